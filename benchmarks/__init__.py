@@ -0,0 +1,4 @@
+"""
+Benchmarks de rendimiento de AlmacénPro
+Scripts ejecutables con ``python -m benchmarks.<nombre>``
+"""
@@ -0,0 +1,110 @@
+"""
+Benchmark de puntuación de clientes (churn, segmento, CLV, próxima compra)
+Compara la puntuación cliente por cliente, que vuelve a consultar las ventas en
+cada indicador, con la puntuación en lote de PredictiveAnalysisManager.
+La versión por cliente se mide sobre una muestra y se extrapola a toda la base.
+
+Uso:
+    python -m benchmarks.bench_customer_scoring [--customers 10000 100000] [--sales 10] [--sample 500]
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import prepare_database, cleanup_database, print_table
+from managers.customer_feature_manager import CustomerFeatureManager
+from managers.predictive_analysis_manager import PredictiveAnalysisManager
+
+def seed_customers(db, customers: int, sales_per_customer: int) -> list:
+    """Insertar clientes con ventas repartidas en los últimos dos años"""
+    rng = random.Random(42)
+    db.execute_many("INSERT INTO clientes (nombre, apellido, activo) VALUES (?, ?, 1)",
+                    [(f"Cliente {i}", "Bench") for i in range(customers)])
+    ids = [row['id'] for row in db.execute_query("SELECT id FROM clientes WHERE apellido = 'Bench' ORDER BY id")]
+
+    now = datetime.now()
+    rows = []
+    for customer_id in ids:
+        count = max(1, int(rng.expovariate(1 / sales_per_customer)))
+        for _ in range(count):
+            moment = now - timedelta(days=rng.uniform(0, 730))
+            total = round(rng.uniform(500, 30000), 2)
+            rows.append((f"SC-{len(rows)}", customer_id, total, total, moment.isoformat(sep=' ', timespec='seconds')))
+        if len(rows) >= 50000:
+            insert_sales(db, rows)
+            rows = []
+    insert_sales(db, rows)
+    CustomerFeatureManager(db).rebuild()
+    db.execute_update("ANALYZE")
+    return ids
+
+def insert_sales(db, rows):
+    # La base de ejemplo exige vendedor_id; el esquema actual usa usuario_id
+    db.execute_many("""
+        INSERT INTO ventas (numero_factura, cliente_id, usuario_id, vendedor_id, subtotal, total, estado, fecha_venta)
+        VALUES (?, ?, 1, 1, ?, ?, 'COMPLETADA', ?)
+    """, rows)
+
+def score_one_by_one(manager, customer_ids):
+    """Flujo anterior: cada indicador consulta de nuevo las ventas del cliente"""
+    for customer_id in customer_ids:
+        manager._predict_churn(customer_id)
+        manager._classify_customer_segment(customer_id)
+        manager._calculate_clv_prediction(customer_id)
+        manager._predict_next_purchase(customer_id)
+        manager._calculate_overall_confidence(customer_id)
+
+def count_queries(db, function):
+    """Ejecutar ``function`` y retornar (segundos, consultas ejecutadas)"""
+    db.query_stats.slow_log_path = None
+    db.query_stats.reset()
+    db.query_stats.enable()
+    start = time.perf_counter()
+    try:
+        function()
+        elapsed = time.perf_counter() - start
+    finally:
+        db.query_stats.disable()
+    return elapsed, sum(item['calls'] for item in db.query_stats.get_report(limit=0))
+
+def run(customer_counts=(10000, 100000), sales_per_customer: int = 10, sample: int = 500):
+    results = []
+    for customers in customer_counts:
+        db, temp_dir = prepare_database()
+        try:
+            ids = seed_customers(db, customers, sales_per_customer)
+            manager = PredictiveAnalysisManager(db)
+            sampled = random.Random(1).sample(ids, min(sample, len(ids)))
+
+            elapsed, queries = count_queries(db, lambda: score_one_by_one(manager, sampled))
+            factor = len(ids) / len(sampled)
+            results.append({
+                'clientes': customers, 'modo': f"por cliente (muestra {len(sampled)})",
+                'seg': elapsed * factor, 'consultas': int(queries * factor),
+                'clientes_seg': len(sampled) / elapsed if elapsed else 0.0
+            })
+
+            scores = {}
+            elapsed, queries = count_queries(db, lambda: scores.update(manager.score_customers()))
+            results.append({
+                'clientes': customers, 'modo': 'en lote', 'seg': elapsed, 'consultas': queries,
+                'clientes_seg': len(scores) / elapsed if elapsed else 0.0
+            })
+        finally:
+            cleanup_database(db, temp_dir)
+
+    print_table(f"Puntuación de clientes (~{sales_per_customer} ventas por cliente; por cliente extrapolado)", results)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de puntuación de clientes")
+    parser.add_argument('--customers', type=int, nargs='+', default=[10000, 100000], help="Cantidades de clientes")
+    parser.add_argument('--sales', type=int, default=10, help="Ventas promedio por cliente")
+    parser.add_argument('--sample', type=int, default=500, help="Clientes medidos en el modo por cliente")
+    args = parser.parse_args()
+    run(args.customers, args.sales, args.sample)
+
+if __name__ == '__main__':
+    main()
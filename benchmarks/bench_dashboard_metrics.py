@@ -0,0 +1,108 @@
+"""
+Benchmark de métricas del dashboard
+Compara la carga anterior del panel principal (ventas del día y del mes
+traídas dos veces y sumadas en Python, productos y clientes completos para
+contarlos) con DashboardMetricsService sobre ventas y sobre los resúmenes diarios
+
+Uso:
+    python -m benchmarks.bench_dashboard_metrics [--years 3] [--per-day 915] [--products 5000]
+                                                 [--customers 20000] [--runs 5]
+"""
+
+import argparse
+import time
+from datetime import date
+
+from benchmarks.bench_report_dates import seed_sales
+from benchmarks.common import prepare_database, cleanup_database, seed_products, summarize, print_table
+from managers.customer_manager import CustomerManager
+from managers.dashboard_metrics import DashboardMetricsService
+from managers.product_manager import ProductManager
+from managers.sales_manager import SalesManager
+from managers.sales_rollup_manager import SalesRollupManager
+
+# Último día con ventas generadas por seed_sales
+TODAY = date(2024, 12, 30)
+
+def seed_customers(db, count: int):
+    """Insertar clientes sintéticos (uno de cada diez inactivo)"""
+    db.execute_many("""
+        INSERT INTO clientes (nombre, apellido, activo) VALUES (?, ?, ?)
+    """, [(f"Cliente {i}", f"Bench {i}", int(i % 10 != 0)) for i in range(count)])
+
+def legacy_metrics(sales: SalesManager, products: ProductManager, customers: CustomerManager) -> dict:
+    """Carga anterior de DashboardWidget (listas completas sumadas en Python)"""
+    metrics = {}
+    month_start = TODAY.replace(day=1)
+
+    today_sales = sales.get_sales_by_date(TODAY)
+    metrics['ventas_hoy'] = sum(float(sale.get('total', 0)) for sale in today_sales or [])
+    monthly_sales = sales.get_sales_by_date_range(month_start, TODAY)
+    monthly_total = sum(float(sale.get('total', 0)) for sale in monthly_sales or [])
+    metrics['meta_mes'] = monthly_total / (monthly_total * 1.2) * 100 if monthly_total else 0
+
+    all_products = products.search_products('') or []
+    metrics['total_productos'] = len(all_products)
+    metrics['stock_bajo'] = len([p for p in all_products
+                                 if float(p.get('stock_actual', 0)) <= float(p.get('stock_minimo', 0))])
+
+    metrics['clientes_activos'] = len(customers.get_all_customers() or [])
+    monthly_sales = sales.get_sales_by_date_range(month_start, TODAY)
+    metrics['utilidad_mes'] = sum(float(sale.get('total', 0)) * 0.3 for sale in monthly_sales or [])
+    return metrics
+
+def measure(function, runs: int):
+    samples, result = [], None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = function()
+        samples.append(time.perf_counter() - start)
+    return samples, result
+
+def run(years: int = 3, per_day: int = 915, products: int = 5000, customers: int = 20000, runs: int = 5):
+    db, temp_dir = prepare_database()
+    try:
+        total_sales = seed_sales(db, years, per_day)
+        seed_products(db, products, stock=10)
+        db.execute_update("UPDATE productos SET stock_minimo = 20 WHERE id % 4 = 0")
+        seed_customers(db, customers)
+        SalesRollupManager(db).rebuild()
+        db.execute_update("ANALYZE")
+
+        product_manager = ProductManager(db)
+        sales_manager = SalesManager(db, product_manager)
+        customer_manager = CustomerManager(db)
+        approaches = {
+            'anterior': lambda: legacy_metrics(sales_manager, product_manager, customer_manager),
+            'agregados': lambda: DashboardMetricsService(db, use_rollups=False).get_metrics(today=TODAY),
+            'resumen': lambda: DashboardMetricsService(db).get_metrics(today=TODAY)
+        }
+
+        results, values = [], []
+        for name, function in approaches.items():
+            samples, metrics = measure(function, runs)
+            results.append({'carga': name, **summarize(samples)})
+            values.append({'carga': name, **{key: round(value, 2) for key, value in sorted(metrics.items())
+                                            if key != 'ventas_mes'}})
+
+        print_table(f"Carga del dashboard ({total_sales} ventas, {products} productos, {customers} clientes)",
+                    results)
+        print_table("Valores obtenidos (la carga anterior suma ventas canceladas y cuenta solo 50 productos)",
+                    values)
+        return results
+
+    finally:
+        cleanup_database(db, temp_dir)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de métricas del dashboard")
+    parser.add_argument('--years', type=int, default=3, help="Años de ventas sintéticas")
+    parser.add_argument('--per-day', type=int, default=915, help="Ventas por día (3 años x 915 = 1M)")
+    parser.add_argument('--products', type=int, default=5000, help="Productos sintéticos")
+    parser.add_argument('--customers', type=int, default=20000, help="Clientes sintéticos")
+    parser.add_argument('--runs', type=int, default=5, help="Repeticiones por carga")
+    args = parser.parse_args()
+    run(args.years, args.per_day, args.products, args.customers, args.runs)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark de exportadores CSV/Excel/PDF
+Mide filas por segundo y memoria máxima (RSS) exportando una lista ya cargada
+contra un generador de filas. Cada caso corre en un proceso aparte para que
+el pico de memoria de uno no se mezcle con el siguiente.
+
+Uso:
+    python -m benchmarks.bench_exporters [--rows 10000 100000 1000000] [--formats csv excel pdf]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import PROJECT_ROOT, print_table
+
+EXTENSIONS = {'csv': '.csv', 'excel': '.xlsx', 'pdf': '.pdf'}
+
+def movement_rows(count: int):
+    """Filas con la forma de un reporte de movimientos de stock"""
+    start = datetime(2024, 1, 1)
+    for i in range(count):
+        yield {
+            'id': i,
+            'fecha_movimiento': start + timedelta(minutes=i),
+            'producto_nombre': f"Producto {i % 5000}",
+            'codigo_barras': f"779{i % 5000:010d}",
+            'tipo_movimiento': 'SALIDA' if i % 3 else 'ENTRADA',
+            'cantidad_movimiento': (i % 12) + 1,
+            'precio_unitario': 100.0 + i % 50,
+            'usuario_nombre': 'Cajero'
+        }
+
+def peak_rss_mb() -> float:
+    """Memoria residente máxima del proceso actual en MB"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux informa KB y macOS bytes
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+
+def run_case(format_type: str, rows: int, mode: str) -> dict:
+    """Exportar en este proceso y retornar tiempos y memoria"""
+    from utils.exporters import FileExporter
+
+    exporter = FileExporter()
+    baseline = peak_rss_mb()
+    with tempfile.TemporaryDirectory(prefix='almacen_export_') as temp_dir:
+        path = os.path.join(temp_dir, 'export' + EXTENSIONS[format_type])
+        start = time.perf_counter()
+        data = list(movement_rows(rows)) if mode == 'lista' else movement_rows(rows)
+        success = exporter.export(data, path, format_type, "Movimientos de stock")
+        elapsed = time.perf_counter() - start
+        size_mb = os.path.getsize(path) / (1024 * 1024) if success else 0.0
+
+    return {
+        'formato': format_type,
+        'filas': rows,
+        'modo': mode,
+        'ok': success,
+        'seg': elapsed,
+        'filas_seg': rows / elapsed if elapsed else 0.0,
+        'rss_pico_mb': peak_rss_mb(),
+        'rss_extra_mb': peak_rss_mb() - baseline,
+        'archivo_mb': size_mb
+    }
+
+def run(rows=(10000, 100000, 1000000), formats=('csv', 'excel', 'pdf'),
+        modes=('lista', 'stream'), pdf_max_rows: int = 100000):
+    results = []
+    for format_type in formats:
+        for count in rows:
+            if format_type == 'pdf' and count > pdf_max_rows:
+                continue
+            for mode in modes:
+                output = subprocess.run(
+                    [sys.executable, '-m', 'benchmarks.bench_exporters', '--case', format_type, str(count), mode],
+                    cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+                ).stdout
+                results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print_table("Exportación de filas (proceso aislado por caso)", results)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de exportadores CSV/Excel/PDF")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 1000000], help="Cantidades de filas")
+    parser.add_argument('--formats', nargs='+', default=['csv', 'excel', 'pdf'], choices=list(EXTENSIONS))
+    parser.add_argument('--pdf-max-rows', type=int, default=100000, help="Límite de filas para PDF")
+    parser.add_argument('--case', nargs=3, metavar=('FORMATO', 'FILAS', 'MODO'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        format_type, count, mode = args.case
+        print(json.dumps(run_case(format_type, int(count), mode)))
+        return
+
+    run(args.rows, args.formats, pdf_max_rows=args.pdf_max_rows)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""
+Benchmark de utilidades de análisis (utils/ml_utils)
+Compara la versión en Python puro con la vectorizada en NumPy sobre series de
+10 mil a 1 millón de elementos y verifica que den el mismo resultado. Con
+--kmeans mide la segmentación K-means completa contra mini-lotes.
+
+Uso:
+    python -m benchmarks.bench_ml_utils [--sizes 10000 100000 1000000] [--runs 3]
+    python -m benchmarks.bench_ml_utils --kmeans [--sizes 10000 100000 1000000] [--k 5]
+"""
+
+import argparse
+import math
+import random
+import time
+
+from benchmarks.common import summarize, print_table
+from utils import ml_utils
+from utils.ml_utils import (DataPreprocessor, FeatureEngineer, KMeans, ModelEvaluator,
+                            calculate_confidence_interval, detect_anomalies, smooth_time_series)
+
+def series(size: int):
+    """Serie de importes con tendencia, ruido y algunos picos"""
+    rng = random.Random(42)
+    values = [1000 + i * 0.01 + rng.gauss(0, 150) for i in range(size)]
+    for index in rng.sample(range(size), max(1, size // 200)):
+        values[index] *= 8
+    return values
+
+def cases(values, actuals):
+    """Funciones a medir: nombre -> llamada sin argumentos"""
+    binary = [1.0 if value > 1000 else 0.0 for value in actuals]
+    return {
+        'normalize_min_max': lambda: DataPreprocessor.normalize_values(values, 'min_max'),
+        'normalize_z_score': lambda: DataPreprocessor.normalize_values(values, 'z_score'),
+        'outliers_iqr': lambda: DataPreprocessor.handle_outliers(values, 'iqr'),
+        'outliers_z_score': lambda: DataPreprocessor.handle_outliers(values, 'z_score', 3.0),
+        'trend_slope': lambda: FeatureEngineer._calculate_trend_slope(values),
+        'anomalies': lambda: detect_anomalies(values, 3.0),
+        'smooth_7': lambda: smooth_time_series(values, 7),
+        'confidence_interval': lambda: calculate_confidence_interval(values),
+        'metrics_regression': lambda: ModelEvaluator.calculate_model_metrics(values, actuals, 'regression'),
+        'metrics_classification': lambda: ModelEvaluator.calculate_model_metrics(
+            [value / 2000 for value in values], binary, 'classification')
+    }
+
+def same_result(first, second) -> bool:
+    """Comparar resultados con tolerancia de redondeo"""
+    if isinstance(first, dict):
+        return first.keys() == second.keys() and all(same_result(first[k], second[k]) for k in first)
+    if isinstance(first, (list, tuple)):
+        return len(first) == len(second) and all(same_result(a, b) for a, b in zip(first, second))
+    if isinstance(first, float) or isinstance(second, float):
+        return math.isclose(first, second, rel_tol=1e-9, abs_tol=1e-6)
+    return first == second
+
+def measure(function, runs: int):
+    samples = []
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = function()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples), result
+
+def run(sizes=(10000, 100000, 1000000), runs: int = 3):
+    if not ml_utils.NUMPY_AVAILABLE:
+        print("NumPy no está instalado: solo se mide la versión en Python puro")
+
+    results = []
+    for size in sizes:
+        values = series(size)
+        actuals = [value * 0.9 + 50 for value in values]
+        for name, function in cases(values, actuals).items():
+            ml_utils.NUMPY_AVAILABLE = False
+            try:
+                pure, expected = measure(function, runs)
+            finally:
+                ml_utils.NUMPY_AVAILABLE = ml_utils.np is not None
+
+            row = {'funcion': name, 'elementos': size, 'python_ms': pure['p50_ms']}
+            if ml_utils.NUMPY_AVAILABLE:
+                vectorized, result = measure(function, runs)
+                row.update({
+                    'numpy_ms': vectorized['p50_ms'],
+                    'aceleracion': pure['p50_ms'] / vectorized['p50_ms'] if vectorized['p50_ms'] else 0.0,
+                    'igual': same_result(expected, result)
+                })
+            results.append(row)
+
+    print_table("Utilidades de análisis: Python puro vs NumPy (mediana)", results)
+    return results
+
+def customer_vectors(size: int, k: int):
+    """Clientes sintéticos (recency, frecuencia, gasto) alrededor de ``k`` perfiles"""
+    rng = random.Random(42)
+    profiles = [(rng.uniform(0, 365), rng.uniform(1, 60), rng.uniform(500, 200000)) for _ in range(k)]
+    vectors = []
+    for i in range(size):
+        recency, frequency, spent = profiles[i % k]
+        vectors.append([recency * rng.uniform(0.7, 1.3), frequency * rng.uniform(0.7, 1.3),
+                        spent * rng.uniform(0.7, 1.3)])
+    return vectors
+
+def run_kmeans(sizes=(10000, 100000, 1000000), k: int = 5):
+    results = []
+    for size in sizes:
+        vectors = customer_vectors(size, k)
+        if ml_utils.NUMPY_AVAILABLE:
+            vectors = ml_utils.np.asarray(vectors)
+        for mini_batch in (False, True):
+            start = time.perf_counter()
+            model = KMeans(k=k, mini_batch=mini_batch).fit(vectors)
+            elapsed = time.perf_counter() - start
+            results.append({
+                'clientes': size,
+                'modo': 'mini-lotes' if mini_batch else 'completo',
+                'seg': elapsed,
+                'iteraciones': model.iterations,
+                'convergio': model.converged,
+                'inercia': model.inertia,
+                'silueta': model.silhouette(vectors)
+            })
+
+    print_table(f"K-means k={k} ({'NumPy' if ml_utils.NUMPY_AVAILABLE else 'Python puro'})", results)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de utils/ml_utils")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000],
+                        help="Tamaños de las series")
+    parser.add_argument('--runs', type=int, default=3, help="Repeticiones por medición")
+    parser.add_argument('--kmeans', action='store_true', help="Medir la segmentación K-means")
+    parser.add_argument('--k', type=int, default=5, help="Grupos para --kmeans")
+    args = parser.parse_args()
+    if args.kmeans:
+        run_kmeans(args.sizes, args.k)
+    else:
+        run(args.sizes, args.runs)
+
+if __name__ == '__main__':
+    main()
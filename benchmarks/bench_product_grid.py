@@ -0,0 +1,100 @@
+"""
+Benchmark de la grilla de productos
+Compara el llenado anterior (QTableWidget con un item por celda y un QWidget
+con dos botones por fila) con el modelo de carga diferida: primera página,
+orden y filtro resueltos en SQL y recorrido completo hasta la última fila.
+
+Uso:
+    python -m benchmarks.bench_product_grid [--products 50000] [--page-size 200]
+"""
+
+import argparse
+import os
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import (QApplication, QHBoxLayout, QPushButton, QTableView, QTableWidget,
+                             QTableWidgetItem, QWidget)
+
+from benchmarks.common import prepare_database, cleanup_database, seed_products, print_table
+from managers.product_manager import ProductManager
+from ui.widgets.table_models import ActionButtonsDelegate, ProductTableModel
+
+COLUMNS = ['codigo', 'nombre', 'categoria', 'precio_venta', 'stock_actual', 'acciones']
+
+def legacy_fill(manager: ProductManager, products: int) -> QTableWidget:
+    """Llenado anterior de MainWindow.load_products_data con todos los productos"""
+    table = QTableWidget(0, 6)
+    rows = manager.get_all_products(page_size=products)
+    table.setRowCount(len(rows))
+    for row, product in enumerate(rows):
+        table.setItem(row, 0, QTableWidgetItem(str(product.get('codigo_interno') or '')))
+        table.setItem(row, 1, QTableWidgetItem(product.get('nombre', '')))
+        table.setItem(row, 2, QTableWidgetItem(product.get('categoria_nombre') or ''))
+        table.setItem(row, 3, QTableWidgetItem(f"${float(product.get('precio_venta') or 0):,.2f}"))
+        table.setItem(row, 4, QTableWidgetItem(f"{float(product.get('stock_actual') or 0):,.2f}"))
+
+        actions = QWidget()
+        layout = QHBoxLayout(actions)
+        layout.addWidget(QPushButton("✏️"))
+        layout.addWidget(QPushButton("📦"))
+        table.setCellWidget(row, 5, actions)
+    return table
+
+def scroll_to_end(model: ProductTableModel):
+    """Sin filtros y por nombre, pedir todas las páginas como al desplazarse"""
+    model.filters = {}
+    model.sort(1, Qt.AscendingOrder)
+    model.fetch_all()
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+def run(products: int = 50000, page_size: int = 200):
+    app = QApplication.instance() or QApplication([])
+    db, temp_dir = prepare_database()
+    try:
+        seed_products(db, products, stock=50, prefix='GRID')
+        db.execute_update("UPDATE productos SET stock_minimo = id % 80, precio_venta = 10 + id % 997")
+        manager = ProductManager(db)
+        results = []
+
+        elapsed, table = timed(lambda: legacy_fill(manager, products))
+        results.append({'operación': 'QTableWidget completo', 'seg': elapsed, 'filas': table.rowCount()})
+        table.deleteLater()
+        app.processEvents()
+
+        model = ProductTableModel(manager, COLUMNS, page_size=page_size)
+        view = QTableView()
+        view.setModel(model)
+        view.setItemDelegateForColumn(5, ActionButtonsDelegate(
+            [('edit', "✏️", "Editar producto"), ('stock', "📦", "Ajustar stock")], view))
+
+        for name, action in [
+            ('modelo: primera página', model.reload),
+            ('modelo: ordenar por precio', lambda: model.sort(3, Qt.DescendingOrder)),
+            ('modelo: filtro stock bajo', lambda: model.set_filters(stock_filter='bajo')),
+            ('modelo: búsqueda', lambda: model.set_filters(search_term='grid 4')),
+            ('modelo: desplazar hasta el final', lambda: scroll_to_end(model))
+        ]:
+            elapsed, _ = timed(action)
+            results.append({'operación': name, 'seg': elapsed, 'filas': model.rowCount()})
+
+        print_table(f"Grilla de productos ({products} productos, páginas de {page_size})", results)
+        return results
+    finally:
+        cleanup_database(db, temp_dir)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la grilla de productos")
+    parser.add_argument('--products', type=int, default=50000, help="Cantidad de productos")
+    parser.add_argument('--page-size', type=int, default=200, help="Filas por página del modelo")
+    args = parser.parse_args()
+    run(args.products, args.page_size)
+
+if __name__ == '__main__':
+    main()
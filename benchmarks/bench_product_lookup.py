@@ -0,0 +1,58 @@
+"""
+Benchmark de búsqueda de productos por código de barras
+Compara la consulta SQL directa con la caché de productos del POS
+
+Uso:
+    python -m benchmarks.bench_product_lookup [--products 50000] [--lookups 20000]
+"""
+
+import argparse
+import random
+import time
+
+from benchmarks.common import prepare_database, cleanup_database, seed_products, summarize, print_table
+from managers.product_cache import ProductCache, PRODUCT_SELECT
+
+def run(products: int = 50000, lookups: int = 20000):
+    db, temp_dir = prepare_database()
+    try:
+        seed_products(db, products)
+        barcodes = [f"BENCH{i:010d}" for i in random.sample(range(products), min(lookups, products))]
+        
+        sql_samples = []
+        for barcode in barcodes:
+            start = time.perf_counter()
+            db.execute_single(PRODUCT_SELECT + " WHERE p.codigo_barras = ? AND p.activo = 1", (barcode,))
+            sql_samples.append(time.perf_counter() - start)
+        
+        cache = ProductCache(db)
+        start = time.perf_counter()
+        cache.warm()
+        warm_ms = (time.perf_counter() - start) * 1000
+        
+        cache_samples = []
+        for barcode in barcodes:
+            start = time.perf_counter()
+            cache.get_by_barcode(barcode)
+            cache_samples.append(time.perf_counter() - start)
+        
+        results = [
+            {'metodo': 'sql', **summarize(sql_samples)},
+            {'metodo': 'cache', **summarize(cache_samples)}
+        ]
+        print_table(f"Búsqueda por código de barras ({products} productos, carga inicial {warm_ms:.0f} ms)",
+                    results)
+        return results
+        
+    finally:
+        cleanup_database(db, temp_dir)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de búsqueda de productos")
+    parser.add_argument('--products', type=int, default=50000, help="Productos en el catálogo")
+    parser.add_argument('--lookups', type=int, default=20000, help="Búsquedas a medir")
+    args = parser.parse_args()
+    run(args.products, args.lookups)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark de búsqueda de productos
+Compara la búsqueda LIKE '%término%' con el índice FTS5 simulando el tipeo
+en el buscador del widget de ventas
+
+Uso:
+    python -m benchmarks.bench_product_search [--products 100000] [--runs 20]
+"""
+
+import argparse
+import random
+import time
+
+from benchmarks.common import prepare_database, cleanup_database, summarize, print_table
+from managers.product_manager import ProductManager
+
+PRODUCT_NAMES = ['Azúcar', 'Yerba Mate', 'Galletitas', 'Fideos', 'Arroz', 'Aceite Girasol',
+                 'Leche Entera', 'Café Molido', 'Gaseosa Cola', 'Jabón Líquido', 'Harina 000',
+                 'Dulce de Leche', 'Queso Cremoso', 'Atún en Aceite', 'Puré de Tomate']
+BRANDS = ['La Serenísima', 'Ledesma', 'Playadito', 'Matarazzo', 'Gallo', 'Natura', 'Cañuelas',
+          'Arcor', 'Bagley', 'Marolio', 'Molto', 'Knorr', 'Ala', 'Sancor', 'Terrabusi']
+SIZES = ['250g', '500g', '1kg', '1L', '1.5L', '2.25L', '3u', '6u']
+
+# Consultas tal como llegan desde textChanged mientras se escribe
+TYPED_QUERIES = ['y', 'ye', 'yer', 'yerb', 'yerba', 'yerba p', 'yerba pla',
+                 'azucar', 'dulce de le', 'cañuelas', 'arcor 500']
+
+def seed_catalog(db, count: int):
+    """Insertar un catálogo sintético con nombres realistas"""
+    rng = random.Random(42)
+    db.execute_many("""
+        INSERT INTO productos (codigo_barras, codigo_interno, nombre, precio_compra,
+                               precio_venta, stock_actual, categoria_id, activo)
+        VALUES (?, ?, ?, 50, 100, 100, 1, 1)
+    """, [(
+        f"779{i:010d}", f"SRCH-{i}",
+        f"{rng.choice(PRODUCT_NAMES)} {rng.choice(BRANDS)} {rng.choice(SIZES)} #{i}"
+    ) for i in range(count)])
+
+def measure(search, queries, runs: int):
+    """Medir una función de búsqueda sobre todas las consultas"""
+    samples = []
+    for _ in range(runs):
+        for term in queries:
+            start = time.perf_counter()
+            search(term)
+            samples.append(time.perf_counter() - start)
+    return samples
+
+def run(products: int = 100000, runs: int = 20, limit: int = 50):
+    db, temp_dir = prepare_database()
+    try:
+        seed_catalog(db, products)
+        manager = ProductManager(db)
+        barcode = f"779{products // 2:010d}"
+        
+        like = lambda term: manager._search_products_like(term, limit)
+        fts = lambda term: manager._search_products_fts(
+            term, manager._build_match_expression(term), limit)
+        
+        results = []
+        for name, queries in (('tipeo', TYPED_QUERIES), ('codigo_barras', [barcode])):
+            for method, search in (('like', like), ('fts5', fts)):
+                results.append({'consulta': name, 'metodo': method,
+                                **summarize(measure(search, queries, runs))})
+        
+        print_table(f"Búsqueda de productos ({products} productos, límite {limit})", results)
+        return results
+        
+    finally:
+        cleanup_database(db, temp_dir)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de búsqueda de productos")
+    parser.add_argument('--products', type=int, default=100000, help="Productos en el catálogo")
+    parser.add_argument('--runs', type=int, default=20, help="Repeticiones por consulta")
+    args = parser.parse_args()
+    run(args.products, args.runs)
+
+if __name__ == '__main__':
+    main()
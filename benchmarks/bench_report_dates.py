@@ -0,0 +1,94 @@
+"""
+Benchmark de filtros por fecha en reportes
+Compara DATE(fecha_venta) BETWEEN ? AND ? con el rango semiabierto
+fecha_venta >= ? AND fecha_venta < ? sobre varios años de ventas sintéticas
+
+Uso:
+    python -m benchmarks.bench_report_dates [--years 5] [--per-day 200] [--runs 20]
+"""
+
+import argparse
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from benchmarks.common import prepare_database, cleanup_database, summarize, print_table
+from database.date_ranges import date_range
+
+# Períodos típicos de los reportes: un día, un mes y un año
+PERIODS = {
+    'dia': (date(2023, 6, 15), date(2023, 6, 15)),
+    'mes': (date(2023, 6, 1), date(2023, 6, 30)),
+    'anio': (date(2023, 1, 1), date(2023, 12, 31))
+}
+
+def seed_sales(db, years: int, per_day: int):
+    """Insertar ventas repartidas a lo largo del día durante ``years`` años"""
+    rng = random.Random(42)
+    first_day = date(2024, 12, 31) - timedelta(days=365 * years)
+    rows = []
+    for offset in range(365 * years):
+        day = datetime.combine(first_day + timedelta(days=offset), datetime.min.time())
+        for _ in range(per_day):
+            moment = day + timedelta(seconds=rng.randrange(86400))
+            total = round(rng.uniform(500, 50000), 2)
+            estado = 'CANCELADA' if rng.random() < 0.03 else 'COMPLETADA'
+            rows.append((f"BENCH-{len(rows)}", 1, 1, total, total, estado, moment.isoformat(sep=' ')))
+
+    # La base de ejemplo exige vendedor_id; el esquema actual usa usuario_id
+    db.execute_many("""
+        INSERT INTO ventas (numero_factura, usuario_id, vendedor_id, subtotal, total, estado, fecha_venta)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+    db.execute_update("ANALYZE")
+    return len(rows)
+
+def build_queries(start: date, end: date):
+    """Misma consulta de totales con el filtro anterior y con el rango"""
+    range_sql, range_params = date_range('fecha_venta', start, end)
+    select = "SELECT COUNT(*), COALESCE(SUM(total), 0) FROM ventas WHERE estado = 'COMPLETADA' AND "
+    return {
+        'date()': (select + "DATE(fecha_venta) BETWEEN ? AND ?", [start.isoformat(), end.isoformat()]),
+        'rango': (select + range_sql, range_params)
+    }
+
+def measure(db, query: str, params, runs: int):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        db.execute_single(query, params)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def run(years: int = 5, per_day: int = 200, runs: int = 20):
+    db, temp_dir = prepare_database()
+    try:
+        total_sales = seed_sales(db, years, per_day)
+
+        results, plans = [], {}
+        for period, (start, end) in PERIODS.items():
+            for method, (query, params) in build_queries(start, end).items():
+                results.append({'periodo': period, 'filtro': method,
+                                **summarize(measure(db, query, params, runs))})
+                plan = db.execute_query(f"EXPLAIN QUERY PLAN {query}", params)
+                plans[method] = ' | '.join(row['detail'] for row in plan)
+
+        print_table(f"Totales de ventas por período ({total_sales} ventas, {years} años)", results)
+        print("\nPlanes de ejecución")
+        for method, plan in plans.items():
+            print(f"  {method:<8}{plan}")
+        return results
+
+    finally:
+        cleanup_database(db, temp_dir)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de filtros por fecha en reportes")
+    parser.add_argument('--years', type=int, default=5, help="Años de ventas sintéticas")
+    parser.add_argument('--per-day', type=int, default=200, help="Ventas por día")
+    parser.add_argument('--runs', type=int, default=20, help="Repeticiones por consulta")
+    args = parser.parse_args()
+    run(args.years, args.per_day, args.runs)
+
+if __name__ == '__main__':
+    main()
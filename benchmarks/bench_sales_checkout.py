@@ -0,0 +1,56 @@
+"""
+Benchmark de checkout de ventas
+Mide la latencia de SalesManager.create_sale para tickets de 1, 10 y 100 ítems
+
+Uso:
+    python -m benchmarks.bench_sales_checkout [--runs 50]
+"""
+
+import argparse
+import time
+
+from benchmarks.common import prepare_database, cleanup_database, seed_products, summarize, print_table
+from managers.sales_manager import SalesManager
+
+TICKET_SIZES = (1, 10, 100)
+
+def run(runs: int = 50):
+    db, temp_dir = prepare_database()
+    try:
+        sales_manager = SalesManager(db, None)
+        product_ids = seed_products(db, max(TICKET_SIZES))
+        user_id = 1
+        
+        results = []
+        for size in TICKET_SIZES:
+            items = [{
+                'producto_id': product_id,
+                'cantidad': 1,
+                'precio_unitario': 100.0
+            } for product_id in product_ids[:size]]
+            payments = [{'metodo_pago': 'EFECTIVO', 'importe': 100.0 * size}]
+            
+            samples = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                success, message, _ = sales_manager.create_sale({}, items, payments, user_id)
+                samples.append(time.perf_counter() - start)
+                if not success:
+                    raise RuntimeError(message)
+            
+            results.append({'items': size, **summarize(samples)})
+        
+        print_table("Latencia de create_sale por tamaño de ticket", results)
+        return results
+        
+    finally:
+        cleanup_database(db, temp_dir)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de checkout de ventas")
+    parser.add_argument('--runs', type=int, default=50, help="Ventas por tamaño de ticket")
+    args = parser.parse_args()
+    run(args.runs)
+
+if __name__ == '__main__':
+    main()
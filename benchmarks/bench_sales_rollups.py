@@ -0,0 +1,87 @@
+"""
+Benchmark de resúmenes diarios de ventas
+Compara los totales de un mes y de un año calculados sobre ventas/pagos_venta
+con los mismos totales leídos de ventas_resumen_diario
+
+Uso:
+    python -m benchmarks.bench_sales_rollups [--years 3] [--per-day 300] [--runs 10]
+"""
+
+import argparse
+import time
+from datetime import date
+
+from benchmarks.bench_report_dates import seed_sales
+from benchmarks.common import prepare_database, cleanup_database, summarize, print_table
+from database.date_ranges import date_range
+from managers.sales_rollup_manager import SalesRollupManager
+
+PERIODS = {
+    'mes': (date(2024, 6, 1), date(2024, 6, 30)),
+    'anio': (date(2024, 1, 1), date(2024, 12, 31))
+}
+
+def raw_totals(db, start: date, end: date):
+    """Totales y pagos por método calculados sobre las tablas de ventas"""
+    fecha_sql, params = date_range('v.fecha_venta', start, end)
+    db.execute_single(f"""
+        SELECT COUNT(*), SUM(v.total) FROM ventas v
+        WHERE v.estado = 'COMPLETADA' AND {fecha_sql}
+    """, params)
+    db.execute_query(f"""
+        SELECT pv.metodo_pago, SUM(pv.importe), COUNT(*)
+        FROM pagos_venta pv INNER JOIN ventas v ON pv.venta_id = v.id
+        WHERE v.estado = 'COMPLETADA' AND {fecha_sql}
+        GROUP BY pv.metodo_pago
+    """, params)
+
+def rollup_totals(rollups: SalesRollupManager, start: date, end: date):
+    rollups.get_sales_totals(start, end)
+    rollups.get_payment_totals(start, end)
+
+def measure(function, runs: int):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def run(years: int = 3, per_day: int = 300, runs: int = 10):
+    db, temp_dir = prepare_database()
+    try:
+        total_sales = seed_sales(db, years, per_day)
+        db.execute_update("""
+            INSERT INTO pagos_venta (venta_id, metodo_pago, importe)
+            SELECT id, CASE id % 3 WHEN 0 THEN 'EFECTIVO' WHEN 1 THEN 'TARJETA_DEBITO' ELSE 'TRANSFERENCIA' END, total
+            FROM ventas WHERE numero_factura LIKE 'BENCH-%'
+        """)
+
+        rollups = SalesRollupManager(db)
+        start = time.perf_counter()
+        rollups.rebuild()
+        rebuild_ms = (time.perf_counter() - start) * 1000
+
+        results = []
+        for period, (first, last) in PERIODS.items():
+            results.append({'periodo': period, 'origen': 'ventas',
+                            **summarize(measure(lambda: raw_totals(db, first, last), runs))})
+            results.append({'periodo': period, 'origen': 'resumen',
+                            **summarize(measure(lambda: rollup_totals(rollups, first, last), runs))})
+
+        print_table(f"Totales por período ({total_sales} ventas, reconstrucción {rebuild_ms:.0f} ms)", results)
+        return results
+
+    finally:
+        cleanup_database(db, temp_dir)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de resúmenes diarios de ventas")
+    parser.add_argument('--years', type=int, default=3, help="Años de ventas sintéticas")
+    parser.add_argument('--per-day', type=int, default=300, help="Ventas por día")
+    parser.add_argument('--runs', type=int, default=10, help="Repeticiones por consulta")
+    args = parser.parse_args()
+    run(args.years, args.per_day, args.runs)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Utilidades compartidas por los benchmarks
+Preparación de bases temporales, carga de datos sintéticos y reporte de tiempos
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import statistics
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from database.manager import DatabaseManager
+
+SAMPLE_DATABASE = PROJECT_ROOT / 'data' / 'almacen_pro.db'
+
+def prepare_database(source: str = None) -> Tuple[DatabaseManager, str]:
+    """Copiar la base de ejemplo a un directorio temporal y abrirla
+    
+    Returns:
+        Tupla (db_manager, directorio_temporal)
+    """
+    temp_dir = tempfile.mkdtemp(prefix='almacen_bench_')
+    db_path = os.path.join(temp_dir, 'bench.db')
+    shutil.copy(source or SAMPLE_DATABASE, db_path)
+    
+    db = DatabaseManager(db_path)
+    
+    # La base de ejemplo tiene un trigger que referencia esta columna sin tenerla
+    columns = {row['name'] for row in db.execute_query("PRAGMA table_info(productos)")}
+    if 'permite_venta_sin_stock' not in columns:
+        db.execute_update("ALTER TABLE productos ADD COLUMN permite_venta_sin_stock BOOLEAN DEFAULT 0")
+    
+    return db, temp_dir
+
+def cleanup_database(db: DatabaseManager, temp_dir: str):
+    """Cerrar y eliminar la base temporal"""
+    db.close_connection()
+    shutil.rmtree(temp_dir, ignore_errors=True)
+
+def seed_products(db: DatabaseManager, count: int, stock: int = 1_000_000,
+                  prefix: str = 'BENCH') -> List[int]:
+    """Insertar productos sintéticos y retornar sus IDs"""
+    db.execute_many("""
+        INSERT INTO productos (codigo_barras, codigo_interno, nombre, precio_compra,
+                               precio_venta, stock_actual, categoria_id, activo)
+        VALUES (?, ?, ?, ?, ?, ?, 1, 1)
+    """, [(
+        f"{prefix}{i:010d}", f"{prefix}-{i}", f"Producto {prefix.lower()} {i}",
+        50.0, 100.0, stock
+    ) for i in range(count)])
+    
+    rows = db.execute_query(
+        "SELECT id FROM productos WHERE codigo_interno LIKE ? ORDER BY id", (f"{prefix}-%",)
+    )
+    return [row['id'] for row in rows]
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Resumir una lista de tiempos en segundos como milisegundos"""
+    ordered = sorted(samples)
+    p95_index = min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))
+    return {
+        'runs': len(ordered),
+        'mean_ms': statistics.mean(ordered) * 1000,
+        'p50_ms': statistics.median(ordered) * 1000,
+        'p95_ms': ordered[p95_index] * 1000,
+        'max_ms': ordered[-1] * 1000
+    }
+
+def print_table(title: str, rows: List[Dict]):
+    """Imprimir resultados en forma de tabla"""
+    print(f"\n{title}")
+    if not rows:
+        return
+    headers = list(rows[0].keys())
+    widths = {h: max(len(h), *(len(_format(row[h])) for row in rows)) for h in headers}
+    print("  ".join(h.ljust(widths[h]) for h in headers))
+    print("  ".join('-' * widths[h] for h in headers))
+    for row in rows:
+        print("  ".join(_format(row[h]).ljust(widths[h]) for h in headers))
+
+def _format(value) -> str:
+    if isinstance(value, float):
+        return f"{value:.3f}"
+    return str(value)
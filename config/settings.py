@@ -22,7 +22,19 @@ class Settings:
             'path': 'data/almacen_pro.db',  # Unificado en carpeta data
             'backup_on_startup': True,
             'optimize_on_startup': True,
-            'enable_foreign_keys': True
+            'enable_foreign_keys': True,
+            'pool_size': 5,          # conexiones de lectura
+            'pool_timeout': 30.0,    # segundos de espera por conexión
+            'maintenance_interval': 3600,         # segundos entre revisiones de VACUUM/ANALYZE
+            'analyze_change_threshold': 10000,    # filas modificadas antes de ANALYZE
+            'vacuum_freelist_ratio': 0.25,        # proporción de páginas libres para VACUUM
+            'vacuum_min_free_pages': 2560,        # mínimo de páginas libres para VACUUM (~10MB)
+            'query_stats': False,                 # instrumentación de consultas SQL
+            'slow_query_ms': 100,                 # umbral del log de consultas lentas
+            'cached_statements': 512,             # sentencias preparadas por conexión
+            'stream_batch_size': 500,             # filas por lote en iter_query
+            'analytics_snapshot_path': 'data/analytics',  # copia columnar para análisis
+            'analytics_snapshot_interval': 3600   # segundos entre actualizaciones de la copia
         },
         
         # Interfaz de usuario
@@ -34,7 +46,9 @@ class Settings:
             'show_splash': True,
             'auto_save_layout': True,
             'grid_lines': True,
-            'row_height': 25
+            'row_height': 25,
+            'loader_threads': 2,     # hilos para cargar datos de los widgets fuera de la interfaz
+            'change_debounce_ms': 1500  # espera para agrupar cambios de datos antes de actualizar paneles
         },
         
         # Ventas
@@ -46,7 +60,8 @@ class Settings:
             'tax_included': True,
             'default_tax_rate': 21.0,
             'round_totals': True,
-            'ticket_copies': 1
+            'ticket_copies': 1,
+            'invoice_block_size': 50  # números reservados por terminal
         },
         
         # Productos
@@ -12,12 +12,8 @@ from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 
 from .base_controller import BaseController
-from .sales_controller import SalesController
-from .customers_controller import CustomersController
-from .inventory_controller import InventoryController
-from .reports_controller import ReportsController
 from .sales_widget_controller import SalesWidgetController
-from .customers_widget_controller import CustomersWidgetController
+from utils.startup_profiler import startup_profiler
 
 logger = logging.getLogger(__name__)
 
@@ -36,8 +32,9 @@ class MainController(QMainWindow):
         self.managers = managers
         self.current_user = current_user
         
-        # Controladores de módulos
+        # Controladores de módulos (los no iniciales se crean al abrirlos)
         self.module_controllers = {}
+        self.module_factories = {}
         self.current_module_controller = None
         
         # Estado de la aplicación
@@ -293,19 +290,15 @@ class MainController(QMainWindow):
         self.main_layout.addWidget(self.module_stack)
     
     def initialize_modules(self):
-        """Inicializar todos los módulos"""
+        """Inicializar el módulo de ventas y registrar el resto para crearlos al abrirlos"""
         try:
-            # Módulo de Ventas
-            self.initialize_sales_module()
+            # Módulo de Ventas: es el inicial, se crea ahora
+            self._build_module('sales', self.initialize_sales_module)
             
-            # Módulo de Clientes
-            self.initialize_customers_module()
-            
-            # Módulo de Inventario
-            self.initialize_inventory_module()
-            
-            # Módulo de Reportes
-            self.initialize_reports_module()
+            # Módulos que se construyen en el primer acceso
+            self.module_factories['customers'] = self.initialize_customers_module
+            self.module_factories['inventory'] = self.initialize_inventory_module
+            self.module_factories['reports'] = self.initialize_reports_module
             
             self.logger.info("Módulos inicializados exitosamente")
             
@@ -314,6 +307,34 @@ class MainController(QMainWindow):
             self.show_critical_error("Error de Inicialización", 
                                    f"Error inicializando módulos: {str(e)}")
     
+    def _build_module(self, module_name: str, factory):
+        """Construir un módulo midiendo su tiempo de creación"""
+        with startup_profiler.measure(f"modulo:{module_name}", "modulos"):
+            factory()
+    
+    def ensure_module(self, module_name: str) -> bool:
+        """Crear el módulo si todavía no fue construido
+        
+        Returns:
+            True si el módulo está disponible
+        """
+        if module_name in self.module_controllers:
+            return True
+        
+        factory = self.module_factories.pop(module_name, None)
+        if factory is None:
+            return False
+        
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            self._build_module(module_name, factory)
+        except Exception as e:
+            self.logger.error(f"Error creando módulo {module_name}: {e}")
+        finally:
+            QApplication.restoreOverrideCursor()
+        
+        return module_name in self.module_controllers
+    
     def initialize_sales_module(self):
         """Inicializar módulo de ventas MVC"""
         try:
@@ -338,6 +359,7 @@ class MainController(QMainWindow):
         """Inicializar módulo de clientes MVC"""
         try:
             # Usar CustomersWidgetController en lugar de CustomersController
+            from .customers_widget_controller import CustomersWidgetController
             customers_widget_controller = CustomersWidgetController(self.managers, self.current_user, self)
             
             # Conectar señales
@@ -358,6 +380,7 @@ class MainController(QMainWindow):
     def initialize_inventory_module(self):
         """Inicializar módulo de inventario"""
         try:
+            from .inventory_controller import InventoryController
             inventory_controller = InventoryController(self.managers, self.current_user, self)
             inventory_controller.initialize()
             
@@ -373,6 +396,7 @@ class MainController(QMainWindow):
     def initialize_reports_module(self):
         """Inicializar módulo de reportes"""
         try:
+            from .reports_controller import ReportsController
             reports_controller = ReportsController(self.managers, self.current_user, self)
             reports_controller.initialize()
             
@@ -412,7 +436,7 @@ class MainController(QMainWindow):
     def switch_to_module(self, module_name: str):
         """Cambiar a un módulo específico"""
         try:
-            if module_name in self.module_controllers:
+            if self.ensure_module(module_name):
                 controller = self.module_controllers[module_name]
                 self.module_stack.setCurrentWidget(controller)
                 self.current_module_controller = controller
@@ -0,0 +1,72 @@
+"""
+Avisos de Cambios de Datos para AlmacénPro
+Los managers publican qué tabla y qué filas modificaron (una venta, un ajuste
+de stock, una recepción de compra, un movimiento de caja) y la interfaz
+actualiza solo los paneles afectados en lugar de consultar todo cada pocos minutos
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Tabla comodín: cambios de origen desconocido (otra terminal sobre la misma base)
+ANY_TABLE = '*'
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    """Cambio confirmado en una tabla"""
+    table: str
+    ids: Tuple[int, ...] = ()
+    source: str = ''
+    timestamp: float = field(default_factory=time.time)
+
+class ChangeBus:
+    """Publicación y suscripción de cambios de datos
+
+    ``subscribe(callback, tables)`` recibe solo los eventos de esas tablas (y
+    los de ``ANY_TABLE``); sin ``tables`` recibe todos. Los callbacks se
+    invocan en el hilo que publicó: la interfaz debe reenviarlos a su hilo
+    (ver ``ui.widgets.change_watcher``). Un callback que falla no afecta a los demás.
+    """
+
+    def __init__(self):
+        self._subscribers: List[Tuple[Callable[[ChangeEvent], None], Optional[frozenset]]] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback: Callable[[ChangeEvent], None], tables: Iterable[str] = None):
+        with self._lock:
+            self._subscribers = [(cb, t) for cb, t in self._subscribers if cb != callback]
+            self._subscribers.append((callback, frozenset(tables) if tables is not None else None))
+
+    def unsubscribe(self, callback: Callable[[ChangeEvent], None]):
+        with self._lock:
+            self._subscribers = [(cb, t) for cb, t in self._subscribers if cb != callback]
+
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, table: str, ids: Iterable[int] = (), source: str = '') -> ChangeEvent:
+        """Avisar a los suscriptores de un cambio ya confirmado"""
+        event = ChangeEvent(table, tuple(ids), source)
+        self.dispatch(event)
+        return event
+
+    def dispatch(self, event: ChangeEvent):
+        for callback, tables in list(self._subscribers):
+            if tables is not None and event.table != ANY_TABLE and event.table not in tables:
+                continue
+            try:
+                callback(event)
+            except Exception as e:
+                logger.warning(f"Error notificando cambio en {event.table}: {e}")
+
+def merge_events(events: Iterable[ChangeEvent]) -> Dict[str, set]:
+    """Agrupar eventos por tabla uniendo sus ids (para aplicar un lote de cambios)"""
+    merged: Dict[str, set] = {}
+    for event in events:
+        merged.setdefault(event.table, set()).update(event.ids)
+    return merged
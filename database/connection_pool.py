@@ -0,0 +1,239 @@
+"""
+Pool de conexiones SQLite para AlmacénPro
+Conexiones de lectura reutilizables por hilo y una única conexión de escritura,
+aprovechando el modo WAL para que los reportes no bloqueen las ventas
+"""
+
+import sqlite3
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+class ConnectionPool:
+    """Pool acotado de conexiones de lectura más una conexión de escritura serializada"""
+
+    def __init__(self, connection_factory: Callable[[bool], sqlite3.Connection],
+                 size: int = 5, timeout: float = 30.0):
+        """
+        Args:
+            connection_factory: Función que recibe ``read_only`` y retorna una conexión nueva
+            size: Cantidad máxima de conexiones de lectura (0 = todo por el escritor)
+            timeout: Segundos máximos de espera para obtener una conexión
+        """
+        self._factory = connection_factory
+        self.size = max(0, int(size))
+        self.timeout = float(timeout)
+
+        # Conexión de escritura única
+        self.writer_connection = connection_factory(False)
+        self._writer_lock = threading.RLock()
+        self._writer_owner = None
+        self._writer_depth = 0
+
+        # Conexiones de lectura
+        self._readers: List[sqlite3.Connection] = []
+        self._idle: List[sqlite3.Connection] = []
+        self._condition = threading.Condition(threading.Lock())
+        self._local = threading.local()
+        self._closed = False
+
+        # Estadísticas
+        self._stats = {
+            'reader_checkouts': 0,
+            'reader_waits': 0,
+            'reader_timeouts': 0,
+            'reader_wait_total': 0.0,
+            'reader_wait_max': 0.0,
+            'readers_in_use': 0,
+            'readers_peak_in_use': 0,
+            'writer_acquisitions': 0,
+            'writer_wait_total': 0.0,
+            'writer_wait_max': 0.0,
+            'writer_timeouts': 0
+        }
+
+    # Escritura
+    def acquire_writer(self):
+        """Tomar la conexión de escritura (reentrante para el mismo hilo)"""
+        current = threading.get_ident()
+        start = time.perf_counter()
+
+        if not self._writer_lock.acquire(timeout=self.timeout):
+            with self._condition:
+                self._stats['writer_timeouts'] += 1
+            raise TimeoutError(
+                f"Tiempo de espera agotado ({self.timeout}s) esperando la conexión de escritura"
+            )
+
+        waited = time.perf_counter() - start
+        self._writer_owner = current
+        self._writer_depth += 1
+
+        with self._condition:
+            self._stats['writer_acquisitions'] += 1
+            self._stats['writer_wait_total'] += waited
+            self._stats['writer_wait_max'] = max(self._stats['writer_wait_max'], waited)
+
+        return self.writer_connection
+
+    def release_writer(self):
+        """Liberar la conexión de escritura si el hilo actual la posee"""
+        if not self.holds_writer():
+            return
+
+        self._writer_depth -= 1
+        if self._writer_depth == 0:
+            self._writer_owner = None
+        self._writer_lock.release()
+
+    def holds_writer(self) -> bool:
+        """Indica si el hilo actual tiene tomada la conexión de escritura"""
+        return self._writer_owner == threading.get_ident()
+
+    @contextmanager
+    def writer(self):
+        """Context manager para usar la conexión de escritura"""
+        connection = self.acquire_writer()
+        try:
+            yield connection
+        finally:
+            self.release_writer()
+
+    # Lectura
+    @contextmanager
+    def reader(self):
+        """Context manager para usar una conexión de lectura del pool"""
+        local = self._local
+        connection = getattr(local, 'connection', None)
+
+        # Uso anidado dentro del mismo hilo: reutilizar la conexión ya tomada
+        if connection is not None:
+            yield connection
+            return
+
+        connection = self._checkout()
+        local.connection = connection
+        try:
+            yield connection
+        finally:
+            local.connection = None
+            self._checkin(connection)
+
+    def _checkout(self) -> sqlite3.Connection:
+        """Obtener una conexión de lectura, esperando como máximo ``timeout``"""
+        start = time.perf_counter()
+        deadline = start + self.timeout
+        waited = False
+        preferred = getattr(self._local, 'last_connection', None)
+
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise sqlite3.ProgrammingError("El pool de conexiones está cerrado")
+
+                if self._idle:
+                    # Afinidad por hilo: preferir la última conexión usada por este hilo
+                    if preferred is not None and preferred in self._idle:
+                        self._idle.remove(preferred)
+                        connection = preferred
+                    else:
+                        connection = self._idle.pop()
+                    break
+
+                if len(self._readers) < self.size:
+                    connection = self._factory(True)
+                    self._readers.append(connection)
+                    break
+
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    self._stats['reader_timeouts'] += 1
+                    raise TimeoutError(
+                        f"Tiempo de espera agotado ({self.timeout}s) obteniendo conexión de lectura"
+                    )
+
+                waited = True
+                self._condition.wait(remaining)
+
+            wait_time = time.perf_counter() - start
+            stats = self._stats
+            stats['reader_checkouts'] += 1
+            stats['reader_wait_total'] += wait_time
+            stats['reader_wait_max'] = max(stats['reader_wait_max'], wait_time)
+            if waited:
+                stats['reader_waits'] += 1
+            stats['readers_in_use'] += 1
+            stats['readers_peak_in_use'] = max(stats['readers_peak_in_use'], stats['readers_in_use'])
+
+        self._local.last_connection = connection
+        return connection
+
+    def _checkin(self, connection: sqlite3.Connection):
+        """Devolver una conexión de lectura al pool"""
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+        except sqlite3.Error as e:
+            logger.warning(f"Error limpiando conexión de lectura: {e}")
+
+        with self._condition:
+            self._stats['readers_in_use'] -= 1
+            if self._closed:
+                connection.close()
+            else:
+                self._idle.append(connection)
+            self._condition.notify()
+
+    def get_stats(self) -> Dict:
+        """Obtener estadísticas de uso del pool"""
+        with self._condition:
+            stats = dict(self._stats)
+            readers_created = len(self._readers)
+            readers_idle = len(self._idle)
+
+        checkouts = stats['reader_checkouts']
+        acquisitions = stats['writer_acquisitions']
+
+        return {
+            'size': self.size,
+            'timeout': self.timeout,
+            'readers_created': readers_created,
+            'readers_idle': readers_idle,
+            'readers_in_use': stats['readers_in_use'],
+            'readers_peak_in_use': stats['readers_peak_in_use'],
+            'reader_checkouts': checkouts,
+            'reader_waits': stats['reader_waits'],
+            'reader_timeouts': stats['reader_timeouts'],
+            'reader_wait_total_ms': round(stats['reader_wait_total'] * 1000, 3),
+            'reader_wait_avg_ms': round(stats['reader_wait_total'] * 1000 / checkouts, 3) if checkouts else 0.0,
+            'reader_wait_max_ms': round(stats['reader_wait_max'] * 1000, 3),
+            'writer_in_use': self._writer_owner is not None,
+            'writer_acquisitions': acquisitions,
+            'writer_timeouts': stats['writer_timeouts'],
+            'writer_wait_total_ms': round(stats['writer_wait_total'] * 1000, 3),
+            'writer_wait_avg_ms': round(stats['writer_wait_total'] * 1000 / acquisitions, 3) if acquisitions else 0.0,
+            'writer_wait_max_ms': round(stats['writer_wait_max'] * 1000, 3)
+        }
+
+    def close(self):
+        """Cerrar todas las conexiones del pool"""
+        with self._condition:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._condition.notify_all()
+
+        for connection in idle:
+            try:
+                connection.close()
+            except sqlite3.Error as e:
+                logger.warning(f"Error cerrando conexión de lectura: {e}")
+
+        try:
+            self.writer_connection.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Error cerrando conexión de escritura: {e}")
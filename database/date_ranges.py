@@ -0,0 +1,55 @@
+"""
+Rangos de Fechas para Consultas SQL
+Predicados semiabiertos (columna >= inicio AND columna < fin) que pueden usar
+los índices sobre columnas de fecha, a diferencia de DATE(columna) = ?
+"""
+
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple, Union
+
+DateLike = Union[date, datetime, str]
+
+def to_date(value: DateLike) -> date:
+    """Convertir date, datetime o texto ISO (YYYY-MM-DD...) a date"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+def day_bounds(start: Optional[DateLike], end: Optional[DateLike] = None) -> Tuple[Optional[str], Optional[str]]:
+    """Límites [inicio, fin + 1 día) como texto ISO para días completos
+
+    ``end`` es inclusivo, igual que ``DATE(col) BETWEEN inicio AND fin``.
+    Como las fechas se guardan como texto ISO, la comparación lexicográfica
+    sirve tanto para 'YYYY-MM-DD HH:MM:SS' como para 'YYYY-MM-DDTHH:MM:SS'.
+    """
+    lower = to_date(start).isoformat() if start is not None else None
+    upper = (to_date(end) + timedelta(days=1)).isoformat() if end is not None else None
+    return lower, upper
+
+def date_range(column: str, start: Optional[DateLike] = None,
+               end: Optional[DateLike] = None) -> Tuple[str, List[str]]:
+    """Predicado sargable para filtrar ``column`` entre dos días (ambos inclusive)
+
+    Ejemplo:
+        date_range('v.fecha_venta', date(2024, 5, 1), date(2024, 5, 31))
+        -> ("v.fecha_venta >= ? AND v.fecha_venta < ?", ['2024-05-01', '2024-06-01'])
+
+    Con ``start`` o ``end`` en None el rango queda abierto de ese lado.
+    """
+    lower, upper = day_bounds(start, end)
+    conditions, params = [], []
+
+    if lower is not None:
+        conditions.append(f"{column} >= ?")
+        params.append(lower)
+    if upper is not None:
+        conditions.append(f"{column} < ?")
+        params.append(upper)
+
+    return (" AND ".join(conditions) or "1 = 1"), params
+
+def day_range(column: str, day: DateLike) -> Tuple[str, List[str]]:
+    """Predicado sargable para un único día"""
+    return date_range(column, day, day)
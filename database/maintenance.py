@@ -0,0 +1,161 @@
+"""
+Mantenimiento de Base de Datos para AlmacénPro
+ANALYZE y VACUUM programados en segundo plano según el espacio libre del
+archivo y la cantidad de filas modificadas, en lugar de ejecutarlos en cada inicio
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Claves en la tabla configuraciones
+KEY_PENDING_CHANGES = 'mantenimiento.cambios_sin_analizar'
+KEY_LAST_ANALYZE = 'mantenimiento.ultimo_analyze'
+KEY_LAST_VACUUM = 'mantenimiento.ultimo_vacuum'
+
+class DatabaseMaintenance:
+    """Tarea de mantenimiento periódica de la base SQLite
+
+    Las filas modificadas se cuentan con ``total_changes`` de la conexión de
+    escritura y se acumulan en ``configuraciones`` para que el umbral de ANALYZE
+    se respete entre sesiones. VACUUM solo se ejecuta cuando las páginas libres
+    superan tanto la proporción como el mínimo configurados.
+    """
+
+    def __init__(self, db_manager, interval: float = None, analyze_threshold: int = None,
+                 vacuum_ratio: float = None, vacuum_min_pages: int = None):
+        # Import here to avoid circular imports
+        from config.settings import settings
+
+        self.db = db_manager
+        self.interval = float(interval or settings.get('database.maintenance_interval', 3600))
+        self.analyze_threshold = int(analyze_threshold or settings.get('database.analyze_change_threshold', 10000))
+        self.vacuum_ratio = float(vacuum_ratio or settings.get('database.vacuum_freelist_ratio', 0.25))
+        self.vacuum_min_pages = int(vacuum_min_pages or settings.get('database.vacuum_min_free_pages', 2560))
+        self.logger = logging.getLogger(__name__)
+
+        self._timer: Optional[threading.Timer] = None
+        self._last_total_changes = self._total_changes()
+
+    # Estado
+    def _total_changes(self) -> int:
+        """Filas modificadas por la conexión de escritura desde que se abrió"""
+        return self.db.connection.total_changes if self.db.connection else 0
+
+    def record_changes(self) -> int:
+        """Acumular en la base las filas modificadas desde la última llamada
+
+        Returns:
+            Total de cambios pendientes de ANALYZE
+        """
+        with self.db.pool.writer():
+            delta = self._total_changes() - self._last_total_changes
+            pending = self._get_value(KEY_PENDING_CHANGES, 0) + max(0, delta)
+            if delta > 0:
+                self._set_value(KEY_PENDING_CHANGES, pending)
+            # La propia escritura del contador no cuenta como cambio de datos
+            self._last_total_changes = self._total_changes()
+        return int(pending)
+
+    def get_status(self) -> Dict:
+        """Estado actual del archivo y de los umbrales de mantenimiento"""
+        page_count = self._pragma('page_count')
+        freelist_count = self._pragma('freelist_count')
+        page_size = self._pragma('page_size')
+        pending = self.record_changes()
+        freelist_ratio = freelist_count / page_count if page_count else 0.0
+
+        return {
+            'page_count': page_count,
+            'freelist_count': freelist_count,
+            'freelist_ratio': round(freelist_ratio, 4),
+            'free_bytes': freelist_count * page_size,
+            'pending_changes': pending,
+            'last_analyze': self._get_value(KEY_LAST_ANALYZE),
+            'last_vacuum': self._get_value(KEY_LAST_VACUUM),
+            'needs_analyze': pending >= self.analyze_threshold,
+            'needs_vacuum': freelist_ratio >= self.vacuum_ratio and freelist_count >= self.vacuum_min_pages
+        }
+
+    # Ejecución
+    def run(self, force: bool = False) -> Dict:
+        """Ejecutar las tareas que superaron su umbral (o todas con ``force``)
+
+        Returns:
+            Diccionario con las tareas ejecutadas y su duración en milisegundos
+        """
+        status = self.get_status()
+        executed = {}
+
+        if force or status['needs_analyze']:
+            executed['analyze_ms'] = self._timed("ANALYZE", "PRAGMA optimize")
+            self._set_value(KEY_PENDING_CHANGES, 0)
+            self._set_value(KEY_LAST_ANALYZE, datetime.now().isoformat(timespec='seconds'))
+
+        if force or status['needs_vacuum']:
+            executed['vacuum_ms'] = self._timed("VACUUM")
+            self._set_value(KEY_LAST_VACUUM, datetime.now().isoformat(timespec='seconds'))
+
+        with self.db.pool.writer():
+            self._last_total_changes = self._total_changes()
+
+        if executed:
+            self.logger.info(f"Mantenimiento de base de datos ejecutado: {executed}")
+        return executed
+
+    def _timed(self, *commands: str) -> float:
+        """Ejecutar comandos con la conexión de escritura y medir su duración"""
+        start = time.perf_counter()
+        with self.db.pool.writer() as connection:
+            for command in commands:
+                connection.execute(command)
+        return round((time.perf_counter() - start) * 1000, 1)
+
+    # Programación
+    def start(self, delay: float = None):
+        """Programar la próxima revisión en segundo plano"""
+        try:
+            self.stop()
+            self._timer = threading.Timer(self.interval if delay is None else delay, self._scheduled_run)
+            self._timer.daemon = True
+            self._timer.start()
+
+        except Exception as e:
+            self.logger.error(f"Error programando mantenimiento: {e}")
+
+    def stop(self):
+        """Cancelar la revisión programada"""
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+
+    def _scheduled_run(self):
+        """Callback del temporizador: ejecutar y reprogramar"""
+        try:
+            self.run()
+        except Exception as e:
+            self.logger.warning(f"Error en mantenimiento programado: {e}")
+        finally:
+            self.start()
+
+    # Auxiliares
+    def _pragma(self, name: str) -> int:
+        result = self.db.execute_single(f"PRAGMA {name}")
+        return int(list(result.values())[0]) if result else 0
+
+    def _get_value(self, key: str, default=None):
+        result = self.db.execute_single("SELECT valor FROM configuraciones WHERE clave = ?", (key,))
+        if not result or result['valor'] is None:
+            return default
+        return int(result['valor']) if isinstance(default, int) else result['valor']
+
+    def _set_value(self, key: str, value):
+        self.db.execute_update("""
+            INSERT INTO configuraciones (clave, valor, descripcion)
+            VALUES (?, ?, 'Estado del mantenimiento automático')
+            ON CONFLICT(clave) DO UPDATE SET valor = excluded.valor, actualizado_en = CURRENT_TIMESTAMP
+        """, (key, str(value)))
@@ -8,16 +8,37 @@ import sqlite3
 import logging
 import os
 import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, Iterator, List, Optional, Any, Tuple
+
+from .change_events import ANY_TABLE, ChangeBus, ChangeEvent
+from .connection_pool import ConnectionPool
+from .maintenance import DatabaseMaintenance
+from .query_stats import QueryStats
 
 logger = logging.getLogger(__name__)
 
+# Versión del esquema guardada en PRAGMA user_version. Incrementar en cada
+# cambio de tablas, índices o triggers para que las bases existentes se actualicen
+SCHEMA_VERSION = 7
+
+# Columnas de productos indexadas para búsqueda de texto completo
+PRODUCT_SEARCH_COLUMNS = ('nombre', 'codigo_barras', 'codigo_interno', 'descripcion')
+
+# Sentencias que pueden ejecutarse en una conexión de lectura
+READ_ONLY_PREFIXES = ('SELECT', 'WITH', 'EXPLAIN')
+
+def is_read_only_query(query: str) -> bool:
+    """Determinar si una sentencia SQL es de solo lectura"""
+    return query.lstrip().upper().startswith(READ_ONLY_PREFIXES)
+
 class DatabaseManager:
     """Gestor principal de base de datos con soporte completo SQLite"""
     
-    def __init__(self, db_path: str = None):
+    def __init__(self, db_path: str = None, pool_size: int = None, pool_timeout: float = None):
         # Import here to avoid circular imports
         from config.settings import settings
         
@@ -27,14 +48,49 @@ class DatabaseManager:
         self.db_path = Path(db_path)
         self.connection = None
         self.cursor = None
-        self.thread_lock = threading.Lock()
+        self.pool = None
+        self._transaction_depth = 0  # Niveles de transacción abiertos (protegido por el escritor)
+        self.fts_enabled = False
+        self.maintenance = None
+        
+        # Avisos de cambios; los de una transacción se publican recién al confirmarla
+        self.changes = ChangeBus()
+        self._pending_changes: List[List[ChangeEvent]] = []  # Uno por nivel abierto (protegido por el escritor)
+        
+        # Versión de los datos sin tomar el escritor: COMMITs propios y una conexión de lectura dedicada
+        self._commit_count = 0  # Protegido por el escritor
+        self._version_at_begin = None  # data_version al abrir la transacción (protegido por el escritor)
+        self._version_connection = None
+        self._version_lock = threading.RLock()
+        self._external_data_version = None  # Última versión conocida (protegida por _version_lock)
+        self._external_pending = False
+        
+        # Configuración del pool de conexiones
+        self.pool_size = pool_size if pool_size is not None else settings.get('database.pool_size', 5)
+        self.pool_timeout = pool_timeout if pool_timeout is not None else settings.get('database.pool_timeout', 30.0)
+        
+        # Instrumentación de consultas (opcional)
+        logs_dir = Path('logs')
+        self.query_stats = QueryStats(
+            enabled=settings.get('database.query_stats', False),
+            slow_threshold_ms=settings.get('database.slow_query_ms', 100),
+            slow_log_path=str(logs_dir / 'slow_queries.log')
+        )
+        self.query_stats_dump_path = logs_dir / 'query_stats.json'
+        
+        # Una base en memoria no puede compartirse entre conexiones
+        if str(db_path) == ':memory:':
+            self.pool_size = 0
         
         # Configuraciones de conexión
         self.connection_config = {
             'check_same_thread': False,
             'timeout': 30.0,
-            'isolation_level': None  # Autocommit mode
+            'isolation_level': None,  # Autocommit mode
+            # Sentencias preparadas reutilizadas por conexión (el default de sqlite3 es 128)
+            'cached_statements': settings.get('database.cached_statements', 512)
         }
+        self.stream_batch_size = settings.get('database.stream_batch_size', 500)
         
         self.logger = logging.getLogger(__name__)
         
@@ -53,20 +109,46 @@ class DatabaseManager:
             # Configurar SQLite
             self._configure_sqlite()
             
-            # Crear todas las tablas
-            self._create_all_tables()
-            
-            # Crear índices
-            self._create_indexes()
-            
-            # Crear triggers
-            self._create_triggers()
-            
-            # Insertar datos por defecto
-            self._insert_default_data()
+            current_version = self.get_schema_version()
+            if current_version >= SCHEMA_VERSION:
+                # Esquema al día: no repetir DDL en cada inicio
+                self.fts_enabled = self._table_exists('productos_fts')
+                self.logger.info(f"Esquema de base de datos vigente (versión {current_version})")
+            else:
+                rollups_missing = not self._table_exists('ventas_resumen_diario')
+                features_missing = not self._table_exists('customer_features')
+                
+                # Crear todas las tablas
+                self._create_all_tables()
+                
+                # Crear índices
+                self._create_indexes()
+                
+                # Crear triggers
+                self._create_triggers()
+                
+                # Crear índice de búsqueda de texto completo
+                self._create_search_index()
+                
+                # Insertar datos por defecto
+                self._insert_default_data()
+                
+                # Fijar el costo de las líneas vendidas antes de guardarse en la venta
+                self._backfill_sale_costs()
+                
+                # Cargar los resúmenes diarios con las ventas ya registradas
+                if rollups_missing:
+                    self._build_sales_rollups()
+                
+                # Calcular las características de los clientes con compras
+                if features_missing:
+                    self._build_customer_features()
+                
+                self._set_schema_version(SCHEMA_VERSION)
+                self.logger.info(f"Esquema actualizado de la versión {current_version} a {SCHEMA_VERSION}")
             
-            # Optimizar base de datos
-            self._optimize_database()
+            # VACUUM/ANALYZE se ejecutan en segundo plano según umbrales
+            self.maintenance = DatabaseMaintenance(self)
             
             self.logger.info("Base de datos configurada exitosamente")
             
@@ -77,21 +159,44 @@ class DatabaseManager:
     def connect(self):
         """Establecer conexión con la base de datos"""
         try:
-            self.connection = sqlite3.connect(str(self.db_path), **self.connection_config)
-            self.connection.row_factory = sqlite3.Row  # Acceso por nombre de columna
+            self.pool = ConnectionPool(self._open_connection, self.pool_size, self.pool_timeout)
+            self.connection = self.pool.writer_connection
             self.cursor = self.connection.cursor()
             
         except Exception as e:
             self.logger.error(f"Error conectando a base de datos: {e}")
             raise e
     
+    def _open_connection(self, read_only: bool = False) -> sqlite3.Connection:
+        """Abrir una conexión nueva (de escritura o de lectura para el pool)"""
+        connection = sqlite3.connect(str(self.db_path), **self.connection_config)
+        connection.row_factory = sqlite3.Row  # Acceso por nombre de columna
+        
+        if read_only:
+            for config in ("PRAGMA cache_size = 10000",
+                           "PRAGMA temp_store = MEMORY",
+                           "PRAGMA mmap_size = 268435456",
+                           "PRAGMA query_only = ON"):
+                connection.execute(config)
+        
+        return connection
+    
     def close_connection(self):
         """Cerrar conexión de base de datos"""
         try:
+            if self.maintenance:
+                self.maintenance.stop()
+                self.maintenance.record_changes()
+            if self.query_stats.enabled:
+                self.query_stats.dump(self.query_stats_dump_path)
             if self.cursor:
                 self.cursor.close()
-            if self.connection:
-                self.connection.close()
+            with self._version_lock:
+                if self._version_connection is not None:
+                    self._version_connection.close()
+                    self._version_connection = None
+            if self.pool:
+                self.pool.close()
                 
             self.logger.info("Conexión de base de datos cerrada")
             
@@ -483,6 +588,17 @@ class DatabaseManager:
                 )
             ''',
             
+            # Numeración de comprobantes por punto de venta y tipo
+            'secuencias_comprobantes': '''
+                CREATE TABLE IF NOT EXISTS secuencias_comprobantes (
+                    punto_venta INTEGER NOT NULL,
+                    tipo_comprobante VARCHAR(20) NOT NULL,
+                    ultimo_numero INTEGER NOT NULL DEFAULT 0,
+                    actualizado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (punto_venta, tipo_comprobante)
+                )
+            ''',
+            
             # Cajas
             'cajas': '''
                 CREATE TABLE IF NOT EXISTS cajas (
@@ -554,6 +670,80 @@ class DatabaseManager:
                 )
             ''',
             
+            # Resúmenes diarios de ventas (mantenidos por SalesRollupManager)
+            'ventas_resumen_diario': '''
+                CREATE TABLE IF NOT EXISTS ventas_resumen_diario (
+                    fecha DATE NOT NULL,
+                    caja_id INTEGER NOT NULL DEFAULT 0,
+                    usuario_id INTEGER NOT NULL DEFAULT 0,
+                    metodo_pago VARCHAR(50) NOT NULL DEFAULT '',
+
+                    -- Ventas atribuidas al primer método de pago de cada ticket
+                    cantidad_ventas INTEGER NOT NULL DEFAULT 0,
+                    cantidad_canceladas INTEGER NOT NULL DEFAULT 0,
+                    subtotal DECIMAL(14,2) NOT NULL DEFAULT 0,
+                    descuentos DECIMAL(14,2) NOT NULL DEFAULT 0,
+                    impuestos DECIMAL(14,2) NOT NULL DEFAULT 0,
+                    total DECIMAL(14,2) NOT NULL DEFAULT 0,
+
+                    -- Pagos por método
+                    cantidad_pagos INTEGER NOT NULL DEFAULT 0,
+                    importe_pagos DECIMAL(14,2) NOT NULL DEFAULT 0,
+
+                    actualizado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (fecha, caja_id, usuario_id, metodo_pago)
+                )
+            ''',
+
+            'productos_resumen_diario': '''
+                CREATE TABLE IF NOT EXISTS productos_resumen_diario (
+                    fecha DATE NOT NULL,
+                    producto_id INTEGER NOT NULL,
+                    cantidad DECIMAL(14,3) NOT NULL DEFAULT 0,
+                    importe DECIMAL(14,2) NOT NULL DEFAULT 0,
+                    costo DECIMAL(14,2) NOT NULL DEFAULT 0,
+                    cantidad_ventas INTEGER NOT NULL DEFAULT 0,
+                    actualizado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (fecha, producto_id)
+                )
+            ''',
+
+            # Cambios de estado de ventas (trigger) para copias incrementales como la instantánea de análisis
+            'ventas_cambios_estado': '''
+                CREATE TABLE IF NOT EXISTS ventas_cambios_estado (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    venta_id INTEGER NOT NULL,
+                    estado VARCHAR(20),
+                    fecha_cambio TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''',
+
+            # Características por cliente (mantenidas por CustomerFeatureManager)
+            'customer_features': '''
+                CREATE TABLE IF NOT EXISTS customer_features (
+                    cliente_id INTEGER PRIMARY KEY,
+                    cantidad_compras INTEGER NOT NULL DEFAULT 0,
+                    monto_total DECIMAL(14,2) NOT NULL DEFAULT 0,
+                    ticket_promedio DECIMAL(12,2) NOT NULL DEFAULT 0,
+                    ticket_maximo DECIMAL(12,2) NOT NULL DEFAULT 0,
+                    ticket_movil DECIMAL(12,2) NOT NULL DEFAULT 0,
+                    primera_compra TIMESTAMP,
+                    ultima_compra TIMESTAMP,
+                    meses_con_compras INTEGER NOT NULL DEFAULT 0,
+
+                    -- Intervalos entre compras en días
+                    suma_intervalos REAL NOT NULL DEFAULT 0,
+                    suma_intervalos_cuadrados REAL NOT NULL DEFAULT 0,
+                    intervalo_promedio REAL,
+                    intervalo_movil REAL,
+                    ultimo_intervalo REAL,
+
+                    ultima_venta_id INTEGER,
+                    actualizado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (cliente_id) REFERENCES clientes(id) ON DELETE CASCADE
+                )
+            ''',
+
             # Configuraciones
             'configuraciones': '''
                 CREATE TABLE IF NOT EXISTS configuraciones (
@@ -609,6 +799,9 @@ class DatabaseManager:
             "CREATE INDEX IF NOT EXISTS idx_productos_categoria ON productos(categoria_id)",
             "CREATE INDEX IF NOT EXISTS idx_productos_proveedor ON productos(proveedor_id)",
             "CREATE INDEX IF NOT EXISTS idx_productos_activo ON productos(activo)",
+            "CREATE INDEX IF NOT EXISTS idx_productos_actualizado ON productos(actualizado_en)",
+            # Cubre el conteo de productos activos y con stock bajo del dashboard
+            "CREATE INDEX IF NOT EXISTS idx_productos_stock ON productos(activo, stock_actual, stock_minimo)",
             
             # Índices de ventas
             "CREATE INDEX IF NOT EXISTS idx_ventas_fecha ON ventas(fecha_venta)",
@@ -616,21 +809,33 @@ class DatabaseManager:
             "CREATE INDEX IF NOT EXISTS idx_ventas_usuario ON ventas(usuario_id)",
             "CREATE INDEX IF NOT EXISTS idx_ventas_estado ON ventas(estado)",
             "CREATE INDEX IF NOT EXISTS idx_ventas_numero ON ventas(numero_factura)",
+            # Cubre los totales de reportes por estado y rango de fechas sin leer la tabla
+            "CREATE INDEX IF NOT EXISTS idx_ventas_estado_fecha ON ventas(estado, fecha_venta, total)",
             
             # Índices de detalle ventas
             "CREATE INDEX IF NOT EXISTS idx_detalle_ventas_venta ON detalle_ventas(venta_id)",
             "CREATE INDEX IF NOT EXISTS idx_detalle_ventas_producto ON detalle_ventas(producto_id)",
             
+            # Índices de pagos de venta
+            "CREATE INDEX IF NOT EXISTS idx_pagos_venta_venta ON pagos_venta(venta_id)",
+            
             # Índices de compras
             "CREATE INDEX IF NOT EXISTS idx_compras_fecha ON compras(fecha_compra)",
             "CREATE INDEX IF NOT EXISTS idx_compras_proveedor ON compras(proveedor_id)",
             "CREATE INDEX IF NOT EXISTS idx_compras_estado ON compras(estado)",
+            "CREATE INDEX IF NOT EXISTS idx_compras_estado_fecha ON compras(estado, fecha_compra, total)",
             
             # Índices de movimientos stock
             "CREATE INDEX IF NOT EXISTS idx_movimientos_producto ON movimientos_stock(producto_id)",
             "CREATE INDEX IF NOT EXISTS idx_movimientos_fecha ON movimientos_stock(fecha_movimiento)",
             "CREATE INDEX IF NOT EXISTS idx_movimientos_tipo ON movimientos_stock(tipo_movimiento)",
             "CREATE INDEX IF NOT EXISTS idx_movimientos_referencia ON movimientos_stock(referencia_id, referencia_tipo)",
+
+            # Índices de resúmenes diarios
+            "CREATE INDEX IF NOT EXISTS idx_productos_resumen_producto ON productos_resumen_diario(producto_id, fecha)",
+            
+            # Índices de características de clientes
+            "CREATE INDEX IF NOT EXISTS idx_customer_features_ultima_compra ON customer_features(ultima_compra)",
             
             # Índices de usuarios
             "CREATE INDEX IF NOT EXISTS idx_usuarios_username ON usuarios(username)",
@@ -697,6 +902,17 @@ class DatabaseManager:
                        json_object('precio_venta', NEW.precio_venta, 'stock_actual', NEW.stock_actual),
                        CURRENT_TIMESTAMP);
             END
+            ''',
+            
+            # Registrar cada cambio de estado de una venta (cancelación, reactivación, etc.)
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_ventas_cambio_estado
+            AFTER UPDATE OF estado ON ventas
+            FOR EACH ROW
+            WHEN OLD.estado IS NOT NEW.estado
+            BEGIN
+                INSERT INTO ventas_cambios_estado (venta_id, estado) VALUES (NEW.id, NEW.estado);
+            END
             '''
         ]
         
@@ -709,6 +925,123 @@ class DatabaseManager:
         self.connection.commit()
         self.logger.info("Triggers creados exitosamente")
     
+    def _create_search_index(self):
+        """Crear el índice FTS5 de productos y los triggers que lo mantienen sincronizado
+        
+        El tokenizador unicode61 con remove_diacritics permite buscar "azucar" y
+        encontrar "Azúcar"; los índices de prefijo aceleran la búsqueda mientras
+        se escribe. Si SQLite no tiene FTS5 la búsqueda vuelve a usar LIKE.
+        """
+        self.fts_enabled = False
+        try:
+            exists = self.cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'productos_fts'"
+            ).fetchone()
+            
+            self.cursor.execute(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS productos_fts USING fts5(
+                    {', '.join(PRODUCT_SEARCH_COLUMNS)},
+                    content = 'productos',
+                    content_rowid = 'id',
+                    tokenize = 'unicode61 remove_diacritics 2',
+                    prefix = '2 3 4'
+                )
+            """)
+            
+            columns = ', '.join(PRODUCT_SEARCH_COLUMNS)
+            new_values = ', '.join(f"NEW.{column}" for column in PRODUCT_SEARCH_COLUMNS)
+            old_values = ', '.join(f"OLD.{column}" for column in PRODUCT_SEARCH_COLUMNS)
+            
+            triggers = [
+                f"""
+                CREATE TRIGGER IF NOT EXISTS trg_productos_fts_insert
+                AFTER INSERT ON productos
+                BEGIN
+                    INSERT INTO productos_fts (rowid, {columns}) VALUES (NEW.id, {new_values});
+                END
+                """,
+                f"""
+                CREATE TRIGGER IF NOT EXISTS trg_productos_fts_delete
+                AFTER DELETE ON productos
+                BEGIN
+                    INSERT INTO productos_fts (productos_fts, rowid, {columns})
+                    VALUES ('delete', OLD.id, {old_values});
+                END
+                """,
+                # Solo las columnas indexadas: los cambios de stock o precio no tocan el índice
+                f"""
+                CREATE TRIGGER IF NOT EXISTS trg_productos_fts_update
+                AFTER UPDATE OF {columns} ON productos
+                BEGIN
+                    INSERT INTO productos_fts (productos_fts, rowid, {columns})
+                    VALUES ('delete', OLD.id, {old_values});
+                    INSERT INTO productos_fts (rowid, {columns}) VALUES (NEW.id, {new_values});
+                END
+                """
+            ]
+            for trigger_sql in triggers:
+                self.cursor.execute(trigger_sql)
+            
+            if not exists:
+                # Base existente: indexar los productos que ya estaban cargados
+                self.cursor.execute("INSERT INTO productos_fts (productos_fts) VALUES ('rebuild')")
+                self.logger.info("Índice de búsqueda de productos construido")
+            
+            self.connection.commit()
+            self.fts_enabled = True
+            
+        except sqlite3.Error as e:
+            self.logger.warning(f"Búsqueda de texto completo no disponible, se usará LIKE: {e}")
+    
+    def rebuild_search_index(self) -> bool:
+        """Reconstruir el índice de búsqueda de productos desde la tabla productos"""
+        try:
+            with self.transaction():
+                self.connection.execute("INSERT INTO productos_fts (productos_fts) VALUES ('rebuild')")
+            self.logger.info("Índice de búsqueda de productos reconstruido")
+            return True
+        except Exception as e:
+            self.logger.error(f"Error reconstruyendo índice de búsqueda: {e}")
+            return False
+
+    def _backfill_sale_costs(self):
+        """Guardar el precio de compra actual en las líneas de venta sin costo
+
+        Las versiones anteriores no registraban el costo al vender; se fija una
+        vez para que cancelar o reconstruir no dependa de cambios de precio.
+        """
+        # CREATE TABLE IF NOT EXISTS no agrega la columna a una tabla existente
+        if 'costo_unitario' not in self._table_columns('detalle_ventas'):
+            self.connection.execute("ALTER TABLE detalle_ventas ADD COLUMN costo_unitario DECIMAL(10,2) DEFAULT 0")
+        
+        updated = self.connection.execute("""
+            UPDATE detalle_ventas
+            SET costo_unitario = (SELECT p.precio_compra FROM productos p WHERE p.id = detalle_ventas.producto_id)
+            WHERE COALESCE(costo_unitario, 0) = 0
+              AND EXISTS (SELECT 1 FROM productos p
+                          WHERE p.id = detalle_ventas.producto_id AND COALESCE(p.precio_compra, 0) != 0)
+        """).rowcount
+        if updated:
+            self.logger.info(f"Costo registrado en {updated} líneas de venta existentes")
+
+    def _build_sales_rollups(self):
+        """Completar los resúmenes diarios de ventas recién creados"""
+        # Import here to avoid circular imports
+        from managers.sales_rollup_manager import SalesRollupManager
+
+        success, message = SalesRollupManager(self).rebuild()
+        if not success:
+            self.logger.warning(message)
+
+    def _build_customer_features(self):
+        """Completar las características de clientes recién creadas"""
+        # Import here to avoid circular imports
+        from managers.customer_feature_manager import CustomerFeatureManager
+
+        success, message = CustomerFeatureManager(self).rebuild()
+        if not success:
+            self.logger.warning(message)
+
     def _insert_default_data(self):
         """Insertar datos por defecto necesarios"""
         try:
@@ -746,56 +1079,279 @@ class DatabaseManager:
         except Exception as e:
             self.logger.error(f"Error insertando datos por defecto: {e}")
     
-    def _optimize_database(self):
-        """Optimizar base de datos"""
+    def get_schema_version(self) -> int:
+        """Obtener la versión de esquema guardada en la base"""
+        return self.connection.execute("PRAGMA user_version").fetchone()[0]
+    
+    def _set_schema_version(self, version: int):
+        """Registrar la versión de esquema aplicada"""
+        self.connection.execute(f"PRAGMA user_version = {int(version)}")
+    
+    def _read_data_version(self) -> int:
+        """``PRAGMA data_version`` de una conexión de lectura propia
+
+        Cambia cuando cualquier otra conexión (el escritor de este proceso u otra
+        terminal) confirma escrituras. En modo WAL no espera a un escritor en
+        curso, así que puede llamarse desde la interfaz. Una base en memoria no
+        admite otra conexión y retorna 0.
+        """
+        if not self.pool.size:
+            return 0
+        with self._version_lock:
+            if self._version_connection is None:
+                self._version_connection = self._open_connection(read_only=True)
+            return self._version_connection.execute("PRAGMA data_version").fetchone()[0]
+
+    def _record_commit(self, version_before: Optional[int]):
+        """Registrar un COMMIT propio para que check_external_changes no lo tome como externo
+
+        ``version_before`` es la versión leída antes de escribir: si ya difería de
+        la última conocida, otra terminal escribió antes y el aviso queda pendiente.
+        """
+        self._commit_count += 1
+        if not self.pool.size:
+            return
+        with self._version_lock:
+            version_after = self._read_data_version()
+            if self._external_data_version is None:
+                return
+            if version_before != self._external_data_version:
+                self._external_pending = True
+            self._external_data_version = version_after
+
+    def get_data_version(self) -> Tuple[int, int]:
+        """Versión de los datos para invalidar resultados en caché
+
+        Combina los COMMIT propios de este proceso con ``PRAGMA data_version`` de
+        una conexión de lectura; no toma la conexión de escritura.
+        """
+        return self._commit_count, self._read_data_version()
+
+    def notify_change(self, table: str, ids=(), source: str = ''):
+        """Publicar un cambio en ``table``; dentro de una transacción se difiere al COMMIT
+        (y se descarta si se revierte), así nadie relee datos aún no confirmados"""
+        event = ChangeEvent(table, tuple(ids), source)
+        if self.in_transaction() and self._pending_changes:
+            self._pending_changes[-1].append(event)
+        else:
+            self.changes.dispatch(event)
+    
+    def check_external_changes(self) -> bool:
+        """Publicar un cambio genérico si otro proceso escribió en la base desde la última consulta
+        
+        Los cambios propios ya se publican al confirmarse; esta verificación es
+        un único ``PRAGMA data_version`` en una conexión de lectura, sin esperar
+        al escritor, así puede ejecutarse en un temporizador de la interfaz.
+        """
         try:
-            optimization_commands = [
-                "ANALYZE",
-                "PRAGMA optimize",
-                "VACUUM"
-            ]
-            
-            for command in optimization_commands:
-                self.cursor.execute(command)
-            
-            self.logger.info("Base de datos optimizada")
-            
+            with self._version_lock:
+                version = self._read_data_version()
+                previous, self._external_data_version = self._external_data_version, version
+                pending, self._external_pending = self._external_pending, False
+        except Exception as e:
+            self.logger.warning(f"Error verificando cambios externos: {e}")
+            return False
+        
+        if previous is None or (previous == version and not pending):
+            return False
+        self.changes.publish(ANY_TABLE, source='externo')
+        return True
+
+    def _table_exists(self, name: str) -> bool:
+        """Verificar si existe una tabla (o tabla virtual)"""
+        return self.connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+        ).fetchone() is not None
+    
+    def _table_columns(self, table: str) -> set:
+        """Nombres de las columnas de una tabla"""
+        return {row[1] for row in self.connection.execute(f"PRAGMA table_info({table})")}
+    
+    def optimize_database(self, force: bool = True) -> Dict:
+        """Ejecutar ANALYZE y VACUUM (todos con ``force``, o solo los que superan su umbral)"""
+        try:
+            return self.maintenance.run(force=force)
         except Exception as e:
             self.logger.warning(f"Error optimizando base de datos: {e}")
+            return {}
     
     # Métodos de transacción
+    def in_transaction(self) -> bool:
+        """Indica si el hilo actual tiene una unidad de trabajo abierta"""
+        return self.pool.holds_writer() and self._transaction_depth > 0
+    
+    def _begin_unit(self):
+        """Abrir transacción o savepoint según el nivel de anidamiento"""
+        depth = self._transaction_depth
+        if depth == 0:
+            # IMMEDIATE toma el lock de escritura al inicio y evita SQLITE_BUSY al promover
+            self.connection.execute("BEGIN IMMEDIATE")
+            self._version_at_begin = self._read_data_version()
+        else:
+            self.connection.execute(f"SAVEPOINT sp_{depth}")
+        self._transaction_depth = depth + 1
+        self._pending_changes.append([])
+    
+    def _commit_unit(self):
+        """Confirmar el nivel de transacción más interno"""
+        depth = self._transaction_depth - 1
+        if depth == 0:
+            self.connection.commit()
+            self._record_commit(self._version_at_begin)
+        else:
+            self.connection.execute(f"RELEASE SAVEPOINT sp_{depth}")
+        self._transaction_depth = depth
+        
+        events = self._pending_changes.pop() if self._pending_changes else []
+        if self._pending_changes:
+            self._pending_changes[-1].extend(events)
+        else:
+            for event in events:
+                self.changes.dispatch(event)
+    
+    def _rollback_unit(self):
+        """Revertir el nivel de transacción más interno"""
+        depth = self._transaction_depth - 1
+        self._transaction_depth = max(depth, 0)
+        if self._pending_changes:
+            self._pending_changes.pop()
+        if depth <= 0:
+            self._pending_changes.clear()
+            self.connection.rollback()
+        else:
+            self.connection.execute(f"ROLLBACK TO SAVEPOINT sp_{depth}")
+            self.connection.execute(f"RELEASE SAVEPOINT sp_{depth}")
+    
+    @contextmanager
+    def transaction(self):
+        """Unidad de trabajo atómica; las llamadas anidadas usan savepoints
+        
+        Las sentencias ejecutadas dentro del bloque no se confirman individualmente:
+        se hace un único COMMIT al salir, o rollback si se produce una excepción.
+        """
+        connection = self.pool.acquire_writer()
+        try:
+            self._begin_unit()
+        except Exception:
+            self.pool.release_writer()
+            raise
+        
+        try:
+            yield connection
+        except BaseException:
+            try:
+                self._rollback_unit()
+            except sqlite3.Error as e:
+                self.logger.error(f"Error revirtiendo transacción: {e}")
+            raise
+        else:
+            try:
+                self._commit_unit()
+            except Exception:
+                self._rollback_unit()
+                raise
+        finally:
+            self.pool.release_writer()
+    
     def begin_transaction(self):
-        """Iniciar transacción"""
-        with self.thread_lock:
-            self.cursor.execute("BEGIN TRANSACTION")
+        """Iniciar transacción (retiene la conexión de escritura hasta commit/rollback)"""
+        self.pool.acquire_writer()
+        try:
+            self._begin_unit()
+        except Exception:
+            self.pool.release_writer()
+            raise
     
     def commit_transaction(self):
         """Confirmar transacción"""
-        with self.thread_lock:
-            self.connection.commit()
+        # Si el commit falla se conserva la conexión para que el rollback la libere
+        self._commit_unit()
+        self.pool.release_writer()
     
     def rollback_transaction(self):
         """Revertir transacción"""
-        with self.thread_lock:
-            self.connection.rollback()
+        try:
+            self._rollback_unit()
+        finally:
+            self.pool.release_writer()
+    
+    @contextmanager
+    def _connection_for(self, query: str):
+        """Elegir conexión: lectura del pool, o escritura para modificaciones y
+        para lecturas dentro de una transacción abierta por el hilo actual"""
+        if self.pool.size and is_read_only_query(query) and not self.pool.holds_writer():
+            with self.pool.reader() as connection:
+                yield connection
+        else:
+            with self.pool.writer() as connection:
+                yield connection
     
     # Métodos de consulta
     def execute_query(self, query: str, params: tuple = ()) -> List[Dict]:
         """Ejecutar consulta SELECT"""
         try:
-            with self.thread_lock:
-                self.cursor.execute(query, params)
-                return [dict(row) for row in self.cursor.fetchall()]
+            stats = self.query_stats if self.query_stats.enabled else None
+            start = time.perf_counter()
+            with self._connection_for(query) as connection:
+                acquired = time.perf_counter()
+                cursor = connection.execute(query, params)
+                rows = [dict(row) for row in cursor.fetchall()]
+                if stats:
+                    stats.record(query, start, acquired, len(rows), connection, params)
+                return rows
         except Exception as e:
             self.logger.error(f"Error ejecutando consulta: {e}")
             raise e
     
+    def iter_batches(self, query: str, params: tuple = (), batch_size: int = None,
+                     row_type: str = 'dict') -> Iterator[List]:
+        """Ejecutar una consulta SELECT y entregar los resultados por lotes
+        
+        La conexión queda tomada mientras se consume el generador, por lo que
+        conviene recorrerlo completo (o cerrarlo) antes de hacer otra cosa.
+        
+        Args:
+            batch_size: Filas por lote (``database.stream_batch_size`` por defecto)
+            row_type: 'dict', 'tuple' (sin nombres de columna) o 'row' (sqlite3.Row)
+        """
+        if row_type not in ('dict', 'tuple', 'row'):
+            raise ValueError(f"Tipo de fila no soportado: {row_type}")
+        batch_size = batch_size or self.stream_batch_size
+        
+        try:
+            with self._connection_for(query) as connection:
+                cursor = connection.cursor()
+                if row_type == 'tuple':
+                    cursor.row_factory = None
+                try:
+                    cursor.execute(query, params)
+                    while True:
+                        rows = cursor.fetchmany(batch_size)
+                        if not rows:
+                            break
+                        yield [dict(row) for row in rows] if row_type == 'dict' else rows
+                finally:
+                    cursor.close()
+        except Exception as e:
+            self.logger.error(f"Error recorriendo consulta: {e}")
+            raise e
+    
+    def iter_query(self, query: str, params: tuple = (), batch_size: int = None,
+                   row_type: str = 'dict') -> Iterator:
+        """Recorrer los resultados de una consulta fila por fila sin cargarlos todos en memoria"""
+        for batch in self.iter_batches(query, params, batch_size, row_type):
+            yield from batch
+    
     def execute_single(self, query: str, params: tuple = ()) -> Optional[Dict]:
         """Ejecutar consulta que retorna un solo registro"""
         try:
-            with self.thread_lock:
-                self.cursor.execute(query, params)
-                row = self.cursor.fetchone()
+            stats = self.query_stats if self.query_stats.enabled else None
+            start = time.perf_counter()
+            with self._connection_for(query) as connection:
+                acquired = time.perf_counter()
+                row = connection.execute(query, params).fetchone()
+                if stats:
+                    stats.record(query, start, acquired, 1 if row else 0, connection, params)
                 return dict(row) if row else None
         except Exception as e:
             self.logger.error(f"Error ejecutando consulta single: {e}")
@@ -804,10 +1360,18 @@ class DatabaseManager:
     def execute_insert(self, query: str, params: tuple = ()) -> int:
         """Ejecutar INSERT y retornar ID insertado"""
         try:
-            with self.thread_lock:
-                self.cursor.execute(query, params)
-                self.connection.commit()
-                return self.cursor.lastrowid
+            stats = self.query_stats if self.query_stats.enabled else None
+            start = time.perf_counter()
+            with self.pool.writer() as connection:
+                version_before = None if self._transaction_depth else self._read_data_version()
+                acquired = time.perf_counter()
+                cursor = connection.execute(query, params)
+                if not self._transaction_depth:
+                    connection.commit()
+                    self._record_commit(version_before)
+                if stats:
+                    stats.record(query, start, acquired, cursor.rowcount, connection, params)
+                return cursor.lastrowid
         except Exception as e:
             self.logger.error(f"Error ejecutando insert: {e}")
             raise e
@@ -815,14 +1379,44 @@ class DatabaseManager:
     def execute_update(self, query: str, params: tuple = ()) -> bool:
         """Ejecutar UPDATE/DELETE"""
         try:
-            with self.thread_lock:
-                self.cursor.execute(query, params)
-                self.connection.commit()
-                return self.cursor.rowcount > 0
+            stats = self.query_stats if self.query_stats.enabled else None
+            start = time.perf_counter()
+            with self.pool.writer() as connection:
+                version_before = None if self._transaction_depth else self._read_data_version()
+                acquired = time.perf_counter()
+                cursor = connection.execute(query, params)
+                if not self._transaction_depth:
+                    connection.commit()
+                    self._record_commit(version_before)
+                if stats:
+                    stats.record(query, start, acquired, cursor.rowcount, connection, params)
+                return cursor.rowcount > 0
         except Exception as e:
             self.logger.error(f"Error ejecutando update: {e}")
             raise e
     
+    def execute_many(self, query: str, params_seq) -> int:
+        """Ejecutar la misma sentencia para varios juegos de parámetros en una transacción"""
+        try:
+            stats = self.query_stats if self.query_stats.enabled else None
+            if stats and not isinstance(params_seq, (list, tuple)):
+                params_seq = list(params_seq)
+            start = time.perf_counter()
+            with self.transaction() as connection:
+                acquired = time.perf_counter()
+                cursor = connection.executemany(query, params_seq)
+                if stats:
+                    stats.record(query, start, acquired, cursor.rowcount, connection,
+                                 params_seq[0] if params_seq else ())
+                return cursor.rowcount
+        except Exception as e:
+            self.logger.error(f"Error ejecutando sentencia por lotes: {e}")
+            raise e
+    
+    def get_query_report(self, sort_by: str = 'total_ms', limit: int = 20) -> str:
+        """Reporte de texto de las estadísticas de consultas"""
+        return self.query_stats.format_report(sort_by, limit)
+    
     def get_database_info(self) -> Dict:
         """Obtener información de la base de datos"""
         try:
@@ -851,6 +1445,9 @@ class DatabaseManager:
                 })
                 info['total_records'] += record_count
             
+            # Estadísticas del pool de conexiones
+            info['pool'] = self.pool.get_stats()
+            
             return info
             
         except Exception as e:
@@ -867,7 +1464,8 @@ class DatabaseManager:
             backup_conn = sqlite3.connect(str(backup_path))
             
             # Realizar backup
-            self.connection.backup(backup_conn)
+            with self.pool.writer() as connection:
+                connection.backup(backup_conn)
             backup_conn.close()
             
             self.logger.info(f"Backup creado: {backup_path}")
@@ -0,0 +1,263 @@
+"""
+Estadísticas de Consultas para AlmacénPro
+Instrumentación opcional de DatabaseManager: latencia por sentencia normalizada,
+filas, espera por conexión y registro de consultas lentas con su plan de ejecución
+
+Uso por línea de comandos (sobre el volcado que se guarda al cerrar):
+    python -m database.query_stats [--file logs/query_stats.json] [--sort total_ms] [--limit 20]
+"""
+
+import argparse
+import json
+import logging
+import re
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Logger dedicado para el archivo de consultas lentas
+slow_logger = logging.getLogger('almacen.slow_queries')
+
+SAMPLES_PER_STATEMENT = 1000
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUES_LIST = re.compile(r"(\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_statement(query: str) -> str:
+    """Normalizar una sentencia para agrupar ejecuciones equivalentes
+
+    Colapsa espacios, reemplaza literales por ``?`` y listas de parámetros
+    (``IN (?, ?, ?)``, ``VALUES (?, ?), (?, ?)``) por ``(...)``.
+    """
+    statement = _STRING_LITERAL.sub('?', query)
+    statement = _NUMBER_LITERAL.sub('?', statement)
+    statement = _WHITESPACE.sub(' ', statement).strip()
+    statement = _PLACEHOLDER_LIST.sub('(...)', statement)
+    statement = _VALUES_LIST.sub(r'\1', statement)
+    return statement
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+class QueryStats:
+    """Acumulador de estadísticas por sentencia normalizada
+
+    Desactivado por defecto: con ``enabled = False`` DatabaseManager no mide nada.
+    Los percentiles se calculan sobre las últimas ``SAMPLES_PER_STATEMENT``
+    ejecuciones de cada sentencia.
+    """
+
+    def __init__(self, enabled: bool = False, slow_threshold_ms: float = 100.0,
+                 slow_log_path: Optional[str] = None):
+        self.enabled = False
+        self.slow_threshold_ms = float(slow_threshold_ms)
+        self.slow_log_path = slow_log_path
+        self._statements: Dict[str, Dict] = {}
+        self._normalized_cache: Dict[str, str] = {}
+        self._plans: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._handler = None
+        self.started_at = time.time()
+
+        if enabled:
+            self.enable()
+
+    # Activación
+    def enable(self, slow_threshold_ms: float = None):
+        """Activar la instrumentación (y el archivo de consultas lentas si hay ruta)"""
+        if slow_threshold_ms is not None:
+            self.slow_threshold_ms = float(slow_threshold_ms)
+
+        if self.slow_log_path and self._handler is None:
+            try:
+                path = Path(self.slow_log_path)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                self._handler = logging.FileHandler(path, encoding='utf-8')
+                self._handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+                slow_logger.addHandler(self._handler)
+            except OSError as e:
+                logger.warning(f"No se pudo abrir el log de consultas lentas: {e}")
+
+        self.enabled = True
+        logger.info(f"Instrumentación de consultas activada (lentas > {self.slow_threshold_ms} ms)")
+
+    def disable(self):
+        """Desactivar la instrumentación conservando lo acumulado"""
+        self.enabled = False
+        if self._handler is not None:
+            slow_logger.removeHandler(self._handler)
+            self._handler.close()
+            self._handler = None
+
+    def reset(self):
+        """Descartar las estadísticas acumuladas"""
+        with self._lock:
+            self._statements.clear()
+            self._plans.clear()
+            self.started_at = time.time()
+
+    # Registro
+    def normalize(self, query: str) -> str:
+        normalized = self._normalized_cache.get(query)
+        if normalized is None:
+            normalized = normalize_statement(query)
+            if len(self._normalized_cache) < 10000:
+                self._normalized_cache[query] = normalized
+        return normalized
+
+    def record(self, query: str, start: float, acquired: float, rows: int,
+               connection=None, params=()):
+        """Registrar una ejecución
+
+        Args:
+            query: Sentencia ejecutada
+            start: Instante previo a pedir la conexión (perf_counter)
+            acquired: Instante en que se obtuvo la conexión
+            rows: Filas retornadas o afectadas
+            connection: Conexión usada, para obtener el plan de las consultas lentas
+            params: Parámetros de la ejecución (para EXPLAIN QUERY PLAN)
+        """
+        finished = time.perf_counter()
+        elapsed_ms = (finished - acquired) * 1000
+        wait_ms = (acquired - start) * 1000
+        statement = self.normalize(query)
+
+        with self._lock:
+            entry = self._statements.get(statement)
+            if entry is None:
+                entry = self._statements[statement] = {
+                    'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'rows': 0,
+                    'wait_ms': 0.0, 'max_wait_ms': 0.0, 'slow_calls': 0,
+                    'samples': deque(maxlen=SAMPLES_PER_STATEMENT)
+                }
+            entry['calls'] += 1
+            entry['total_ms'] += elapsed_ms
+            entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+            entry['rows'] += max(0, rows or 0)
+            entry['wait_ms'] += wait_ms
+            entry['max_wait_ms'] = max(entry['max_wait_ms'], wait_ms)
+            entry['samples'].append(elapsed_ms)
+
+            is_slow = elapsed_ms >= self.slow_threshold_ms
+            if is_slow:
+                entry['slow_calls'] += 1
+            needs_plan = is_slow and statement not in self._plans
+
+        if is_slow:
+            plan = self._explain(statement, query, params, connection) if needs_plan else self._plans.get(statement)
+            slow_logger.warning(
+                f"Consulta lenta {elapsed_ms:.1f} ms (espera {wait_ms:.1f} ms, {rows} filas): {statement}"
+                + (f"\n    Plan: {plan}" if plan else "")
+            )
+
+    def _explain(self, statement: str, query: str, params, connection) -> str:
+        """Obtener el plan de ejecución una vez por sentencia normalizada"""
+        plan = ''
+        if connection is not None:
+            try:
+                rows = connection.execute(f"EXPLAIN QUERY PLAN {query}", params or ()).fetchall()
+                plan = ' | '.join(str(row[-1]) for row in rows)
+            except Exception as e:
+                plan = f"(sin plan: {e})"
+
+        with self._lock:
+            self._plans[statement] = plan
+        return plan
+
+    # Reportes
+    def get_report(self, sort_by: str = 'total_ms', limit: int = 20) -> List[Dict]:
+        """Estadísticas por sentencia ordenadas de mayor a menor"""
+        with self._lock:
+            snapshot = [(statement, dict(entry), sorted(entry['samples']))
+                        for statement, entry in self._statements.items()]
+            plans = dict(self._plans)
+
+        report = []
+        for statement, entry, samples in snapshot:
+            calls = entry['calls']
+            report.append({
+                'statement': statement,
+                'calls': calls,
+                'total_ms': round(entry['total_ms'], 3),
+                'avg_ms': round(entry['total_ms'] / calls, 3),
+                'p50_ms': round(_percentile(samples, 0.50), 3),
+                'p95_ms': round(_percentile(samples, 0.95), 3),
+                'max_ms': round(entry['max_ms'], 3),
+                'rows': entry['rows'],
+                'wait_ms': round(entry['wait_ms'], 3),
+                'max_wait_ms': round(entry['max_wait_ms'], 3),
+                'slow_calls': entry['slow_calls'],
+                'plan': plans.get(statement, '')
+            })
+
+        report.sort(key=lambda item: item.get(sort_by, 0), reverse=True)
+        return report[:limit] if limit else report
+
+    def dump(self, path: str) -> bool:
+        """Guardar el reporte completo en JSON"""
+        try:
+            path = Path(path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as file:
+                json.dump({
+                    'started_at': self.started_at,
+                    'dumped_at': time.time(),
+                    'slow_threshold_ms': self.slow_threshold_ms,
+                    'statements': self.get_report(limit=0)
+                }, file, ensure_ascii=False, indent=2)
+            return True
+        except OSError as e:
+            logger.error(f"Error guardando estadísticas de consultas: {e}")
+            return False
+
+    def format_report(self, sort_by: str = 'total_ms', limit: int = 20) -> str:
+        return format_report(self.get_report(sort_by, limit))
+
+def format_report(statements: List[Dict], width: int = 90) -> str:
+    """Tabla de texto para el widget de administración o la consola"""
+    if not statements:
+        return "Sin consultas registradas (¿instrumentación desactivada?)"
+
+    header = f"{'llamadas':>9}{'total ms':>11}{'p50':>9}{'p95':>9}{'máx':>9}{'filas':>9}{'espera':>9}  sentencia"
+    lines = [header, '-' * len(header)]
+    for item in statements:
+        statement = item['statement']
+        if len(statement) > width:
+            statement = statement[:width - 3] + '...'
+        lines.append(f"{item['calls']:>9}{item['total_ms']:>11.1f}{item['p50_ms']:>9.2f}{item['p95_ms']:>9.2f}"
+                     f"{item['max_ms']:>9.2f}{item['rows']:>9}{item['wait_ms']:>9.1f}  {statement}")
+        if item.get('plan'):
+            lines.append(f"{'':>65}plan: {item['plan']}")
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Reporte de estadísticas de consultas SQL")
+    parser.add_argument('--file', default='logs/query_stats.json', help="Volcado generado por la aplicación")
+    parser.add_argument('--sort', default='total_ms',
+                        choices=['total_ms', 'calls', 'avg_ms', 'p95_ms', 'max_ms', 'rows', 'wait_ms', 'slow_calls'])
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    try:
+        with open(args.file, encoding='utf-8') as file:
+            data = json.load(file)
+    except (OSError, ValueError) as e:
+        print(f"No se pudo leer {args.file}: {e}")
+        return 1
+
+    statements = sorted(data.get('statements', []), key=lambda item: item.get(args.sort, 0), reverse=True)
+    print(format_report(statements[:args.limit] if args.limit else statements))
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
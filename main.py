@@ -16,43 +16,38 @@ Sistema profesional de gestión para almacenes, kioscos, distribuidoras
 
 import sys
 import os
+import time
 import traceback
 import logging
 from pathlib import Path
 from datetime import datetime
 
+_PROCESS_START = time.perf_counter()
+
 # Configurar el path para imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+from utils.startup_profiler import startup_profiler
+
 from PyQt5.QtWidgets import QApplication, QMessageBox, QSplashScreen
 from PyQt5.QtCore import Qt, QTimer, QThread, pyqtSignal
 from PyQt5.QtGui import QPixmap, QFont
 
 # Imports de configuración y base de datos
-from config.settings import Settings
+from config.settings import Settings, settings
 from database.manager import DatabaseManager
 
-# Imports de managers (lógica de negocio)
+# Imports de managers (lógica de negocio). Los managers secundarios y avanzados
+# se importan recién cuando se usan (ver InitializationThread)
 from managers.user_manager import UserManager
 from managers.product_manager import ProductManager
 from managers.sales_manager import SalesManager
-from managers.purchase_manager import PurchaseManager
-from managers.provider_manager import ProviderManager
 from managers.customer_manager import CustomerManager
 from managers.financial_manager import FinancialManager
-from managers.inventory_manager import InventoryManager
-from managers.report_manager import ReportManager
-
-# Managers adicionales
-from managers.predictive_analysis_manager import PredictiveAnalysisManager
-from managers.communication_manager import CommunicationManager
-from managers.advanced_customer_manager import AdvancedCustomerManager
-from managers.enterprise_user_manager import EnterpriseUserManager
+from managers.service_registry import ServiceRegistry, deferred
 
 # Imports de utilidades
 from utils.backup_manager import BackupManager
-from utils.notifications import NotificationManager
-from utils.style_manager import StyleManager
 
 # Imports de controladores MVC
 from controllers.main_controller import MainController
@@ -60,6 +55,8 @@ from controllers.main_controller import MainController
 # Diálogos que siguen siendo necesarios  
 from controllers.login_controller import LoginController, show_login_dialog
 
+startup_profiler.record("imports", time.perf_counter() - _PROCESS_START, "imports")
+
 # Configuración global de logging
 def setup_logging():
     """Configurar sistema de logging MVC"""
@@ -88,7 +85,7 @@ class InitializationThread(QThread):
     """Hilo para inicialización de componentes MVC avanzada"""
     
     progress_updated = pyqtSignal(str, int)
-    initialization_completed = pyqtSignal(dict)
+    initialization_completed = pyqtSignal(object)
     initialization_failed = pyqtSignal(str)
     
     def __init__(self, db_path=None):
@@ -99,97 +96,80 @@ class InitializationThread(QThread):
     def run(self):
         """Ejecutar inicialización MVC en hilo separado"""
         try:
-            managers = {}
+            managers = ServiceRegistry(profiler=startup_profiler)
             
             # 1. Inicializar base de datos
             self.progress_updated.emit("Inicializando base de datos...", 10)
-            db_manager = DatabaseManager(self.db_path)
+            with startup_profiler.measure("DatabaseManager", "base_de_datos"):
+                db_manager = DatabaseManager(self.db_path)
             managers['database'] = db_manager
+            if settings.get('database.optimize_on_startup', True):
+                # Primera revisión de VACUUM/ANALYZE unos minutos después del inicio
+                db_manager.maintenance.start(delay=300)
             
-            # 2. Inicializar managers principales
+            # 2. Inicializar managers necesarios para vender
             self.progress_updated.emit("Inicializando gestores principales...", 20)
             
             # User Manager
-            managers['user'] = UserManager(db_manager)
+            managers.register('user', lambda: UserManager(db_manager), lazy=False)
             self.progress_updated.emit("Gestor de usuarios listo", 25)
             
             # Product Manager
-            managers['product'] = ProductManager(db_manager)
+            managers.register('product', lambda: ProductManager(db_manager), lazy=False)
+            with startup_profiler.measure("product.warm_cache", "base_de_datos"):
+                managers['product'].warm_cache()
             self.progress_updated.emit("Gestor de productos listo", 30)
             
             # Customer Manager
-            managers['customer'] = CustomerManager(db_manager)
+            managers.register('customer', lambda: CustomerManager(db_manager), lazy=False)
             self.progress_updated.emit("Gestor de clientes listo", 35)
             
             # Financial Manager
-            managers['financial'] = FinancialManager(db_manager)
+            managers.register('financial', lambda: FinancialManager(db_manager), lazy=False)
             self.progress_updated.emit("Gestor financiero listo", 38)
             
             # Sales Manager
-            managers['sales'] = SalesManager(db_manager, managers['product'], managers['financial'])
+            managers.register('sales', lambda: SalesManager(db_manager, managers['product'], managers['financial']),
+                              lazy=False)
             self.progress_updated.emit("Gestor de ventas listo", 40)
             
-            # Purchase Manager  
-            managers['purchase'] = PurchaseManager(db_manager, managers['product'])
-            self.progress_updated.emit("Gestor de compras listo", 45)
-            
-            # Provider Manager
-            managers['provider'] = ProviderManager(db_manager)
-            self.progress_updated.emit("Gestor de proveedores listo", 47)
-            
-            # Inventory Manager
-            managers['inventory'] = InventoryManager(db_manager)
-            self.progress_updated.emit("Gestor de inventario listo", 48)
-            
-            # Report Manager
-            managers['report'] = ReportManager(db_manager)
-            self.progress_updated.emit("Gestor de reportes listo", 49)
-            
-            # 3. Inicializar managers avanzados
-            self.progress_updated.emit("Inicializando gestores avanzados...", 50)
-            
-            # Advanced Customer Manager
-            try:
-                managers['advanced_customer'] = AdvancedCustomerManager(db_manager)
-                self.progress_updated.emit("CRM avanzado listo", 55)
-            except Exception as e:
-                self.logger.warning(f"CRM avanzado no disponible: {e}")
-            
-            # Enterprise User Manager
-            try:
-                managers['enterprise_user'] = EnterpriseUserManager(db_manager)
-                self.progress_updated.emit("Gestión empresarial lista", 60)
-            except Exception as e:
-                self.logger.warning(f"Gestión empresarial no disponible: {e}")
-            
-            # Predictive Analysis Manager
-            try:
-                managers['predictive_analysis'] = PredictiveAnalysisManager(db_manager)
-                self.progress_updated.emit("Análisis predictivo listo", 65)
-            except Exception as e:
-                self.logger.warning(f"Análisis predictivo no disponible: {e}")
-            
-            # Communication Manager
-            try:
-                managers['communication'] = CommunicationManager(db_manager)
-                self.progress_updated.emit("Gestor de comunicaciones listo", 70)
-            except Exception as e:
-                self.logger.warning(f"Comunicaciones no disponibles: {e}")
-            
-            # 4. Inicializar utilidades
-            self.progress_updated.emit("Inicializando utilidades del sistema...", 75)
-            
-            # Backup Manager
-            managers['backup'] = BackupManager(db_manager.db_path)
-            self.progress_updated.emit("Sistema de backup listo", 80)
-            
-            # Notification Manager
-            managers['notification'] = NotificationManager()
-            self.progress_updated.emit("Sistema de notificaciones listo", 85)
-            
-            # Style Manager
-            managers['style'] = StyleManager()
-            self.progress_updated.emit("Gestor de estilos listo", 90)
+            # Backup Manager (programa el backup automático al construirse)
+            managers.register('backup', lambda: BackupManager(db_manager.db_path), lazy=False)
+            self.progress_updated.emit("Sistema de backup listo", 50)
+            
+            # 3. Registrar managers que se construyen en el primer uso
+            self.progress_updated.emit("Registrando gestores adicionales...", 60)
+            
+            managers.register('purchase', deferred(
+                'managers.purchase_manager:PurchaseManager', db_manager, managers['product']))
+            managers.register('provider', deferred('managers.provider_manager:ProviderManager', db_manager))
+            managers.register('inventory', deferred('managers.inventory_manager:InventoryManager', db_manager))
+            managers.register('report', deferred('managers.report_manager:ReportManager', db_manager))
+            managers.register('dashboard_metrics', deferred(
+                'managers.dashboard_metrics:DashboardMetricsService', db_manager))
+            managers.register('report_jobs', lambda: deferred(
+                'managers.report_job_manager:ReportJobManager', managers['report'])())
+            
+            # Managers avanzados: CRM, gestión empresarial, análisis predictivo, comunicaciones
+            managers.register('advanced_customer', deferred(
+                'managers.advanced_customer_manager:AdvancedCustomerManager', db_manager))
+            managers.register('enterprise_user', lambda: deferred(
+                'managers.enterprise_user_manager:EnterpriseUserManager', db_manager,
+                managers['user'].permissions)())
+            # Copia columnar de ventas para análisis; primera actualización a los 10 minutos
+            managers.register('analytics_snapshot', deferred(
+                'managers.analytics_snapshot:AnalyticsSnapshot', db_manager), lazy=False)
+            managers['analytics_snapshot'].start(delay=600)
+            managers.register('predictive_analysis', lambda: deferred(
+                'managers.predictive_analysis_manager:PredictiveAnalysisManager', db_manager,
+                managers['analytics_snapshot'])())
+            managers.register('communication', deferred(
+                'managers.communication_manager:CommunicationManager', db_manager))
+            
+            # 4. Utilidades de interfaz (se construyen en el hilo de la UI al usarse)
+            managers.register('notification', deferred('utils.notifications:NotificationManager'))
+            managers.register('style', deferred('utils.style_manager:StyleManager'))
+            self.progress_updated.emit("Gestores adicionales registrados", 90)
             
             # 5. Verificación final
             self.progress_updated.emit("Verificando integridad del sistema...", 95)
@@ -316,10 +296,11 @@ class AlmacenProApp:
         """Mostrar ventana principal MVC"""
         try:
             # Usar MainController MVC en lugar de MainWindow directo
-            self.main_controller = MainController(
-                managers=self.managers,
-                current_user=self.current_user
-            )
+            with startup_profiler.measure("MainController", "widgets"):
+                self.main_controller = MainController(
+                    managers=self.managers,
+                    current_user=self.current_user
+                )
             
             # Configurar eventos de aplicación MVC
             if hasattr(self.main_controller, 'logout_requested'):
@@ -330,6 +311,9 @@ class AlmacenProApp:
             self.main_controller.show()
             self.logger.info("Ventana principal MVC mostrada exitosamente")
             
+            if startup_profiler.enabled:
+                self.report_startup_profile()
+            
         except Exception as e:
             self.logger.error(f"Error mostrando ventana principal MVC: {e}")
             QMessageBox.critical(
@@ -349,6 +333,16 @@ class AlmacenProApp:
         self.current_user = None
         self.show_login()
     
+    def report_startup_profile(self):
+        """Mostrar el desglose de tiempos de arranque (--profile-startup)"""
+        report = startup_profiler.report()
+        pending = self.managers.pending() if hasattr(self.managers, 'pending') else []
+        if pending:
+            report += f"\n\nManagers sin construir: {', '.join(pending)}"
+        
+        self.logger.info("\n" + report)
+        print(report)
+    
     def handle_exit(self):
         """Manejar salida de la aplicación MVC"""
         self.logger.info("Cerrando aplicación MVC")
@@ -496,6 +490,10 @@ class AlmacenProApp:
 def main():
     """Función principal"""
     try:
+        if '--profile-startup' in sys.argv:
+            sys.argv.remove('--profile-startup')
+            startup_profiler.enable(origin=_PROCESS_START)
+        
         app = AlmacenProApp()
         return app.run()
         
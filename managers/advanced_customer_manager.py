@@ -402,21 +402,24 @@ class AdvancedCustomerManager:
     def calculate_customer_clv(self, customer_id: int, prediction_months: int = 12) -> Dict:
         """Calcular Customer Lifetime Value (CLV)"""
         try:
-            # Obtener datos históricos del cliente
+            # Características precalculadas del cliente (customer_features)
             customer_data_query = """
                 SELECT 
                     c.id,
                     c.nombre,
-                    c.created_at,
-                    COUNT(v.id) as total_purchases,
-                    COALESCE(SUM(v.total), 0) as total_spent,
-                    COALESCE(AVG(v.total), 0) as avg_order_value,
-                    MIN(v.fecha_venta) as first_purchase,
-                    MAX(v.fecha_venta) as last_purchase
+                    c.creado_en,
+                    COALESCE(f.cantidad_compras, 0) as total_purchases,
+                    COALESCE(f.monto_total, 0) as total_spent,
+                    COALESCE(f.ticket_promedio, 0) as avg_order_value,
+                    f.ticket_movil,
+                    f.intervalo_promedio,
+                    f.intervalo_movil,
+                    COALESCE(f.meses_con_compras, 0) as active_months,
+                    f.primera_compra as first_purchase,
+                    f.ultima_compra as last_purchase
                 FROM clientes c
-                LEFT JOIN ventas v ON c.id = v.customer_id
+                LEFT JOIN customer_features f ON f.cliente_id = c.id
                 WHERE c.id = ?
-                GROUP BY c.id
             """
             
             result = self.db.execute_query(customer_data_query, (customer_id,))
@@ -445,45 +448,16 @@ class AdvancedCustomerManager:
                 }
             
             # Calcular frecuencia de compra
-            first_purchase = customer['first_purchase']
-            last_purchase = customer['last_purchase']
-            
-            if first_purchase and last_purchase:
-                if isinstance(first_purchase, str):
-                    first_purchase = datetime.fromisoformat(first_purchase.replace('Z', '+00:00'))
-                if isinstance(last_purchase, str):
-                    last_purchase = datetime.fromisoformat(last_purchase.replace('Z', '+00:00'))
-                
-                customer_lifespan_days = (last_purchase - first_purchase).days or 1
-                purchase_frequency = total_purchases / (customer_lifespan_days / 30)  # Compras por mes
-            else:
-                customer_lifespan_days = 30
-                purchase_frequency = total_purchases
-            
-            # Obtener datos de compras por mes para calcular tendencias
-            monthly_purchases_query = """
-                SELECT 
-                    strftime('%Y-%m', fecha_venta) as month,
-                    COUNT(*) as purchases,
-                    SUM(total) as revenue
-                FROM ventas
-                WHERE customer_id = ?
-                GROUP BY strftime('%Y-%m', fecha_venta)
-                ORDER BY month DESC
-                LIMIT 12
-            """
-            
-            monthly_data = self.db.execute_query(monthly_purchases_query, (customer_id,))
-            
-            # Calcular tendencia de compras
-            if len(monthly_data) >= 3:
-                recent_months = [dict(row)['revenue'] for row in monthly_data[:3]]
-                older_months = [dict(row)['revenue'] for row in monthly_data[3:6]] if len(monthly_data) >= 6 else [0]
-                
-                recent_avg = statistics.mean(recent_months) if recent_months else 0
-                older_avg = statistics.mean(older_months) if older_months else recent_avg
-                
-                trend_factor = recent_avg / older_avg if older_avg > 0 else 1.0
+            first_purchase = datetime.fromisoformat(customer['first_purchase'])
+            last_purchase = datetime.fromisoformat(customer['last_purchase'])
+            customer_lifespan_days = (last_purchase - first_purchase).days or 1
+            purchase_frequency = total_purchases / (customer_lifespan_days / 30)  # Compras por mes
+            
+            # Tendencia: gasto por día reciente (promedios móviles) contra el histórico
+            if total_purchases >= 3 and customer['intervalo_promedio'] and customer['intervalo_movil']:
+                recent_rate = float(customer['ticket_movil']) / max(customer['intervalo_movil'], 1.0)
+                overall_rate = avg_order_value / max(customer['intervalo_promedio'], 1.0)
+                trend_factor = recent_rate / overall_rate if overall_rate > 0 else 1.0
                 trend_factor = max(0.5, min(2.0, trend_factor))  # Limitar entre 0.5 y 2.0
             else:
                 trend_factor = 1.0
@@ -496,7 +470,7 @@ class AdvancedCustomerManager:
             predicted_clv = monthly_value * prediction_months
             
             # Calcular confianza basada en cantidad de datos
-            confidence = min(95, 20 + (total_purchases * 5) + (len(monthly_data) * 10))
+            confidence = min(95, 20 + (total_purchases * 5) + (min(customer['active_months'], 12) * 10))
             
             # Obtener satisfacción promedio para ajustar predicción
             satisfaction_query = """
@@ -508,8 +482,8 @@ class AdvancedCustomerManager:
             satisfaction_result = self.db.execute_query(satisfaction_query, (customer_id,))
             avg_satisfaction = 5.0  # Default
             
-            if satisfaction_result and satisfaction_result[0][0]:
-                avg_satisfaction = float(satisfaction_result[0][0])
+            if satisfaction_result and satisfaction_result[0]['avg_satisfaction']:
+                avg_satisfaction = float(satisfaction_result[0]['avg_satisfaction'])
             
             # Ajustar predicción por satisfacción
             satisfaction_factor = avg_satisfaction / 5.0  # Normalizar a 0-2
@@ -770,57 +744,43 @@ class AdvancedCustomerManager:
     def predict_customer_churn(self, customer_id: int = None) -> Dict:
         """Predecir riesgo de abandono de clientes"""
         try:
+            # Métricas de todos los clientes en una consulta (compras desde customer_features)
+            metrics_query = """
+                SELECT 
+                    c.id,
+                    c.nombre,
+                    COALESCE(f.cantidad_compras, 0) as total_purchases,
+                    COALESCE(f.ultima_compra, c.creado_en) as last_activity,
+                    COALESCE(f.ticket_promedio, 0) as avg_order_value,
+                    COALESCE(f.monto_total, 0) as total_spent,
+                    COALESCE((SELECT AVG(ss.overall_score) FROM satisfaction_surveys ss
+                              WHERE ss.customer_id = c.id), 5.0) as avg_satisfaction,
+                    (SELECT COUNT(*) FROM customer_support cs_support
+                     WHERE cs_support.customer_id = c.id) as support_tickets
+                FROM clientes c
+                LEFT JOIN customer_features f ON f.cliente_id = c.id
+                WHERE c.activo = 1
+            """
+            
             # Si se especifica un cliente, analizar solo ese
             if customer_id:
-                customers_query = """
-                    SELECT id FROM clientes WHERE id = ? AND activo = 1
-                """
-                customers_result = self.db.execute_query(customers_query, (customer_id,))
-                customer_ids = [customer_id] if customers_result else []
+                metrics_result = self.db.execute_query(metrics_query + " AND c.id = ?", (customer_id,))
             else:
-                # Analizar todos los clientes activos
-                customers_query = """
-                    SELECT id FROM clientes WHERE activo = 1
-                """
-                customers_result = self.db.execute_query(customers_query)
-                customer_ids = [row[0] for row in customers_result] if customers_result else []
+                metrics_result = self.db.execute_query(metrics_query)
             
             churn_predictions = []
             
-            for cid in customer_ids:
-                # Obtener métricas del cliente
-                metrics_query = """
-                    SELECT 
-                        c.id,
-                        c.nombre,
-                        COUNT(v.id) as total_purchases,
-                        COALESCE(MAX(v.fecha_venta), c.created_at) as last_activity,
-                        COALESCE(AVG(v.total), 0) as avg_order_value,
-                        COALESCE(SUM(v.total), 0) as total_spent,
-                        COALESCE(AVG(ss.overall_score), 5.0) as avg_satisfaction,
-                        COUNT(cs_support.id) as support_tickets
-                    FROM clientes c
-                    LEFT JOIN ventas v ON c.id = v.customer_id
-                    LEFT JOIN satisfaction_surveys ss ON c.id = ss.customer_id
-                    LEFT JOIN customer_support cs_support ON c.id = cs_support.customer_id
-                    WHERE c.id = ?
-                    GROUP BY c.id
-                """
-                
-                metrics_result = self.db.execute_query(metrics_query, (cid,))
-                if not metrics_result:
-                    continue
-                
-                metrics = dict(metrics_result[0])
+            for metrics in metrics_result:
+                cid = metrics['id']
                 
                 # Calcular factores de riesgo
                 current_date = datetime.now()
                 last_activity = metrics['last_activity']
                 
                 if isinstance(last_activity, str):
-                    last_activity = datetime.fromisoformat(last_activity.replace('Z', '+00:00'))
+                    last_activity = datetime.fromisoformat(last_activity.replace('Z', ''))
                 
-                days_inactive = (current_date - last_activity).days
+                days_inactive = (current_date - last_activity).days if last_activity else 0
                 
                 # Modelo simple de predicción de churn
                 risk_score = 0
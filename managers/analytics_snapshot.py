@@ -0,0 +1,608 @@
+"""
+Instantánea Columnar para Análisis de AlmacénPro
+Copia ventas, detalle_ventas, productos y clientes a archivos por columna
+(arrays binarios de ancho fijo, mapeables en memoria y legibles con NumPy o
+Arrow) para que los análisis pesados no hagan GROUP BY sobre la base de la caja
+
+Estructura en disco:
+    <ruta>/manifest.json                      filas, último id, generación, columnas y diccionarios
+    <ruta>/<tabla>/<generación>/<columna>.bin valores little-endian ('q' int64, 'd' float64, 'i' int32)
+
+Una tabla que se reescribe completa (las dimensiones en cada actualización)
+pasa a una generación nueva en archivos propios y se publica al reemplazar el
+manifiesto; los lectores que tengan mapeada la generación anterior siguen
+leyendo sus archivos, que se borran en una actualización posterior.
+
+Los textos se guardan codificados con diccionario (código int32 + lista de
+valores en el manifiesto). Los enteros nulos se guardan como 0, los importes
+nulos como NaN y las fechas como segundos desde 1970 (0 si faltan).
+
+Solo ``PredictiveAnalysisManager.analyze_seasonal_trends`` lee la instantánea;
+la segmentación usa customer_features y el resto de los análisis consulta la base.
+
+Actualización manual:
+    python -m managers.analytics_snapshot [--db data/almacen_pro.db] [--ruta data/analytics]
+"""
+
+import argparse
+import bisect
+import json
+import logging
+import mmap
+import os
+import shutil
+import sys
+import threading
+from array import array
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from managers.sales_rollup_manager import sales_column_expressions
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+SNAPSHOT_FORMAT_VERSION = 2
+
+# Tipo lógico -> código de array
+TYPECODES = {'int': 'q', 'float': 'd', 'timestamp': 'q', 'category': 'i'}
+
+# Expresión SQL para segundos desde 1970 (la fecha local se toma tal cual)
+def _epoch(column: str) -> str:
+    return f"CAST(strftime('%s', {column}) AS INTEGER)"
+
+def snapshot_tables(expressions: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+    """Definición de las tablas copiadas
+
+    Las tablas incrementales (hechos) solo agregan filas con id mayor al último
+    copiado; las dimensiones se reescriben completas en cada actualización.
+    """
+    return {
+        'ventas': {
+            'incremental': True,
+            'columns': [('id', 'int'), ('fecha_venta', 'timestamp'), ('cliente_id', 'int'),
+                        ('usuario_id', 'int'), ('caja_id', 'int'), ('subtotal', 'float'),
+                        ('descuentos', 'float'), ('impuestos', 'float'), ('total', 'float'),
+                        ('estado', 'category')],
+            'query': f"""
+                SELECT v.id, {_epoch('v.fecha_venta')}, v.cliente_id, v.usuario_id, v.caja_id,
+                       v.subtotal, {expressions['descuentos']}, {expressions['impuestos']}, v.total, v.estado
+                FROM ventas v
+                WHERE v.id > ?
+                ORDER BY v.id
+            """
+        },
+        'detalle_ventas': {
+            'incremental': True,
+            'columns': [('id', 'int'), ('venta_id', 'int'), ('producto_id', 'int'),
+                        ('fecha_venta', 'timestamp'), ('cantidad', 'float'),
+                        ('precio_unitario', 'float'), ('importe', 'float')],
+            'query': f"""
+                SELECT dv.id, dv.venta_id, dv.producto_id, {_epoch('v.fecha_venta')},
+                       dv.cantidad, dv.precio_unitario, {expressions['importe']}
+                FROM detalle_ventas dv
+                INNER JOIN ventas v ON dv.venta_id = v.id
+                WHERE dv.id > ?
+                ORDER BY dv.id
+            """
+        },
+        'productos': {
+            'incremental': False,
+            'columns': [('id', 'int'), ('nombre', 'category'), ('categoria_id', 'int'),
+                        ('precio_compra', 'float'), ('precio_venta', 'float'),
+                        ('stock_actual', 'float'), ('stock_minimo', 'float'), ('activo', 'int')],
+            'query': """
+                SELECT id, nombre, categoria_id, precio_compra, precio_venta,
+                       stock_actual, stock_minimo, activo
+                FROM productos
+                WHERE id > ?
+                ORDER BY id
+            """
+        },
+        'clientes': {
+            'incremental': False,
+            'columns': [('id', 'int'), ('nombre', 'category'), ('apellido', 'category'),
+                        ('limite_credito', 'float'), ('descuento_porcentaje', 'float'),
+                        ('activo', 'int'), ('creado_en', 'timestamp')],
+            'query': f"""
+                SELECT id, nombre, apellido, limite_credito, descuento_porcentaje,
+                       activo, {_epoch('creado_en')}
+                FROM clientes
+                WHERE id > ?
+                ORDER BY id
+            """
+        }
+    }
+
+class SnapshotTable:
+    """Lectura de una tabla de la instantánea
+
+    ``column()`` retorna un ``numpy.memmap`` si NumPy está instalado, o un
+    ``memoryview`` tipado sobre el archivo mapeado en memoria en caso contrario.
+    En ambos casos no se copia el archivo completo a memoria.
+    """
+
+    def __init__(self, directory: Path, name: str, meta: Dict[str, Any]):
+        self.directory = directory
+        self.name = name
+        self.meta = meta
+        self.rows = int(meta['rows'])
+        self._kinds = {column['name']: column['kind'] for column in meta['columns']}
+        self._maps: List[mmap.mmap] = []
+        self._cache: Dict[str, Any] = {}
+
+    def __len__(self) -> int:
+        return self.rows
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._kinds)
+
+    def column(self, name: str):
+        """Valores de la columna (códigos int32 para columnas de texto)"""
+        if name not in self._kinds:
+            raise KeyError(f"Columna desconocida en {self.name}: {name}")
+        if name in self._cache:
+            return self._cache[name]
+
+        typecode = TYPECODES[self._kinds[name]]
+        path = self.directory / f"{name}.bin"
+        if NUMPY_AVAILABLE:
+            dtype = np.dtype(typecode).newbyteorder('<')
+            values = np.memmap(path, dtype=dtype, mode='r', shape=(self.rows,)) if self.rows else np.empty(0, dtype)
+        elif self.rows:
+            with open(path, 'rb') as handle:
+                mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps.append(mapped)
+            values = memoryview(mapped).cast(typecode)[:self.rows]
+        else:
+            values = memoryview(array(typecode))
+
+        self._cache[name] = values
+        return values
+
+    def dictionary(self, name: str) -> List[str]:
+        """Valores de una columna de texto en el orden de sus códigos"""
+        return self.meta.get('dictionaries', {}).get(name, [])
+
+    def decode(self, name: str, codes: Iterable[int] = None) -> List[Optional[str]]:
+        """Convertir códigos de una columna de texto a sus valores"""
+        values = self.dictionary(name)
+        codes = self.column(name) if codes is None else codes
+        return [values[code] if code >= 0 else None for code in codes]
+
+    def code(self, name: str, value: str) -> int:
+        """Código de un valor de texto (-2 si no aparece en la tabla)"""
+        values = self.dictionary(name)
+        return values.index(value) if value in values else -2
+
+    def close(self):
+        """Liberar los mapeos de memoria"""
+        self._cache.clear()
+        for mapped in self._maps:
+            try:
+                mapped.close()
+            except (BufferError, ValueError):
+                pass
+        self._maps.clear()
+
+class AnalyticsSnapshot:
+    """Exportación periódica e incremental a formato columnar y API de lectura"""
+
+    def __init__(self, db_manager, path: str = None, interval: float = None):
+        # Import here to avoid circular imports
+        from config.settings import settings
+
+        self.db = db_manager
+        self.path = Path(path or settings.get('database.analytics_snapshot_path', 'data/analytics'))
+        self.interval = float(interval or settings.get('database.analytics_snapshot_interval', 3600))
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._tables: Optional[Dict[str, Dict[str, Any]]] = None
+
+    # Manifiesto
+    @property
+    def manifest_path(self) -> Path:
+        return self.path / 'manifest.json'
+
+    def load_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as handle:
+                manifest = json.load(handle)
+            if manifest.get('version') == SNAPSHOT_FORMAT_VERSION:
+                return manifest
+            self.logger.info("Formato de instantánea anterior, se regenera completa")
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Manifiesto de instantánea ilegible, se regenera: {e}")
+        return {'version': SNAPSHOT_FORMAT_VERSION, 'tables': {}}
+
+    def _save_manifest(self, manifest: Dict[str, Any]):
+        """Escribir el manifiesto de forma atómica (los lectores ven filas ya escritas)"""
+        temp_path = self.manifest_path.with_suffix('.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as handle:
+            json.dump(manifest, handle, ensure_ascii=False)
+        os.replace(temp_path, self.manifest_path)
+
+    def is_available(self) -> bool:
+        """Hay una instantánea con ventas para analizar"""
+        return bool(self.load_manifest()['tables'].get('ventas', {}).get('rows'))
+
+    # Escritura
+    def _get_tables(self) -> Dict[str, Dict[str, Any]]:
+        if self._tables is None:
+            self._tables = snapshot_tables(sales_column_expressions(self.db))
+        return self._tables
+
+    def table_directory(self, name: str, meta: Dict[str, Any]) -> Path:
+        """Directorio con los archivos de la generación vigente de una tabla"""
+        return self.path / name / str(meta['generation'])
+
+    def refresh(self, tables: Sequence[str] = None) -> Dict[str, int]:
+        """Copiar las filas nuevas de cada tabla
+
+        Returns:
+            Diccionario tabla -> filas agregadas (o escritas, en tablas completas)
+        """
+        with self._lock:
+            self.path.mkdir(parents=True, exist_ok=True)
+            manifest = self.load_manifest()
+            definitions = self._get_tables()
+            written = {}
+
+            # Antes de copiar: un cambio posterior se aplica en la próxima actualización
+            last_state_change = self._last_state_change()
+
+            for name in tables or definitions:
+                definition = definitions[name]
+                meta = manifest['tables'].get(name)
+                if not definition['incremental'] or not self._matches(meta, definition):
+                    meta = self._reset_table(name, definition, meta)
+                    if name == 'ventas':
+                        meta['last_state_change'] = last_state_change
+                written[name] = self._append(name, definition, meta)
+                manifest['tables'][name] = meta
+
+            if 'ventas' in written:
+                written['estados_actualizados'] = self._sync_sale_states(manifest['tables']['ventas'])
+
+            manifest['updated_at'] = datetime.now().isoformat(timespec='seconds')
+            self._save_manifest(manifest)
+
+            for name, meta in manifest['tables'].items():
+                self._remove_old_generations(name, meta['generation'])
+
+        self.logger.info(f"Instantánea de análisis actualizada: {written}")
+        return written
+
+    @staticmethod
+    def _matches(meta: Optional[Dict], definition: Dict) -> bool:
+        return bool(meta) and [(c['name'], c['kind']) for c in meta['columns']] == definition['columns']
+
+    def _reset_table(self, name: str, definition: Dict, previous: Optional[Dict] = None) -> Dict[str, Any]:
+        """Empezar una generación nueva y vacía de la tabla
+
+        Los archivos de la generación anterior no se tocan: pueden estar mapeados
+        por un lector hasta que el manifiesto nuevo los deje sin uso.
+        """
+        meta = {
+            'rows': 0,
+            'last_id': 0,
+            'generation': (previous or {}).get('generation', 0) + 1,
+            'columns': [{'name': column, 'kind': kind} for column, kind in definition['columns']],
+            'dictionaries': {column: [] for column, kind in definition['columns'] if kind == 'category'}
+        }
+        # Restos de una actualización interrumpida con el mismo número (nadie los lee)
+        directory = self.table_directory(name, meta)
+        shutil.rmtree(directory, ignore_errors=True)
+        directory.mkdir(parents=True, exist_ok=True)
+        for column, _ in definition['columns']:
+            open(directory / f"{column}.bin", 'wb').close()
+        return meta
+
+    def _remove_old_generations(self, name: str, generation: int):
+        """Borrar generaciones sin uso (en Windows falla si siguen mapeadas; se reintenta luego)"""
+        for entry in (self.path / name).iterdir():
+            if entry.name == str(generation):
+                continue
+            if entry.is_dir():
+                shutil.rmtree(entry, ignore_errors=True)
+            else:
+                try:
+                    entry.unlink()  # Archivos del formato anterior
+                except OSError:
+                    pass
+
+    def _append(self, name: str, definition: Dict, meta: Dict[str, Any]) -> int:
+        """Agregar al final de cada archivo las filas con id mayor al último copiado"""
+        directory = self.table_directory(name, meta)
+        columns = definition['columns']
+        dictionaries = meta['dictionaries']
+        lookups = {column: {value: code for code, value in enumerate(values)}
+                   for column, values in dictionaries.items()}
+
+        handles = [open(directory / f"{column}.bin", 'ab') for column, _ in columns]
+        added = 0
+        try:
+            # Truncar restos de una actualización interrumpida antes del manifiesto
+            for handle, (column, kind) in zip(handles, columns):
+                handle.truncate(meta['rows'] * array(TYPECODES[kind]).itemsize)
+
+            for batch in self.db.iter_batches(definition['query'], (meta['last_id'],), row_type='tuple'):
+                for index, (handle, (column, kind)) in enumerate(zip(handles, columns)):
+                    values = [row[index] for row in batch]
+                    if kind == 'category':
+                        values = [self._encode(value, lookups[column], dictionaries[column]) for value in values]
+                    elif kind == 'float':
+                        values = [float('nan') if value is None else float(value) for value in values]
+                    else:
+                        values = [0 if value is None else int(value) for value in values]
+                    data = array(TYPECODES[kind], values)
+                    if sys.byteorder != 'little':
+                        data.byteswap()
+                    data.tofile(handle)
+
+                added += len(batch)
+                meta['last_id'] = batch[-1][0]
+        finally:
+            for handle in handles:
+                handle.close()
+
+        meta['rows'] += added
+        return added
+
+    @staticmethod
+    def _encode(value, lookup: Dict[str, int], values: List[str]) -> int:
+        if value is None:
+            return -1
+        value = str(value)
+        code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(values)
+            values.append(value)
+        return code
+
+    def _last_state_change(self) -> int:
+        row = self.db.execute_single("SELECT COALESCE(MAX(id), 0) AS id FROM ventas_cambios_estado")
+        return int(row['id']) if row else 0
+
+    def _sync_sale_states(self, meta: Dict[str, Any]) -> int:
+        """Actualizar en el lugar el estado de ventas ya copiadas
+
+        Se leen los cambios registrados en ventas_cambios_estado desde la última
+        actualización (cancelaciones y también ventas que vuelven a COMPLETADA).
+        """
+        rows = self.db.execute_query(
+            "SELECT id, venta_id, estado FROM ventas_cambios_estado WHERE id > ? ORDER BY id",
+            (meta['last_state_change'],)
+        )
+        if not rows:
+            return 0
+        meta['last_state_change'] = rows[-1]['id']
+
+        # Vale el último estado de cada venta
+        changes = {row['venta_id']: row['estado'] for row in rows}
+        if not meta['rows']:
+            return 0
+        directory = self.table_directory('ventas', meta)
+
+        lookup = {value: code for code, value in enumerate(meta['dictionaries']['estado'])}
+        with open(directory / 'id.bin', 'rb') as handle:
+            ids = array('q')
+            ids.fromfile(handle, meta['rows'])
+        if sys.byteorder != 'little':
+            ids.byteswap()
+
+        updated = 0
+        itemsize = array('i').itemsize
+        with open(directory / 'estado.bin', 'r+b') as handle:
+            for sale_id, estado in changes.items():
+                position = bisect.bisect_left(ids, sale_id)
+                if position >= len(ids) or ids[position] != sale_id:
+                    continue
+                code = array('i', [self._encode(estado, lookup, meta['dictionaries']['estado'])])
+                handle.seek(position * itemsize)
+                current = array('i')
+                current.fromfile(handle, 1)
+                if sys.byteorder != 'little':
+                    code.byteswap()
+                    current.byteswap()
+                if current[0] != code[0]:
+                    handle.seek(position * itemsize)
+                    code.tofile(handle)
+                    updated += 1
+        return updated
+
+    # Lectura
+    def table(self, name: str) -> SnapshotTable:
+        """Abrir una tabla de la instantánea para lectura"""
+        meta = self.load_manifest()['tables'].get(name)
+        if meta is None:
+            raise KeyError(f"La instantánea no tiene la tabla {name}")
+        return SnapshotTable(self.table_directory(name, meta), name, meta)
+
+    def monthly_sales(self, since: int = 0, estado: str = 'COMPLETADA') -> List[Dict[str, Any]]:
+        """Ventas agrupadas por mes leyendo solo la instantánea
+
+        Args:
+            since: Segundos desde 1970 de la primera fecha incluida
+            estado: Estado de las ventas a considerar
+
+        Returns:
+            Filas con year, month, transaction_count, total_revenue, avg_ticket,
+            unique_customers y unique_products (misma forma que la consulta SQL)
+        """
+        ventas, detalle = self.table('ventas'), self.table('detalle_ventas')
+        try:
+            fechas, estados = ventas.column('fecha_venta'), ventas.column('estado')
+            code = ventas.code('estado', estado)
+            keys = month_keys(fechas)
+            if NUMPY_AVAILABLE:
+                selected = (np.asarray(fechas) >= since) & (np.asarray(estados) == code)
+                clientes = np.asarray(ventas.column('cliente_id'))
+                sale_ids = np.asarray(ventas.column('id'))
+                line_sales = np.asarray(detalle.column('venta_id'))
+                positions = np.clip(np.searchsorted(sale_ids, line_sales), 0, max(len(sale_ids) - 1, 0))
+                line_selected = selected[positions] & (sale_ids[positions] == line_sales) \
+                    if len(sale_ids) else np.zeros(len(line_sales), dtype=bool)
+                customers = count_distinct(keys, clientes, selected & (clientes != 0))
+            else:
+                selected = [fecha >= since and state == code for fecha, state in zip(fechas, estados)]
+                clientes = ventas.column('cliente_id')
+                valid_sales = {sale_id for sale_id, ok in zip(ventas.column('id'), selected) if ok}
+                line_selected = [sale_id in valid_sales for sale_id in detalle.column('venta_id')]
+                customers = count_distinct(keys, clientes,
+                                           [ok and cliente != 0 for ok, cliente in zip(selected, clientes)])
+
+            totals = group_sum(keys, ventas.column('total'), selected)
+            products = count_distinct(month_keys(detalle.column('fecha_venta')),
+                                      detalle.column('producto_id'), line_selected)
+
+            return [{
+                'year': f"{key // 100:04d}",
+                'month': f"{key % 100:02d}",
+                'transaction_count': count,
+                'total_revenue': total,
+                'avg_ticket': total / count if count else 0,
+                'unique_customers': customers.get(key, 0),
+                'unique_products': products.get(key, 0)
+            } for key, (count, total) in sorted(totals.items())]
+        finally:
+            ventas.close()
+            detalle.close()
+
+    def get_status(self) -> Dict[str, Any]:
+        manifest = self.load_manifest()
+        return {
+            'path': str(self.path),
+            'updated_at': manifest.get('updated_at'),
+            'numpy': NUMPY_AVAILABLE,
+            'tables': {name: {'rows': meta['rows'], 'last_id': meta['last_id']}
+                       for name, meta in manifest['tables'].items()}
+        }
+
+    # Programación
+    def start(self, delay: float = None):
+        """Programar la próxima actualización en segundo plano"""
+        try:
+            self.stop()
+            self._timer = threading.Timer(self.interval if delay is None else delay, self._scheduled_refresh)
+            self._timer.daemon = True
+            self._timer.start()
+        except Exception as e:
+            self.logger.error(f"Error programando la instantánea de análisis: {e}")
+
+    def stop(self):
+        """Cancelar la actualización programada"""
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+
+    def _scheduled_refresh(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            self.logger.warning(f"Error actualizando la instantánea de análisis: {e}")
+        finally:
+            self.start()
+
+# Agregación vectorizada
+def group_sum(keys: Sequence[int], values: Sequence[float] = None,
+              mask: Sequence[bool] = None) -> Dict[int, Tuple[int, float]]:
+    """Cantidad y suma de ``values`` por clave entera
+
+    Con NumPy usa ``np.unique`` + ``np.bincount``; sin NumPy recorre las columnas
+    una vez en Python.
+
+    Returns:
+        Diccionario clave -> (cantidad, suma)
+    """
+    if NUMPY_AVAILABLE:
+        keys = np.asarray(keys)
+        weights = np.asarray(values, dtype=float) if values is not None else None
+        if mask is not None:
+            mask = np.asarray(mask, dtype=bool)
+            keys = keys[mask]
+            weights = weights[mask] if weights is not None else None
+        if not len(keys):
+            return {}
+        unique, inverse = np.unique(keys, return_inverse=True)
+        counts = np.bincount(inverse, minlength=len(unique))
+        sums = np.bincount(inverse, weights=np.nan_to_num(weights), minlength=len(unique)) \
+            if weights is not None else counts.astype(float)
+        return {int(key): (int(count), float(total)) for key, count, total in zip(unique, counts, sums)}
+
+    result: Dict[int, List] = {}
+    for index, key in enumerate(keys):
+        if mask is not None and not mask[index]:
+            continue
+        value = values[index] if values is not None else 1.0
+        entry = result.setdefault(int(key), [0, 0.0])
+        entry[0] += 1
+        entry[1] += value if value == value else 0.0  # NaN cuenta como 0
+    return {key: (count, total) for key, (count, total) in result.items()}
+
+def count_distinct(keys: Sequence[int], values: Sequence[int],
+                   mask: Sequence[bool] = None) -> Dict[int, int]:
+    """Cantidad de valores distintos por clave (COUNT(DISTINCT ...) ... GROUP BY)"""
+    if NUMPY_AVAILABLE:
+        keys, values = np.asarray(keys, dtype='int64'), np.asarray(values, dtype='int64')
+        if mask is not None:
+            mask = np.asarray(mask, dtype=bool)
+            keys, values = keys[mask], values[mask]
+        if not len(keys):
+            return {}
+        pairs = np.unique(np.stack([keys, values], axis=1), axis=0)
+        unique, counts = np.unique(pairs[:, 0], return_counts=True)
+        return {int(key): int(count) for key, count in zip(unique, counts)}
+
+    seen = set()
+    for index, (key, value) in enumerate(zip(keys, values)):
+        if mask is None or mask[index]:
+            seen.add((int(key), int(value)))
+    return dict(Counter(key for key, _ in seen))
+
+def month_keys(timestamps: Sequence[int]):
+    """Clave AAAAMM (entero) de cada marca de tiempo en segundos"""
+    if NUMPY_AVAILABLE:
+        months = np.asarray(timestamps, dtype='int64').astype('datetime64[s]').astype('datetime64[M]').astype('int64')
+        return (1970 + months // 12) * 100 + months % 12 + 1
+    # Las fechas se guardaron sin zona: se leen como UTC para recuperar la fecha local
+    epoch = datetime(1970, 1, 1)
+    keys = []
+    for value in timestamps:
+        moment = epoch + timedelta(seconds=int(value))
+        keys.append(moment.year * 100 + moment.month)
+    return keys
+
+def main():
+    """Actualizar la instantánea desde la línea de comandos"""
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    from database.manager import DatabaseManager
+
+    parser = argparse.ArgumentParser(description="Actualizar la instantánea columnar de análisis")
+    parser.add_argument('--db', default=None, help="Ruta de la base (por defecto la de la configuración)")
+    parser.add_argument('--ruta', default=None, help="Directorio de la instantánea")
+    args = parser.parse_args()
+
+    db = DatabaseManager(args.db) if args.db else DatabaseManager()
+    try:
+        snapshot = AnalyticsSnapshot(db, args.ruta)
+        print(snapshot.refresh())
+        print(json.dumps(snapshot.get_status(), indent=2, ensure_ascii=False))
+    finally:
+        db.close_connection()
+
+if __name__ == '__main__':
+    main()
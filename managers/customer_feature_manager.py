@@ -0,0 +1,236 @@
+"""
+Características de Clientes para AlmacénPro
+Mantiene customer_features (un registro por cliente) con recency, frecuencia,
+monto, promedios móviles e intervalos entre compras, para que el CRM y los
+modelos de churn/CLV lean valores ya calculados en lugar de recorrer ventas
+
+Reconstrucción manual (por ejemplo luego de importar ventas):
+    python -m managers.customer_feature_manager [--cliente 42]
+"""
+
+import argparse
+import logging
+from datetime import datetime
+from itertools import groupby
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Peso de la última compra en los promedios móviles exponenciales
+FEATURE_SMOOTHING = 0.3
+
+FEATURE_COLUMNS = ('cliente_id', 'cantidad_compras', 'monto_total', 'ticket_promedio', 'ticket_maximo',
+                   'ticket_movil', 'primera_compra', 'ultima_compra', 'meses_con_compras',
+                   'suma_intervalos', 'suma_intervalos_cuadrados', 'intervalo_promedio',
+                   'intervalo_movil', 'ultimo_intervalo', 'ultima_venta_id')
+
+def add_purchase(features: Optional[Dict[str, Any]], customer_id: int, sale_id: int,
+                 fecha_venta: str, total: float) -> Dict[str, Any]:
+    """Incorporar una compra (posterior a las ya incluidas) a las características
+
+    Es la misma función para la actualización incremental y para la
+    reconstrucción completa, así ambas dan exactamente el mismo resultado.
+    """
+    total = float(total or 0)
+    if not features or not features.get('cantidad_compras'):
+        return {
+            'cliente_id': customer_id, 'cantidad_compras': 1, 'monto_total': total,
+            'ticket_promedio': total, 'ticket_maximo': total, 'ticket_movil': total,
+            'primera_compra': fecha_venta, 'ultima_compra': fecha_venta, 'meses_con_compras': 1,
+            'suma_intervalos': 0.0, 'suma_intervalos_cuadrados': 0.0, 'intervalo_promedio': None,
+            'intervalo_movil': None, 'ultimo_intervalo': None, 'ultima_venta_id': sale_id
+        }
+
+    count = features['cantidad_compras'] + 1
+    amount = features['monto_total'] + total
+    interval = (datetime.fromisoformat(fecha_venta) -
+                datetime.fromisoformat(features['ultima_compra'])).total_seconds() / 86400
+    interval_sum = features['suma_intervalos'] + interval
+    previous_interval = features['intervalo_movil']
+
+    return {
+        'cliente_id': customer_id,
+        'cantidad_compras': count,
+        'monto_total': amount,
+        'ticket_promedio': amount / count,
+        'ticket_maximo': max(features['ticket_maximo'], total),
+        'ticket_movil': FEATURE_SMOOTHING * total + (1 - FEATURE_SMOOTHING) * features['ticket_movil'],
+        'primera_compra': features['primera_compra'],
+        'ultima_compra': fecha_venta,
+        'meses_con_compras': features['meses_con_compras'] + (fecha_venta[:7] != features['ultima_compra'][:7]),
+        'suma_intervalos': interval_sum,
+        'suma_intervalos_cuadrados': features['suma_intervalos_cuadrados'] + interval * interval,
+        'intervalo_promedio': interval_sum / (count - 1),
+        'intervalo_movil': interval if previous_interval is None else
+            FEATURE_SMOOTHING * interval + (1 - FEATURE_SMOOTHING) * previous_interval,
+        'ultimo_intervalo': interval,
+        'ultima_venta_id': sale_id
+    }
+
+def fold_purchases(customer_id: int, purchases: Iterable[Tuple[int, str, float]]) -> Optional[Dict[str, Any]]:
+    """Características a partir de las compras (id, fecha, total) en orden cronológico"""
+    features = None
+    for sale_id, fecha_venta, total in purchases:
+        features = add_purchase(features, customer_id, sale_id, fecha_venta, total)
+    return features
+
+class CustomerFeatureManager:
+    """Mantenimiento y lectura de customer_features
+
+    ``apply_sale`` suma una venta completada nueva en O(1) a partir del registro
+    del cliente. Si la venta es anterior a la última compra registrada (carga
+    atrasada) o si cambia el estado de una venta ya incluida, ``refresh_customer``
+    recalcula ese cliente desde sus ventas. ``rebuild`` recalcula toda la tabla.
+    """
+
+    _PURCHASES_QUERY = """
+        SELECT cliente_id, id, fecha_venta, total
+        FROM ventas
+        WHERE estado = 'COMPLETADA' AND cliente_id IS NOT NULL {filter}
+        ORDER BY cliente_id, fecha_venta, id
+    """
+
+    def __init__(self, db_manager):
+        self.db = db_manager
+        self.logger = logging.getLogger(__name__)
+
+    # Escritura
+    def _save(self, rows: List[Dict[str, Any]]):
+        if rows:
+            self.db.execute_many(f"""
+                INSERT OR REPLACE INTO customer_features ({', '.join(FEATURE_COLUMNS)}, actualizado_en)
+                VALUES ({', '.join('?' for _ in FEATURE_COLUMNS)}, CURRENT_TIMESTAMP)
+            """, [tuple(row[column] for column in FEATURE_COLUMNS) for row in rows])
+
+    def apply_sale(self, sale_id: int):
+        """Sumar una venta recién registrada a las características de su cliente
+
+        Debe llamarse dentro de la transacción que registra la venta.
+        """
+        with self.db.transaction():
+            sale = self.db.execute_single(
+                "SELECT id, cliente_id, fecha_venta, total, estado FROM ventas WHERE id = ?", (sale_id,))
+            if not sale or not sale['cliente_id'] or sale['estado'] != 'COMPLETADA':
+                return
+
+            current = self.db.execute_single(
+                f"SELECT {', '.join(FEATURE_COLUMNS)} FROM customer_features WHERE cliente_id = ?",
+                (sale['cliente_id'],))
+            if current and current['ultima_venta_id'] == sale_id:
+                return
+            if current and (datetime.fromisoformat(sale['fecha_venta']) <
+                            datetime.fromisoformat(current['ultima_compra'])):
+                self.refresh_customer(sale['cliente_id'])
+                return
+
+            self._save([add_purchase(current, sale['cliente_id'], sale_id, sale['fecha_venta'], sale['total'])])
+
+    def refresh_customer(self, customer_id: int):
+        """Recalcular las características de un cliente desde sus ventas"""
+        with self.db.transaction():
+            purchases = self.db.execute_query(
+                self._PURCHASES_QUERY.format(filter="AND cliente_id = ?"), (customer_id,))
+            features = fold_purchases(customer_id, ((row['id'], row['fecha_venta'], row['total'])
+                                                    for row in purchases))
+            if features:
+                self._save([features])
+            else:
+                self.db.execute_update("DELETE FROM customer_features WHERE cliente_id = ?", (customer_id,))
+
+    def rebuild(self, batch_size: int = 1000) -> Tuple[bool, str]:
+        """Recalcular customer_features para todos los clientes"""
+        try:
+            customers = 0
+            with self.db.transaction():
+                self.db.execute_update("DELETE FROM customer_features")
+                rows = (row for batch in self.db.iter_batches(self._PURCHASES_QUERY.format(filter=''),
+                                                              row_type='tuple') for row in batch)
+                pending = []
+                for customer_id, purchases in groupby(rows, key=itemgetter(0)):
+                    pending.append(fold_purchases(customer_id, (row[1:] for row in purchases)))
+                    if len(pending) >= batch_size:
+                        self._save(pending)
+                        customers += len(pending)
+                        pending = []
+                self._save(pending)
+                customers += len(pending)
+
+            message = f"Características de clientes reconstruidas ({customers} clientes)"
+            self.logger.info(message)
+            return True, message
+
+        except Exception as e:
+            self.logger.error(f"Error reconstruyendo características de clientes: {e}")
+            return False, f"Error reconstruyendo características de clientes: {str(e)}"
+
+    # Lectura
+    _SELECT_FEATURES = """
+        SELECT f.*,
+               julianday('now') - julianday(f.ultima_compra) AS recency_dias,
+               julianday(f.ultima_compra) - julianday(f.primera_compra) AS antiguedad_dias
+        FROM customer_features f
+    """
+
+    def get_features(self, customer_id: int) -> Optional[Dict[str, Any]]:
+        """Características de un cliente (None si no tiene compras)"""
+        row = self.db.execute_single(self._SELECT_FEATURES + " WHERE f.cliente_id = ?", (customer_id,))
+        return self._with_derived(row) if row else None
+
+    def get_all_features(self, customer_ids: List[int] = None) -> Dict[int, Dict[str, Any]]:
+        """Características por ID de cliente (todos los que tienen compras por defecto)"""
+        if customer_ids is not None:
+            if not customer_ids:
+                return {}
+            placeholders = ', '.join('?' for _ in customer_ids)
+            rows = self.db.execute_query(self._SELECT_FEATURES + f" WHERE f.cliente_id IN ({placeholders})",
+                                         tuple(customer_ids))
+        else:
+            rows = self.db.execute_query(self._SELECT_FEATURES)
+        return {row['cliente_id']: self._with_derived(row) for row in rows}
+
+    @staticmethod
+    def _with_derived(row: Dict[str, Any]) -> Dict[str, Any]:
+        """Agregar varianza de intervalos, consistencia, cohorte y puntajes RFM"""
+        # Import here to avoid circular imports
+        from utils.ml_utils import FeatureEngineer
+
+        intervals = row['cantidad_compras'] - 1
+        variance = 0.0
+        if intervals > 0:
+            mean = row['suma_intervalos'] / intervals
+            variance = max(0.0, row['suma_intervalos_cuadrados'] / intervals - mean * mean)
+        average = row['intervalo_promedio'] or 0
+        row['varianza_intervalos'] = variance
+        row['consistencia'] = max(0.0, 1.0 - min(variance / average ** 2, 1.0)) if average > 0 else 0.0
+        row['cohorte'] = row['primera_compra'][:7]
+        row['rfm'] = FeatureEngineer.calculate_rfm_scores({
+            'days_since_last': row['recency_dias'],
+            'total_purchases': row['cantidad_compras'],
+            'total_spent': row['monto_total']
+        })
+        return row
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconstruir las características de clientes")
+    parser.add_argument('--db', default=None, help="Ruta de la base (por defecto la configurada)")
+    parser.add_argument('--cliente', type=int, default=None, help="Recalcular solo este cliente")
+    args = parser.parse_args()
+
+    from database.manager import DatabaseManager
+
+    db = DatabaseManager(args.db)
+    try:
+        manager = CustomerFeatureManager(db)
+        if args.cliente:
+            manager.refresh_customer(args.cliente)
+            print(f"Características del cliente {args.cliente} recalculadas")
+            return 0
+        success, message = manager.rebuild()
+        print(message)
+        return 0 if success else 1
+    finally:
+        db.close_connection()
+
+if __name__ == '__main__':
+    raise SystemExit(main())
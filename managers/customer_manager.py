@@ -74,6 +74,58 @@ class CustomerManager:
             logger.error(f"Error buscando clientes: {e}")
             return []
     
+    # Columnas por las que puede ordenar la grilla de clientes (sin NULL, para paginar por clave)
+    CUSTOMER_SORT_EXPRESSIONS = {
+        'id': "c.id",
+        'nombre': "COALESCE(c.nombre, '') || ' ' || COALESCE(c.apellido, '')",
+        'email': "COALESCE(c.email, '')",
+        'telefono': "COALESCE(c.telefono, '')",
+        'categoria': "COALESCE(c.categoria_cliente, '')",
+        'limite_credito': "COALESCE(c.limite_credito, 0)",
+        'saldo': "COALESCE(c.saldo_cuenta_corriente, 0)",
+        'ultima_compra': "COALESCE(f.ultima_compra, '')"
+    }
+    
+    def query_customers(self, search_term: str = "", category: str = None, status: str = None,
+                        order_by: str = 'nombre', descending: bool = False, after: Tuple = None,
+                        limit: int = 200) -> List[Dict]:
+        """Página de clientes filtrada y ordenada en la base (grilla con carga diferida)
+        
+        ``status``: None o 'activos' (por defecto), 'inactivos' o 'con_deuda'.
+        ``after`` es el par (orden_valor, id) de la última fila de la página anterior.
+        """
+        try:
+            sort_expression = self.CUSTOMER_SORT_EXPRESSIONS.get(order_by, self.CUSTOMER_SORT_EXPRESSIONS['nombre'])
+            conditions = ["c.activo = 0" if status == 'inactivos' else "c.activo = 1"]
+            params = []
+            if status == 'con_deuda':
+                conditions.append("COALESCE(c.saldo_cuenta_corriente, 0) > 0")
+            if category:
+                conditions.append("c.categoria_cliente = ?")
+                params.append(category)
+            if search_term and search_term.strip():
+                search_pattern = f"%{search_term.strip()}%"
+                conditions.append("(c.nombre LIKE ? OR c.apellido LIKE ? OR c.dni_cuit LIKE ?)")
+                params.extend([search_pattern] * 3)
+            if after is not None:
+                conditions.append(f"({sort_expression}, c.id) {'<' if descending else '>'} (?, ?)")
+                params.extend(after)
+            
+            direction = 'DESC' if descending else 'ASC'
+            query = f"""
+                SELECT c.*, f.ultima_compra, f.cantidad_compras, {sort_expression} as orden_valor
+                FROM clientes c
+                LEFT JOIN customer_features f ON f.cliente_id = c.id
+                WHERE {' AND '.join(conditions)}
+                ORDER BY orden_valor {direction}, c.id {direction}
+                LIMIT ?
+            """
+            params.append(limit)
+            return self.db.execute_query(query, params)
+        except Exception as e:
+            logger.error(f"Error consultando clientes: {e}")
+            return []
+    
     def create_customer(self, customer_data: Dict) -> Optional[int]:
         """Crear nuevo cliente"""
         try:
@@ -100,6 +152,7 @@ class CustomerManager:
             ))
             
             if customer_id:
+                self.db.notify_change('clientes', [customer_id], 'create_customer')
                 logger.info(f"Cliente creado exitosamente: ID {customer_id}")
                 return customer_id
             return None
@@ -133,6 +186,7 @@ class CustomerManager:
             ))
             
             if rows_affected > 0:
+                self.db.notify_change('clientes', [customer_id], 'update_customer')
                 logger.info(f"Cliente {customer_id} actualizado exitosamente")
                 return True
             return False
@@ -412,6 +466,7 @@ class CustomerManager:
                 )
                 
                 if success:
+                    self.db.notify_change('clientes', [customer_id], 'update_customer_category_auto')
                     self.logger.info(f"Cliente {customer_id} reclasificado de {current_customer['categoria_cliente']} a {new_category}")
                     return True
             
@@ -540,6 +595,7 @@ class CustomerManager:
                 ))
                 
                 self.db.commit_transaction()
+                self.db.notify_change('clientes', [customer_id], 'process_account_payment')
                 
                 self.logger.info(f"Pago procesado para cliente {customer_id}: ${amount:.2f}")
                 return True, f"Pago procesado correctamente. Nuevo saldo: ${new_balance:.2f}"
@@ -0,0 +1,120 @@
+"""
+Métricas del Dashboard para AlmacénPro
+Calcula los indicadores del panel principal con una consulta de agregación por
+grupo (ventas del día y del mes, productos y stock bajo, clientes activos) en
+lugar de traer ventas, productos y clientes completos para sumarlos en Python
+"""
+
+import logging
+from datetime import date
+from typing import Dict, Iterable, Optional
+
+from database.date_ranges import date_range
+
+logger = logging.getLogger(__name__)
+
+# Grupos de métricas y las claves que devuelve cada uno
+METRIC_GROUPS = {
+    'ventas': ('ventas_hoy', 'ventas_mes', 'meta_mes'),
+    'productos': ('total_productos', 'stock_bajo'),
+    'clientes': ('clientes_activos', 'utilidad_mes')
+}
+
+# Meta del mes: 20% más que lo vendido; utilidad estimada con 30% de margen
+MONTHLY_TARGET_FACTOR = 1.2
+ESTIMATED_MARGIN = 0.3
+
+class DashboardMetricsService:
+    """Indicadores del dashboard calculados en la base
+
+    Los importes de ventas se leen de ``ventas_resumen_diario`` (un registro
+    por día y caja); con ``use_rollups=False`` se suman directamente sobre
+    ``ventas`` usando el índice ``idx_ventas_estado_fecha``. En ambos casos
+    solo cuentan las ventas completadas.
+    """
+
+    def __init__(self, db_manager, use_rollups: bool = True):
+        self.db = db_manager
+        self.use_rollups = use_rollups
+        self.logger = logging.getLogger(__name__)
+
+    def get_metrics(self, groups: Iterable[str] = None, today: Optional[date] = None) -> Dict:
+        """Todas las métricas de los grupos pedidos (por defecto, todos) en un diccionario"""
+        groups = tuple(groups) if groups is not None else tuple(METRIC_GROUPS)
+        today = today or date.today()
+        metrics = {}
+
+        if 'ventas' in groups or 'clientes' in groups:
+            sales = self.get_sales_metrics(today)
+            if 'ventas' in groups:
+                metrics.update(sales)
+            if 'clientes' in groups:
+                metrics['utilidad_mes'] = sales['ventas_mes'] * ESTIMATED_MARGIN
+
+        if 'productos' in groups:
+            metrics.update(self.get_product_metrics())
+
+        if 'clientes' in groups:
+            metrics.update(self.get_customer_metrics())
+
+        return metrics
+
+    def get_sales_metrics(self, today: Optional[date] = None) -> Dict:
+        """Ventas del día y del mes en curso con una sola consulta"""
+        today = today or date.today()
+        month_start = today.replace(day=1)
+        try:
+            if self.use_rollups:
+                fecha_sql, params = date_range('fecha', month_start, today)
+                row = self.db.execute_single(f"""
+                    SELECT COALESCE(SUM(CASE WHEN fecha >= ? THEN total END), 0) AS ventas_hoy,
+                           COALESCE(SUM(total), 0) AS ventas_mes
+                    FROM ventas_resumen_diario
+                    WHERE {fecha_sql}
+                """, [today.isoformat()] + params)
+            else:
+                fecha_sql, params = date_range('fecha_venta', month_start, today)
+                row = self.db.execute_single(f"""
+                    SELECT COALESCE(SUM(CASE WHEN fecha_venta >= ? THEN total END), 0) AS ventas_hoy,
+                           COALESCE(SUM(total), 0) AS ventas_mes
+                    FROM ventas
+                    WHERE estado = 'COMPLETADA' AND {fecha_sql}
+                """, [today.isoformat()] + params)
+            row = row or {}
+        except Exception as e:
+            self.logger.error(f"Error calculando métricas de ventas: {e}")
+            row = {}
+
+        monthly_total = float(row.get('ventas_mes') or 0)
+        target = monthly_total * MONTHLY_TARGET_FACTOR
+        return {
+            'ventas_hoy': float(row.get('ventas_hoy') or 0),
+            'ventas_mes': monthly_total,
+            'meta_mes': monthly_total / target * 100 if target > 0 else 0
+        }
+
+    def get_product_metrics(self) -> Dict:
+        """Productos activos y con stock en o bajo el mínimo (índice ``idx_productos_stock``)"""
+        try:
+            row = self.db.execute_single("""
+                SELECT COUNT(*) AS total_productos,
+                       COALESCE(SUM(COALESCE(stock_actual, 0) <= COALESCE(stock_minimo, 0)), 0) AS stock_bajo
+                FROM productos
+                WHERE activo = 1
+            """) or {}
+        except Exception as e:
+            self.logger.error(f"Error calculando métricas de productos: {e}")
+            row = {}
+        return {
+            'total_productos': int(row.get('total_productos') or 0),
+            'stock_bajo': int(row.get('stock_bajo') or 0)
+        }
+
+    def get_customer_metrics(self) -> Dict:
+        """Clientes activos (índice ``idx_clientes_activo``)"""
+        try:
+            row = self.db.execute_single("SELECT COUNT(*) AS clientes_activos FROM clientes WHERE activo = 1") or {}
+        except Exception as e:
+            self.logger.error(f"Error calculando métricas de clientes: {e}")
+            row = {}
+        return {'clientes_activos': int(row.get('clientes_activos') or 0)}
@@ -13,6 +13,8 @@ import base64
 from enum import Enum
 import uuid
 
+from managers.permission_resolver import EMPTY_PERMISSIONS, PermissionResolver, compile_permissions
+
 logger = logging.getLogger(__name__)
 
 # Para 2FA
@@ -54,10 +56,13 @@ class AuditAction(Enum):
 class EnterpriseUserManager:
     """Manager empresarial de usuarios con funcionalidades avanzadas"""
     
-    def __init__(self, database_manager):
+    def __init__(self, database_manager, permission_resolver: PermissionResolver = None):
         self.db = database_manager
         self.logger = logging.getLogger(__name__)
         
+        # Mismo resolvedor que UserManager y la interfaz (caché de permisos compartida)
+        self.permissions = permission_resolver or PermissionResolver(database_manager)
+        
         # Configuraciones de seguridad
         self.max_login_attempts = 5
         self.lockout_duration_minutes = 30
@@ -684,9 +689,9 @@ class EnterpriseUserManager:
             if ip_whitelist and client_ip and client_ip not in ip_whitelist:
                 return {"valid": False, "error": "IP no autorizada"}
             
-            # Verificar scope
+            # Verificar scope (admite '*' y scopes padre, igual que los permisos de roles)
             scopes = json.loads(token_data['scopes']) if token_data['scopes'] else []
-            if required_scope and required_scope not in scopes:
+            if required_scope and not compile_permissions(scopes).allows(required_scope):
                 return {"valid": False, "error": "Scope insuficiente"}
             
             # Actualizar uso
@@ -714,10 +719,8 @@ class EnterpriseUserManager:
         """Delegar permisos temporalmente"""
         try:
             # Verificar que el delegador tenga los permisos
-            delegator_permissions = self._get_user_permissions(delegator_id)
-            
             for permission in permissions:
-                if permission not in delegator_permissions:
+                if not self.permissions.user_has_permission(delegator_id, permission):
                     return {"error": f"No tiene permiso para delegar: {permission}"}
             
             # Crear delegación
@@ -994,7 +997,7 @@ class EnterpriseUserManager:
     
     def _get_user_permissions(self, user_id: int) -> List[str]:
         """Obtener permisos del usuario"""
-        return []  # Placeholder
+        return sorted((self.permissions.for_user(user_id) or EMPTY_PERMISSIONS).permissions)
     
     def _is_new_device(self, user_id: int, device_info: Dict) -> bool:
         """Verificar si es un dispositivo nuevo"""
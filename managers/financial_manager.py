@@ -8,6 +8,8 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple
 from decimal import Decimal
 
+from database.date_ranges import day_range
+
 logger = logging.getLogger(__name__)
 
 class FinancialManager:
@@ -195,6 +197,9 @@ class FinancialManager:
                     WHERE id = ?
                 """, (amount, session_id))
             
+            if movement_id:
+                self.db.notify_change('movimientos_caja', [movement_id], 'add_cash_movement')
+            
             return movement_id
             
         except Exception as e:
@@ -275,7 +280,8 @@ class FinancialManager:
             if not target_date:
                 target_date = datetime.now().strftime('%Y-%m-%d')
             
-            query = """
+            date_sql, params = day_range('sc.fecha_apertura', target_date)
+            query = f"""
                 SELECT sc.*, c.nombre as caja_nombre, u.username as usuario_nombre,
                        COUNT(mc.id) as total_movimientos,
                        SUM(CASE WHEN mc.tipo_movimiento = 'VENTA' THEN mc.importe ELSE 0 END) as total_ventas_efectivo
@@ -283,9 +289,8 @@ class FinancialManager:
                 JOIN cajas c ON sc.caja_id = c.id
                 JOIN usuarios u ON sc.usuario_id = u.id
                 LEFT JOIN movimientos_caja mc ON sc.id = mc.sesion_caja_id
-                WHERE DATE(sc.fecha_apertura) = ?
+                WHERE {date_sql}
             """
-            params = [target_date]
             
             if cash_register_id:
                 query += " AND sc.caja_id = ?"
@@ -0,0 +1,126 @@
+"""
+Gestor de Numeración de Comprobantes - AlmacénPro v2.0
+Contadores por punto de venta y tipo de comprobante respaldados en la tabla
+secuencias_comprobantes, con reserva de bloques por terminal
+"""
+
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class InvoiceSequenceManager:
+    """Servicio de numeración libre de colisiones para ventas y comprobantes
+
+    Cada instancia representa una terminal: reserva bloques de ``block_size``
+    números con una única transacción corta y los entrega desde memoria, de modo
+    que varias cajas (o el portal web) no compiten por el contador en cada venta.
+    Los números no usados de un bloque se pierden al cerrar la terminal, por lo
+    que para comprobantes fiscales correlativos debe usarse ``block_size=1``.
+    """
+
+    def __init__(self, db_manager, block_size: int = None):
+        # Import here to avoid circular imports
+        from config.settings import settings
+
+        self.db = db_manager
+        self.block_size = max(1, int(block_size or settings.get('sales.invoice_block_size', 50)))
+        self.logger = logging.getLogger(__name__)
+
+        # Bloques reservados en memoria: (punto_venta, tipo) -> [siguiente, último]
+        self._blocks: Dict[Tuple[int, str], List[int]] = {}
+        self._lock = threading.Lock()
+
+    def ensure_sequence(self, tipo_comprobante: str, punto_venta: int, initial_value: int = 0) -> bool:
+        """Crear el contador si no existe, partiendo de ``initial_value``
+
+        Returns:
+            True si el contador fue creado en esta llamada
+        """
+        return self.db.execute_update("""
+            INSERT OR IGNORE INTO secuencias_comprobantes (punto_venta, tipo_comprobante, ultimo_numero)
+            VALUES (?, ?, ?)
+        """, (int(punto_venta), tipo_comprobante, int(initial_value)))
+
+    def has_sequence(self, tipo_comprobante: str, punto_venta: int) -> bool:
+        """Verificar si existe el contador para el punto de venta y tipo"""
+        return self.db.execute_single("""
+            SELECT 1 AS existe FROM secuencias_comprobantes
+            WHERE punto_venta = ? AND tipo_comprobante = ?
+        """, (int(punto_venta), tipo_comprobante)) is not None
+
+    def get_last_number(self, tipo_comprobante: str, punto_venta: int) -> int:
+        """Obtener el último número reservado en la base (incluye bloques en uso)"""
+        result = self.db.execute_single("""
+            SELECT ultimo_numero FROM secuencias_comprobantes
+            WHERE punto_venta = ? AND tipo_comprobante = ?
+        """, (int(punto_venta), tipo_comprobante))
+        return int(result['ultimo_numero']) if result else 0
+
+    def next_number(self, tipo_comprobante: str, punto_venta: int) -> int:
+        """Obtener el siguiente número para el punto de venta y tipo de comprobante"""
+        punto_venta = int(punto_venta)
+
+        # Dentro de una transacción externa no se usa el bloque en memoria: si la
+        # transacción se revierte, el contador vuelve atrás junto con el número
+        if self.db.in_transaction():
+            return self._reserve_block(tipo_comprobante, punto_venta, 1)[0]
+
+        key = (punto_venta, tipo_comprobante)
+        with self._lock:
+            block = self._blocks.get(key)
+            if block is None or block[0] > block[1]:
+                first, last = self._reserve_block(tipo_comprobante, punto_venta, self.block_size)
+                block = [first, last]
+                self._blocks[key] = block
+
+            number = block[0]
+            block[0] += 1
+            return number
+
+    def next_invoice_number(self, tipo_comprobante: str = 'TICKET', punto_venta: int = 1) -> str:
+        """Obtener el siguiente número formateado como TIPO-PPPP-NNNNNNNN"""
+        number = self.next_number(tipo_comprobante, punto_venta)
+        return f"{tipo_comprobante}-{int(punto_venta):04d}-{number:08d}"
+
+    def _reserve_block(self, tipo_comprobante: str, punto_venta: int, size: int) -> Tuple[int, int]:
+        """Reservar ``size`` números consecutivos de forma atómica
+
+        Returns:
+            Tupla (primer_número, último_número) del bloque reservado
+        """
+        with self.db.transaction():
+            self.db.execute_update("""
+                INSERT OR IGNORE INTO secuencias_comprobantes (punto_venta, tipo_comprobante, ultimo_numero)
+                VALUES (?, ?, 0)
+            """, (punto_venta, tipo_comprobante))
+
+            self.db.execute_update("""
+                UPDATE secuencias_comprobantes
+                SET ultimo_numero = ultimo_numero + ?, actualizado_en = CURRENT_TIMESTAMP
+                WHERE punto_venta = ? AND tipo_comprobante = ?
+            """, (size, punto_venta, tipo_comprobante))
+
+            result = self.db.execute_single("""
+                SELECT ultimo_numero FROM secuencias_comprobantes
+                WHERE punto_venta = ? AND tipo_comprobante = ?
+            """, (punto_venta, tipo_comprobante))
+
+        last = int(result['ultimo_numero'])
+        self.logger.debug(f"Bloque reservado {tipo_comprobante}/{punto_venta}: {last - size + 1}-{last}")
+        return last - size + 1, last
+
+    def discard_blocks(self):
+        """Descartar los bloques en memoria (por ejemplo al cerrar la terminal)"""
+        with self._lock:
+            self._blocks.clear()
+
+    def get_block_status(self) -> Dict[str, Optional[Dict]]:
+        """Estado de los bloques reservados por esta terminal"""
+        with self._lock:
+            return {
+                f"{tipo}/{punto_venta}": {'siguiente': block[0], 'ultimo': block[1],
+                                          'disponibles': max(0, block[1] - block[0] + 1)}
+                for (punto_venta, tipo), block in self._blocks.items()
+            }
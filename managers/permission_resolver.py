@@ -0,0 +1,182 @@
+"""
+Resolución de Permisos para AlmacénPro
+Compila los permisos de cada rol una sola vez por sesión y los guarda por
+usuario, así las verificaciones de la interfaz (pestañas, menús, paneles del
+dashboard) y de los tokens de acceso no vuelven a consultar la base ni a
+separar el texto de permisos en cada llamada
+
+Formato de permisos:
+    '*'                  todos los permisos
+    'productos'          el permiso y sus derivados ('productos_consulta', ...)
+    'productos_*'        equivalente a 'productos'
+Los segmentos se separan con '_', '.' o ':' (los scopes de tokens suelen usar '.' o ':')
+"""
+
+import logging
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+from database.change_events import ChangeBus, ChangeEvent
+
+logger = logging.getLogger(__name__)
+
+WILDCARD = '*'
+SEPARATORS = ('_', '.', ':')
+
+class PermissionSet:
+    """Permisos compilados (inmutable)
+
+    ``permissions`` es el frozenset normalizado; ``allows`` resuelve el
+    comodín y la jerarquía revisando los prefijos del permiso pedido.
+    """
+
+    __slots__ = ('permissions', 'grants_all')
+
+    def __init__(self, permissions: Iterable[str] = ()):
+        normalized = set()
+        for permission in permissions:
+            permission = permission.strip()
+            for separator in SEPARATORS:
+                if permission.endswith(separator + WILDCARD):
+                    permission = permission[:-2]
+                    break
+            if permission:
+                normalized.add(permission)
+        self.permissions = frozenset(normalized)
+        self.grants_all = WILDCARD in self.permissions
+
+    def allows(self, permission: str) -> bool:
+        """Indica si el permiso (o uno de sus ancestros) fue otorgado"""
+        if self.grants_all or permission in self.permissions:
+            return True
+        for index, char in enumerate(permission):
+            if char in SEPARATORS and permission[:index] in self.permissions:
+                return True
+        return False
+
+    __contains__ = allows
+
+    def __bool__(self) -> bool:
+        return bool(self.permissions)
+
+    def __repr__(self) -> str:
+        return f"PermissionSet({sorted(self.permissions)})"
+
+EMPTY_PERMISSIONS = PermissionSet()
+
+@lru_cache(maxsize=256)
+def _compile(permissions: Union[str, Tuple[str, ...]]) -> PermissionSet:
+    if isinstance(permissions, str):
+        permissions = permissions.split(',')
+    return PermissionSet(permissions)
+
+def compile_permissions(permissions) -> PermissionSet:
+    """Compilar permisos en texto separado por comas o en lista (con caché por valor)"""
+    if isinstance(permissions, PermissionSet):
+        return permissions
+    if not permissions:
+        return EMPTY_PERMISSIONS
+    if not isinstance(permissions, str):
+        permissions = tuple(permissions)
+    return _compile(permissions)
+
+def user_permissions(current_user: Dict, resolver: 'PermissionResolver' = None) -> PermissionSet:
+    """Permisos del usuario de la sesión
+
+    Con ``resolver`` se usan los permisos vigentes del rol (refleja cambios de
+    rol sin volver a iniciar sesión); si no, los recibidos al autenticarse.
+    """
+    if resolver is not None and current_user.get('id') is not None:
+        permissions = resolver.for_user(current_user['id'])
+        if permissions is not None:
+            return permissions
+    return compile_permissions(current_user.get('permisos'))
+
+class PermissionResolver:
+    """Permisos por usuario con caché e invalidación por cambios
+
+    Los roles se compilan todos juntos la primera vez que se necesitan; cada
+    usuario se resuelve con una consulta (activo y rol) y queda guardado. Los
+    avisos de cambios en ``usuarios`` o ``roles`` (``update_user``,
+    ``create_role``, otra terminal) descartan lo guardado.
+    """
+
+    def __init__(self, db_manager):
+        self.db = db_manager
+        self.logger = logging.getLogger(__name__)
+        self._roles: Optional[Dict[int, PermissionSet]] = None
+        self._users: Dict[int, PermissionSet] = {}
+        self._lock = threading.Lock()
+        # Se incrementa al invalidar: lo resuelto con datos anteriores no se guarda
+        self._generation = 0
+
+        changes = getattr(db_manager, 'changes', None)
+        if isinstance(changes, ChangeBus):
+            changes.subscribe(self._on_change, ('usuarios', 'roles'))
+
+    def for_user(self, user_id: int) -> Optional[PermissionSet]:
+        """Permisos del usuario (vacío si está inactivo; None si no existe o falla la consulta)"""
+        permissions = self._users.get(user_id)
+        if permissions is not None:
+            return permissions
+
+        generation = self._generation
+        try:
+            user = self.db.execute_single("SELECT activo, rol_id FROM usuarios WHERE id = ?", (user_id,))
+            if not user:
+                return None
+            if user.get('activo'):
+                permissions = self._get_roles().get(user.get('rol_id'), EMPTY_PERMISSIONS)
+            else:
+                permissions = EMPTY_PERMISSIONS
+        except Exception as e:
+            self.logger.error(f"Error resolviendo permisos del usuario {user_id}: {e}")
+            return None
+
+        with self._lock:
+            if generation == self._generation:
+                self._users[user_id] = permissions
+        return permissions
+
+    def user_has_permission(self, user_id: int, permission: str) -> bool:
+        permissions = self.for_user(user_id)
+        return permissions is not None and permissions.allows(permission)
+
+    def role_permissions(self, role_id: int) -> PermissionSet:
+        return self._get_roles().get(role_id, EMPTY_PERMISSIONS)
+
+    def invalidate_user(self, user_id: int = None):
+        """Descartar los permisos guardados de un usuario (o de todos)"""
+        with self._lock:
+            self._generation += 1
+            if user_id is None:
+                self._users.clear()
+            else:
+                self._users.pop(user_id, None)
+
+    def invalidate_roles(self):
+        """Volver a compilar los roles en la próxima consulta"""
+        with self._lock:
+            self._generation += 1
+            self._roles = None
+            self._users.clear()
+
+    # Internos
+    def _get_roles(self) -> Dict[int, PermissionSet]:
+        roles = self._roles
+        if roles is None:
+            generation = self._generation
+            rows = self.db.execute_query("SELECT id, permisos FROM roles")
+            roles = {row['id']: compile_permissions(row['permisos']) for row in rows}
+            with self._lock:
+                if generation == self._generation:
+                    self._roles = roles
+        return roles
+
+    def _on_change(self, event: ChangeEvent):
+        if event.table == 'usuarios' and event.ids:
+            for user_id in event.ids:
+                self.invalidate_user(user_id)
+        else:
+            self.invalidate_roles()
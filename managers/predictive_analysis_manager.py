@@ -7,10 +7,12 @@ import logging
 import json
 import math
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Dict, Iterator, List, Tuple, Optional, Any
 from dataclasses import dataclass
 import sqlite3
 from collections import defaultdict, Counter
+from itertools import groupby
+from operator import itemgetter
 
 logger = logging.getLogger(__name__)
 
@@ -52,10 +54,13 @@ class PurchasePattern:
 class PredictiveAnalysisManager:
     """Gestor de análisis predictivo de clientes"""
     
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, snapshot=None):
         self.db_manager = db_manager
+        self.snapshot = snapshot  # AnalyticsSnapshot opcional para agregaciones pesadas
         self.min_transactions = 3  # Mínimo para análisis
         self.confidence_threshold = 0.7
+        self.cluster_count = 4  # Grupos de la segmentación K-means
+        self.cluster_sample_size = 10  # Ids de clientes de muestra por grupo
         
         # Configurar segmentos predefinidos
         self.segment_definitions = {
@@ -68,67 +73,145 @@ class PredictiveAnalysisManager:
         }
 
     def analyze_customer_behavior(self, customer_id: int) -> Dict[str, Any]:
-        """Análisis completo de comportamiento de cliente"""
+        """Análisis completo de comportamiento de cliente
+        
+        Carga una vez los datos, las ventas y las líneas del cliente y calcula
+        todos los indicadores sobre esos datos (ver ``_score_customer``).
+        """
         try:
             # Obtener datos históricos
             customer_data = self._get_customer_data(customer_id)
             if not customer_data:
                 return {'error': 'Cliente no encontrado o sin datos suficientes'}
             
-            # Análisis de patrones
-            purchase_patterns = self._analyze_purchase_patterns(customer_id)
-            
-            # Análisis de tendencias
-            trends = self._analyze_trends(customer_id)
-            
-            # Predicción de churn
-            churn_prediction = self._predict_churn(customer_id)
-            
-            # Segmentación automática
-            segment = self._classify_customer_segment(customer_id)
-            
-            # Predicción de próxima compra
-            next_purchase = self._predict_next_purchase(customer_id)
-            
-            # Recomendaciones de productos
-            product_recommendations = self._recommend_products(customer_id)
-            
-            # Valor de vida del cliente (CLV)
-            clv_prediction = self._calculate_clv_prediction(customer_id)
+            sales = self._get_customer_sales(customer_id)
+            scores = self._score_customer(customer_data, sales, self._trend_start())
             
             return {
                 'customer_id': customer_id,
                 'analysis_date': datetime.now().isoformat(),
-                'purchase_patterns': purchase_patterns,
-                'trends': trends,
-                'churn_prediction': churn_prediction,
-                'segment': segment,
-                'next_purchase_prediction': next_purchase,
-                'product_recommendations': product_recommendations,
-                'clv_prediction': clv_prediction,
-                'confidence_score': self._calculate_overall_confidence(customer_id)
+                'purchase_patterns': self._patterns_from_history(sales, self._get_customer_lines(customer_id)),
+                'trends': scores['trends'],
+                'churn_prediction': scores['churn'],
+                'segment': scores['segment'],
+                'next_purchase_prediction': scores['next_purchase'],
+                'product_recommendations': self._recommend_products(customer_id),
+                'clv_prediction': scores['clv'],
+                'confidence_score': scores['confidence']
             }
             
         except Exception as e:
             logger.error(f"Error analizando comportamiento del cliente {customer_id}: {e}")
             return {'error': str(e)}
 
+    # Puntuación en lote
+    def iter_customer_scores(self, customer_ids: List[int] = None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Puntuar churn, segmento, CLV y próxima compra de toda la base
+        
+        Usa dos consultas en total: los agregados por cliente y las ventas de
+        todos los clientes ordenadas por cliente, que se recorren en lotes y se
+        puntúan de a un cliente por vez. Solo incluye clientes activos con compras.
+        
+        Args:
+            customer_ids: Limitar a estos clientes (por defecto todos)
+        
+        Yields:
+            Tuplas (customer_id, {'churn', 'segment', 'clv', 'next_purchase', 'confidence'})
+        """
+        selected = set(customer_ids) if customer_ids is not None else None
+        customers = {
+            row['id']: row for row in self.db_manager.execute_query(self._SEGMENT_CUSTOMERS_QUERY)
+            if selected is None or row['id'] in selected
+        }
+        if not customers:
+            return
+        
+        trend_start = self._trend_start()
+        rows = (row for batch in self.db_manager.iter_batches("""
+            SELECT cliente_id, fecha_venta, total
+            FROM ventas
+            WHERE cliente_id IS NOT NULL AND estado = 'COMPLETADA'
+            ORDER BY cliente_id, fecha_venta
+        """, row_type='tuple') for row in batch)
+        
+        for customer_id, group in groupby(rows, key=itemgetter(0)):
+            customer_data = customers.get(customer_id)
+            if customer_data is None:
+                continue
+            sales = [{'fecha_venta': fecha, 'total': total} for _, fecha, total in group]
+            scores = self._score_customer(customer_data, sales, trend_start)
+            del scores['trends'], scores['patterns']
+            yield customer_id, scores
+    
+    def score_customers(self, customer_ids: List[int] = None) -> Dict[int, Dict[str, Any]]:
+        """Puntuaciones de ``iter_customer_scores`` por ID de cliente"""
+        try:
+            return dict(self.iter_customer_scores(customer_ids))
+        except Exception as e:
+            logger.error(f"Error puntuando clientes: {e}")
+            return {}
+    
+    def _score_customer(self, customer_data: Dict[str, Any], sales: List[Dict[str, Any]],
+                        trend_start: str) -> Dict[str, Any]:
+        """Todos los indicadores de un cliente a partir de sus datos ya cargados"""
+        trends = self._trends_from_sales(sales, trend_start)
+        patterns = self._patterns_from_history(sales)
+        return {
+            'trends': trends,
+            'patterns': patterns,
+            'churn': self._churn_from_data(customer_data, trends),
+            'segment': self._segment_from_data(customer_data),
+            'next_purchase': self._next_purchase_from_data(customer_data, patterns),
+            'clv': self._clv_from_data(customer_data, trends),
+            'confidence': self._confidence_from_data(customer_data)
+        }
+    
+    def _trend_start(self) -> str:
+        """Inicio de la ventana de tendencias (últimos 12 meses)"""
+        return self.db_manager.execute_single("SELECT date('now', '-12 months') as inicio")['inicio']
+    
+    @staticmethod
+    def _parse_datetime(value: str) -> datetime:
+        """Fecha de venta con o sin 'T' y microsegundos"""
+        return datetime.fromisoformat(value)
+    
+    def _get_customer_sales(self, customer_id: int) -> List[Dict[str, Any]]:
+        """Ventas del cliente en orden cronológico"""
+        return self.db_manager.execute_query("""
+            SELECT fecha_venta, total FROM ventas
+            WHERE cliente_id = ? AND estado = 'COMPLETADA'
+            ORDER BY fecha_venta
+        """, (customer_id,))
+    
+    def _get_customer_lines(self, customer_id: int) -> List[Dict[str, Any]]:
+        """Líneas de las ventas completadas del cliente con producto y categoría"""
+        return self.db_manager.execute_query("""
+            SELECT v.fecha_venta, v.total, dv.producto_id, dv.cantidad, p.nombre,
+                   COALESCE(cat.nombre, 'Sin categoría') as categoria
+            FROM ventas v
+            JOIN detalle_ventas dv ON v.id = dv.venta_id
+            JOIN productos p ON dv.producto_id = p.id
+            LEFT JOIN categorias cat ON p.categoria_id = cat.id
+            WHERE v.cliente_id = ? AND v.estado = 'COMPLETADA'
+            ORDER BY v.fecha_venta
+        """, (customer_id,))
+
     def _get_customer_data(self, customer_id: int) -> Dict[str, Any]:
         """Obtener datos completos del cliente"""
         try:
+            # Agregados precalculados en customer_features (ver CustomerFeatureManager)
             query = """
             SELECT c.*, 
-                   COUNT(v.id) as total_purchases,
-                   COALESCE(SUM(v.total), 0) as total_spent,
-                   COALESCE(AVG(v.total), 0) as avg_purchase,
-                   MAX(v.fecha_venta) as last_purchase,
-                   MIN(v.fecha_venta) as first_purchase,
-                   julianday('now') - julianday(MAX(v.fecha_venta)) as days_since_last,
-                   julianday(MAX(v.fecha_venta)) - julianday(MIN(v.fecha_venta)) as customer_lifespan
+                   COALESCE(f.cantidad_compras, 0) as total_purchases,
+                   COALESCE(f.monto_total, 0) as total_spent,
+                   COALESCE(f.ticket_promedio, 0) as avg_purchase,
+                   f.ultima_compra as last_purchase,
+                   f.primera_compra as first_purchase,
+                   julianday('now') - julianday(f.ultima_compra) as days_since_last,
+                   julianday(f.ultima_compra) - julianday(f.primera_compra) as customer_lifespan
             FROM clientes c
-            LEFT JOIN ventas v ON c.id = v.cliente_id
+            LEFT JOIN customer_features f ON f.cliente_id = c.id
             WHERE c.id = ?
-            GROUP BY c.id
             """
             
             result = self.db_manager.execute_query(query, (customer_id,))
@@ -143,39 +226,38 @@ class PredictiveAnalysisManager:
     def _analyze_purchase_patterns(self, customer_id: int) -> List[Dict[str, Any]]:
         """Análisis de patrones de compra"""
         try:
-            # Obtener historial de compras
-            query = """
-            SELECT v.fecha_venta, v.total, dv.producto_id, dv.cantidad, p.nombre, p.categoria
-            FROM ventas v
-            JOIN detalle_venta dv ON v.id = dv.venta_id
-            JOIN productos p ON dv.producto_id = p.id
-            WHERE v.cliente_id = ?
-            ORDER BY v.fecha_venta
-            """
-            
-            purchases = self.db_manager.execute_query(query, (customer_id,))
-            if not purchases or len(purchases) < self.min_transactions:
+            return self._patterns_from_history(self._get_customer_sales(customer_id),
+                                               self._get_customer_lines(customer_id))
+        except Exception as e:
+            logger.error(f"Error analizando patrones de compra: {e}")
+            return []
+    
+    def _patterns_from_history(self, sales: List[Dict[str, Any]],
+                               lines: List[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Patrones de frecuencia, estacionalidad, productos (si hay líneas) y montos"""
+        try:
+            if not sales or len(sales) < self.min_transactions:
                 return []
             
             patterns = []
             
             # Patrón de frecuencia
-            frequency_pattern = self._analyze_frequency_pattern(purchases)
+            frequency_pattern = self._analyze_frequency_pattern(sales)
             if frequency_pattern:
                 patterns.append(frequency_pattern)
             
             # Patrón estacional
-            seasonal_pattern = self._analyze_seasonal_pattern(purchases)
+            seasonal_pattern = self._analyze_seasonal_pattern(sales)
             if seasonal_pattern:
                 patterns.append(seasonal_pattern)
             
             # Patrón de productos
-            product_pattern = self._analyze_product_pattern(purchases)
+            product_pattern = self._analyze_product_pattern(lines) if lines else None
             if product_pattern:
                 patterns.append(product_pattern)
             
             # Patrón de montos
-            amount_pattern = self._analyze_amount_pattern(purchases)
+            amount_pattern = self._analyze_amount_pattern(sales)
             if amount_pattern:
                 patterns.append(amount_pattern)
             
@@ -192,7 +274,7 @@ class PredictiveAnalysisManager:
                 return None
             
             # Calcular intervalos entre compras
-            dates = [datetime.strptime(p['fecha_venta'], '%Y-%m-%d %H:%M:%S') for p in purchases]
+            dates = [self._parse_datetime(p['fecha_venta']) for p in purchases]
             intervals = [(dates[i] - dates[i-1]).days for i in range(1, len(dates))]
             
             if not intervals:
@@ -235,8 +317,7 @@ class PredictiveAnalysisManager:
             # Agrupar compras por mes
             monthly_purchases = defaultdict(list)
             for purchase in purchases:
-                date = datetime.strptime(purchase['fecha_venta'], '%Y-%m-%d %H:%M:%S')
-                month = date.month
+                month = self._parse_datetime(purchase['fecha_venta']).month
                 monthly_purchases[month].append(purchase['total'])
             
             # Calcular promedios mensuales
@@ -368,20 +449,26 @@ class PredictiveAnalysisManager:
     def _analyze_trends(self, customer_id: int) -> Dict[str, Any]:
         """Análisis de tendencias del cliente"""
         try:
-            # Obtener ventas de los últimos 12 meses
-            query = """
-            SELECT strftime('%Y-%m', fecha_venta) as month,
-                   COUNT(*) as purchase_count,
-                   SUM(total) as total_spent,
-                   AVG(total) as avg_purchase
-            FROM ventas
-            WHERE cliente_id = ? AND fecha_venta >= date('now', '-12 months')
-            GROUP BY strftime('%Y-%m', fecha_venta)
-            ORDER BY month
-            """
-            
-            monthly_data = self.db_manager.execute_query(query, (customer_id,))
-            if not monthly_data or len(monthly_data) < 3:
+            return self._trends_from_sales(self._get_customer_sales(customer_id), self._trend_start())
+        except Exception as e:
+            logger.error(f"Error analizando tendencias: {e}")
+            return {'error': str(e)}
+    
+    def _trends_from_sales(self, sales: List[Dict[str, Any]], trend_start: str) -> Dict[str, Any]:
+        """Tendencias mensuales de los últimos 12 meses a partir de las ventas"""
+        try:
+            monthly = {}
+            for sale in sales:
+                if sale['fecha_venta'] < trend_start:
+                    continue
+                entry = monthly.setdefault(sale['fecha_venta'][:7], [0, 0.0])
+                entry[0] += 1
+                entry[1] += sale['total'] or 0
+            
+            monthly_data = [{'month': month, 'purchase_count': count, 'total_spent': total,
+                             'avg_purchase': total / count}
+                            for month, (count, total) in sorted(monthly.items())]
+            if len(monthly_data) < 3:
                 return {'insufficient_data': True}
             
             # Analizar tendencias
@@ -466,11 +553,14 @@ class PredictiveAnalysisManager:
 
     def _predict_churn(self, customer_id: int) -> Dict[str, Any]:
         """Predicción de abandono (churn) del cliente"""
+        customer_data = self._get_customer_data(customer_id)
+        if not customer_data:
+            return {'error': 'No hay datos suficientes'}
+        return self._churn_from_data(customer_data, self._analyze_trends(customer_id))
+    
+    def _churn_from_data(self, customer_data: Dict[str, Any], trends: Dict[str, Any]) -> Dict[str, Any]:
+        """Probabilidad de churn a partir de los agregados y las tendencias del cliente"""
         try:
-            customer_data = self._get_customer_data(customer_id)
-            if not customer_data:
-                return {'error': 'No hay datos suficientes'}
-            
             # Factores de churn
             factors = {}
             churn_score = 0
@@ -485,7 +575,6 @@ class PredictiveAnalysisManager:
                 churn_score += 0.2
             
             # Factor 2: Tendencia de compras decreciente
-            trends = self._analyze_trends(customer_id)
             if trends.get('frequency_trend', {}).get('direction') == 'decreasing':
                 factors['declining_frequency'] = 0.3
                 churn_score += 0.3
@@ -539,11 +628,14 @@ class PredictiveAnalysisManager:
 
     def _classify_customer_segment(self, customer_id: int) -> Dict[str, Any]:
         """Clasificación automática del segmento del cliente"""
+        customer_data = self._get_customer_data(customer_id)
+        if not customer_data:
+            return {'segment': 'unknown'}
+        return self._segment_from_data(customer_data)
+    
+    def _segment_from_data(self, customer_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Segmento del cliente según sus agregados de compras"""
         try:
-            customer_data = self._get_customer_data(customer_id)
-            if not customer_data:
-                return {'segment': 'unknown'}
-            
             total_spent = customer_data.get('total_spent', 0)
             total_purchases = customer_data.get('total_purchases', 0)
             days_since_last = customer_data.get('days_since_last', 0)
@@ -606,11 +698,13 @@ class PredictiveAnalysisManager:
 
     def _predict_next_purchase(self, customer_id: int) -> Dict[str, Any]:
         """Predicción de próxima compra"""
+        return self._next_purchase_from_data(self._get_customer_data(customer_id),
+                                             self._patterns_from_history(self._get_customer_sales(customer_id)))
+    
+    def _next_purchase_from_data(self, customer_data: Dict[str, Any],
+                                 patterns: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Próxima compra probable según el patrón de frecuencia (y estacional si hay)"""
         try:
-            # Obtener patrón de frecuencia
-            customer_data = self._get_customer_data(customer_id)
-            patterns = self._analyze_purchase_patterns(customer_id)
-            
             if not customer_data or not patterns:
                 return {'prediction': 'insufficient_data'}
             
@@ -629,7 +723,7 @@ class PredictiveAnalysisManager:
             if not last_purchase_str:
                 return {'prediction': 'no_previous_purchases'}
             
-            last_purchase = datetime.strptime(last_purchase_str, '%Y-%m-%d %H:%M:%S')
+            last_purchase = self._parse_datetime(last_purchase_str)
             avg_interval = frequency_pattern['avg_days_between_purchases']
             confidence = frequency_pattern['confidence']
             
@@ -689,13 +783,15 @@ class PredictiveAnalysisManager:
         try:
             # Obtener historial de productos del cliente
             query = """
-            SELECT p.id, p.nombre, p.categoria, p.precio, 
+            SELECT p.id, p.nombre, p.categoria_id, COALESCE(cat.nombre, 'Sin categoría') as categoria,
+                   p.precio_venta as precio,
                    SUM(dv.cantidad) as total_quantity,
                    COUNT(*) as purchase_frequency,
                    MAX(v.fecha_venta) as last_purchase
             FROM productos p
-            JOIN detalle_venta dv ON p.id = dv.producto_id
+            JOIN detalle_ventas dv ON p.id = dv.producto_id
             JOIN ventas v ON dv.venta_id = v.id
+            LEFT JOIN categorias cat ON p.categoria_id = cat.id
             WHERE v.cliente_id = ?
             GROUP BY p.id
             ORDER BY purchase_frequency DESC, last_purchase DESC
@@ -706,14 +802,16 @@ class PredictiveAnalysisManager:
                 return []
             
             # Obtener productos similares (misma categoría)
-            categories = list(set(p['categoria'] for p in customer_products))
+            categories = list(set(p['categoria_id'] for p in customer_products if p['categoria_id'] is not None))
             
             similar_products_query = """
-            SELECT p.id, p.nombre, p.categoria, p.precio,
+            SELECT p.id, p.nombre, COALESCE(cat.nombre, 'Sin categoría') as categoria,
+                   p.precio_venta as precio,
                    COUNT(dv.venta_id) as popularity
             FROM productos p
-            JOIN detalle_venta dv ON p.id = dv.producto_id
-            WHERE p.categoria IN ({}) AND p.id NOT IN ({})
+            JOIN detalle_ventas dv ON p.id = dv.producto_id
+            LEFT JOIN categorias cat ON p.categoria_id = cat.id
+            WHERE p.categoria_id IN ({}) AND p.id NOT IN ({})
             GROUP BY p.id
             HAVING popularity >= 3
             ORDER BY popularity DESC
@@ -724,14 +822,14 @@ class PredictiveAnalysisManager:
             )
             
             params = categories
-            similar_products = self.db_manager.execute_query(similar_products_query, params)
+            similar_products = self.db_manager.execute_query(similar_products_query, params) if categories else []
             
             # Calcular scores de recomendación
             recommendations = []
             
             # Productos de recompra (que ya compró antes)
             for product in customer_products[:3]:  # Top 3
-                last_purchase = datetime.strptime(product['last_purchase'], '%Y-%m-%d %H:%M:%S')
+                last_purchase = self._parse_datetime(product['last_purchase'])
                 days_since = (datetime.now() - last_purchase).days
                 
                 # Score basado en frecuencia y recencia
@@ -776,11 +874,14 @@ class PredictiveAnalysisManager:
 
     def _calculate_clv_prediction(self, customer_id: int) -> Dict[str, Any]:
         """Cálculo del valor de vida del cliente (CLV) predictivo"""
+        customer_data = self._get_customer_data(customer_id)
+        if not customer_data:
+            return {'error': 'No hay datos suficientes'}
+        return self._clv_from_data(customer_data, self._analyze_trends(customer_id))
+    
+    def _clv_from_data(self, customer_data: Dict[str, Any], trends: Dict[str, Any]) -> Dict[str, Any]:
+        """CLV proyectado a partir de los agregados y las tendencias del cliente"""
         try:
-            customer_data = self._get_customer_data(customer_id)
-            if not customer_data:
-                return {'error': 'No hay datos suficientes'}
-            
             total_spent = customer_data.get('total_spent', 0)
             total_purchases = customer_data.get('total_purchases', 0)
             customer_lifespan = customer_data.get('customer_lifespan', 0)
@@ -806,7 +907,6 @@ class PredictiveAnalysisManager:
             predicted_clv = avg_purchase_value * purchase_frequency * estimated_lifetime_months * retention_probability
             
             # Análisis de tendencia para ajustar predicción
-            trends = self._analyze_trends(customer_id)
             trend_multiplier = 1.0
             
             if trends.get('overall_trend') == 'positive':
@@ -850,11 +950,14 @@ class PredictiveAnalysisManager:
 
     def _calculate_overall_confidence(self, customer_id: int) -> float:
         """Calcular score de confianza general del análisis"""
+        customer_data = self._get_customer_data(customer_id)
+        if not customer_data:
+            return 0.0
+        return self._confidence_from_data(customer_data)
+    
+    def _confidence_from_data(self, customer_data: Dict[str, Any]) -> float:
+        """Confianza del análisis según cantidad, antigüedad y actividad de compras"""
         try:
-            customer_data = self._get_customer_data(customer_id)
-            if not customer_data:
-                return 0.0
-            
             factors = []
             
             # Factor 1: Cantidad de transacciones
@@ -896,25 +999,24 @@ class PredictiveAnalysisManager:
             logger.error(f"Error calculando confianza: {e}")
             return 0.0
 
-    def get_segment_analysis(self) -> Dict[str, Any]:
-        """Análisis completo de segmentos de clientes"""
-        try:
-            query = """
+    # Resumen de compras por cliente activo (segmentos y K-means)
+    _SEGMENT_CUSTOMERS_QUERY = """
             SELECT c.id, c.nombre,
-                   COUNT(v.id) as total_purchases,
-                   COALESCE(SUM(v.total), 0) as total_spent,
-                   COALESCE(AVG(v.total), 0) as avg_purchase,
-                   MAX(v.fecha_venta) as last_purchase,
-                   julianday('now') - julianday(MAX(v.fecha_venta)) as days_since_last,
-                   julianday(MAX(v.fecha_venta)) - julianday(MIN(v.fecha_venta)) as customer_lifespan
+                   f.cantidad_compras as total_purchases,
+                   f.monto_total as total_spent,
+                   f.ticket_promedio as avg_purchase,
+                   f.ultima_compra as last_purchase,
+                   julianday('now') - julianday(f.ultima_compra) as days_since_last,
+                   julianday(f.ultima_compra) - julianday(f.primera_compra) as customer_lifespan
             FROM clientes c
-            LEFT JOIN ventas v ON c.id = v.cliente_id
-            WHERE c.activo = 1
-            GROUP BY c.id
-            HAVING total_purchases > 0
+            JOIN customer_features f ON f.cliente_id = c.id
+            WHERE c.activo = 1 AND f.cantidad_compras > 0
             """
-            
-            customers = self.db_manager.execute_query(query)
+    
+    def get_segment_analysis(self) -> Dict[str, Any]:
+        """Análisis completo de segmentos de clientes"""
+        try:
+            customers = self.db_manager.execute_query(self._SEGMENT_CUSTOMERS_QUERY)
             if not customers:
                 return {'error': 'No hay datos de clientes'}
             
@@ -922,7 +1024,7 @@ class PredictiveAnalysisManager:
             segments = defaultdict(list)
             
             for customer in customers:
-                segment_info = self._classify_customer_segment(customer['id'])
+                segment_info = self._segment_from_data(customer)
                 segment_key = segment_info.get('primary_segment', 'unknown')
                 segments[segment_key].append(customer)
             
@@ -952,6 +1054,7 @@ class PredictiveAnalysisManager:
             return {
                 'total_customers_analyzed': len(customers),
                 'segments': segment_stats,
+                'clusters': self._cluster_customers(customers),
                 'analysis_date': datetime.now().isoformat(),
                 'recommendations': self._generate_segment_recommendations(segment_stats)
             }
@@ -960,6 +1063,77 @@ class PredictiveAnalysisManager:
             logger.error(f"Error en análisis de segmentos: {e}")
             return {'error': str(e)}
 
+    @staticmethod
+    def _cluster_features(customers: List[Dict[str, Any]]) -> List[List[float]]:
+        """Vectores recency/frequency/monetary/ticket; frecuencia e importes en escala logarítmica"""
+        return [[
+            customer['days_since_last'] or 0,
+            math.log1p(customer['total_purchases'] or 0),
+            math.log1p(max(customer['total_spent'] or 0, 0)),
+            math.log1p(max(customer['avg_purchase'] or 0, 0))
+        ] for customer in customers]
+    
+    def _cluster_customers(self, customers: List[Dict[str, Any]], k: int = None) -> Dict[str, Any]:
+        """Segmentación K-means de los clientes con su perfil por grupo"""
+        from utils.ml_utils import KMeans
+        
+        k = k or self.cluster_count
+        if len(customers) < 2 * k:
+            return {'error': 'Datos insuficientes para segmentación K-means'}
+        
+        try:
+            vectors = self._cluster_features(customers)
+            model = KMeans(k=k).fit(vectors)
+            
+            # Sumas por grupo en una sola pasada sobre los clientes
+            groups = {}
+            for customer, label in zip(customers, model.labels):
+                group = groups.setdefault(int(label), {'count': 0, 'recency': 0.0, 'frequency': 0.0,
+                                                       'spent': 0.0, 'sample': []})
+                group['count'] += 1
+                group['recency'] += customer['days_since_last'] or 0
+                group['frequency'] += customer['total_purchases'] or 0
+                group['spent'] += customer['total_spent'] or 0
+                if len(group['sample']) < self.cluster_sample_size:
+                    group['sample'].append(customer['id'])
+            
+            profiles = [{
+                'cluster': cluster,
+                'customer_count': group['count'],
+                'avg_recency': round(group['recency'] / group['count'], 1),
+                'avg_frequency': round(group['frequency'] / group['count'], 1),
+                'avg_spent': round(group['spent'] / group['count'], 2),
+                'sample_customer_ids': group['sample']
+            } for cluster, group in sorted(groups.items())]
+            profiles.sort(key=lambda profile: profile['avg_spent'], reverse=True)
+            
+            return {
+                'k': k,
+                'inertia': round(model.inertia, 3),
+                'silhouette': round(model.silhouette(vectors), 3),
+                'iterations': model.iterations,
+                'converged': model.converged,
+                'profiles': profiles
+            }
+        except Exception as e:
+            logger.error(f"Error en segmentación K-means: {e}")
+            return {'error': str(e)}
+    
+    def get_cluster_elbow(self, max_k: int = 8) -> Dict[str, Any]:
+        """Inercia y silueta por cantidad de grupos, con el k sugerido por el codo"""
+        from utils.ml_utils import KMeans
+        
+        try:
+            customers = self.db_manager.execute_query(self._SEGMENT_CUSTOMERS_QUERY)
+            if len(customers) < 3:
+                return {'error': 'Datos insuficientes para segmentación K-means'}
+            
+            rows = KMeans.elbow(self._cluster_features(customers), range(2, min(max_k, len(customers) - 1) + 1))
+            return {'elbow': rows, 'suggested_k': KMeans.suggest_k(rows)}
+        except Exception as e:
+            logger.error(f"Error calculando codo de K-means: {e}")
+            return {'error': str(e)}
+    
     def _get_segment_name(self, segment_key: str) -> str:
         """Obtener nombre descriptivo del segmento"""
         names = {
@@ -1255,26 +1429,56 @@ class PredictiveAnalysisManager:
         
         return f"{urgency}. Demanda prevista: {predicted_demand:.0f} unidades ({confidence_text})."
 
+    def _monthly_sales(self, months_back: int) -> List[Dict[str, Any]]:
+        """Ventas completadas por mes, desde la instantánea columnar si está disponible"""
+        start = self.db_manager.execute_single(
+            "SELECT date('now', ?) as fecha, CAST(strftime('%s', date('now', ?)) AS INTEGER) as segundos",
+            (f'-{months_back} months', f'-{months_back} months')
+        )
+        
+        if self.snapshot is not None:
+            try:
+                if self.snapshot.is_available():
+                    return self.snapshot.monthly_sales(since=start['segundos'])
+            except Exception as e:
+                logger.warning(f"Instantánea de análisis no disponible, se consulta la base: {e}")
+        
+        # Totales por venta y productos por línea en consultas separadas: unir
+        # ventas con su detalle antes de agrupar multiplicaría las ventas
+        query = """
+            WITH ventas_mes AS (
+                SELECT 
+                    strftime('%Y', fecha_venta) as year,
+                    strftime('%m', fecha_venta) as month,
+                    COUNT(*) as transaction_count,
+                    SUM(total) as total_revenue,
+                    AVG(total) as avg_ticket,
+                    COUNT(DISTINCT cliente_id) as unique_customers
+                FROM ventas
+                WHERE fecha_venta >= ? AND estado = 'COMPLETADA'
+                GROUP BY year, month
+            ),
+            productos_mes AS (
+                SELECT 
+                    strftime('%Y', v.fecha_venta) as year,
+                    strftime('%m', v.fecha_venta) as month,
+                    COUNT(DISTINCT dv.producto_id) as unique_products
+                FROM ventas v
+                INNER JOIN detalle_ventas dv ON v.id = dv.venta_id
+                WHERE v.fecha_venta >= ? AND v.estado = 'COMPLETADA'
+                GROUP BY year, month
+            )
+            SELECT vm.*, COALESCE(pm.unique_products, 0) as unique_products
+            FROM ventas_mes vm
+            LEFT JOIN productos_mes pm ON pm.year = vm.year AND pm.month = vm.month
+            ORDER BY vm.year, vm.month
+        """
+        return self.db_manager.execute_query(query, (start['fecha'], start['fecha']))
+    
     def analyze_seasonal_trends(self, months_back: int = 12) -> Dict[str, Any]:
         """Análisis de tendencias estacionales del negocio"""
         try:
-            query = """
-            SELECT 
-                strftime('%m', v.fecha_venta) as month,
-                strftime('%Y', v.fecha_venta) as year,
-                COUNT(v.id) as transaction_count,
-                SUM(v.total) as total_revenue,
-                AVG(v.total) as avg_ticket,
-                COUNT(DISTINCT v.cliente_id) as unique_customers,
-                COUNT(DISTINCT dv.producto_id) as unique_products
-            FROM ventas v
-            LEFT JOIN detalle_venta dv ON v.id = dv.venta_id
-            WHERE v.fecha_venta >= date('now', '-{} months')
-            GROUP BY year, month
-            ORDER BY year, month
-            """.format(months_back)
-            
-            monthly_data = self.db_manager.execute_query(query)
+            monthly_data = self._monthly_sales(months_back)
             if not monthly_data or len(monthly_data) < 6:
                 return {'error': 'Datos insuficientes para análisis estacional'}
             
@@ -0,0 +1,189 @@
+"""
+Caché de Productos para AlmacénPro
+Índices en memoria por id, código de barras y código interno para el camino
+de escaneo del POS, con refresco incremental por productos.actualizado_en
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PRODUCT_SELECT = """
+    SELECT p.*, c.nombre as categoria_nombre, pr.nombre as proveedor_nombre
+    FROM productos p
+    LEFT JOIN categorias c ON p.categoria_id = c.id
+    LEFT JOIN proveedores pr ON p.proveedor_id = pr.id
+"""
+
+class ProductCache:
+    """Catálogo de productos en memoria con invalidación incremental
+
+    Las filas se guardan como tuplas con una lista de columnas compartida para
+    reducir memoria en catálogos grandes; cada consulta retorna un dict nuevo.
+    Los cambios hechos por otras conexiones (otra caja, el portal) se detectan
+    consultando como máximo cada ``refresh_interval`` segundos las filas con
+    ``actualizado_en`` mayor o igual a la última marca vista.
+    """
+
+    def __init__(self, db_manager, refresh_interval: float = 2.0):
+        self.db = db_manager
+        self.refresh_interval = refresh_interval
+
+        self._columns: Tuple[str, ...] = ()
+        self._rows: Dict[int, tuple] = {}
+        self._by_barcode: Dict[str, int] = {}
+        self._by_internal_code: Dict[str, int] = {}
+        self._watermark: Optional[str] = None
+        self._last_refresh = 0.0
+        self._loaded = False
+        self._lock = threading.RLock()
+
+        self._stats = {'hits': 0, 'misses': 0, 'refreshes': 0, 'invalidations': 0}
+
+    # Carga y refresco
+    def warm(self):
+        """Cargar el catálogo completo en memoria"""
+        start = time.perf_counter()
+        rows = self.db.execute_query(PRODUCT_SELECT)
+
+        with self._lock:
+            self._rows.clear()
+            self._by_barcode.clear()
+            self._by_internal_code.clear()
+            self._watermark = None
+            self._apply(rows)
+            self._loaded = True
+            self._last_refresh = time.monotonic()
+
+        logger.info(f"Caché de productos cargada: {len(rows)} productos en "
+                    f"{(time.perf_counter() - start) * 1000:.1f} ms")
+
+    def refresh(self) -> int:
+        """Aplicar los productos modificados desde la última marca
+
+        Returns:
+            Cantidad de productos actualizados en la caché
+        """
+        with self._lock:
+            if not self._loaded:
+                self.warm()
+                return len(self._rows)
+
+            if self._watermark is None:
+                rows = self.db.execute_query(PRODUCT_SELECT + " WHERE p.actualizado_en IS NOT NULL")
+            else:
+                rows = self.db.execute_query(
+                    PRODUCT_SELECT + " WHERE p.actualizado_en >= ?", (self._watermark,)
+                )
+
+            self._apply(rows)
+            self._last_refresh = time.monotonic()
+            self._stats['refreshes'] += 1
+            return len(rows)
+
+    def _maybe_refresh(self):
+        """Refrescar si la caché no está cargada o pasó el intervalo de refresco"""
+        if not self._loaded or time.monotonic() - self._last_refresh >= self.refresh_interval:
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"Error refrescando caché de productos: {e}")
+
+    def _apply(self, rows: List[Dict]):
+        """Incorporar filas a los índices (requiere el lock tomado)"""
+        for row in rows:
+            if not self._columns:
+                self._columns = tuple(row.keys())
+            self._store(row)
+
+    def _store(self, row: Dict):
+        """Guardar una fila y actualizar los índices secundarios"""
+        product_id = row['id']
+        self._unindex(product_id)
+
+        self._rows[product_id] = tuple(row.get(column) for column in self._columns)
+        if row.get('codigo_barras'):
+            self._by_barcode[str(row['codigo_barras'])] = product_id
+        if row.get('codigo_interno'):
+            self._by_internal_code[str(row['codigo_interno'])] = product_id
+
+        updated_at = row.get('actualizado_en')
+        if updated_at and (self._watermark is None or str(updated_at) > self._watermark):
+            self._watermark = str(updated_at)
+
+    def _unindex(self, product_id: int):
+        """Quitar un producto de todos los índices"""
+        old = self._rows.pop(product_id, None)
+        if old is None:
+            return
+
+        row = dict(zip(self._columns, old))
+        barcode = row.get('codigo_barras')
+        if barcode and self._by_barcode.get(str(barcode)) == product_id:
+            del self._by_barcode[str(barcode)]
+        internal_code = row.get('codigo_interno')
+        if internal_code and self._by_internal_code.get(str(internal_code)) == product_id:
+            del self._by_internal_code[str(internal_code)]
+
+    # Consultas
+    def get_by_id(self, product_id: int) -> Optional[Dict]:
+        """Obtener producto por ID"""
+        self._maybe_refresh()
+        return self._get(product_id, "p.id = ?", product_id)
+
+    def get_by_barcode(self, barcode: str) -> Optional[Dict]:
+        """Obtener producto por código de barras"""
+        self._maybe_refresh()
+        return self._get(self._by_barcode.get(str(barcode)), "p.codigo_barras = ?", barcode)
+
+    def get_by_internal_code(self, internal_code: str) -> Optional[Dict]:
+        """Obtener producto por código interno"""
+        self._maybe_refresh()
+        return self._get(self._by_internal_code.get(str(internal_code)), "p.codigo_interno = ?", internal_code)
+
+    def _get(self, product_id: Optional[int], where: str, value) -> Optional[Dict]:
+        """Resolver desde memoria o, si no está, desde la base"""
+        row = self._rows.get(product_id) if product_id is not None else None
+        if row is not None:
+            self._stats['hits'] += 1
+            return dict(zip(self._columns, row))
+
+        # Puede ser un producto creado por otra conexión y aún no refrescado
+        self._stats['misses'] += 1
+        result = self.db.execute_single(PRODUCT_SELECT + f" WHERE {where}", (value,))
+        if result:
+            with self._lock:
+                if not self._columns:
+                    self._columns = tuple(result.keys())
+                self._store(result)
+        return result
+
+    # Invalidación
+    def invalidate(self, product_ids: Iterable[int]):
+        """Descartar productos modificados en este proceso (se recargan al consultarlos)"""
+        with self._lock:
+            for product_id in product_ids:
+                self._unindex(product_id)
+                self._stats['invalidations'] += 1
+
+    def clear(self):
+        """Vaciar la caché completa"""
+        with self._lock:
+            self._rows.clear()
+            self._by_barcode.clear()
+            self._by_internal_code.clear()
+            self._watermark = None
+            self._loaded = False
+
+    def get_stats(self) -> Dict:
+        """Estadísticas de uso de la caché"""
+        lookups = self._stats['hits'] + self._stats['misses']
+        return {
+            **self._stats,
+            'size': len(self._rows),
+            'hit_rate': round(self._stats['hits'] / lookups, 4) if lookups else 0.0,
+            'watermark': self._watermark
+        }
@@ -7,7 +7,10 @@ import logging
 import uuid
 from datetime import datetime, date
 from decimal import Decimal
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, Iterator, List, Optional, Tuple, Any
+
+from database.date_ranges import date_range
+from managers.product_cache import ProductCache
 
 logger = logging.getLogger(__name__)
 
@@ -18,8 +21,16 @@ class ProductManager:
         self.db = db_manager
         self.logger = logging.getLogger(__name__)
         
+        # Caché en memoria para el camino de escaneo del POS
+        self.cache = ProductCache(db_manager)
+        
     def search_products(self, search_term: str, limit: int = 50) -> List[Dict]:
-        """Buscar productos por código de barras, nombre o código interno"""
+        """Buscar productos por código de barras, nombre o código interno
+        
+        Usa el índice FTS5 (búsqueda por prefijo, sin distinguir acentos) ordenado
+        por bm25, con el código de barras o interno exacto siempre primero. Si el
+        índice no está disponible se usa la búsqueda LIKE original.
+        """
         try:
             search_term = search_term.strip() if search_term else ""
             
@@ -34,79 +45,125 @@ class ProductManager:
                     ORDER BY p.nombre
                     LIMIT ?
                 """
-                results = self.db.execute_query(query, (limit,))
-                if results:
-                    return [dict(row) for row in results]
-                return []
-            else:
-                # Búsqueda con término específico
-                query = """
-                    SELECT p.*, c.nombre as categoria_nombre, pr.nombre as proveedor_nombre
-                    FROM productos p
-                    LEFT JOIN categorias c ON p.categoria_id = c.id
-                    LEFT JOIN proveedores pr ON p.proveedor_id = pr.id
-                    WHERE (p.codigo_barras LIKE ? OR p.nombre LIKE ? 
-                           OR p.codigo_interno LIKE ?)
-                    AND p.activo = 1
-                    ORDER BY 
-                        CASE 
-                            WHEN p.codigo_barras = ? THEN 1
-                            WHEN p.codigo_barras LIKE ? THEN 2
-                            WHEN p.nombre LIKE ? THEN 3
-                            ELSE 4
-                        END,
-                        p.nombre
-                    LIMIT ?
-                """
-                
-                search_pattern = f"%{search_term}%"
-                exact_pattern = search_term
-                starts_pattern = f"{search_term}%"
-                
-                params = (
-                    search_pattern, search_pattern, search_pattern,  # WHERE clause
-                    exact_pattern, starts_pattern, starts_pattern,   # ORDER BY clause
-                    limit
-                )
-                results = self.db.execute_query(query, params)
-                if results:
-                    return [dict(row) for row in results]
-                return []
+                return self.db.execute_query(query, (limit,))
+            
+            match_expression = self._build_match_expression(search_term)
+            if getattr(self.db, 'fts_enabled', False) and match_expression:
+                try:
+                    return self._search_products_fts(search_term, match_expression, limit)
+                except Exception as e:
+                    self.logger.warning(f"Búsqueda FTS fallida, usando LIKE: {e}")
+            
+            return self._search_products_like(search_term, limit)
             
         except Exception as e:
             self.logger.error(f"Error buscando productos: {e}")
             return []
     
+    @staticmethod
+    def _build_match_expression(search_term: str) -> str:
+        """Convertir el texto ingresado en una expresión MATCH de FTS5
+        
+        Cada palabra se busca como prefijo ("coca col" -> "coca"* "col"*) y se
+        entrecomilla para que los caracteres especiales de FTS5 no generen errores.
+        """
+        terms = []
+        for word in search_term.split():
+            if any(char.isalnum() for char in word):
+                terms.append('"' + word.replace('"', '""') + '"*')
+        return ' '.join(terms)
+    
+    def _search_products_fts(self, search_term: str, match_expression: str, limit: int) -> List[Dict]:
+        """Búsqueda por índice de texto completo"""
+        # Pesos bm25 por columna: nombre, codigo_barras, codigo_interno, descripcion
+        query = """
+            SELECT p.*, c.nombre as categoria_nombre, pr.nombre as proveedor_nombre
+            FROM productos_fts f
+            JOIN productos p ON p.id = f.rowid
+            LEFT JOIN categorias c ON p.categoria_id = c.id
+            LEFT JOIN proveedores pr ON p.proveedor_id = pr.id
+            WHERE productos_fts MATCH ?
+            AND p.activo = 1
+            ORDER BY 
+                CASE WHEN p.codigo_barras = ? OR p.codigo_interno = ? THEN 0 ELSE 1 END,
+                bm25(productos_fts, 10.0, 5.0, 5.0, 1.0),
+                p.nombre
+            LIMIT ?
+        """
+        return self.db.execute_query(query, (match_expression, search_term, search_term, limit))
+    
+    def _search_products_like(self, search_term: str, limit: int) -> List[Dict]:
+        """Búsqueda por LIKE (recorre toda la tabla de productos)"""
+        query = """
+            SELECT p.*, c.nombre as categoria_nombre, pr.nombre as proveedor_nombre
+            FROM productos p
+            LEFT JOIN categorias c ON p.categoria_id = c.id
+            LEFT JOIN proveedores pr ON p.proveedor_id = pr.id
+            WHERE (p.codigo_barras LIKE ? OR p.nombre LIKE ? 
+                   OR p.codigo_interno LIKE ?)
+            AND p.activo = 1
+            ORDER BY 
+                CASE 
+                    WHEN p.codigo_barras = ? THEN 1
+                    WHEN p.codigo_barras LIKE ? THEN 2
+                    WHEN p.nombre LIKE ? THEN 3
+                    ELSE 4
+                END,
+                p.nombre
+            LIMIT ?
+        """
+        
+        search_pattern = f"%{search_term}%"
+        exact_pattern = search_term
+        starts_pattern = f"{search_term}%"
+        
+        params = (
+            search_pattern, search_pattern, search_pattern,  # WHERE clause
+            exact_pattern, starts_pattern, starts_pattern,   # ORDER BY clause
+            limit
+        )
+        return self.db.execute_query(query, params)
+    
     def get_product_by_barcode(self, barcode: str) -> Optional[Dict]:
         """Obtener producto por código de barras"""
         try:
-            return self.db.execute_single("""
-                SELECT p.*, c.nombre as categoria_nombre, pr.nombre as proveedor_nombre
-                FROM productos p
-                LEFT JOIN categorias c ON p.categoria_id = c.id
-                LEFT JOIN proveedores pr ON p.proveedor_id = pr.id
-                WHERE p.codigo_barras = ? AND p.activo = 1
-            """, (barcode,))
+            product = self.cache.get_by_barcode(barcode)
+            return product if product and product.get('activo') else None
             
         except Exception as e:
             self.logger.error(f"Error obteniendo producto por código: {e}")
             return None
     
+    def get_product_by_internal_code(self, internal_code: str) -> Optional[Dict]:
+        """Obtener producto por código interno"""
+        try:
+            product = self.cache.get_by_internal_code(internal_code)
+            return product if product and product.get('activo') else None
+            
+        except Exception as e:
+            self.logger.error(f"Error obteniendo producto por código interno: {e}")
+            return None
+    
     def get_product_by_id(self, product_id: int) -> Optional[Dict]:
         """Obtener producto por ID"""
         try:
-            return self.db.execute_single("""
-                SELECT p.*, c.nombre as categoria_nombre, pr.nombre as proveedor_nombre
-                FROM productos p
-                LEFT JOIN categorias c ON p.categoria_id = c.id
-                LEFT JOIN proveedores pr ON p.proveedor_id = pr.id
-                WHERE p.id = ?
-            """, (product_id,))
+            return self.cache.get_by_id(product_id)
             
         except Exception as e:
             self.logger.error(f"Error obteniendo producto por ID: {e}")
             return None
     
+    def warm_cache(self):
+        """Cargar el catálogo en la caché de productos (al iniciar la aplicación)"""
+        try:
+            self.cache.warm()
+        except Exception as e:
+            self.logger.warning(f"No se pudo precargar la caché de productos: {e}")
+    
+    def invalidate_products(self, product_ids: List[int]):
+        """Descartar de la caché productos modificados fuera de este gestor"""
+        self.cache.invalidate(product_ids)
+    
     def create_product(self, product_data: Dict) -> int:
         """Crear nuevo producto - Compatible con GUI y esquema real"""
         try:
@@ -177,6 +234,7 @@ class ProductManager:
             ))
             
             if product_id:
+                self.cache.invalidate([product_id])
                 self.logger.info(f"Producto creado exitosamente: ID {product_id}")
                 return True, f"Producto creado exitosamente", product_id
             else:
@@ -237,6 +295,7 @@ class ProductManager:
             query = f"UPDATE productos SET {', '.join(update_fields)} WHERE id = ?"
             
             success = self.db.execute_update(query, update_values)
+            self.cache.invalidate([product_id])
             
             if success:
                 self.logger.info(f"Producto actualizado: ID {product_id}")
@@ -308,6 +367,9 @@ class ProductManager:
                 
                 # Confirmar transacción
                 self.db.commit_transaction()
+                self.cache.invalidate([product_id])
+                # Dentro de otra transacción (recepción de compras) se publica al confirmarla
+                self.db.notify_change('productos', [product_id], 'update_stock')
                 
                 self.logger.info(f"Stock actualizado: Producto {product_id}, "
                                f"Stock anterior: {current_stock}, "
@@ -343,13 +405,10 @@ class ProductManager:
                 query += " AND ms.producto_id = ?"
                 params.append(product_id)
             
-            if date_from:
-                query += " AND DATE(ms.fecha_movimiento) >= ?"
-                params.append(date_from)
-            
-            if date_to:
-                query += " AND DATE(ms.fecha_movimiento) <= ?"
-                params.append(date_to)
+            if date_from or date_to:
+                date_sql, date_params = date_range('ms.fecha_movimiento', date_from, date_to)
+                query += f" AND {date_sql}"
+                params.extend(date_params)
             
             query += " ORDER BY ms.fecha_movimiento DESC LIMIT ?"
             params.append(limit)
@@ -418,6 +477,122 @@ class ProductManager:
             self.logger.error(f"Error obteniendo todos los productos: {e}")
             return []
     
+    def iter_products(self, include_inactive: bool = False) -> Iterator[Dict]:
+        """Recorrer todos los productos sin cargarlos en memoria (para exportaciones)"""
+        query = """
+            SELECT p.*, c.nombre as categoria_nombre, pr.nombre as proveedor_nombre
+            FROM productos p
+            LEFT JOIN categorias c ON p.categoria_id = c.id
+            LEFT JOIN proveedores pr ON p.proveedor_id = pr.id
+        """
+        if not include_inactive:
+            query += " WHERE p.activo = 1"
+        query += " ORDER BY p.nombre"
+        
+        return self.db.iter_query(query)
+    
+    # Columnas por las que puede ordenar la grilla de productos. Las expresiones
+    # no admiten NULL para poder paginar por clave (valor de orden, id).
+    PRODUCT_SORT_EXPRESSIONS = {
+        'codigo': "COALESCE(p.codigo_barras, p.codigo_interno, '')",
+        'nombre': "p.nombre",
+        'categoria': "COALESCE(c.nombre, '')",
+        'stock_actual': "COALESCE(p.stock_actual, 0)",
+        'stock_minimo': "COALESCE(p.stock_minimo, 0)",
+        'precio_compra': "COALESCE(p.precio_compra, 0)",
+        'precio_venta': "COALESCE(p.precio_venta, 0)",
+        'valor_stock': "COALESCE(p.stock_actual, 0) * COALESCE(p.precio_compra, 0)"
+    }
+    
+    # Filtros de estado de stock de las grillas (crítico: la mitad del mínimo o menos)
+    STOCK_FILTERS = {
+        'con_stock': "COALESCE(p.stock_actual, 0) > 0",
+        'sin_stock': "COALESCE(p.stock_actual, 0) <= 0",
+        'bajo': "COALESCE(p.stock_actual, 0) <= COALESCE(p.stock_minimo, 0)",
+        'normal': "COALESCE(p.stock_actual, 0) > COALESCE(p.stock_minimo, 0)",
+        'critico': "p.stock_minimo > 0 AND COALESCE(p.stock_actual, 0) <= p.stock_minimo / 2.0"
+    }
+    
+    def _product_filters(self, search_term: str, category_id: Optional[int],
+                         stock_filter: Optional[str], include_inactive: bool) -> Tuple[List[str], List]:
+        """Condiciones WHERE y parámetros comunes a la grilla y su resumen"""
+        conditions, params = [], []
+        if not include_inactive:
+            conditions.append("p.activo = 1")
+        if category_id:
+            conditions.append("p.categoria_id = ?")
+            params.append(category_id)
+        if stock_filter in self.STOCK_FILTERS:
+            conditions.append(self.STOCK_FILTERS[stock_filter])
+        
+        search_term = search_term.strip() if search_term else ""
+        if search_term:
+            match_expression = self._build_match_expression(search_term)
+            if getattr(self.db, 'fts_enabled', False) and match_expression:
+                conditions.append("p.id IN (SELECT rowid FROM productos_fts WHERE productos_fts MATCH ?)")
+                params.append(match_expression)
+            else:
+                search_pattern = f"%{search_term}%"
+                conditions.append("(p.codigo_barras LIKE ? OR p.nombre LIKE ? OR p.codigo_interno LIKE ?)")
+                params.extend([search_pattern] * 3)
+        return conditions, params
+    
+    def query_products(self, search_term: str = "", category_id: int = None, stock_filter: str = None,
+                       order_by: str = 'nombre', descending: bool = False, after: Tuple = None,
+                       limit: int = 200, include_inactive: bool = False) -> List[Dict]:
+        """Página de productos filtrada y ordenada en la base (grillas con carga diferida)
+        
+        Pagina por clave: ``after`` es el par (orden_valor, id) de la última fila de
+        la página anterior, así cada página usa el índice en lugar de un OFFSET
+        que recorre todas las filas ya mostradas.
+        """
+        try:
+            sort_expression = self.PRODUCT_SORT_EXPRESSIONS.get(order_by, self.PRODUCT_SORT_EXPRESSIONS['nombre'])
+            conditions, params = self._product_filters(search_term, category_id, stock_filter, include_inactive)
+            if after is not None:
+                conditions.append(f"({sort_expression}, p.id) {'<' if descending else '>'} (?, ?)")
+                params.extend(after)
+            
+            direction = 'DESC' if descending else 'ASC'
+            query = f"""
+                SELECT p.*, c.nombre as categoria_nombre, pr.nombre as proveedor_nombre,
+                       {sort_expression} as orden_valor
+                FROM productos p
+                LEFT JOIN categorias c ON p.categoria_id = c.id
+                LEFT JOIN proveedores pr ON p.proveedor_id = pr.id
+                {'WHERE ' + ' AND '.join(conditions) if conditions else ''}
+                ORDER BY orden_valor {direction}, p.id {direction}
+                LIMIT ?
+            """
+            params.append(limit)
+            return self.db.execute_query(query, params)
+            
+        except Exception as e:
+            self.logger.error(f"Error consultando productos: {e}")
+            return []
+    
+    def get_products_summary(self, search_term: str = "", category_id: int = None,
+                             stock_filter: str = None, include_inactive: bool = False) -> Dict:
+        """Totales de los productos que cumplen los filtros de la grilla"""
+        try:
+            conditions, params = self._product_filters(search_term, category_id, stock_filter, include_inactive)
+            query = f"""
+                SELECT COUNT(*) as total,
+                       COALESCE(SUM(CASE WHEN p.stock_minimo > 0
+                                          AND COALESCE(p.stock_actual, 0) <= p.stock_minimo
+                                     THEN 1 ELSE 0 END), 0) as stock_bajo,
+                       COALESCE(SUM(CASE WHEN COALESCE(p.stock_actual, 0) <= 0 THEN 1 ELSE 0 END), 0) as sin_stock,
+                       COALESCE(SUM(COALESCE(p.stock_actual, 0) * COALESCE(p.precio_compra, 0)), 0) as valor_costo,
+                       COALESCE(SUM(COALESCE(p.stock_actual, 0) * COALESCE(p.precio_venta, 0)), 0) as valor_venta
+                FROM productos p
+                {'WHERE ' + ' AND '.join(conditions) if conditions else ''}
+            """
+            return self.db.execute_single(query, params) or {}
+            
+        except Exception as e:
+            self.logger.error(f"Error calculando resumen de productos: {e}")
+            return {'total': 0, 'stock_bajo': 0, 'sin_stock': 0, 'valor_costo': 0, 'valor_venta': 0}
+    
     def delete_product(self, product_id: int, user_id: int) -> Tuple[bool, str]:
         """Eliminar producto (marcar como inactivo)"""
         try:
@@ -440,6 +615,8 @@ class ProductManager:
                     WHERE id = ?
                 """, (product_id,))
                 
+                self.cache.invalidate([product_id])
+                
                 if success:
                     self.logger.info(f"Producto marcado como inactivo: ID {product_id}")
                     return True, "Producto marcado como inactivo"
@@ -448,6 +625,7 @@ class ProductManager:
             else:
                 # Eliminar físicamente si no tiene movimientos recientes
                 success = self.db.execute_update("DELETE FROM productos WHERE id = ?", (product_id,))
+                self.cache.invalidate([product_id])
                 
                 if success:
                     self.logger.info(f"Producto eliminado: ID {product_id}")
@@ -515,6 +693,7 @@ class ProductManager:
                 params.append(provider_id)
             
             affected_rows = self.db.execute_update(query, params)
+            self.cache.refresh()
             
             if affected_rows > 0:
                 self.logger.info(f"Precios actualizados: {affected_rows} productos, "
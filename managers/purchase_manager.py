@@ -8,6 +8,8 @@ from datetime import datetime, date
 from decimal import Decimal
 from typing import Dict, List, Optional, Tuple, Any
 
+from database.date_ranges import date_range
+
 logger = logging.getLogger(__name__)
 
 class PurchaseManager:
@@ -229,6 +231,8 @@ class PurchaseManager:
                 
                 # Confirmar transacción
                 self.db.commit_transaction()
+                # El stock de cada producto ya se avisó desde update_stock
+                self.db.notify_change('compras', [purchase_id], 'receive_merchandise')
                 
                 if errors:
                     error_msg = "; ".join(errors)
@@ -307,13 +311,10 @@ class PurchaseManager:
                 query += " AND c.proveedor_id = ?"
                 params.append(provider_id)
             
-            if date_from:
-                query += " AND DATE(c.fecha_compra) >= ?"
-                params.append(date_from)
-            
-            if date_to:
-                query += " AND DATE(c.fecha_compra) <= ?"
-                params.append(date_to)
+            if date_from or date_to:
+                date_sql, date_params = date_range('c.fecha_compra', date_from, date_to)
+                query += f" AND {date_sql}"
+                params.extend(date_params)
             
             query += """
                 GROUP BY c.id
@@ -428,13 +429,10 @@ class PurchaseManager:
             """
             params = []
             
-            if date_from:
-                query += " AND DATE(fecha_compra) >= ?"
-                params.append(date_from)
-            
-            if date_to:
-                query += " AND DATE(fecha_compra) <= ?"
-                params.append(date_to)
+            if date_from or date_to:
+                date_sql, date_params = date_range('fecha_compra', date_from, date_to)
+                query += f" AND {date_sql}"
+                params.extend(date_params)
             
             result = self.db.execute_single(query, params)
             
@@ -481,13 +479,10 @@ class PurchaseManager:
             """
             params = []
             
-            if date_from:
-                query += " AND DATE(c.fecha_compra) >= ?"
-                params.append(date_from)
-            
-            if date_to:
-                query += " AND DATE(c.fecha_compra) <= ?"
-                params.append(date_to)
+            if date_from or date_to:
+                date_sql, date_params = date_range('c.fecha_compra', date_from, date_to)
+                query += f" AND {date_sql}"
+                params.extend(date_params)
             
             query += """
                 GROUP BY p.id, p.nombre, p.telefono, p.email
@@ -0,0 +1,179 @@
+"""
+Motor de Reportes para AlmacénPro
+Planifica un conjunto de métricas sobre una ventana de fechas y las calcula con
+una sola consulta por tabla base, en lugar de una consulta por métrica
+"""
+
+import logging
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from database.date_ranges import date_range
+from managers.sales_rollup_manager import sales_column_expressions
+
+logger = logging.getLogger(__name__)
+
+# Métrica -> tabla base de la que se deriva
+METRIC_SOURCES = {
+    'resumen': 'ventas',
+    'ventas_por_hora': 'ventas',
+    'metodos_pago': 'pagos',
+    'productos_top': 'detalle',
+    'estado_stock': 'productos'
+}
+
+class ReportEngine:
+    """Cálculo de métricas de reportes agrupadas por tabla base
+
+    ``run(['resumen', 'ventas_por_hora', 'metodos_pago'], desde, hasta)`` lee
+    ventas una sola vez (agrupadas por hora, de donde salen el resumen y la
+    distribución horaria) y pagos_venta una vez. Los totales de períodos
+    largos se leen de los resúmenes diarios con SalesRollupManager.
+    """
+
+    def __init__(self, db_manager):
+        self.db = db_manager
+        self.logger = logging.getLogger(__name__)
+        self._expressions = None
+
+        self._loaders: Dict[str, Callable] = {
+            'ventas': self._load_sales_by_hour,
+            'pagos': self._load_payments,
+            'detalle': self._load_products,
+            'productos': self._load_stock_status
+        }
+        self._metrics: Dict[str, Callable] = {
+            'resumen': self._sales_summary,
+            'ventas_por_hora': self._sales_by_hour,
+            'metodos_pago': lambda rows: rows,
+            'productos_top': lambda rows: rows,
+            'estado_stock': lambda row: row
+        }
+
+    def _get_expressions(self) -> Dict[str, str]:
+        if self._expressions is None:
+            self._expressions = sales_column_expressions(self.db)
+        return self._expressions
+
+    def plan(self, metrics: Iterable[str]) -> Dict[str, List[str]]:
+        """Agrupar las métricas pedidas por tabla base"""
+        plan: Dict[str, List[str]] = {}
+        for metric in metrics:
+            if metric not in METRIC_SOURCES:
+                raise ValueError(f"Métrica desconocida: {metric}")
+            plan.setdefault(METRIC_SOURCES[metric], []).append(metric)
+        return plan
+
+    def run(self, metrics: Iterable[str], start: Optional[date] = None, end: Optional[date] = None,
+            user_id: int = None, top_limit: int = 10) -> Dict[str, Any]:
+        """Calcular las métricas pedidas para el período [start, end]
+
+        Returns:
+            Diccionario métrica -> resultado, con las mismas claves que usan los reportes
+        """
+        options = {'start': start, 'end': end, 'user_id': user_id, 'top_limit': top_limit}
+        results = {}
+        for source, source_metrics in self.plan(metrics).items():
+            data = self._loaders[source](**options)
+            for metric in source_metrics:
+                results[metric] = self._metrics[metric](data)
+        return results
+
+    # Cargas por tabla base
+    def _filters(self, column: str, user_column: Optional[str], start, end, user_id):
+        sql, params = date_range(column, start, end)
+        if user_id and user_column:
+            sql += f" AND {user_column} = ?"
+            params.append(user_id)
+        return sql, params
+
+    def _load_sales_by_hour(self, start, end, user_id, **_) -> List[Dict]:
+        """Una pasada sobre ventas con los agregados de cada hora"""
+        expressions = self._get_expressions()
+        completed = "CASE WHEN v.estado = 'COMPLETADA' THEN {} END"
+        filter_sql, params = self._filters('v.fecha_venta', 'v.usuario_id', start, end, user_id)
+
+        return self.db.execute_query(f"""
+            SELECT strftime('%H', v.fecha_venta) AS hora,
+                   COUNT(*) AS total_ventas,
+                   COUNT({completed.format(1)}) AS ventas_completadas,
+                   COUNT(CASE WHEN v.estado = 'CANCELADA' THEN 1 END) AS ventas_canceladas,
+                   COALESCE(SUM({completed.format('v.total')}), 0) AS monto_total,
+                   COALESCE(SUM({completed.format('v.subtotal')}), 0) AS subtotal_total,
+                   COALESCE(SUM({completed.format(expressions['impuestos'])}), 0) AS impuestos_total,
+                   COALESCE(SUM({completed.format(expressions['descuentos'])}), 0) AS descuentos_total,
+                   MIN({completed.format('v.total')}) AS ticket_minimo,
+                   MAX({completed.format('v.total')}) AS ticket_maximo
+            FROM ventas v
+            WHERE {filter_sql}
+            GROUP BY hora
+            ORDER BY hora
+        """, params)
+
+    def _load_payments(self, start, end, user_id, **_) -> List[Dict]:
+        filter_sql, params = self._filters('v.fecha_venta', 'v.usuario_id', start, end, user_id)
+        return self.db.execute_query(f"""
+            SELECT pv.metodo_pago,
+                   COUNT(*) AS cantidad_transacciones,
+                   SUM(pv.importe) AS monto_total
+            FROM pagos_venta pv
+            INNER JOIN ventas v ON pv.venta_id = v.id
+            WHERE v.estado = 'COMPLETADA' AND {filter_sql}
+            GROUP BY pv.metodo_pago
+            ORDER BY monto_total DESC
+        """, params)
+
+    def _load_products(self, start, end, user_id, top_limit, **_) -> List[Dict]:
+        filter_sql, params = self._filters('v.fecha_venta', 'v.usuario_id', start, end, user_id)
+        return self.db.execute_query(f"""
+            SELECT p.nombre, p.codigo_barras,
+                   SUM(dv.cantidad) AS cantidad_vendida,
+                   SUM({self._get_expressions()['importe']}) AS monto_total,
+                   COUNT(DISTINCT v.id) AS transacciones
+            FROM productos p
+            INNER JOIN detalle_ventas dv ON p.id = dv.producto_id
+            INNER JOIN ventas v ON dv.venta_id = v.id
+            WHERE v.estado = 'COMPLETADA' AND {filter_sql}
+            GROUP BY p.id, p.nombre, p.codigo_barras
+            ORDER BY cantidad_vendida DESC
+            LIMIT ?
+        """, params + [top_limit])
+
+    def _load_stock_status(self, **_) -> Dict:
+        """Contadores de stock con los mismos criterios que el reporte de inventario"""
+        low = "p.stock_minimo > 0 AND p.stock_actual <= p.stock_minimo"
+        return self.db.execute_single(f"""
+            SELECT COUNT(*) AS total_productos,
+                   COALESCE(SUM(CASE WHEN {low} THEN 1 ELSE 0 END), 0) AS productos_stock_bajo,
+                   COALESCE(SUM(CASE WHEN NOT ({low}) AND p.stock_actual = 0 THEN 1 ELSE 0 END), 0) AS productos_sin_stock
+            FROM productos p
+            WHERE p.activo = 1
+        """) or {'total_productos': 0, 'productos_stock_bajo': 0, 'productos_sin_stock': 0}
+
+    # Métricas derivadas
+    @staticmethod
+    def _sales_summary(hours: List[Dict]) -> Dict:
+        """Resumen del período a partir de los grupos por hora"""
+        summary = {
+            'total_ventas': sum(row['total_ventas'] for row in hours),
+            'ventas_completadas': sum(row['ventas_completadas'] for row in hours),
+            'ventas_canceladas': sum(row['ventas_canceladas'] for row in hours)
+        }
+        for key in ('monto_total', 'subtotal_total', 'impuestos_total', 'descuentos_total'):
+            summary[key] = float(sum(row[key] or 0 for row in hours))
+
+        minimums = [row['ticket_minimo'] for row in hours if row['ticket_minimo'] is not None]
+        maximums = [row['ticket_maximo'] for row in hours if row['ticket_maximo'] is not None]
+        completed = summary['ventas_completadas']
+        summary['ticket_promedio'] = summary['monto_total'] / completed if completed else 0.0
+        summary['ticket_minimo'] = float(min(minimums)) if minimums else 0.0
+        summary['ticket_maximo'] = float(max(maximums)) if maximums else 0.0
+        return summary
+
+    @staticmethod
+    def _sales_by_hour(hours: List[Dict]) -> List[Dict]:
+        return [{
+            'hora': row['hora'],
+            'cantidad_ventas': row['ventas_completadas'],
+            'monto_total': row['monto_total']
+        } for row in hours if row['ventas_completadas']]
@@ -0,0 +1,330 @@
+"""
+Cola de Trabajos de Reportes para AlmacénPro
+Ejecuta reportes y exportaciones fuera del hilo de la interfaz, informa el
+progreso, permite cancelarlos y guarda los resultados terminados en caché
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Estados de un trabajo
+PENDIENTE = 'PENDIENTE'
+EJECUTANDO = 'EJECUTANDO'
+COMPLETADO = 'COMPLETADO'
+CANCELADO = 'CANCELADO'
+ERROR = 'ERROR'
+
+# Tipo de reporte -> (método de ReportManager, argumentos fijos)
+REPORT_METHODS = {
+    'SALES_DAILY': ('generate_daily_sales_report', {}),
+    'SALES_MONTHLY': ('generate_monthly_sales_report', {}),
+    'INVENTORY': ('generate_inventory_report', {}),
+    'LOW_STOCK': ('generate_inventory_report', {'low_stock_only': True}),
+    'TOP_PRODUCTS': ('generate_top_products_report', {}),
+    'FINANCIAL': ('generate_financial_report', {}),
+    'MOVEMENTS': ('generate_stock_movements_report', {})
+}
+
+# Tipo de reporte -> (iterador de ReportManager, clave de las filas en el reporte)
+# Al exportar esas filas se recorren con el iterador en lugar de armar el reporte completo
+EXPORT_ITERATORS = {
+    'MOVEMENTS': ('iter_stock_movements', 'movimientos')
+}
+
+class ReportCancelled(Exception):
+    """El trabajo fue cancelado mientras se ejecutaba"""
+
+@dataclass
+class ReportJob:
+    """Estado de un reporte encolado"""
+    id: str
+    report_type: str
+    params: Dict[str, Any]
+    cache_key: Optional[str] = None
+    export: Optional[Dict[str, Any]] = None
+    status: str = PENDIENTE
+    progress: int = 0
+    message: str = 'En cola'
+    result: Any = None
+    error: Optional[str] = None
+    from_cache: bool = False
+    rows_exported: int = 0
+    created_at: datetime = field(default_factory=datetime.now)
+    finished_at: Optional[datetime] = None
+    _cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+    _done_event: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    @property
+    def done(self) -> bool:
+        return self.status in (COMPLETADO, CANCELADO, ERROR)
+
+    def wait(self, timeout: float = None) -> bool:
+        """Esperar a que termine (uso en scripts y pruebas; no llamar desde la interfaz)"""
+        return self._done_event.wait(timeout)
+
+    def check_cancelled(self):
+        """Cortar la ejecución si se pidió cancelar"""
+        if self.cancelled:
+            raise ReportCancelled(self.id)
+
+class ReportJobManager:
+    """Ejecuta reportes en un pool de hilos con caché de resultados
+
+    Los resultados se guardan con la clave (tipo, parámetros, versión de datos),
+    así volver a abrir el mismo reporte sin ventas nuevas es inmediato. Los
+    listeners se invocan desde los hilos del pool; la interfaz debe reenviarlos
+    a su hilo (por ejemplo con una señal de Qt).
+    """
+
+    # Filas exportadas entre avisos de progreso (y controles de cancelación)
+    progress_every = 10000
+
+    def __init__(self, report_manager, max_workers: int = 2, max_cached: int = 50,
+                 retention_days: int = 30):
+        self.report_manager = report_manager
+        self.db = report_manager.db
+        self.logger = logging.getLogger(__name__)
+        self.max_cached = max_cached
+        self.retention_days = retention_days
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='reportes')
+        self._jobs: Dict[str, ReportJob] = {}
+        self._cache: Dict[str, Dict[str, Any]] = {}
+        self._listeners: List[Callable[[ReportJob], None]] = []
+        self._lock = threading.Lock()
+
+    # Listeners
+    def add_listener(self, callback: Callable[[ReportJob], None]):
+        """Registrar una función que recibe el trabajo en cada cambio de progreso o estado"""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[ReportJob], None]):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, job: ReportJob):
+        for callback in list(self._listeners):
+            try:
+                callback(job)
+            except Exception as e:
+                self.logger.warning(f"Error notificando trabajo {job.id}: {e}")
+
+    def _set_progress(self, job: ReportJob, progress: int, message: str):
+        job.progress = progress
+        job.message = message
+        self._notify(job)
+
+    def _finish(self, job: ReportJob, status: str, message: str, progress: int = None):
+        job.status = status
+        job.finished_at = datetime.now()
+        job._done_event.set()
+        self._set_progress(job, job.progress if progress is None else progress, message)
+
+    # Caché
+    def make_key(self, report_type: str, params: Dict[str, Any]) -> Optional[str]:
+        """Clave de caché para el reporte con la versión actual de los datos"""
+        try:
+            version = self.db.get_data_version()
+            payload = json.dumps([report_type, params, version], sort_keys=True, default=str)
+            return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+        except Exception as e:
+            self.logger.warning(f"No se pudo calcular la clave de caché de {report_type}: {e}")
+            return None
+
+    def get_cached(self, report_type: str, params: Dict[str, Any] = None) -> Any:
+        """Resultado guardado del reporte si los datos no cambiaron desde entonces"""
+        key = self.make_key(report_type, params or {})
+        with self._lock:
+            entry = self._cache.get(key) if key else None
+        return entry['result'] if entry else None
+
+    def _store(self, key: str, result: Any):
+        with self._lock:
+            now = datetime.now()
+            self._cache[key] = {'result': result, 'stored_at': now}
+
+            # Misma retención que cleanup_old_reports, y los más viejos al superar el límite
+            cutoff = now - timedelta(days=self.retention_days)
+            for expired in [item for item, entry in self._cache.items() if entry['stored_at'] < cutoff]:
+                del self._cache[expired]
+            while len(self._cache) > self.max_cached:
+                oldest = min(self._cache, key=lambda item: self._cache[item]['stored_at'])
+                del self._cache[oldest]
+
+    def evict(self, older_than: datetime) -> int:
+        """Eliminar resultados guardados antes de ``older_than``"""
+        with self._lock:
+            expired = [key for key, entry in self._cache.items() if entry['stored_at'] < older_than]
+            for key in expired:
+                del self._cache[key]
+        return len(expired)
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+    def cleanup_old_reports(self, days_to_keep: int = None) -> int:
+        """Aplicar la retención de reportes a los archivos y a la caché"""
+        if days_to_keep is None:
+            days_to_keep = self.retention_days
+        self.report_manager.cleanup_old_reports(days_to_keep)
+        evicted = self.evict(datetime.now() - timedelta(days=days_to_keep))
+
+        # Los trabajos terminados solo se conservan mientras su resultado esté en caché
+        with self._lock:
+            finished = [job_id for job_id, job in self._jobs.items()
+                        if job.done and job.cache_key not in self._cache]
+            for job_id in finished:
+                del self._jobs[job_id]
+
+        if evicted:
+            self.logger.info(f"Resultados de reportes eliminados de la caché: {evicted}")
+        return evicted
+
+    # Trabajos
+    def submit(self, report_type: str, params: Dict[str, Any] = None,
+               function: Callable[..., Any] = None, export: Dict[str, Any] = None,
+               use_cache: bool = True) -> ReportJob:
+        """Encolar un reporte
+
+        Args:
+            report_type: Tipo de ``ReportManager.REPORT_TYPES`` u otro nombre si se pasa ``function``
+            params: Argumentos del reporte (también forman parte de la clave de caché)
+            function: Función que genera los datos; por defecto el método de ReportManager del tipo
+            export: ``{'path', 'format', 'title', 'key'}`` para exportar el resultado al terminar
+            use_cache: Reutilizar un resultado guardado con la misma clave
+        """
+        params = dict(params or {})
+        if function is None and report_type not in REPORT_METHODS:
+            raise ValueError(f"Tipo de reporte no soportado: {report_type}")
+
+        job = ReportJob(id=uuid.uuid4().hex, report_type=report_type, params=params, export=export)
+        job.cache_key = self.make_key(report_type, params) if use_cache else None
+
+        with self._lock:
+            self._jobs[job.id] = job
+            cached = self._cache.get(job.cache_key) if job.cache_key else None
+
+        if cached and not export:
+            job.result = cached['result']
+            job.from_cache = True
+            self._finish(job, COMPLETADO, 'Resultado en caché', 100)
+            return job
+
+        self._executor.submit(self._run, job, function, cached)
+        self._notify(job)
+        return job
+
+    def cancel(self, job_id: str) -> bool:
+        """Pedir la cancelación de un trabajo pendiente o en ejecución"""
+        job = self._jobs.get(job_id)
+        if not job or job.done:
+            return False
+        job._cancel_event.set()
+        return True
+
+    def get_job(self, job_id: str) -> Optional[ReportJob]:
+        return self._jobs.get(job_id)
+
+    def get_active_jobs(self) -> List[ReportJob]:
+        return [job for job in list(self._jobs.values()) if not job.done]
+
+    def _generate(self, job: ReportJob, function: Callable[..., Any] = None) -> Any:
+        if function is not None:
+            return function(**job.params)
+        if job.export and job.report_type in EXPORT_ITERATORS:
+            method_name, key = EXPORT_ITERATORS[job.report_type]
+            if job.export.get('key') == key:
+                return getattr(self.report_manager, method_name)(**job.params)
+        method_name, fixed = REPORT_METHODS[job.report_type]
+        return getattr(self.report_manager, method_name)(**fixed, **job.params)
+
+    def _run(self, job: ReportJob, function: Callable[..., Any] = None, cached: Dict = None):
+        """Ejecutar el trabajo en un hilo del pool"""
+        try:
+            job.check_cancelled()
+            job.status = EJECUTANDO
+            self._set_progress(job, 10, 'Consultando datos')
+
+            if cached:
+                result = cached['result']
+                job.from_cache = True
+            else:
+                result = self._generate(job, function)
+                if isinstance(result, dict) and 'error' in result:
+                    raise RuntimeError(result['error'])
+
+            # Los generadores se consumen al exportar y no se guardan
+            streamed = not isinstance(result, (list, dict))
+            job.check_cancelled()
+            if job.cache_key and not cached and not streamed:
+                self._store(job.cache_key, result)
+
+            if job.export:
+                self._set_progress(job, 70, 'Exportando')
+                self._export(job, result)
+
+            job.result = None if streamed else result
+            self._finish(job, COMPLETADO, 'Completado', 100)
+
+        except ReportCancelled:
+            self._finish(job, CANCELADO, 'Cancelado')
+
+        except Exception as e:
+            self.logger.error(f"Error ejecutando reporte {job.report_type}: {e}")
+            job.error = str(e)
+            self._finish(job, ERROR, 'Error')
+
+    def _export(self, job: ReportJob, result: Any):
+        """Exportar las filas del resultado (lista o generador) con FileExporter"""
+        from utils.exporters import FileExporter, split_rows
+
+        export = job.export
+        rows = result.get(export['key'], []) if export.get('key') and isinstance(result, dict) else result
+        if isinstance(rows, (dict, str)) or not hasattr(rows, '__iter__'):
+            raise ValueError("El resultado no tiene filas para exportar")
+
+        # Sin filas no se crea el archivo
+        headers, rows = split_rows(rows)
+        if rows is None:
+            return
+
+        def counted(rows):
+            for row in rows:
+                job.rows_exported += 1
+                if job.rows_exported % self.progress_every == 0:
+                    job.check_cancelled()
+                    self._set_progress(job, job.progress, f"Exportando ({job.rows_exported} filas)")
+                yield row
+
+        exported = FileExporter().export(counted(rows), export['path'], export.get('format', 'auto'),
+                                         export.get('title', 'Reporte'), headers)
+        if job.cancelled:
+            # El exportador corta al cancelar: descartar el archivo incompleto
+            try:
+                os.remove(export['path'])
+            except OSError:
+                pass
+            raise ReportCancelled(job.id)
+        if not exported:
+            raise RuntimeError(f"No se pudo exportar a {export['path']}")
+
+    def shutdown(self, wait: bool = True):
+        """Cancelar los trabajos pendientes y detener el pool"""
+        for job in self.get_active_jobs():
+            job._cancel_event.set()
+        self._executor.shutdown(wait=wait)
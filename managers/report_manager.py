@@ -6,9 +6,13 @@ Sistema completo de generación de reportes, estadísticas y análisis de datos
 import logging
 from datetime import datetime, date, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, Iterator, List, Optional, Tuple, Any
 import json
 
+from database.date_ranges import date_range
+from managers.report_engine import ReportEngine
+from managers.sales_rollup_manager import SalesRollupManager
+
 logger = logging.getLogger(__name__)
 
 class ReportManager:
@@ -18,6 +22,12 @@ class ReportManager:
         self.db = db_manager
         self.logger = logging.getLogger(__name__)
         
+        # Resúmenes diarios de ventas para reportes de períodos largos
+        self.rollups = SalesRollupManager(db_manager)
+        
+        # Métricas agrupadas por tabla base (una consulta por tabla)
+        self.engine = ReportEngine(db_manager)
+        
         # Directorio para reportes generados
         self.reports_dir = Path("reports")
         self.reports_dir.mkdir(exist_ok=True)
@@ -42,71 +52,11 @@ class ReportManager:
             if not target_date:
                 target_date = date.today()
             
-            # Consulta principal de ventas del día
-            sales_query = """
-                SELECT 
-                    COUNT(*) as total_ventas,
-                    COUNT(CASE WHEN estado = 'COMPLETADA' THEN 1 END) as ventas_completadas,
-                    COUNT(CASE WHEN estado = 'CANCELADA' THEN 1 END) as ventas_canceladas,
-                    SUM(CASE WHEN estado = 'COMPLETADA' THEN total ELSE 0 END) as monto_total,
-                    SUM(CASE WHEN estado = 'COMPLETADA' THEN subtotal ELSE 0 END) as subtotal_total,
-                    SUM(CASE WHEN estado = 'COMPLETADA' THEN impuestos_importe ELSE 0 END) as impuestos_total,
-                    SUM(CASE WHEN estado = 'COMPLETADA' THEN descuento_importe ELSE 0 END) as descuentos_total,
-                    AVG(CASE WHEN estado = 'COMPLETADA' THEN total ELSE NULL END) as ticket_promedio,
-                    MIN(CASE WHEN estado = 'COMPLETADA' THEN total ELSE NULL END) as ticket_minimo,
-                    MAX(CASE WHEN estado = 'COMPLETADA' THEN total ELSE NULL END) as ticket_maximo
-                FROM ventas
-                WHERE DATE(fecha_venta) = ?
-            """
-            
-            params = [target_date]
-            if user_id:
-                sales_query += " AND usuario_id = ?"
-                params.append(user_id)
-            
-            sales_data = self.db.execute_single(sales_query, params)
-            
-            # Métodos de pago
-            payment_methods = self.db.execute_query("""
-                SELECT pv.metodo_pago, 
-                       COUNT(*) as cantidad_transacciones,
-                       SUM(pv.importe) as monto_total
-                FROM pagos_venta pv
-                INNER JOIN ventas v ON pv.venta_id = v.id
-                WHERE DATE(v.fecha_venta) = ? AND v.estado = 'COMPLETADA'
-                {} 
-                GROUP BY pv.metodo_pago
-                ORDER BY monto_total DESC
-            """.format("AND v.usuario_id = ?" if user_id else ""), params)
-            
-            # Productos más vendidos del día
-            top_products = self.db.execute_query("""
-                SELECT p.nombre, p.codigo_barras,
-                       SUM(dv.cantidad) as cantidad_vendida,
-                       SUM(dv.total) as monto_total,
-                       COUNT(DISTINCT v.id) as transacciones
-                FROM productos p
-                INNER JOIN detalle_ventas dv ON p.id = dv.producto_id
-                INNER JOIN ventas v ON dv.venta_id = v.id
-                WHERE DATE(v.fecha_venta) = ? AND v.estado = 'COMPLETADA'
-                {}
-                GROUP BY p.id, p.nombre, p.codigo_barras
-                ORDER BY cantidad_vendida DESC
-                LIMIT 10
-            """.format("AND v.usuario_id = ?" if user_id else ""), params)
-            
-            # Ventas por hora
-            hourly_sales = self.db.execute_query("""
-                SELECT 
-                    strftime('%H', fecha_venta) as hora,
-                    COUNT(*) as cantidad_ventas,
-                    SUM(total) as monto_total
-                FROM ventas
-                WHERE DATE(fecha_venta) = ? AND estado = 'COMPLETADA'
-                {}
-                GROUP BY strftime('%H', fecha_venta)
-                ORDER BY hora
-            """.format("AND usuario_id = ?" if user_id else ""), params)
+            # Resumen y ventas por hora salen de una sola pasada sobre ventas
+            metrics = self.engine.run(
+                ['resumen', 'ventas_por_hora', 'metodos_pago', 'productos_top'],
+                target_date, target_date, user_id
+            )
             
             # Armar reporte
             report = {
@@ -114,21 +64,10 @@ class ReportManager:
                 'fecha': target_date.isoformat(),
                 'generado_en': datetime.now().isoformat(),
                 'usuario_id': user_id,
-                'resumen': {
-                    'total_ventas': sales_data.get('total_ventas', 0),
-                    'ventas_completadas': sales_data.get('ventas_completadas', 0),
-                    'ventas_canceladas': sales_data.get('ventas_canceladas', 0),
-                    'monto_total': float(sales_data.get('monto_total', 0) or 0),
-                    'subtotal_total': float(sales_data.get('subtotal_total', 0) or 0),
-                    'impuestos_total': float(sales_data.get('impuestos_total', 0) or 0),
-                    'descuentos_total': float(sales_data.get('descuentos_total', 0) or 0),
-                    'ticket_promedio': float(sales_data.get('ticket_promedio', 0) or 0),
-                    'ticket_minimo': float(sales_data.get('ticket_minimo', 0) or 0),
-                    'ticket_maximo': float(sales_data.get('ticket_maximo', 0) or 0)
-                },
-                'metodos_pago': [dict(row) for row in payment_methods],
-                'productos_top': [dict(row) for row in top_products],
-                'ventas_por_hora': [dict(row) for row in hourly_sales]
+                'resumen': metrics['resumen'],
+                'metodos_pago': metrics['metodos_pago'],
+                'productos_top': metrics['productos_top'],
+                'ventas_por_hora': metrics['ventas_por_hora']
             }
             
             return report
@@ -147,67 +86,55 @@ class ReportManager:
             else:
                 end_date = date(year, month + 1, 1) - timedelta(days=1)
             
-            # Estadísticas generales del mes
-            monthly_stats = self.db.execute_single("""
-                SELECT 
-                    COUNT(*) as total_ventas,
-                    COUNT(CASE WHEN estado = 'COMPLETADA' THEN 1 END) as ventas_completadas,
-                    SUM(CASE WHEN estado = 'COMPLETADA' THEN total ELSE 0 END) as monto_total,
-                    AVG(CASE WHEN estado = 'COMPLETADA' THEN total ELSE NULL END) as ticket_promedio,
-                    COUNT(DISTINCT cliente_id) as clientes_unicos,
-                    COUNT(DISTINCT DATE(fecha_venta)) as dias_con_ventas
-                FROM ventas
-                WHERE DATE(fecha_venta) BETWEEN ? AND ?
-                {}
-            """.format("AND usuario_id = ?" if user_id else ""), 
-            [start_date, end_date] + ([user_id] if user_id else []))
+            # Estadísticas generales y ventas por día desde los resúmenes diarios
+            monthly_stats = self.rollups.get_sales_totals(start_date, end_date, user_id)
+            daily_sales = self.rollups.get_daily_totals(start_date, end_date, user_id)
             
-            # Ventas por día del mes
-            daily_sales = self.db.execute_query("""
-                SELECT 
-                    DATE(fecha_venta) as fecha,
-                    COUNT(*) as cantidad_ventas,
-                    SUM(CASE WHEN estado = 'COMPLETADA' THEN total ELSE 0 END) as monto_total
+            # Clientes únicos no se pueden sumar por día: se cuentan sobre ventas
+            fecha_sql, fecha_params = date_range('fecha_venta', start_date, end_date)
+            params = fecha_params + ([user_id] if user_id else [])
+            customers = self.db.execute_single("""
+                SELECT COUNT(DISTINCT cliente_id) as clientes_unicos
                 FROM ventas
-                WHERE DATE(fecha_venta) BETWEEN ? AND ?
+                WHERE {}
                 {}
-                GROUP BY DATE(fecha_venta)
-                ORDER BY fecha
-            """.format("AND usuario_id = ?" if user_id else ""), 
-            [start_date, end_date] + ([user_id] if user_id else []))
+            """.format(fecha_sql, "AND usuario_id = ?" if user_id else ""), params)
+            monthly_stats['clientes_unicos'] = customers.get('clientes_unicos', 0) if customers else 0
             
             # Top productos del mes
-            top_products_month = self.db.execute_query("""
-                SELECT p.nombre, p.codigo_barras, c.nombre as categoria,
-                       SUM(dv.cantidad) as cantidad_vendida,
-                       SUM(dv.total) as monto_total,
-                       COUNT(DISTINCT v.id) as transacciones
-                FROM productos p
-                INNER JOIN detalle_ventas dv ON p.id = dv.producto_id
-                INNER JOIN ventas v ON dv.venta_id = v.id
-                LEFT JOIN categorias c ON p.categoria_id = c.id
-                WHERE DATE(v.fecha_venta) BETWEEN ? AND ? AND v.estado = 'COMPLETADA'
-                {}
-                GROUP BY p.id, p.nombre, p.codigo_barras, c.nombre
-                ORDER BY monto_total DESC
-                LIMIT 20
-            """.format("AND v.usuario_id = ?" if user_id else ""), 
-            [start_date, end_date] + ([user_id] if user_id else []))
+            if user_id:
+                # El resumen de productos no distingue usuario
+                v_fecha_sql, _ = date_range('v.fecha_venta', start_date, end_date)
+                top_products_month = self.db.execute_query("""
+                    SELECT p.nombre, p.codigo_barras, c.nombre as categoria,
+                           SUM(dv.cantidad) as cantidad_vendida,
+                           SUM(dv.total) as monto_total,
+                           COUNT(DISTINCT v.id) as transacciones
+                    FROM productos p
+                    INNER JOIN detalle_ventas dv ON p.id = dv.producto_id
+                    INNER JOIN ventas v ON dv.venta_id = v.id
+                    LEFT JOIN categorias c ON p.categoria_id = c.id
+                    WHERE v.estado = 'COMPLETADA' AND {}
+                    AND v.usuario_id = ?
+                    GROUP BY p.id, p.nombre, p.codigo_barras, c.nombre
+                    ORDER BY monto_total DESC
+                    LIMIT 20
+                """.format(v_fecha_sql), params)
+            else:
+                top_products_month = [{
+                    'nombre': product['nombre'],
+                    'codigo_barras': product['codigo_barras'],
+                    'categoria': product['categoria'],
+                    'cantidad_vendida': product['cantidad_vendida'],
+                    'monto_total': product['monto_total'],
+                    'transacciones': product['transacciones']
+                } for product in self.rollups.get_product_totals(start_date, end_date, 20, 'monto_total')]
             
             # Comparación con mes anterior
             prev_month_start = start_date - timedelta(days=start_date.day)
             prev_month_start = prev_month_start.replace(day=1)
             prev_month_end = start_date - timedelta(days=1)
-            
-            prev_month_stats = self.db.execute_single("""
-                SELECT 
-                    COUNT(CASE WHEN estado = 'COMPLETADA' THEN 1 END) as ventas_completadas,
-                    SUM(CASE WHEN estado = 'COMPLETADA' THEN total ELSE 0 END) as monto_total
-                FROM ventas
-                WHERE DATE(fecha_venta) BETWEEN ? AND ?
-                {}
-            """.format("AND usuario_id = ?" if user_id else ""), 
-            [prev_month_start, prev_month_end] + ([user_id] if user_id else []))
+            prev_month_stats = self.rollups.get_sales_totals(prev_month_start, prev_month_end, user_id)
             
             # Calcular variaciones
             current_sales = monthly_stats.get('ventas_completadas', 0)
@@ -224,14 +151,14 @@ class ReportManager:
                 'generado_en': datetime.now().isoformat(),
                 'usuario_id': user_id,
                 'resumen': {
-                    **dict(monthly_stats),
+                    **monthly_stats,
                     'monto_total': current_amount,
                     'ticket_promedio': float(monthly_stats.get('ticket_promedio', 0) or 0),
                     'crecimiento_ventas_pct': round(sales_growth, 2),
                     'crecimiento_monto_pct': round(amount_growth, 2)
                 },
-                'ventas_diarias': [dict(row) for row in daily_sales],
-                'productos_top': [dict(row) for row in top_products_month],
+                'ventas_diarias': daily_sales,
+                'productos_top': top_products_month,
                 'comparacion_mes_anterior': {
                     'ventas_anteriores': prev_sales,
                     'monto_anterior': prev_amount
@@ -319,7 +246,7 @@ class ReportManager:
                     'productos_sin_stock': stock_counts['SIN_STOCK']
                 },
                 'por_categoria': categories_stats,
-                'productos': [dict(p) for p in products]
+                'productos': products
             }
             
             return report
@@ -332,37 +259,26 @@ class ReportManager:
         """Generar reporte de productos más vendidos"""
         try:
             start_date = date.today() - timedelta(days=period_days)
-            
-            top_products = self.db.execute_query("""
-                SELECT p.nombre, p.codigo_barras, c.nombre as categoria_nombre,
-                       SUM(dv.cantidad) as cantidad_vendida,
-                       SUM(dv.total) as monto_total,
-                       COUNT(DISTINCT v.id) as transacciones,
-                       AVG(dv.precio_unitario) as precio_promedio,
-                       p.stock_actual,
-                       p.stock_minimo,
-                       (SUM(dv.total) - SUM(dv.cantidad * COALESCE(p.precio_compra, 0))) as ganancia_bruta
-                FROM productos p
-                INNER JOIN detalle_ventas dv ON p.id = dv.producto_id
-                INNER JOIN ventas v ON dv.venta_id = v.id
-                LEFT JOIN categorias c ON p.categoria_id = c.id
-                WHERE DATE(v.fecha_venta) >= ? AND v.estado = 'COMPLETADA'
-                GROUP BY p.id, p.nombre, p.codigo_barras, c.nombre, p.stock_actual, p.stock_minimo
-                ORDER BY cantidad_vendida DESC
-                LIMIT ?
-            """, (start_date, limit))
+            top_products = [{
+                'nombre': product['nombre'],
+                'codigo_barras': product['codigo_barras'],
+                'categoria_nombre': product['categoria'],
+                'cantidad_vendida': product['cantidad_vendida'],
+                'monto_total': product['monto_total'],
+                'transacciones': product['transacciones'],
+                'precio_promedio': product['precio_promedio'],
+                'stock_actual': product['stock_actual'],
+                'stock_minimo': product['stock_minimo'],
+                'ganancia_bruta': product['ganancia_bruta']
+            } for product in self.rollups.get_product_totals(start_date, None, limit)]
             
             # Estadísticas del período
-            period_stats = self.db.execute_single("""
-                SELECT 
-                    COUNT(DISTINCT p.id) as productos_vendidos,
-                    SUM(dv.cantidad) as cantidad_total,
-                    SUM(dv.total) as monto_total
-                FROM productos p
-                INNER JOIN detalle_ventas dv ON p.id = dv.producto_id
-                INNER JOIN ventas v ON dv.venta_id = v.id
-                WHERE DATE(v.fecha_venta) >= ? AND v.estado = 'COMPLETADA'
-            """, (start_date,))
+            summary = self.rollups.get_product_summary(start_date, None)
+            period_stats = {
+                'productos_vendidos': summary.get('productos_vendidos', 0),
+                'cantidad_total': summary.get('cantidad_total', 0),
+                'monto_total': summary.get('monto_total', 0)
+            }
             
             report = {
                 'tipo': 'TOP_PRODUCTS',
@@ -370,8 +286,8 @@ class ReportManager:
                 'fecha_desde': start_date.isoformat(),
                 'fecha_hasta': date.today().isoformat(),
                 'generado_en': datetime.now().isoformat(),
-                'resumen': dict(period_stats) if period_stats else {},
-                'productos': [dict(row) for row in top_products]
+                'resumen': period_stats or {},
+                'productos': top_products
             }
             
             return report
@@ -383,50 +299,37 @@ class ReportManager:
     def generate_financial_report(self, start_date: date, end_date: date) -> Dict:
         """Generar reporte financiero"""
         try:
-            # Ingresos por ventas
-            sales_income = self.db.execute_single("""
-                SELECT 
-                    SUM(total) as ingresos_brutos,
-                    SUM(subtotal) as ingresos_netos,
-                    SUM(impuestos_importe) as impuestos_recaudados,
-                    SUM(descuento_importe) as descuentos_otorgados,
-                    COUNT(*) as cantidad_transacciones
-                FROM ventas
-                WHERE DATE(fecha_venta) BETWEEN ? AND ? AND estado = 'COMPLETADA'
-            """, (start_date, end_date))
+            compra_sql, compra_params = date_range('fecha_compra', start_date, end_date)
+            
+            # Ingresos por ventas (resúmenes diarios)
+            totals = self.rollups.get_sales_totals(start_date, end_date)
+            sales_income = {
+                'ingresos_brutos': totals['monto_total'],
+                'ingresos_netos': totals['subtotal_total'],
+                'impuestos_recaudados': totals['impuestos_total'],
+                'descuentos_otorgados': totals['descuentos_total'],
+                'cantidad_transacciones': totals['ventas_completadas']
+            }
             
             # Costos por compras
-            purchase_costs = self.db.execute_single("""
+            purchase_costs = self.db.execute_single(f"""
                 SELECT 
                     SUM(total) as costos_compras,
                     COUNT(*) as cantidad_compras
                 FROM compras
-                WHERE DATE(fecha_compra) BETWEEN ? AND ? AND estado = 'COMPLETADA'
-            """, (start_date, end_date))
+                WHERE estado = 'COMPLETADA' AND {compra_sql}
+            """, compra_params)
             
             # Margen bruto estimado (basado en productos vendidos)
-            gross_margin = self.db.execute_single("""
-                SELECT 
-                    SUM(dv.total) as ingresos_productos,
-                    SUM(dv.cantidad * COALESCE(p.precio_compra, 0)) as costos_productos,
-                    SUM(dv.total - (dv.cantidad * COALESCE(p.precio_compra, 0))) as margen_bruto
-                FROM detalle_ventas dv
-                INNER JOIN ventas v ON dv.venta_id = v.id
-                INNER JOIN productos p ON dv.producto_id = p.id
-                WHERE DATE(v.fecha_venta) BETWEEN ? AND ? AND v.estado = 'COMPLETADA'
-            """, (start_date, end_date))
+            products = self.rollups.get_product_summary(start_date, end_date)
+            gross_margin = {
+                'ingresos_productos': products.get('monto_total', 0),
+                'costos_productos': products.get('costo_total', 0),
+                'margen_bruto': (products.get('monto_total') or 0) - (products.get('costo_total') or 0)
+            }
             
             # Métodos de pago
-            payment_methods = self.db.execute_query("""
-                SELECT pv.metodo_pago, 
-                       SUM(pv.importe) as monto_total,
-                       COUNT(*) as cantidad_transacciones
-                FROM pagos_venta pv
-                INNER JOIN ventas v ON pv.venta_id = v.id
-                WHERE DATE(v.fecha_venta) BETWEEN ? AND ? AND v.estado = 'COMPLETADA'
-                GROUP BY pv.metodo_pago
-                ORDER BY monto_total DESC
-            """, (start_date, end_date))
+            payment_methods = self.rollups.get_payment_totals(start_date, end_date)
             
             # Calcular ratios
             ingresos_brutos = float(sales_income.get('ingresos_brutos', 0) or 0)
@@ -443,14 +346,14 @@ class ReportManager:
                     'dias': (end_date - start_date).days + 1
                 },
                 'generado_en': datetime.now().isoformat(),
-                'ingresos': dict(sales_income) if sales_income else {},
-                'costos': dict(purchase_costs) if purchase_costs else {},
-                'margen': dict(gross_margin) if gross_margin else {},
+                'ingresos': sales_income or {},
+                'costos': purchase_costs or {},
+                'margen': gross_margin or {},
                 'ratios': {
                     'margen_bruto_porcentaje': round(margen_bruto_pct, 2),
                     'ingresos_por_dia': round(ingresos_brutos / ((end_date - start_date).days + 1), 2) if ingresos_brutos > 0 else 0
                 },
-                'metodos_pago': [dict(row) for row in payment_methods]
+                'metodos_pago': payment_methods
             }
             
             return report
@@ -459,28 +362,40 @@ class ReportManager:
             self.logger.error(f"Error generando reporte financiero: {e}")
             return {'error': str(e)}
     
+    def _stock_movements_query(self, start_date: date, end_date: date,
+                               product_id: int = None) -> Tuple[str, List]:
+        """Consulta de movimientos de stock del período"""
+        fecha_sql, params = date_range('ms.fecha_movimiento', start_date, end_date)
+        
+        query = f"""
+            SELECT ms.*, p.nombre as producto_nombre, p.codigo_barras,
+                   u.nombre_completo as usuario_nombre
+            FROM movimientos_stock ms
+            INNER JOIN productos p ON ms.producto_id = p.id
+            LEFT JOIN usuarios u ON ms.usuario_id = u.id
+            WHERE {fecha_sql}
+        """
+        
+        if product_id:
+            query += " AND ms.producto_id = ?"
+            params.append(product_id)
+        
+        query += " ORDER BY ms.fecha_movimiento DESC"
+        return query, params
+    
+    def iter_stock_movements(self, start_date: date, end_date: date,
+                             product_id: int = None) -> Iterator[Dict]:
+        """Recorrer los movimientos del período sin cargarlos en memoria (para exportaciones)"""
+        query, params = self._stock_movements_query(start_date, end_date, product_id)
+        return self.db.iter_query(query, params)
+    
     def generate_stock_movements_report(self, start_date: date, end_date: date, 
                                       product_id: int = None) -> Dict:
         """Generar reporte de movimientos de stock"""
         try:
-            query = """
-                SELECT ms.*, p.nombre as producto_nombre, p.codigo_barras,
-                       u.nombre_completo as usuario_nombre
-                FROM movimientos_stock ms
-                INNER JOIN productos p ON ms.producto_id = p.id
-                LEFT JOIN usuarios u ON ms.usuario_id = u.id
-                WHERE DATE(ms.fecha_movimiento) BETWEEN ? AND ?
-            """
-            
-            params = [start_date, end_date]
-            
-            if product_id:
-                query += " AND ms.producto_id = ?"
-                params.append(product_id)
-            
-            query += " ORDER BY ms.fecha_movimiento DESC"
-            
+            query, params = self._stock_movements_query(start_date, end_date, product_id)
             movements = self.db.execute_query(query, params)
+            fecha_sql, _ = date_range('ms.fecha_movimiento', start_date, end_date)
             
             # Estadísticas por tipo de movimiento
             movement_stats = self.db.execute_query("""
@@ -488,12 +403,12 @@ class ReportManager:
                     tipo_movimiento,
                     COUNT(*) as cantidad_movimientos,
                     SUM(ABS(cantidad_movimiento)) as cantidad_total
-                FROM movimientos_stock
-                WHERE DATE(fecha_movimiento) BETWEEN ? AND ?
+                FROM movimientos_stock ms
+                WHERE {}
                 {}
                 GROUP BY tipo_movimiento
-            """.format("AND producto_id = ?" if product_id else ""), 
-            params if not product_id else params)
+            """.format(fecha_sql, "AND ms.producto_id = ?" if product_id else ""), 
+            params)
             
             report = {
                 'tipo': 'MOVEMENTS',
@@ -503,8 +418,8 @@ class ReportManager:
                 },
                 'producto_id': product_id,
                 'generado_en': datetime.now().isoformat(),
-                'resumen': [dict(row) for row in movement_stats],
-                'movimientos': [dict(row) for row in movements]
+                'resumen': movement_stats,
+                'movimientos': movements
             }
             
             return report
@@ -538,18 +453,14 @@ class ReportManager:
         try:
             summary = {}
             
-            # Resumen de ventas
-            sales_summary = self.generate_daily_sales_report()
-            if 'error' not in sales_summary:
-                summary['ventas_hoy'] = sales_summary['resumen']
-            
-            # Productos con stock bajo
-            low_stock = self.generate_inventory_report(low_stock_only=True)
-            if 'error' not in low_stock:
-                summary['stock_bajo'] = {
-                    'productos_stock_bajo': low_stock['resumen']['productos_stock_bajo'],
-                    'productos_sin_stock': low_stock['resumen']['productos_sin_stock']
-                }
+            # Ventas de hoy y estado del stock sin armar los reportes completos
+            today = date.today()
+            metrics = self.engine.run(['resumen', 'estado_stock'], today, today)
+            summary['ventas_hoy'] = metrics['resumen']
+            summary['stock_bajo'] = {
+                'productos_stock_bajo': metrics['estado_stock']['productos_stock_bajo'],
+                'productos_sin_stock': metrics['estado_stock']['productos_sin_stock']
+            }
             
             # Top productos últimos días
             top_products = self.generate_top_products_report(period_days=days, limit=5)
@@ -4,11 +4,16 @@ Versión que funciona con la estructura real de la base de datos
 """
 
 import logging
-from datetime import datetime, date
+from datetime import date
 from decimal import Decimal
 from typing import Dict, List, Optional, Tuple, Any
 import uuid
 
+from database.date_ranges import date_range, day_range
+from managers.customer_feature_manager import CustomerFeatureManager
+from managers.invoice_sequence_manager import InvoiceSequenceManager
+from managers.sales_rollup_manager import SalesRollupManager
+
 logger = logging.getLogger(__name__)
 
 class SalesManager:
@@ -20,6 +25,15 @@ class SalesManager:
         self.financial_manager = financial_manager
         self.logger = logging.getLogger(__name__)
         
+        # Numeración de comprobantes (bloques reservados por esta terminal)
+        self.invoice_sequences = InvoiceSequenceManager(db_manager)
+        
+        # Resúmenes diarios para reportes y tableros
+        self.rollups = SalesRollupManager(db_manager)
+        
+        # Características de clientes para CRM y modelos predictivos
+        self.customer_features = CustomerFeatureManager(db_manager)
+        
         # Estados válidos de venta
         self.VALID_STATUSES = ['ACTIVA', 'COMPLETADA', 'CANCELADA', 'DEVUELTA']
         
@@ -31,7 +45,7 @@ class SalesManager:
     
     def create_sale(self, sale_data: Dict, items: List[Dict], 
                    payments: List[Dict], user_id: int) -> Tuple[bool, str, int]:
-        """Crear nueva venta - Versión corregida"""
+        """Crear nueva venta en una sola transacción con inserciones por lote"""
         try:
             # Validaciones básicas
             if not items:
@@ -40,16 +54,6 @@ class SalesManager:
             if not payments:
                 return False, "La venta debe tener al menos un método de pago", 0
             
-            # Verificar stock disponible (sin actualizar para evitar triggers)
-            for item in items:
-                product = self.product_manager.get_product_by_id(item['producto_id'])
-                if not product:
-                    return False, f"Producto ID {item['producto_id']} no encontrado", 0
-                
-                current_stock = float(product.get('stock_actual', 0))
-                if current_stock < item['cantidad']:
-                    return False, f"Stock insuficiente para {product['nombre']}. Disponible: {current_stock}", 0
-            
             # Calcular totales
             subtotal = sum(item['cantidad'] * item['precio_unitario'] for item in items)
             descuento_total = sum(item.get('descuento_importe', 0) for item in items)
@@ -61,10 +65,30 @@ class SalesManager:
             if abs(total_pagos - total) > 0.01:  # Tolerancia para redondeo
                 return False, f"Los pagos ({total_pagos}) no coinciden con el total ({total})", 0
             
-            # Iniciar transacción
-            self.db.begin_transaction()
+            # Cantidades agrupadas por producto (un producto puede repetirse en el ticket)
+            quantities = {}
+            for item in items:
+                quantities[item['producto_id']] = quantities.get(item['producto_id'], 0) + item['cantidad']
             
-            try:
+            # Número de factura fuera de la transacción para usar el bloque reservado
+            invoice_number = self.generate_invoice_number(
+                sale_data.get('tipo_comprobante', 'TICKET'),
+                sale_data.get('punto_venta')
+            )
+            
+            # Unidad de trabajo: un único COMMIT para venta, detalles, stock y pagos
+            with self.db.transaction():
+                # Verificar stock de todos los productos con una sola consulta
+                stock = self.get_stock_for_products(list(quantities))
+                for product_id, quantity in quantities.items():
+                    product = stock.get(product_id)
+                    if not product:
+                        return False, f"Producto ID {product_id} no encontrado", 0
+                    
+                    current_stock = float(product['stock_actual'] or 0)
+                    if current_stock < quantity:
+                        return False, f"Stock insuficiente para {product['nombre']}. Disponible: {current_stock}", 0
+                
                 # Crear venta
                 sale_id = self.db.execute_insert("""
                     INSERT INTO ventas (
@@ -73,7 +97,7 @@ class SalesManager:
                         estado, notas, caja_id, tipo_venta, metodo_pago
                     ) VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """, (
-                    self.generate_invoice_number(),
+                    invoice_number,
                     sale_data.get('cliente_id'),
                     user_id,  # vendedor_id = usuario_id
                     user_id,
@@ -92,53 +116,53 @@ class SalesManager:
                     raise Exception("Error creando venta")
                 
                 # Insertar detalles de la venta
-                for item in items:
-                    item_subtotal = item['cantidad'] * item['precio_unitario']
-                    
-                    detail_id = self.db.execute_insert("""
-                        INSERT INTO detalle_ventas (
-                            venta_id, producto_id, cantidad, precio_unitario,
-                            descuento_porcentaje, subtotal
-                        ) VALUES (?, ?, ?, ?, ?, ?)
-                    """, (
-                        sale_id,
-                        item['producto_id'],
-                        item['cantidad'],
-                        item['precio_unitario'],
-                        item.get('descuento_porcentaje', 0),
-                        item_subtotal
-                    ))
-                    
-                    if not detail_id:
-                        raise Exception(f"Error insertando detalle para producto {item['producto_id']}")
-                    
-                    # Actualizar stock manualmente (evitando triggers)
-                    try:
-                        self.update_stock_direct(item['producto_id'], item['cantidad'])
-                    except Exception as e:
-                        self.logger.warning(f"No se pudo actualizar stock para producto {item['producto_id']}: {e}")
-                        # Continúar sin actualizar stock por ahora
+                inserted = self.db.execute_many("""
+                    INSERT INTO detalle_ventas (
+                        venta_id, producto_id, cantidad, precio_unitario,
+                        costo_unitario, descuento_porcentaje, subtotal
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, [(
+                    sale_id,
+                    item['producto_id'],
+                    item['cantidad'],
+                    item['precio_unitario'],
+                    float(stock[item['producto_id']]['precio_compra'] or 0),
+                    item.get('descuento_porcentaje', 0),
+                    item['cantidad'] * item['precio_unitario']
+                ) for item in items])
+                
+                if inserted != len(items):
+                    raise Exception("Error insertando detalles de la venta")
+                
+                # Descontar stock y registrar movimientos (savepoint propio)
+                try:
+                    self.decrement_stock_bulk(quantities, stock, sale_id, user_id)
+                except Exception as e:
+                    self.logger.warning(f"No se pudo actualizar stock de la venta {sale_id}: {e}")
+                    # Continúar sin actualizar stock por ahora
                 
                 # Insertar pagos
-                for payment in payments:
-                    payment_id = self.db.execute_insert("""
-                        INSERT INTO pagos_venta (
-                            venta_id, metodo_pago, importe, referencia,
-                            fecha_pago, observaciones
-                        ) VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP, ?)
-                    """, (
-                        sale_id,
-                        payment['metodo_pago'],
-                        payment['importe'],
-                        payment.get('referencia'),
-                        payment.get('observaciones')
-                    ))
-                    
-                    if not payment_id:
-                        raise Exception(f"Error registrando pago {payment['metodo_pago']}")
-                    
-                    # Registrar movimiento de caja si es efectivo y hay sesión activa
-                    if payment['metodo_pago'] == 'EFECTIVO' and self.financial_manager and sale_data.get('caja_id'):
+                inserted = self.db.execute_many("""
+                    INSERT INTO pagos_venta (
+                        venta_id, metodo_pago, importe, referencia,
+                        fecha_pago, observaciones
+                    ) VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP, ?)
+                """, [(
+                    sale_id,
+                    payment['metodo_pago'],
+                    payment['importe'],
+                    payment.get('referencia'),
+                    payment.get('observaciones')
+                ) for payment in payments])
+                
+                if inserted != len(payments):
+                    raise Exception("Error registrando pagos de la venta")
+                
+                # Registrar movimiento de caja si es efectivo y hay sesión activa
+                if self.financial_manager and sale_data.get('caja_id'):
+                    for payment in payments:
+                        if payment['metodo_pago'] != 'EFECTIVO':
+                            continue
                         try:
                             session = self.financial_manager.get_current_session(sale_data['caja_id'])
                             if session:
@@ -154,53 +178,188 @@ class SalesManager:
                     if credit_amount > 0:
                         self.update_customer_account(sale_data['cliente_id'], credit_amount, 'DEBE', sale_id, user_id)
                 
-                # Confirmar transacción
-                self.db.commit_transaction()
-                
-                self.logger.info(f"Venta creada exitosamente: ID {sale_id}, Total: ${total}")
-                return True, f"Venta #{sale_id} completada exitosamente", sale_id
+                # Sumar la venta a los resúmenes diarios (savepoint propio)
+                try:
+                    self.rollups.apply_sale(sale_id)
+                except Exception as e:
+                    self.logger.warning(f"No se pudo actualizar el resumen diario de la venta {sale_id}: {e}")
                 
-            except Exception as e:
-                self.db.rollback_transaction()
-                raise e
+                if sale_data.get('cliente_id'):
+                    try:
+                        self.customer_features.apply_sale(sale_id)
+                    except Exception as e:
+                        self.logger.warning(f"No se pudieron actualizar las características del cliente {sale_data['cliente_id']}: {e}")
+            
+            # El stock cambió: descartar esos productos de la caché del POS
+            if self.product_manager:
+                self.product_manager.invalidate_products(list(quantities))
+            
+            # Avisar a los paneles de ventas y stock
+            self.db.notify_change('ventas', [sale_id], 'create_sale')
+            self.db.notify_change('productos', list(quantities), 'create_sale')
+            
+            self.logger.info(f"Venta creada exitosamente: ID {sale_id}, Total: ${total}")
+            return True, f"Venta #{sale_id} completada exitosamente", sale_id
                 
         except Exception as e:
             self.logger.error(f"Error creando venta: {e}")
             return False, f"Error creando venta: {str(e)}", 0
     
+    def get_stock_for_products(self, product_ids: List[int]) -> Dict[int, Dict]:
+        """Obtener stock actual y costo de varios productos con una sola consulta"""
+        if not product_ids:
+            return {}
+        
+        placeholders = ', '.join('?' for _ in product_ids)
+        rows = self.db.execute_query(f"""
+            SELECT id, nombre, stock_actual, precio_compra
+            FROM productos
+            WHERE id IN ({placeholders})
+        """, tuple(product_ids))
+        
+        return {row['id']: row for row in rows}
+    
+    def decrement_stock_bulk(self, quantities: Dict[int, float], stock: Dict[int, Dict],
+                             sale_id: int, user_id: int):
+        """Descontar stock de todos los productos vendidos con un único UPDATE
+        
+        Args:
+            quantities: Cantidad vendida por producto_id
+            stock: Stock previo por producto_id (de get_stock_for_products)
+            sale_id: Venta que origina el movimiento
+            user_id: Usuario que registra la venta
+        """
+        values = ', '.join('(?, ?)' for _ in quantities)
+        params = [value for pair in quantities.items() for value in pair]
+        
+        with self.db.transaction():
+            self.db.execute_update(f"""
+                WITH vendidos(producto_id, cantidad) AS (VALUES {values})
+                UPDATE productos
+                SET stock_actual = stock_actual - (
+                    SELECT cantidad FROM vendidos WHERE vendidos.producto_id = productos.id
+                )
+                WHERE id IN (SELECT producto_id FROM vendidos)
+            """, params)
+            
+            movements = []
+            for product_id, quantity in quantities.items():
+                current_stock = float(stock[product_id]['stock_actual'] or 0)
+                movements.append((
+                    product_id, 'SALIDA', 'VENTA', current_stock,
+                    -quantity, current_stock - quantity, user_id, sale_id, 'VENTA'
+                ))
+            
+            self.db.execute_many("""
+                INSERT INTO movimientos_stock (
+                    producto_id, tipo_movimiento, motivo, cantidad_anterior,
+                    cantidad_movimiento, cantidad_nueva, fecha_movimiento, usuario_id,
+                    referencia_id, referencia_tipo
+                ) VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?, ?, ?)
+            """, movements)
+    
     def update_stock_direct(self, product_id: int, quantity_sold: float):
         """Actualizar stock directamente sin triggers problemáticos"""
         try:
-            # Obtener stock actual
-            result = self.db.execute_single("SELECT stock_actual FROM productos WHERE id = ?", (product_id,))
-            if not result:
-                raise Exception("Producto no encontrado")
-            
-            current_stock = float(result['stock_actual'])
-            new_stock = current_stock - quantity_sold
-            
-            # Actualización simple sin triggers
-            self.db.execute_update("UPDATE productos SET stock_actual = ? WHERE id = ?", (new_stock, product_id))
-            
-            # Registrar movimiento si existe la tabla
-            try:
-                self.db.execute_insert("""
-                    INSERT INTO movimientos_stock (
-                        producto_id, tipo_movimiento, motivo, cantidad_anterior,
-                        cantidad_movimiento, cantidad_nueva, fecha_movimiento, usuario_id
-                    ) VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?)
-                """, (
-                    product_id, 'SALIDA', 'VENTA', current_stock, 
-                    -quantity_sold, new_stock, 1
-                ))
-            except:
-                # Si no existe la tabla de movimientos, continuar
-                pass
+            # Savepoint: stock y movimiento se aplican juntos o no se aplican
+            with self.db.transaction():
+                # Obtener stock actual
+                result = self.db.execute_single("SELECT stock_actual FROM productos WHERE id = ?", (product_id,))
+                if not result:
+                    raise Exception("Producto no encontrado")
+                
+                current_stock = float(result['stock_actual'])
+                new_stock = current_stock - quantity_sold
+                
+                # Actualización simple sin triggers
+                self.db.execute_update("UPDATE productos SET stock_actual = ? WHERE id = ?", (new_stock, product_id))
+                
+                # Registrar movimiento si existe la tabla
+                try:
+                    self.db.execute_insert("""
+                        INSERT INTO movimientos_stock (
+                            producto_id, tipo_movimiento, motivo, cantidad_anterior,
+                            cantidad_movimiento, cantidad_nueva, fecha_movimiento, usuario_id
+                        ) VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?)
+                    """, (
+                        product_id, 'SALIDA', 'VENTA', current_stock, 
+                        -quantity_sold, new_stock, 1
+                    ))
+                except:
+                    # Si no existe la tabla de movimientos, continuar
+                    pass
                 
         except Exception as e:
             self.logger.error(f"Error actualizando stock directo: {e}")
             raise e
-    
+
+    def cancel_sale(self, sale_id: int, user_id: int, reason: str = None) -> Tuple[bool, str]:
+        """Cancelar venta, restaurar stock y descontarla de los resúmenes diarios"""
+        try:
+            sale = self.get_sale_by_id(sale_id)
+            if not sale:
+                return False, "Venta no encontrada"
+
+            if sale['estado'] == 'CANCELADA':
+                return False, "La venta ya está cancelada"
+
+            if sale['estado'] == 'DEVUELTA':
+                return False, "No se puede cancelar una venta devuelta"
+
+            quantities = {}
+            for item in sale['items']:
+                quantities[item['producto_id']] = quantities.get(item['producto_id'], 0) + float(item['cantidad'])
+
+            with self.db.transaction():
+                # Restar la venta con su estado anterior y volver a sumarla cancelada
+                self.rollups.apply_sale(sale_id, -1)
+
+                if quantities:
+                    stock = self.get_stock_for_products(list(quantities))
+                    self.db.execute_many(
+                        "UPDATE productos SET stock_actual = stock_actual + ? WHERE id = ?",
+                        [(quantity, product_id) for product_id, quantity in quantities.items()]
+                    )
+                    self.db.execute_many("""
+                        INSERT INTO movimientos_stock (
+                            producto_id, tipo_movimiento, motivo, cantidad_anterior,
+                            cantidad_movimiento, cantidad_nueva, fecha_movimiento, usuario_id,
+                            referencia_id, referencia_tipo
+                        ) VALUES (?, 'ENTRADA', 'CANCELACION_VENTA', ?, ?, ?, CURRENT_TIMESTAMP, ?, ?, 'CANCELACION')
+                    """, [(
+                        product_id, float(stock[product_id]['stock_actual'] or 0), quantity,
+                        float(stock[product_id]['stock_actual'] or 0) + quantity, user_id, sale_id
+                    ) for product_id, quantity in quantities.items() if product_id in stock])
+
+                self.db.execute_update("UPDATE ventas SET estado = 'CANCELADA' WHERE id = ?", (sale_id,))
+
+                # Reversar cuenta corriente si fue a crédito
+                credit_amount = sum(float(p['importe']) for p in sale['payments'] if p['metodo_pago'] == 'CUENTA_CORRIENTE')
+                if sale.get('cliente_id') and credit_amount > 0:
+                    self.update_customer_account(
+                        sale['cliente_id'], credit_amount, 'HABER', sale_id, user_id,
+                        f"Cancelación de venta #{sale_id}: {reason or 'Sin motivo especificado'}"
+                    )
+
+                self.rollups.apply_sale(sale_id)
+
+                # La venta deja de contar en las características del cliente
+                if sale.get('cliente_id'):
+                    self.customer_features.refresh_customer(sale['cliente_id'])
+
+            if self.product_manager:
+                self.product_manager.invalidate_products(list(quantities))
+
+            self.db.notify_change('ventas', [sale_id], 'cancel_sale')
+            self.db.notify_change('productos', list(quantities), 'cancel_sale')
+
+            self.logger.info(f"Venta cancelada: ID {sale_id} por usuario {user_id}. Motivo: {reason or 'Sin motivo especificado'}")
+            return True, "Venta cancelada exitosamente"
+
+        except Exception as e:
+            self.logger.error(f"Error cancelando venta: {e}")
+            return False, f"Error cancelando venta: {str(e)}"
+
     def get_sale_by_id(self, sale_id: int) -> Optional[Dict]:
         """Obtener venta por ID"""
         try:
@@ -232,18 +391,18 @@ class SalesManager:
     def get_sales_by_date(self, target_date: date) -> List[Dict]:
         """Obtener ventas por fecha específica"""
         try:
-            query = """
+            date_sql, params = day_range('v.fecha_venta', target_date)
+            query = f"""
                 SELECT v.*, c.nombre as cliente_nombre, c.apellido as cliente_apellido,
                        u.nombre_completo as usuario_nombre
                 FROM ventas v
                 LEFT JOIN clientes c ON v.cliente_id = c.id
                 LEFT JOIN usuarios u ON v.usuario_id = u.id
-                WHERE DATE(v.fecha_venta) = ? 
+                WHERE {date_sql}
                 ORDER BY v.fecha_venta DESC
             """
             
-            sales = self.db.execute_query(query, (target_date,))
-            return [dict(sale) for sale in sales] if sales else []
+            return self.db.execute_query(query, params) or []
             
         except Exception as e:
             self.logger.error(f"Error obteniendo ventas por fecha {target_date}: {e}")
@@ -252,18 +411,18 @@ class SalesManager:
     def get_sales_by_date_range(self, date_from: date, date_to: date) -> List[Dict]:
         """Obtener ventas en un rango de fechas"""
         try:
-            query = """
+            date_sql, params = date_range('v.fecha_venta', date_from, date_to)
+            query = f"""
                 SELECT v.*, c.nombre as cliente_nombre, c.apellido as cliente_apellido,
                        u.nombre_completo as usuario_nombre
                 FROM ventas v
                 LEFT JOIN clientes c ON v.cliente_id = c.id
                 LEFT JOIN usuarios u ON v.usuario_id = u.id
-                WHERE DATE(v.fecha_venta) BETWEEN ? AND ?
+                WHERE {date_sql}
                 ORDER BY v.fecha_venta DESC
             """
             
-            sales = self.db.execute_query(query, (date_from, date_to))
-            return [dict(sale) for sale in sales] if sales else []
+            return self.db.execute_query(query, params) or []
             
         except Exception as e:
             self.logger.error(f"Error obteniendo ventas por rango {date_from} - {date_to}: {e}")
@@ -275,7 +434,8 @@ class SalesManager:
             if target_date is None:
                 target_date = date.today()
             
-            query = """
+            date_sql, params = day_range('fecha_venta', target_date)
+            query = f"""
                 SELECT 
                     COUNT(*) as total_ventas,
                     COALESCE(SUM(total), 0) as monto_total,
@@ -286,10 +446,9 @@ class SalesManager:
                     COALESCE(MIN(total), 0) as ticket_minimo,
                     COALESCE(MAX(total), 0) as ticket_maximo
                 FROM ventas 
-                WHERE DATE(fecha_venta) = ? AND estado = 'COMPLETADA'
+                WHERE estado = 'COMPLETADA' AND {date_sql}
             """
             
-            params = [target_date]
             if user_id:
                 query += " AND usuario_id = ?"
                 params.append(user_id)
@@ -311,11 +470,64 @@ class SalesManager:
         except Exception as e:
             self.logger.error(f"Error obteniendo resumen diario: {e}")
             return {'fecha': target_date.isoformat(), 'error': str(e)}
+
+    def get_revenue_by_period(self, date_from: date, date_to: date) -> float:
+        """Monto vendido en el período (desde los resúmenes diarios)"""
+        try:
+            return self.rollups.get_sales_totals(date_from, date_to)['monto_total']
+        except Exception as e:
+            self.logger.error(f"Error obteniendo ingresos del período: {e}")
+            return 0.0
+
+    def get_sales_count_by_period(self, date_from: date, date_to: date) -> int:
+        """Cantidad de ventas completadas en el período"""
+        try:
+            return int(self.rollups.get_sales_totals(date_from, date_to)['ventas_completadas'])
+        except Exception as e:
+            self.logger.error(f"Error obteniendo cantidad de ventas del período: {e}")
+            return 0
+
+    def get_profit_margin_by_period(self, date_from: date, date_to: date) -> float:
+        """Margen bruto porcentual de los productos vendidos en el período"""
+        try:
+            summary = self.rollups.get_product_summary(date_from, date_to)
+            revenue = float(summary.get('monto_total') or 0)
+            cost = float(summary.get('costo_total') or 0)
+            return (revenue - cost) / revenue * 100 if revenue > 0 else 0.0
+        except Exception as e:
+            self.logger.error(f"Error obteniendo margen del período: {e}")
+            return 0.0
+
+    def get_sales_by_payment_method(self, date_from: date, date_to: date) -> List[Dict]:
+        """Ventas del período agrupadas por método de pago"""
+        try:
+            return [{
+                'label': row['metodo_pago'],
+                'total_sales': float(row['monto_total'] or 0),
+                'count': row['cantidad_transacciones']
+            } for row in self.rollups.get_payment_totals(date_from, date_to)]
+        except Exception as e:
+            self.logger.error(f"Error obteniendo ventas por método de pago: {e}")
+            return []
+
+    def generate_invoice_number(self, tipo_comprobante: str = 'TICKET', punto_venta: int = None) -> str:
+        """Generar número de factura único por punto de venta y tipo de comprobante"""
+        if punto_venta is None:
+            punto_venta = self.get_default_point_of_sale()
+        return self.invoice_sequences.next_invoice_number(tipo_comprobante, punto_venta)
     
-    def generate_invoice_number(self) -> str:
-        """Generar número de factura único"""
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        return f"FCT-{timestamp}"
+    def get_default_point_of_sale(self) -> int:
+        """Obtener punto de venta configurado (ventas.punto_venta)"""
+        if not hasattr(self, '_default_point_of_sale'):
+            try:
+                result = self.db.execute_single(
+                    "SELECT valor FROM configuraciones WHERE clave = 'ventas.punto_venta'"
+                )
+                self._default_point_of_sale = int(result['valor']) if result and result['valor'] else 1
+            except Exception as e:
+                self.logger.warning(f"No se pudo leer el punto de venta configurado: {e}")
+                self._default_point_of_sale = 1
+        return self._default_point_of_sale
     
     def update_customer_account(self, customer_id: int, amount: float, 
                                movement_type: str, sale_id: int, user_id: int,
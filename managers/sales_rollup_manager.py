@@ -0,0 +1,299 @@
+"""
+Resúmenes Diarios de Ventas para AlmacénPro
+Mantiene ventas_resumen_diario (día x caja x usuario x método de pago) y
+productos_resumen_diario (día x producto) para que los reportes de meses o
+años lean un registro por día en lugar de cada línea de venta
+
+Reconstrucción manual (por ejemplo luego de importar ventas):
+    python -m managers.sales_rollup_manager [--desde 2024-01-01] [--hasta 2024-12-31]
+"""
+
+import argparse
+import logging
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from database.date_ranges import date_range
+
+logger = logging.getLogger(__name__)
+
+SALES_ROLLUP_MEASURES = ('cantidad_ventas', 'cantidad_canceladas', 'subtotal', 'descuentos',
+                         'impuestos', 'total', 'cantidad_pagos', 'importe_pagos')
+PRODUCT_ROLLUP_MEASURES = ('cantidad', 'importe', 'costo', 'cantidad_ventas')
+
+def sales_column_expressions(db_manager) -> Dict[str, str]:
+    """Expresiones SQL para columnas que cambian de nombre entre versiones del esquema
+
+    Las bases creadas por versiones anteriores usan ``descuento``/``impuestos``
+    en ventas y no tienen ``total`` en detalle_ventas. El costo es el guardado
+    en la línea al vender; solo las líneas sin costo usan el precio de compra
+    actual. Alias: ``v`` = ventas, ``dv`` = detalle_ventas, ``p`` = productos.
+    """
+    def columns(table: str) -> set:
+        return {row['name'] for row in db_manager.execute_query(f"PRAGMA table_info({table})")}
+
+    def first(alias: str, available: set, *candidates: str) -> str:
+        for column in candidates:
+            if column in available:
+                return f"COALESCE({alias}.{column}, 0)"
+        return "0"
+
+    sales_columns = columns('ventas')
+    detail_columns = columns('detalle_ventas')
+    return {
+        'descuentos': first('v', sales_columns, 'descuento_importe', 'descuento'),
+        'impuestos': first('v', sales_columns, 'impuestos_importe', 'impuestos'),
+        'importe': first('dv', detail_columns, 'total', 'subtotal'),
+        'costo': ("COALESCE(NULLIF(dv.costo_unitario, 0), p.precio_compra, 0)"
+                  if 'costo_unitario' in detail_columns else "COALESCE(p.precio_compra, 0)")
+    }
+
+class SalesRollupManager:
+    """Mantenimiento y lectura de los resúmenes diarios de ventas
+
+    Cada cambio de una venta se aplica como diferencia: ``apply_sale(id, -1)``
+    antes de modificarla y ``apply_sale(id, +1)`` después. Las ventas
+    completadas suman importes; las canceladas solo su contador. Los importes
+    de la venta se atribuyen al primer método de pago del ticket y los pagos a
+    su propio método, así ``SUM(total)`` y ``SUM(importe_pagos)`` no se duplican.
+    """
+
+    def __init__(self, db_manager):
+        self.db = db_manager
+        self.logger = logging.getLogger(__name__)
+        self._expressions = None
+
+    def _get_expressions(self) -> Dict[str, str]:
+        if self._expressions is None:
+            self._expressions = sales_column_expressions(self.db)
+        return self._expressions
+
+    # Escritura
+    def _upsert_sales(self, filter_sql: str, filter_params: List, sign: int = 1):
+        """Sumar a ventas_resumen_diario las ventas que cumplen el filtro"""
+        expressions = self._get_expressions()
+        completed = "CASE WHEN v.estado = 'COMPLETADA' THEN {} ELSE 0 END"
+        updates = ', '.join(f"{measure} = {measure} + excluded.{measure}" for measure in SALES_ROLLUP_MEASURES)
+
+        self.db.execute_update(f"""
+            INSERT INTO ventas_resumen_diario (
+                fecha, caja_id, usuario_id, metodo_pago, {', '.join(SALES_ROLLUP_MEASURES)}
+            )
+            SELECT fecha, caja_id, usuario_id, metodo_pago,
+                   {', '.join(f'? * SUM({measure})' for measure in SALES_ROLLUP_MEASURES)}
+            FROM (
+                SELECT DATE(v.fecha_venta) AS fecha,
+                       COALESCE(v.caja_id, 0) AS caja_id,
+                       COALESCE(v.usuario_id, 0) AS usuario_id,
+                       COALESCE((SELECT pv.metodo_pago FROM pagos_venta pv
+                                 WHERE pv.venta_id = v.id ORDER BY pv.id LIMIT 1), '') AS metodo_pago,
+                       {completed.format(1)} AS cantidad_ventas,
+                       CASE WHEN v.estado = 'CANCELADA' THEN 1 ELSE 0 END AS cantidad_canceladas,
+                       {completed.format('v.subtotal')} AS subtotal,
+                       {completed.format(expressions['descuentos'])} AS descuentos,
+                       {completed.format(expressions['impuestos'])} AS impuestos,
+                       {completed.format('v.total')} AS total,
+                       0 AS cantidad_pagos,
+                       0 AS importe_pagos
+                FROM ventas v
+                WHERE {filter_sql}
+
+                UNION ALL
+
+                SELECT DATE(v.fecha_venta), COALESCE(v.caja_id, 0), COALESCE(v.usuario_id, 0),
+                       pv.metodo_pago, 0, 0, 0, 0, 0, 0, 1, pv.importe
+                FROM ventas v
+                INNER JOIN pagos_venta pv ON pv.venta_id = v.id
+                WHERE v.estado = 'COMPLETADA' AND {filter_sql}
+            )
+            GROUP BY fecha, caja_id, usuario_id, metodo_pago
+            ON CONFLICT (fecha, caja_id, usuario_id, metodo_pago) DO UPDATE SET
+                {updates}, actualizado_en = CURRENT_TIMESTAMP
+        """, [sign] * len(SALES_ROLLUP_MEASURES) + list(filter_params) * 2)
+
+    def _upsert_products(self, filter_sql: str, filter_params: List, sign: int = 1):
+        """Sumar a productos_resumen_diario las líneas de las ventas que cumplen el filtro"""
+        expressions = self._get_expressions()
+        updates = ', '.join(f"{measure} = {measure} + excluded.{measure}" for measure in PRODUCT_ROLLUP_MEASURES)
+
+        self.db.execute_update(f"""
+            INSERT INTO productos_resumen_diario (fecha, producto_id, {', '.join(PRODUCT_ROLLUP_MEASURES)})
+            SELECT DATE(v.fecha_venta), dv.producto_id,
+                   ? * SUM(dv.cantidad),
+                   ? * SUM({expressions['importe']}),
+                   ? * SUM(dv.cantidad * {expressions['costo']}),
+                   ? * COUNT(DISTINCT v.id)
+            FROM ventas v
+            INNER JOIN detalle_ventas dv ON dv.venta_id = v.id
+            LEFT JOIN productos p ON p.id = dv.producto_id
+            WHERE v.estado = 'COMPLETADA' AND {filter_sql}
+            GROUP BY DATE(v.fecha_venta), dv.producto_id
+            ON CONFLICT (fecha, producto_id) DO UPDATE SET
+                {updates}, actualizado_en = CURRENT_TIMESTAMP
+        """, [sign] * len(PRODUCT_ROLLUP_MEASURES) + list(filter_params))
+
+    def apply_sale(self, sale_id: int, sign: int = 1):
+        """Sumar (``sign=1``) o restar (``sign=-1``) la venta en su estado actual
+
+        Debe llamarse dentro de la transacción que registra o modifica la venta.
+        """
+        with self.db.transaction():
+            self._upsert_sales("v.id = ?", [sale_id], sign)
+            self._upsert_products("v.id = ?", [sale_id], sign)
+
+    def rebuild(self, start: Optional[date] = None, end: Optional[date] = None) -> Tuple[bool, str]:
+        """Recalcular los resúmenes desde ventas para el período (todo si no se indica)"""
+        try:
+            fecha_sql, fecha_params = date_range('fecha', start, end)
+            v_fecha_sql, _ = date_range('v.fecha_venta', start, end)
+
+            with self.db.transaction():
+                self.db.execute_update(f"DELETE FROM ventas_resumen_diario WHERE {fecha_sql}", fecha_params)
+                self.db.execute_update(f"DELETE FROM productos_resumen_diario WHERE {fecha_sql}", fecha_params)
+                self._upsert_sales(v_fecha_sql, fecha_params)
+                self._upsert_products(v_fecha_sql, fecha_params)
+
+            days = self.db.execute_single(
+                f"SELECT COUNT(DISTINCT fecha) AS dias FROM ventas_resumen_diario WHERE {fecha_sql}", fecha_params)
+            message = f"Resúmenes diarios reconstruidos ({days['dias'] if days else 0} días)"
+            self.logger.info(message)
+            return True, message
+
+        except Exception as e:
+            self.logger.error(f"Error reconstruyendo resúmenes diarios: {e}")
+            return False, f"Error reconstruyendo resúmenes diarios: {str(e)}"
+
+    # Lectura
+    def get_sales_totals(self, start: Optional[date] = None, end: Optional[date] = None,
+                         user_id: int = None) -> Dict:
+        """Totales de ventas del período"""
+        fecha_sql, params = date_range('fecha', start, end)
+        if user_id:
+            fecha_sql += " AND usuario_id = ?"
+            params.append(user_id)
+
+        result = self.db.execute_single(f"""
+            SELECT COALESCE(SUM(cantidad_ventas), 0) AS ventas_completadas,
+                   COALESCE(SUM(cantidad_canceladas), 0) AS ventas_canceladas,
+                   COALESCE(SUM(total), 0) AS monto_total,
+                   COALESCE(SUM(subtotal), 0) AS subtotal_total,
+                   COALESCE(SUM(descuentos), 0) AS descuentos_total,
+                   COALESCE(SUM(impuestos), 0) AS impuestos_total,
+                   COUNT(DISTINCT CASE WHEN cantidad_ventas + cantidad_canceladas > 0 THEN fecha END) AS dias_con_ventas
+            FROM ventas_resumen_diario
+            WHERE {fecha_sql}
+        """, params) or {}
+
+        completed = int(result.get('ventas_completadas') or 0)
+        amount = float(result.get('monto_total') or 0)
+        return {
+            **result,
+            'total_ventas': completed + int(result.get('ventas_canceladas') or 0),
+            'monto_total': amount,
+            'ticket_promedio': amount / completed if completed else 0.0
+        }
+
+    def get_daily_totals(self, start: Optional[date] = None, end: Optional[date] = None,
+                         user_id: int = None) -> List[Dict]:
+        """Cantidad de ventas y monto por día"""
+        fecha_sql, params = date_range('fecha', start, end)
+        if user_id:
+            fecha_sql += " AND usuario_id = ?"
+            params.append(user_id)
+
+        return self.db.execute_query(f"""
+            SELECT fecha,
+                   SUM(cantidad_ventas + cantidad_canceladas) AS cantidad_ventas,
+                   SUM(total) AS monto_total
+            FROM ventas_resumen_diario
+            WHERE {fecha_sql}
+            GROUP BY fecha
+            HAVING SUM(cantidad_ventas + cantidad_canceladas) > 0
+            ORDER BY fecha
+        """, params)
+
+    def get_payment_totals(self, start: Optional[date] = None, end: Optional[date] = None,
+                           user_id: int = None) -> List[Dict]:
+        """Importe y cantidad de pagos por método"""
+        fecha_sql, params = date_range('fecha', start, end)
+        if user_id:
+            fecha_sql += " AND usuario_id = ?"
+            params.append(user_id)
+
+        return self.db.execute_query(f"""
+            SELECT metodo_pago,
+                   SUM(importe_pagos) AS monto_total,
+                   SUM(cantidad_pagos) AS cantidad_transacciones
+            FROM ventas_resumen_diario
+            WHERE {fecha_sql}
+            GROUP BY metodo_pago
+            HAVING SUM(cantidad_pagos) > 0
+            ORDER BY monto_total DESC
+        """, params)
+
+    def get_product_totals(self, start: Optional[date] = None, end: Optional[date] = None,
+                           limit: int = None, order_by: str = 'cantidad_vendida') -> List[Dict]:
+        """Productos vendidos en el período con cantidades, importes y margen"""
+        if order_by not in ('cantidad_vendida', 'monto_total', 'ganancia_bruta'):
+            raise ValueError(f"Orden no soportado: {order_by}")
+
+        fecha_sql, params = date_range('r.fecha', start, end)
+        query = f"""
+            SELECT p.id AS producto_id, p.nombre, p.codigo_barras, c.nombre AS categoria,
+                   p.stock_actual, p.stock_minimo,
+                   t.cantidad_vendida, t.monto_total, t.transacciones,
+                   CASE WHEN t.cantidad_vendida > 0 THEN t.monto_total / t.cantidad_vendida END AS precio_promedio,
+                   t.costo_total,
+                   t.monto_total - t.costo_total AS ganancia_bruta
+            FROM (
+                SELECT r.producto_id,
+                       SUM(r.cantidad) AS cantidad_vendida,
+                       SUM(r.importe) AS monto_total,
+                       SUM(r.costo) AS costo_total,
+                       SUM(r.cantidad_ventas) AS transacciones
+                FROM productos_resumen_diario r
+                WHERE {fecha_sql}
+                GROUP BY r.producto_id
+                HAVING SUM(r.cantidad_ventas) > 0
+            ) t
+            INNER JOIN productos p ON p.id = t.producto_id
+            LEFT JOIN categorias c ON p.categoria_id = c.id
+            ORDER BY {order_by} DESC
+        """
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        return self.db.execute_query(query, params)
+
+    def get_product_summary(self, start: Optional[date] = None, end: Optional[date] = None) -> Dict:
+        """Totales de productos vendidos en el período"""
+        fecha_sql, params = date_range('fecha', start, end)
+        return self.db.execute_single(f"""
+            SELECT COUNT(DISTINCT CASE WHEN cantidad_ventas > 0 THEN producto_id END) AS productos_vendidos,
+                   COALESCE(SUM(cantidad), 0) AS cantidad_total,
+                   COALESCE(SUM(importe), 0) AS monto_total,
+                   COALESCE(SUM(costo), 0) AS costo_total
+            FROM productos_resumen_diario
+            WHERE {fecha_sql}
+        """, params) or {}
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconstruir los resúmenes diarios de ventas")
+    parser.add_argument('--db', default=None, help="Ruta de la base (por defecto la configurada)")
+    parser.add_argument('--desde', type=date.fromisoformat, default=None, help="Primer día (YYYY-MM-DD)")
+    parser.add_argument('--hasta', type=date.fromisoformat, default=None, help="Último día (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    from database.manager import DatabaseManager
+
+    db = DatabaseManager(args.db)
+    try:
+        success, message = SalesRollupManager(db).rebuild(args.desde, args.hasta)
+        print(message)
+        return 0 if success else 1
+    finally:
+        db.close_connection()
+
+if __name__ == '__main__':
+    raise SystemExit(main())
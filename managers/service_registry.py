@@ -0,0 +1,133 @@
+"""
+Registro de Servicios para AlmacénPro
+Diccionario de managers que construye cada uno recién en el primer acceso,
+para que el arranque no pague por módulos que el cajero no usa
+"""
+
+import importlib
+import logging
+import threading
+import time
+from collections.abc import MutableMapping
+from typing import Any, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+def deferred(path: str, *args, **kwargs) -> Callable[[], Any]:
+    """Fábrica que importa ``'paquete.modulo:Clase'`` y la instancia al invocarse
+
+    El import también se difiere, así un módulo pesado o con dependencias
+    opcionales faltantes no afecta el arranque.
+    """
+    module_name, _, attribute = path.partition(':')
+
+    def factory():
+        module = importlib.import_module(module_name)
+        return getattr(module, attribute)(*args, **kwargs)
+
+    factory.__qualname__ = f"deferred({path})"
+    return factory
+
+class ServiceRegistry(MutableMapping):
+    """Mapa nombre -> manager con construcción diferida
+
+    Se usa igual que el diccionario ``managers`` de siempre: ``managers['sales']``,
+    ``managers.get('communication')`` o ``'crm' in managers``. La pertenencia no
+    construye el servicio; si la fábrica falla, el error se registra en el log y
+    el servicio se comporta como ausente (``get`` retorna el valor por defecto).
+    """
+
+    def __init__(self, profiler=None):
+        self.profiler = profiler
+        self._instances: Dict[str, Any] = {}
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._order: List[str] = []
+        self._lock = threading.RLock()
+
+    def register(self, name: str, factory: Callable[[], Any], lazy: bool = True):
+        """Registrar un servicio; con ``lazy=False`` se construye en el momento"""
+        with self._lock:
+            self._instances.pop(name, None)
+            self._factories[name] = factory
+            if name not in self._order:
+                self._order.append(name)
+
+        if not lazy:
+            self[name]
+
+    def is_loaded(self, name: str) -> bool:
+        """Indica si el servicio ya fue construido"""
+        return name in self._instances
+
+    def loaded(self) -> Dict[str, Any]:
+        """Servicios ya construidos (sin forzar los pendientes)"""
+        with self._lock:
+            return dict(self._instances)
+
+    def pending(self) -> List[str]:
+        """Servicios registrados que aún no se construyeron"""
+        with self._lock:
+            return [name for name in self._order if name in self._factories]
+
+    def _build(self, name: str) -> Any:
+        """Construir el servicio (requiere el lock tomado)"""
+        factory = self._factories[name]
+        start = time.perf_counter()
+        try:
+            instance = factory()
+        except Exception as e:
+            # Mismo criterio que antes: un manager opcional que falla queda ausente
+            logger.warning(f"Servicio '{name}' no disponible: {e}")
+            del self._factories[name]
+            self._order.remove(name)
+            raise KeyError(name) from e
+
+        elapsed = time.perf_counter() - start
+        if self.profiler is not None:
+            self.profiler.record(name, elapsed, 'managers')
+        logger.debug(f"Servicio '{name}' construido en {elapsed * 1000:.1f} ms")
+
+        del self._factories[name]
+        self._instances[name] = instance
+        return instance
+
+    # Interfaz de diccionario
+    def __getitem__(self, name: str) -> Any:
+        try:
+            return self._instances[name]
+        except KeyError:
+            pass
+
+        with self._lock:
+            if name in self._instances:
+                return self._instances[name]
+            if name not in self._factories:
+                raise KeyError(name)
+            return self._build(name)
+
+    def __setitem__(self, name: str, value: Any):
+        with self._lock:
+            self._factories.pop(name, None)
+            self._instances[name] = value
+            if name not in self._order:
+                self._order.append(name)
+
+    def __delitem__(self, name: str):
+        with self._lock:
+            if name not in self._instances and name not in self._factories:
+                raise KeyError(name)
+            self._instances.pop(name, None)
+            self._factories.pop(name, None)
+            self._order.remove(name)
+
+    def __contains__(self, name) -> bool:
+        return name in self._instances or name in self._factories
+
+    def __iter__(self):
+        return iter(list(self._order))
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __repr__(self) -> str:
+        return f"ServiceRegistry(loaded={list(self._instances)}, pending={self.pending()})"
@@ -10,6 +10,8 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple, Any
 import bcrypt
 
+from managers.permission_resolver import PermissionResolver
+
 logger = logging.getLogger(__name__)
 
 class UserManager:
@@ -20,6 +22,9 @@ class UserManager:
         self.logger = logging.getLogger(__name__)
         self.failed_attempts = {}  # Cache de intentos fallidos por usuario
         
+        # Permisos compilados por rol y guardados por usuario (compartido con la interfaz)
+        self.permissions = PermissionResolver(db_manager)
+        
         # Roles por defecto del sistema
         self.DEFAULT_ROLES = {
             'ADMINISTRADOR': {
@@ -219,6 +224,8 @@ class UserManager:
             success = self.db.execute_update(query, update_values)
             
             if success:
+                # Rol o estado pudieron cambiar: descartar sus permisos guardados
+                self.db.notify_change('usuarios', [user_id], 'update_user')
                 self.logger.info(f"Usuario actualizado: ID {user_id}")
                 return True, "Usuario actualizado exitosamente"
             else:
@@ -354,23 +361,8 @@ class UserManager:
             return []
     
     def user_has_permission(self, user_id: int, permission: str) -> bool:
-        """Verificar si un usuario tiene un permiso específico"""
-        try:
-            user = self.get_user_by_id(user_id)
-            if not user or not user.get('activo'):
-                return False
-            
-            user_permissions = self._parse_permissions(user.get('rol_permisos', ''))
-            
-            # Administrador tiene todos los permisos
-            if '*' in user_permissions:
-                return True
-            
-            return permission in user_permissions
-            
-        except Exception as e:
-            self.logger.error(f"Error verificando permisos: {e}")
-            return False
+        """Verificar si un usuario tiene un permiso específico (o '*', o un permiso padre)"""
+        return self.permissions.user_has_permission(user_id, permission)
     
     def create_role(self, role_data: Dict, creator_user_id: int) -> Tuple[bool, str, int]:
         """Crear nuevo rol"""
@@ -402,6 +394,7 @@ class UserManager:
             ))
             
             if role_id:
+                self.db.notify_change('roles', [role_id], 'create_role')
                 self.logger.info(f"Rol creado: {role_data['nombre']} (ID: {role_id})")
                 return True, f"Rol creado exitosamente", role_id
             else:
@@ -453,6 +446,7 @@ class UserManager:
             """, (admin_user_id, user_id))
             
             if success:
+                self.db.notify_change('usuarios', [user_id], 'deactivate_user')
                 self.logger.info(f"Usuario desactivado: ID {user_id}")
                 return True, "Usuario desactivado exitosamente"
             else:
@@ -0,0 +1,147 @@
+"""
+Unit tests for the columnar analytics snapshot
+"""
+
+import pytest
+from managers.analytics_snapshot import AnalyticsSnapshot, count_distinct, group_sum, month_keys
+from managers.predictive_analysis_manager import PredictiveAnalysisManager
+from tests.unit.test_sales_rollups import insert_sale
+
+
+@pytest.fixture
+def snapshot_db(db_manager):
+    """Database with a customer, two products and sales over two months"""
+    db_manager.execute_update("""
+        INSERT INTO usuarios (id, username, password_hash, nombre_completo)
+        VALUES (1, 'cajero', 'x', 'Cajero Prueba')
+    """)
+    db_manager.execute_update("INSERT INTO clientes (id, nombre, apellido) VALUES (7, 'Ana', 'Gómez')")
+    db_manager.execute_many("""
+        INSERT INTO productos (id, codigo_barras, codigo_interno, nombre, precio_compra, precio_venta, stock_actual, activo)
+        VALUES (?, ?, ?, ?, ?, ?, 100, 1)
+    """, [(1, '7790001', 'YER001', 'Yerba 1kg', 60.0, 100.0), (2, '7790002', 'AZU001', 'Azúcar 1kg', 30.0, 50.0)])
+
+    insert_sale(db_manager, 'F-1', '2024-04-30', [(1, 1, 100.0)], [('EFECTIVO', 100.0)])
+    insert_sale(db_manager, 'F-2', '2024-05-02', [(1, 2, 100.0), (2, 1, 50.0)], [('EFECTIVO', 250.0)])
+    insert_sale(db_manager, 'F-3', '2024-05-02', [(2, 4, 50.0)], [('TARJETA_DEBITO', 200.0)])
+    insert_sale(db_manager, 'F-4', '2024-05-20', [(2, 1, 50.0)], [('EFECTIVO', 50.0)], estado='CANCELADA')
+    db_manager.execute_update("UPDATE ventas SET cliente_id = 7 WHERE numero_factura IN ('F-2', 'F-3')")
+    return db_manager
+
+
+@pytest.fixture
+def snapshot(snapshot_db, tmp_path):
+    """Snapshot written into a temporary directory"""
+    snapshot = AnalyticsSnapshot(snapshot_db, str(tmp_path / 'analytics'))
+    snapshot.refresh()
+    return snapshot
+
+
+class TestAnalyticsSnapshot:
+    """Test suite for AnalyticsSnapshot"""
+
+    def test_refresh_writes_columns(self, snapshot):
+        """Test that every table is copied column by column"""
+        status = snapshot.get_status()
+        assert status['tables']['ventas'] == {'rows': 4, 'last_id': 4}
+        assert status['tables']['detalle_ventas']['rows'] == 5
+        assert status['tables']['productos']['rows'] == 2
+
+        ventas = snapshot.table('ventas')
+        try:
+            assert list(ventas.column('total')) == [100.0, 250.0, 200.0, 50.0]
+            assert list(ventas.column('cliente_id')) == [0, 7, 7, 0]
+            assert ventas.decode('estado') == ['COMPLETADA'] * 3 + ['CANCELADA']
+            assert list(month_keys(ventas.column('fecha_venta'))) == [202404, 202405, 202405, 202405]
+        finally:
+            ventas.close()
+
+        detalle = snapshot.table('detalle_ventas')
+        try:
+            assert list(detalle.column('importe')) == [100.0, 200.0, 50.0, 200.0, 50.0]
+        finally:
+            detalle.close()
+
+    def test_incremental_append(self, snapshot, snapshot_db):
+        """Test that a second refresh only appends rows with a higher id"""
+        assert snapshot.refresh()['ventas'] == 0
+
+        insert_sale(snapshot_db, 'F-5', '2024-06-01', [(1, 3, 100.0)], [('EFECTIVO', 300.0)])
+        written = snapshot.refresh()
+        assert written['ventas'] == 1 and written['detalle_ventas'] == 1
+        assert written['productos'] == 2  # las dimensiones se reescriben completas
+
+        ventas = snapshot.table('ventas')
+        try:
+            assert len(ventas) == 5
+            assert list(ventas.column('id')) == [1, 2, 3, 4, 5]
+            assert ventas.column('total')[-1] == 300.0
+        finally:
+            ventas.close()
+
+    def test_cancelled_sales_are_patched(self, snapshot, snapshot_db):
+        """Test that already copied sales pick up later state changes"""
+        snapshot_db.execute_update("UPDATE ventas SET estado = 'ANULADA' WHERE numero_factura = 'F-2'")
+        written = snapshot.refresh()
+        assert written['ventas'] == 0 and written['estados_actualizados'] == 1
+        assert snapshot.refresh()['estados_actualizados'] == 0
+
+        ventas = snapshot.table('ventas')
+        try:
+            assert ventas.decode('estado') == ['COMPLETADA', 'ANULADA', 'COMPLETADA', 'CANCELADA']
+        finally:
+            ventas.close()
+
+    def test_sale_back_to_completed_is_patched(self, snapshot, snapshot_db):
+        """Test that a sale returning to COMPLETADA is written back to the snapshot"""
+        snapshot_db.execute_update("UPDATE ventas SET estado = 'COMPLETADA' WHERE numero_factura = 'F-4'")
+        assert snapshot.refresh()['estados_actualizados'] == 1
+
+        ventas = snapshot.table('ventas')
+        try:
+            assert ventas.decode('estado') == ['COMPLETADA'] * 4
+        finally:
+            ventas.close()
+
+    def test_dimension_rewrite_keeps_open_readers(self, snapshot, snapshot_db):
+        """Test that rewriting a dimension leaves files mapped by a reader untouched"""
+        productos = snapshot.table('productos')
+        try:
+            precios = productos.column('precio_venta')
+            snapshot_db.execute_update("UPDATE productos SET precio_venta = 120.0 WHERE id = 1")
+            snapshot.refresh()
+
+            assert list(precios) == [100.0, 50.0]
+            assert snapshot.get_status()['tables']['productos']['rows'] == 2
+            latest = snapshot.table('productos')
+            try:
+                assert list(latest.column('precio_venta')) == [120.0, 50.0]
+                assert latest.directory != productos.directory
+            finally:
+                latest.close()
+        finally:
+            productos.close()
+
+    def test_monthly_sales_match_sql(self, snapshot, snapshot_db):
+        """Test that the snapshot aggregation matches the SQL fallback"""
+        from_sql = PredictiveAnalysisManager(snapshot_db)._monthly_sales(months_back=240)
+        from_snapshot = PredictiveAnalysisManager(snapshot_db, snapshot)._monthly_sales(months_back=240)
+
+        assert from_snapshot == from_sql
+        assert from_sql == [
+            {'year': '2024', 'month': '04', 'transaction_count': 1, 'total_revenue': 100.0,
+             'avg_ticket': 100.0, 'unique_customers': 0, 'unique_products': 1},
+            {'year': '2024', 'month': '05', 'transaction_count': 2, 'total_revenue': 450.0,
+             'avg_ticket': 225.0, 'unique_customers': 1, 'unique_products': 2}
+        ]
+
+    def test_vector_helpers(self):
+        """Test grouping helpers on plain sequences"""
+        keys = [202401, 202401, 202402, 202402, 202402]
+        values = [10.0, float('nan'), 5.0, 5.0, 1.0]
+        mask = [True, True, True, True, False]
+
+        assert group_sum(keys, values, mask) == {202401: (2, 10.0), 202402: (2, 10.0)}
+        assert count_distinct(keys, [1, 1, 3, 3, 4]) == {202401: 1, 202402: 2}
+        assert count_distinct(keys, [1, 1, 3, 3, 4], mask) == {202401: 1, 202402: 1}
+        assert list(month_keys([0, 1706745600])) == [197001, 202402]
@@ -0,0 +1,182 @@
+"""
+Unit tests for the off-GUI-thread widget loader
+"""
+
+import threading
+
+import pytest
+from PyQt5.QtCore import QThreadPool
+from PyQt5.QtWidgets import QWidget
+
+from managers.product_manager import ProductManager
+from ui.widgets.async_loader import AsyncLoader
+from ui.widgets.dashboard_widget import DashboardWidget
+from ui.widgets.table_models import ProductTableModel
+
+
+@pytest.fixture
+def pool():
+    """Single-thread pool so queued work runs in submission order"""
+    pool = QThreadPool()
+    pool.setMaxThreadCount(1)
+    yield pool
+    pool.waitForDone(5000)
+
+
+class ThreadRecorder:
+    """Proxy that records the thread of every call made to a manager"""
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.threads = []
+
+    def __getattr__(self, name):
+        attribute = getattr(self.manager, name)
+        if not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            self.threads.append(threading.get_ident())
+            return attribute(*args, **kwargs)
+        return call
+
+
+class TestAsyncLoader:
+    """Test suite for AsyncLoader and the widgets that use it"""
+
+    def test_runs_in_pool_and_delivers_on_gui_thread(self, qapp, pool):
+        """Test that work runs on a worker thread and the callback on the GUI thread"""
+        loader = AsyncLoader(pool=pool)
+        seen = {}
+
+        def work():
+            seen['worker'] = threading.get_ident()
+            return 42
+
+        def done(result):
+            seen['callback'] = threading.get_ident()
+            seen['result'] = result
+
+        assert loader.submit('answer', work, done)
+        assert loader.wait_idle()
+        assert seen['result'] == 42
+        assert seen['worker'] != threading.get_ident()
+        assert seen['callback'] == threading.get_ident()
+
+        errors = []
+        loader.submit('broken', lambda: 1 / 0, error_callback=errors.append)
+        assert loader.wait_idle()
+        assert errors and 'division' in errors[0]
+
+    def test_coalesces_requests_per_key(self, qapp, pool):
+        """Test that requests made while one is running collapse into the latest"""
+        loader = AsyncLoader(pool=pool)
+        gate = threading.Event()
+        runs, results = [], []
+
+        def work(value):
+            def run():
+                if value == 0:
+                    gate.wait(5)
+                runs.append(value)
+                return value
+            return run
+
+        assert loader.submit('stats', work(0), results.append)
+        for value in (1, 2, 3):
+            assert not loader.submit('stats', work(value), results.append)
+        gate.set()
+        assert loader.wait_idle()
+        assert runs == [0, 3]
+        assert results == [0, 3]
+
+    def test_cancel_discards_result(self, qapp, pool):
+        """Test that a cancelled request never reaches its callback"""
+        loader = AsyncLoader(pool=pool)
+        gate = threading.Event()
+        results = []
+
+        loader.submit('slow', lambda: gate.wait(5) and 'slow', results.append)
+        loader.submit('queued', lambda: 'queued', results.append)
+        loader.cancel()
+        gate.set()
+        assert loader.wait_idle()
+        assert results == []
+        assert not loader.is_busy()
+
+    def test_hidden_widget_defers_work(self, qapp, pool):
+        """Test that a hidden widget pauses its loads until it is shown again"""
+        widget = QWidget()
+        loader = AsyncLoader(widget, pool=pool)
+        calls = []
+
+        assert not loader.submit('page', lambda: calls.append('ran') or 'data', calls.append)
+        assert loader.wait_idle(200)
+        assert calls == []
+
+        widget.show()
+        assert loader.wait_idle()
+        assert calls == ['ran', 'data']
+
+        widget.hide()
+        loader.submit('page', lambda: 'again', calls.append)
+        assert loader.wait_idle(200)
+        assert calls == ['ran', 'data']
+        widget.close()
+
+    def test_widgets_query_off_gui_thread(self, qapp, db_manager):
+        """Test that the dashboard and the paged grid never query on the GUI thread"""
+        db_manager.execute_many("""
+            INSERT INTO productos (codigo_barras, codigo_interno, nombre, precio_venta, stock_actual, stock_minimo, activo)
+            VALUES (?, ?, ?, 10.0, ?, 5, 1)
+        """, [(f'779{i:05d}', f'P{i:05d}', f'Producto {i:03d}', i % 10) for i in range(30)])
+        products = ThreadRecorder(ProductManager(db_manager))
+
+        dashboard = DashboardWidget({'product': products}, {'permisos': '*'})
+        dashboard.show()
+        assert dashboard.loader.wait_idle()
+        assert dashboard.dashboard_data['total_productos'] == 30
+        assert dashboard.metric_widgets['total_productos'].text() == '30'
+
+        model = ProductTableModel(products, ['codigo', 'nombre', 'stock_actual'], page_size=20,
+                                  loader=dashboard.loader)
+        model.reload()
+        assert model.rowCount() == 0 and not model.canFetchMore()
+        assert dashboard.loader.wait_idle()
+        assert model.rowCount() == 20
+
+        exported = []
+        model.load_all(exported.append)
+        assert dashboard.loader.wait_idle()
+        assert [row['id'] for row in exported[0]] == [row['id'] for row in products.manager.query_products(limit=100)]
+        assert model.rowCount() == 20
+
+        assert products.threads
+        assert threading.get_ident() not in products.threads
+        dashboard.close()
+
+    def test_failed_page_is_retried(self, qapp, db_manager, pool):
+        """Test that a page that fails to load is requested again by the next fetchMore"""
+        db_manager.execute_many("""
+            INSERT INTO productos (codigo_barras, codigo_interno, nombre, precio_venta, stock_actual, activo)
+            VALUES (?, ?, ?, 10.0, 5, 1)
+        """, [(f'779{i:05d}', f'P{i:05d}', f'Producto {i:03d}') for i in range(30)])
+        manager = ProductManager(db_manager)
+        failures = [1]
+
+        class FlakyManager:
+            def query_products(self, **options):
+                if failures:
+                    failures.pop()
+                    raise RuntimeError("database is locked")
+                return manager.query_products(**options)
+
+        loader = AsyncLoader(pool=pool)
+        model = ProductTableModel(FlakyManager(), ['codigo', 'nombre'], page_size=20, loader=loader)
+        model.reload()
+        assert loader.wait_idle()
+        assert model.rowCount() == 0 and model.canFetchMore()
+
+        model.fetchMore()
+        assert loader.wait_idle()
+        assert model.rowCount() == 20 and model.canFetchMore()
@@ -0,0 +1,217 @@
+"""
+Unit tests for data-change events and change-driven widget refresh
+"""
+
+import sqlite3
+import threading
+import time
+from unittest.mock import MagicMock, call
+
+import pytest
+from PyQt5.QtCore import QCoreApplication
+from PyQt5.QtWidgets import QWidget
+
+from database.change_events import ANY_TABLE, ChangeBus
+from managers.customer_manager import CustomerManager
+from managers.product_manager import ProductManager
+from managers.sales_manager import SalesManager
+from ui.widgets.change_watcher import ChangeWatcher
+from ui.widgets.dashboard_widget import DashboardWidget
+
+
+@pytest.fixture
+def shop_db(db_manager):
+    """Database with a cashier and two products in stock"""
+    db_manager.execute_update("""
+        INSERT INTO usuarios (id, username, password_hash, nombre_completo)
+        VALUES (1, 'cajero', 'x', 'Cajero Prueba')
+    """)
+    db_manager.execute_many("""
+        INSERT INTO productos (id, codigo_barras, codigo_interno, nombre, precio_compra, precio_venta, stock_actual, activo)
+        VALUES (?, ?, ?, ?, ?, ?, 100, 1)
+    """, [(1, '7790001', 'YER001', 'Yerba 1kg', 60.0, 100.0), (2, '7790002', 'AZU001', 'Azúcar 1kg', 30.0, 50.0)])
+    return db_manager
+
+
+def record(bus, tables=None):
+    """Subscribe a list to the bus and return it"""
+    events = []
+    bus.subscribe(events.append, tables)
+    return events
+
+
+class TestChangeEvents:
+    """Test suite for ChangeBus, deferred publication and ChangeWatcher"""
+
+    def test_bus_filters_by_table(self):
+        """Test that subscribers only get their tables plus unknown-origin changes"""
+        bus = ChangeBus()
+        sales = record(bus, ('ventas',))
+        everything = record(bus)
+
+        bus.publish('productos', [1, 2], 'update_stock')
+        bus.publish('ventas', [7], 'create_sale')
+        bus.publish(ANY_TABLE, source='externo')
+
+        assert [event.table for event in sales] == ['ventas', ANY_TABLE]
+        assert [event.table for event in everything] == ['productos', 'ventas', ANY_TABLE]
+        assert everything[0].ids == (1, 2)
+
+        bus.unsubscribe(sales.append)
+        assert bus.subscriber_count() == 1
+
+    def test_events_wait_for_commit(self, db_manager):
+        """Test that changes inside a transaction publish on commit and vanish on rollback"""
+        events = record(db_manager.changes)
+
+        with db_manager.transaction():
+            db_manager.notify_change('ventas', [1])
+            try:
+                with db_manager.transaction():
+                    db_manager.notify_change('ventas', [2])
+                    raise ValueError('savepoint')
+            except ValueError:
+                pass
+            with db_manager.transaction():
+                db_manager.notify_change('productos', [3])
+            assert events == []
+
+        assert [(event.table, event.ids) for event in events] == [('ventas', (1,)), ('productos', (3,))]
+
+        with pytest.raises(ValueError):
+            with db_manager.transaction():
+                db_manager.notify_change('ventas', [4])
+                raise ValueError('rollback')
+        assert len(events) == 2
+
+        db_manager.notify_change('clientes', [5])
+        assert events[-1].table == 'clientes'
+
+    def test_managers_publish_committed_writes(self, shop_db):
+        """Test that a stock adjustment announces what it changed and rejected writes do not"""
+        events = record(shop_db.changes)
+        products = ProductManager(shop_db)
+        sales = SalesManager(shop_db, products)
+
+        success, message = products.update_stock(1, 50, 'AJUSTE', 'Inventario', 1)
+        assert success, message
+        assert [(event.table, event.ids, event.source) for event in events] == [('productos', (1,), 'update_stock')]
+
+        success, _ = products.update_stock(99, 5, 'AJUSTE', 'Inventario', 1)
+        assert not success
+        success, _, _ = sales.create_sale({}, [{'producto_id': 2, 'cantidad': 1000, 'precio_unitario': 50.0}],
+                                          [{'metodo_pago': 'EFECTIVO', 'importe': 50000.0}], 1)
+        assert not success
+        assert len(events) == 1
+
+    def test_external_writes_detected(self, db_manager, temp_db):
+        """Test that a write from another connection is reported as an unknown-origin change"""
+        events = record(db_manager.changes, ('productos',))
+        assert not db_manager.check_external_changes()
+
+        db_manager.notify_change('productos', [1])
+        assert not db_manager.check_external_changes()
+
+        other = sqlite3.connect(temp_db)
+        other.execute("INSERT INTO categorias (nombre) VALUES ('Otra terminal')")
+        other.commit()
+        other.close()
+
+        assert db_manager.check_external_changes()
+        assert events[-1].table == ANY_TABLE
+        assert not db_manager.check_external_changes()
+
+    def test_own_writes_are_not_external(self, db_manager, temp_db):
+        """Test that this process's commits are not reported as external, even mixed with another terminal's"""
+        events = record(db_manager.changes, ('productos',))
+        assert not db_manager.check_external_changes()
+
+        db_manager.execute_insert("INSERT INTO categorias (nombre) VALUES ('Propia')")
+        db_manager.execute_many("INSERT INTO categorias (nombre) VALUES (?)", [('Lote 1',), ('Lote 2',)])
+        assert not db_manager.check_external_changes()
+
+        other = sqlite3.connect(temp_db)
+        other.execute("INSERT INTO categorias (nombre) VALUES ('Otra terminal')")
+        other.commit()
+        other.close()
+        db_manager.execute_insert("INSERT INTO categorias (nombre) VALUES ('Propia 2')")
+
+        assert db_manager.check_external_changes()
+        assert events[-1].table == ANY_TABLE
+
+    def test_external_check_does_not_wait_for_writer(self, db_manager):
+        """Test that the timer check runs while another thread holds the writer"""
+        assert not db_manager.check_external_changes()
+        held, release = threading.Event(), threading.Event()
+
+        def hold_writer():
+            with db_manager.transaction():
+                db_manager.connection.execute("INSERT INTO categorias (nombre) VALUES ('En curso')")
+                held.set()
+                release.wait(5)
+
+        holder = threading.Thread(target=hold_writer)
+        holder.start()
+        try:
+            assert held.wait(5)
+            started = time.perf_counter()
+            assert not db_manager.check_external_changes()
+            assert time.perf_counter() - started < 1
+        finally:
+            release.set()
+            holder.join()
+        assert not db_manager.check_external_changes()
+
+    def test_customer_writes_publish(self):
+        """Test that creating and editing a customer announces the change"""
+        db = MagicMock()
+        db.execute_insert.return_value = 5
+        db.execute_update.return_value = True
+        customers = CustomerManager(db)
+
+        assert customers.create_customer({'nombre': 'Ana', 'apellido': 'Gómez'}) == 5
+        assert customers.update_customer(5, {'nombre': 'Ana María', 'apellido': 'Gómez'})
+        assert db.notify_change.call_args_list == [
+            call('clientes', [5], 'create_customer'), call('clientes', [5], 'update_customer')]
+
+    def test_watcher_batches_and_waits_until_visible(self, qapp):
+        """Test that a burst of changes reaches a hidden widget once, when it is shown"""
+        bus = ChangeBus()
+        widget = QWidget()
+        batches = []
+        watcher = ChangeWatcher(bus, ('ventas',), batches.append, widget, debounce_ms=0)
+
+        for sale_id in (1, 2, 3):
+            bus.publish('ventas', [sale_id])
+        bus.publish('productos', [9])
+        QCoreApplication.processEvents()
+        assert batches == [] and watcher.has_pending()
+
+        widget.show()
+        QCoreApplication.processEvents()
+        assert batches == [{'ventas': {1, 2, 3}}]
+
+        watcher.stop()
+        bus.publish('ventas', [4])
+        QCoreApplication.processEvents()
+        assert len(batches) == 1
+        widget.close()
+
+    def test_dashboard_reloads_only_affected_sections(self, qapp, shop_db):
+        """Test that a stock change reloads the product metrics but not the sales ones"""
+        dashboard = DashboardWidget({'product': ProductManager(shop_db)}, {'permisos': '*'})
+        dashboard.show()
+        assert dashboard.loader.wait_idle()
+        assert dashboard.dashboard_data['total_productos'] == 2
+
+        submitted = []
+        submit = dashboard.loader.submit
+        dashboard.loader.submit = lambda key, *args, **kwargs: submitted.append(key) or submit(key, *args, **kwargs)
+
+        shop_db.execute_update("UPDATE productos SET stock_actual = 0 WHERE id = 1")
+        shop_db.notify_change('productos', [1], 'update_stock')
+        dashboard.change_watcher.flush()
+
+        assert submitted == ['dashboard:productos']
+        assert dashboard.loader.wait_idle()
+        dashboard.close()
@@ -0,0 +1,136 @@
+"""
+Unit tests for the materialized customer features
+"""
+
+from datetime import date, timedelta
+
+import pytest
+from managers.advanced_customer_manager import AdvancedCustomerManager
+from managers.customer_feature_manager import CustomerFeatureManager, FEATURE_COLUMNS
+from managers.sales_manager import SalesManager
+from tests.unit.test_sales_rollups import insert_sale
+
+
+def days_ago(days):
+    return (date.today() - timedelta(days=days)).isoformat()
+
+
+@pytest.fixture
+def features_db(db_manager):
+    """Two customers with sales every ten days and one cancelled sale"""
+    db_manager.execute_update("""
+        INSERT INTO usuarios (id, username, password_hash, nombre_completo)
+        VALUES (1, 'cajero', 'x', 'Cajero Prueba')
+    """)
+    db_manager.execute_update("""
+        INSERT INTO productos (id, codigo_barras, codigo_interno, nombre, precio_compra, precio_venta, stock_actual, activo)
+        VALUES (1, '7790001', 'YER001', 'Yerba 1kg', 60.0, 100.0, 100, 1)
+    """)
+    db_manager.execute_many("INSERT INTO clientes (id, nombre, apellido) VALUES (?, ?, ?)",
+                            [(1, 'Ana', 'Gómez'), (2, 'Luis', 'Pérez'), (3, 'Eva', 'Sin compras')])
+
+    sales = [(1, 40, 1), (1, 30, 2), (1, 20, 3), (1, 10, 2), (2, 5, 4), (2, 2, 1)]
+    for number, (customer_id, offset, quantity) in enumerate(sales, start=1):
+        insert_sale(db_manager, f'F-{number}', days_ago(offset), [(1, quantity, 100.0)],
+                    [('EFECTIVO', quantity * 100.0)])
+        db_manager.execute_update("UPDATE ventas SET cliente_id = ? WHERE numero_factura = ?",
+                                  (customer_id, f'F-{number}'))
+    insert_sale(db_manager, 'F-X', days_ago(1), [(1, 9, 100.0)], [('EFECTIVO', 900.0)], estado='CANCELADA')
+    db_manager.execute_update("UPDATE ventas SET cliente_id = 1 WHERE numero_factura = 'F-X'")
+    return db_manager
+
+
+def feature_rows(db):
+    """Stored feature rows without timestamps"""
+    return db.execute_query(f"SELECT {', '.join(FEATURE_COLUMNS)} FROM customer_features ORDER BY cliente_id")
+
+
+class TestCustomerFeatures:
+    """Test suite for CustomerFeatureManager"""
+
+    def test_rebuild_computes_features(self, features_db):
+        """Test the stored and derived features after a full rebuild"""
+        manager = CustomerFeatureManager(features_db)
+        success, message = manager.rebuild()
+        assert success and '2 clientes' in message
+
+        features = manager.get_features(1)
+        assert features['cantidad_compras'] == 4
+        assert features['monto_total'] == 800.0
+        assert features['ticket_promedio'] == 200.0
+        assert features['ticket_maximo'] == 300.0
+        assert features['intervalo_promedio'] == pytest.approx(10.0)
+        assert features['varianza_intervalos'] == pytest.approx(0.0, abs=1e-6)
+        assert features['consistencia'] == pytest.approx(1.0)
+        assert features['recency_dias'] == pytest.approx(10.0, abs=1.0)
+        assert features['antiguedad_dias'] == pytest.approx(30.0)
+        # Promedio móvil exponencial de 100, 200, 300, 200
+        assert features['ticket_movil'] == pytest.approx(((100 * 0.7 + 60) * 0.7 + 90) * 0.7 + 60)
+        assert set(features['rfm']) == {'recency', 'frequency', 'monetary', 'rfm_combined'}
+
+        assert manager.get_features(3) is None
+        assert sorted(manager.get_all_features()) == [1, 2]
+        assert list(manager.get_all_features([2, 3])) == [2]
+
+    def test_incremental_apply_matches_rebuild(self, features_db):
+        """Test that applying sales one by one gives the same rows as a rebuild"""
+        manager = CustomerFeatureManager(features_db)
+        manager.rebuild()
+        expected = feature_rows(features_db)
+
+        features_db.execute_update("DELETE FROM customer_features")
+        for row in features_db.execute_query("SELECT id FROM ventas ORDER BY fecha_venta, id"):
+            manager.apply_sale(row['id'])
+            manager.apply_sale(row['id'])  # aplicar dos veces no duplica la venta
+
+        assert feature_rows(features_db) == pytest.approx(expected)
+
+    def test_backdated_sale_refreshes_customer(self, features_db):
+        """Test that a sale older than the last purchase recomputes the customer"""
+        manager = CustomerFeatureManager(features_db)
+        manager.rebuild()
+
+        sale_id = insert_sale(features_db, 'F-7', days_ago(60), [(1, 1, 100.0)], [('EFECTIVO', 100.0)])
+        features_db.execute_update("UPDATE ventas SET cliente_id = 2 WHERE id = ?", (sale_id,))
+        manager.apply_sale(sale_id)
+
+        features = manager.get_features(2)
+        assert features['cantidad_compras'] == 3
+        assert features['primera_compra'].startswith(days_ago(60))
+        assert features['ultima_compra'].startswith(days_ago(2))
+
+        incremental = feature_rows(features_db)
+        manager.rebuild()
+        assert feature_rows(features_db) == pytest.approx(incremental)
+
+    def test_cancel_sale_updates_features(self, features_db):
+        """Test that cancelling a sale removes it from the customer features"""
+        sales_manager = SalesManager(features_db, None)
+        sales_manager.customer_features.rebuild()
+        sale_id = features_db.execute_single("SELECT id FROM ventas WHERE numero_factura = 'F-6'")['id']
+
+        success, _ = sales_manager.cancel_sale(sale_id, 1, "Error de cobro")
+        assert success
+
+        features = sales_manager.customer_features.get_features(2)
+        assert features['cantidad_compras'] == 1
+        assert features['monto_total'] == 400.0
+        assert features['intervalo_promedio'] is None
+
+    def test_crm_reads_features(self, features_db):
+        """Test that CRM churn and CLV use the precomputed features"""
+        CustomerFeatureManager(features_db).rebuild()
+        crm = AdvancedCustomerManager(features_db)
+
+        churn = crm.predict_customer_churn()
+        assert churn['success'] and churn['total_customers_analyzed'] == 3
+        by_customer = {p['customer_id']: p for p in churn['predictions']}
+        assert by_customer[1]['metrics']['total_purchases'] == 4
+        assert by_customer[1]['days_inactive'] == 10
+        assert by_customer[3]['metrics']['total_purchases'] == 0
+
+        clv = crm.calculate_customer_clv(1)
+        assert clv['historical_clv'] == 800.0
+        assert clv['metrics']['total_purchases'] == 4
+        assert clv['metrics']['customer_lifespan_days'] == 30
+        assert 0.5 <= clv['metrics']['trend_factor'] <= 2.0
@@ -0,0 +1,151 @@
+"""
+Unit tests for batch customer scoring in PredictiveAnalysisManager
+"""
+
+from datetime import date, timedelta
+
+import pytest
+from managers.customer_feature_manager import CustomerFeatureManager
+from managers.predictive_analysis_manager import PredictiveAnalysisManager
+from tests.unit.test_sales_rollups import insert_sale
+
+
+def days_ago(days):
+    return (date.today() - timedelta(days=days)).isoformat()
+
+
+@pytest.fixture
+def scoring_db(db_manager):
+    """Three customers with different purchase histories and one without purchases"""
+    db_manager.execute_update("""
+        INSERT INTO usuarios (id, username, password_hash, nombre_completo)
+        VALUES (1, 'cajero', 'x', 'Cajero Prueba')
+    """)
+    db_manager.execute_many("""
+        INSERT INTO productos (id, codigo_barras, codigo_interno, nombre, categoria_id, precio_compra, precio_venta,
+                               stock_actual, activo)
+        VALUES (?, ?, ?, ?, 1, ?, ?, 100, 1)
+    """, [(1, '7790001', 'YER001', 'Yerba 1kg', 60.0, 100.0), (2, '7790002', 'AZU001', 'Azúcar 1kg', 30.0, 50.0),
+          (3, '7790003', 'CAF001', 'Café 500g', 90.0, 150.0)])
+    db_manager.execute_many("INSERT INTO clientes (id, nombre, apellido) VALUES (?, ?, ?)",
+                            [(1, 'Ana', 'Frecuente'), (2, 'Luis', 'Ausente'), (3, 'Eva', 'Nueva'), (4, 'Sin', 'Compras')])
+
+    # Cliente 1: compra cada dos semanas; cliente 2: dejó de comprar hace meses
+    schedule = {1: [14 * i + 3 for i in range(12)], 2: [200, 230, 260, 290], 3: [5]}
+    number = 0
+    for customer_id, days in schedule.items():
+        for offset in days:
+            number += 1
+            insert_sale(db_manager, f'F-{number}', days_ago(offset),
+                        [(1 + number % 2, 2, 100.0 if number % 2 == 0 else 50.0)], [('EFECTIVO', 200.0)])
+            db_manager.execute_update("UPDATE ventas SET cliente_id = ? WHERE numero_factura = ?",
+                                      (customer_id, f'F-{number}'))
+    # Ventas sin cliente que hacen popular al café
+    for offset in (1, 2, 3):
+        insert_sale(db_manager, f'M-{offset}', days_ago(offset), [(3, 1, 150.0)], [('EFECTIVO', 150.0)])
+    CustomerFeatureManager(db_manager).rebuild()
+    return db_manager
+
+
+@pytest.fixture
+def manager(scoring_db):
+    return PredictiveAnalysisManager(scoring_db)
+
+
+def count_queries(db, tmp_path, function):
+    """Run ``function`` and return its result and the statements it executed"""
+    db.query_stats.slow_log_path = str(tmp_path / 'slow.log')
+    db.query_stats.reset()
+    db.query_stats.enable()
+    try:
+        result = function()
+    finally:
+        db.query_stats.disable()
+    report = [item for item in db.query_stats.get_report(limit=0) if not item['statement'].startswith('PRAGMA')]
+    return result, sum(item['calls'] for item in report)
+
+
+class TestCustomerScoring:
+    """Test suite for the batch scoring API"""
+
+    def test_batch_matches_single_customer(self, manager):
+        """Test that batch scores match the per-customer methods"""
+        scores = manager.score_customers()
+        assert sorted(scores) == [1, 2, 3]
+
+        for customer_id, score in scores.items():
+            segment = manager._classify_customer_segment(customer_id)
+            assert score['segment']['all_segments'] == segment['all_segments']
+            assert score['segment']['characteristics'] == pytest.approx(segment['characteristics'], abs=0.01)
+            assert score['next_purchase'] == manager._predict_next_purchase(customer_id)
+            assert score['confidence'] == pytest.approx(manager._calculate_overall_confidence(customer_id))
+
+            churn = manager._predict_churn(customer_id)
+            assert score['churn']['risk_level'] == churn['risk_level']
+            assert score['churn']['churn_probability'] == pytest.approx(churn['churn_probability'], abs=1e-3)
+            assert score['churn']['days_since_last_purchase'] == pytest.approx(
+                churn['days_since_last_purchase'], abs=0.01)
+
+            assert score['clv'] == pytest.approx(manager._calculate_clv_prediction(customer_id), rel=1e-4)
+
+    def test_scores_reflect_history(self, manager):
+        """Test that recent regulars and lapsed customers score differently"""
+        scores = manager.score_customers()
+        assert scores[2]['churn']['churn_probability'] > scores[1]['churn']['churn_probability']
+        assert scores[2]['churn']['risk_level'] in ('high', 'critical')
+        assert scores[1]['next_purchase']['predicted_date'] is not None
+        assert scores[1]['confidence'] > scores[3]['confidence']
+        assert set(scores[1]) == {'churn', 'segment', 'next_purchase', 'clv', 'confidence'}
+
+    def test_constant_query_count(self, manager, scoring_db, tmp_path):
+        """Test that batch scoring does not issue queries per customer"""
+        scores, queries = count_queries(scoring_db, tmp_path, manager.score_customers)
+        assert len(scores) == 3
+        assert queries <= 3
+
+        subset, _ = count_queries(scoring_db, tmp_path, lambda: manager.score_customers([2, 4, 99]))
+        assert list(subset) == [2]
+
+        result, queries = count_queries(scoring_db, tmp_path, manager.get_segment_analysis)
+        assert result['total_customers_analyzed'] == 3
+        assert queries == 1
+
+    def test_full_analysis_uses_sale_lines(self, manager):
+        """Test that the single-customer analysis reads detalle_ventas and ISO dates"""
+        scoring_db = manager.db_manager
+        scoring_db.execute_update("UPDATE ventas SET fecha_venta = replace(fecha_venta, ' ', 'T') || '.250000'")
+
+        analysis = manager.analyze_customer_behavior(1)
+        assert 'error' not in analysis
+        assert {pattern['pattern_type'] for pattern in analysis['purchase_patterns']} >= {'frequency', 'product_preference'}
+        # Solo compró productos 1 y 2: se recomienda el otro de la misma categoría
+        assert [item['product_id'] for item in analysis['product_recommendations']
+                if item['recommendation_type'] == 'cross_sell'] == [3]
+        assert analysis['next_purchase_prediction']['predicted_date'] is not None
+
+    def test_cancelled_sales_ignored_in_lines(self, manager, scoring_db):
+        """Test that lines of cancelled sales do not count, like the sales and the feature store"""
+        insert_sale(scoring_db, 'F-X', days_ago(1), [(3, 9, 150.0)], [('EFECTIVO', 1350.0)], estado='CANCELADA')
+        scoring_db.execute_update("UPDATE ventas SET cliente_id = 3 WHERE numero_factura = 'F-X'")
+
+        lines = manager._get_customer_lines(3)
+        assert len(lines) == len(manager._get_customer_sales(3)) == 1
+        assert [line['producto_id'] for line in lines] != [3]
+
+    def test_cluster_profiles(self, manager):
+        """Test that cluster profiles sum every customer and cap the sample ids"""
+        customers = [{'id': index, 'days_since_last': 5 if index < 6 else 300,
+                      'total_purchases': 20 if index < 6 else 1,
+                      'total_spent': 9000.0 if index < 6 else 50.0,
+                      'avg_purchase': 450.0 if index < 6 else 50.0} for index in range(12)]
+        manager.cluster_sample_size = 2
+
+        clusters = manager._cluster_customers(customers, k=2)
+        profiles = clusters['profiles']
+        assert [profile['customer_count'] for profile in profiles] == [6, 6]
+        assert profiles[0]['avg_spent'] == 9000.0 and profiles[1]['avg_recency'] == 300.0
+        assert [profile['sample_customer_ids'] for profile in profiles] == [[0, 1], [6, 7]]
+
+    def test_empty_base(self, db_manager):
+        """Test scoring when no customer has purchases"""
+        assert PredictiveAnalysisManager(db_manager).score_customers() == {}
@@ -0,0 +1,100 @@
+"""
+Unit tests for the aggregate dashboard metrics service
+"""
+
+from datetime import date
+
+import pytest
+
+from managers.dashboard_metrics import DashboardMetricsService
+from managers.sales_rollup_manager import SalesRollupManager
+from ui.widgets.dashboard_widget import DashboardWidget
+
+TODAY = date(2024, 5, 20)
+
+
+def insert_sale(db, number, moment, total, estado='COMPLETADA'):
+    """Insert a sale header with a single cash payment"""
+    sale_id = db.execute_insert("""
+        INSERT INTO ventas (numero_factura, usuario_id, caja_id, subtotal, total, estado, fecha_venta)
+        VALUES (?, 1, 1, ?, ?, ?, ?)
+    """, (number, total, total, estado, moment))
+    db.execute_update("INSERT INTO pagos_venta (venta_id, metodo_pago, importe) VALUES (?, 'EFECTIVO', ?)",
+                      (sale_id, total))
+    return sale_id
+
+
+@pytest.fixture
+def metrics_db(db_manager):
+    """Database with sales around TODAY, 60 products and a few customers"""
+    db_manager.execute_update("""
+        INSERT INTO usuarios (id, username, password_hash, nombre_completo)
+        VALUES (1, 'cajero', 'x', 'Cajero Prueba')
+    """)
+    insert_sale(db_manager, 'F-1', '2024-04-30 23:59:00', 1000.0)
+    insert_sale(db_manager, 'F-2', '2024-05-01 09:00:00', 100.0)
+    insert_sale(db_manager, 'F-3', '2024-05-20 08:15:00', 40.0)
+    insert_sale(db_manager, 'F-4', '2024-05-20 21:30:00', 60.0)
+    insert_sale(db_manager, 'F-5', '2024-05-20 22:00:00', 500.0, estado='CANCELADA')
+    insert_sale(db_manager, 'F-6', '2024-05-21 10:00:00', 700.0)
+
+    # Más productos que el límite de search_products('') que usaba el dashboard
+    db_manager.execute_many("""
+        INSERT INTO productos (codigo_barras, codigo_interno, nombre, precio_venta, stock_actual, stock_minimo, activo)
+        VALUES (?, ?, ?, 10.0, ?, 5, ?)
+    """, [(f'779{i:05d}', f'P{i:05d}', f'Producto {i:03d}', i % 10, int(i < 60)) for i in range(64)])
+    db_manager.execute_many("INSERT INTO clientes (nombre, activo) VALUES (?, ?)",
+                            [('Ana', 1), ('Beto', 1), ('Carla', 0)])
+    SalesRollupManager(db_manager).rebuild()
+    return db_manager
+
+
+class TestDashboardMetrics:
+    """Test suite for DashboardMetricsService and its use in DashboardWidget"""
+
+    @pytest.mark.parametrize('use_rollups', [True, False])
+    def test_sales_metrics(self, metrics_db, use_rollups):
+        """Test that day and month totals count only completed sales inside the period"""
+        service = DashboardMetricsService(metrics_db, use_rollups=use_rollups)
+        metrics = service.get_metrics(['ventas'], today=TODAY)
+
+        assert metrics['ventas_hoy'] == pytest.approx(100.0)
+        assert metrics['ventas_mes'] == pytest.approx(200.0)
+        assert metrics['meta_mes'] == pytest.approx(100 / 1.2)
+        assert set(metrics) == {'ventas_hoy', 'ventas_mes', 'meta_mes'}
+
+    def test_counts_cover_all_rows(self, metrics_db):
+        """Test that product and customer counts are not capped by a result limit"""
+        metrics = DashboardMetricsService(metrics_db).get_metrics(['productos', 'clientes'], today=TODAY)
+
+        assert metrics['total_productos'] == 60
+        assert metrics['stock_bajo'] == 36  # stock 0..5 de cada decena
+        assert metrics['clientes_activos'] == 2
+        assert metrics['utilidad_mes'] == pytest.approx(200.0 * 0.3)
+
+    def test_empty_database(self, db_manager):
+        """Test that every metric defaults to zero without data"""
+        metrics = DashboardMetricsService(db_manager).get_metrics(today=TODAY)
+        assert metrics == {'ventas_hoy': 0, 'ventas_mes': 0, 'meta_mes': 0, 'total_productos': 0,
+                           'stock_bajo': 0, 'clientes_activos': 0, 'utilidad_mes': 0}
+
+    def test_product_count_uses_covering_index(self, metrics_db):
+        """Test that the stock counts are answered from idx_productos_stock"""
+        plan = metrics_db.execute_query("""
+            EXPLAIN QUERY PLAN
+            SELECT COUNT(*), SUM(COALESCE(stock_actual, 0) <= COALESCE(stock_minimo, 0))
+            FROM productos WHERE activo = 1
+        """)
+        assert any('COVERING INDEX idx_productos_stock' in row['detail'] for row in plan)
+
+    def test_widget_respects_permissions(self, qapp, metrics_db):
+        """Test that the dashboard only queries the sections the user may see"""
+        dashboard = DashboardWidget({'database': metrics_db}, {'permisos': 'productos'})
+        dashboard.show()
+        assert dashboard.loader.wait_idle()
+
+        assert dashboard.dashboard_data['total_productos'] == 60
+        assert dashboard.dashboard_data['stock_bajo'] == 36
+        assert dashboard.dashboard_data['ventas_hoy'] == 0
+        assert dashboard.dashboard_data['clientes_activos'] == 0
+        dashboard.close()
@@ -4,6 +4,7 @@ Unit tests for DatabaseManager
 
 import pytest
 import sqlite3
+from unittest.mock import patch
 from database.manager import DatabaseManager
 
 
@@ -146,4 +147,257 @@ class TestDatabaseManager:
             db_manager.execute_query(
                 "INSERT INTO child_table (parent_id, name) VALUES (?, ?)",
                 (999, "Invalid Child")
-            )
\ No newline at end of file
+            )
+
+    def test_pool_reads_do_not_wait_for_writer(self, db_manager):
+        """Test that readers run while another thread holds the writer"""
+        import threading
+
+        db_manager.execute_query("CREATE TABLE test_pool (id INTEGER PRIMARY KEY, name TEXT)")
+        db_manager.execute_insert("INSERT INTO test_pool (name) VALUES (?)", ("Inicial",))
+
+        db_manager.begin_transaction()
+        try:
+            results = []
+            readers = [
+                threading.Thread(
+                    target=lambda: results.append(db_manager.execute_query("SELECT * FROM test_pool"))
+                )
+                for _ in range(4)
+            ]
+            for reader in readers:
+                reader.start()
+            for reader in readers:
+                reader.join(timeout=5)
+
+            assert len(results) == 4
+        finally:
+            db_manager.commit_transaction()
+
+    def test_pool_stats_in_database_info(self, db_manager):
+        """Test that pool statistics are exposed"""
+        db_manager.execute_query("SELECT 1")
+
+        info = db_manager.get_database_info()
+
+        assert 'pool' in info
+        assert info['pool']['size'] == db_manager.pool_size
+        assert info['pool']['reader_checkouts'] > 0
+        assert info['pool']['readers_in_use'] == 0
+
+    def test_transaction_context_rollback(self, db_manager):
+        """Test that statements inside transaction() are rolled back together"""
+        db_manager.execute_query("CREATE TABLE test_unit (id INTEGER PRIMARY KEY, name TEXT NOT NULL)")
+
+        with pytest.raises(sqlite3.IntegrityError):
+            with db_manager.transaction():
+                db_manager.execute_insert("INSERT INTO test_unit (name) VALUES (?)", ("Uno",))
+                db_manager.execute_insert("INSERT INTO test_unit (name) VALUES (NULL)")
+
+        result = db_manager.execute_single("SELECT COUNT(*) AS total FROM test_unit")
+        assert result['total'] == 0
+        assert not db_manager.in_transaction()
+
+    def test_nested_transaction_uses_savepoint(self, db_manager):
+        """Test that a failing nested unit only reverts its own statements"""
+        db_manager.execute_query("CREATE TABLE test_nested (id INTEGER PRIMARY KEY, name TEXT)")
+
+        with db_manager.transaction():
+            db_manager.execute_insert("INSERT INTO test_nested (name) VALUES (?)", ("Externo",))
+            try:
+                with db_manager.transaction():
+                    db_manager.execute_insert("INSERT INTO test_nested (name) VALUES (?)", ("Interno",))
+                    raise ValueError("fallo interno")
+            except ValueError:
+                pass
+
+        rows = db_manager.execute_query("SELECT name FROM test_nested")
+        assert rows == [{'name': 'Externo'}]
+
+    def test_transaction_not_visible_until_commit(self, db_manager):
+        """Test that inserts inside a unit of work are not committed individually"""
+        import threading
+
+        db_manager.execute_query("CREATE TABLE test_visibility (id INTEGER PRIMARY KEY, name TEXT)")
+
+        with db_manager.transaction():
+            db_manager.execute_insert("INSERT INTO test_visibility (name) VALUES (?)", ("Pendiente",))
+
+            counts = []
+            reader = threading.Thread(target=lambda: counts.append(
+                db_manager.execute_single("SELECT COUNT(*) AS total FROM test_visibility")['total']
+            ))
+            reader.start()
+            reader.join(timeout=5)
+
+            assert counts == [0]
+
+        result = db_manager.execute_single("SELECT COUNT(*) AS total FROM test_visibility")
+        assert result['total'] == 1
+
+    def test_execute_many(self, db_manager):
+        """Test batched inserts in a single statement call"""
+        db_manager.execute_query("CREATE TABLE test_batch (id INTEGER PRIMARY KEY, name TEXT)")
+
+        inserted = db_manager.execute_many(
+            "INSERT INTO test_batch (name) VALUES (?)",
+            [(f"Fila {i}",) for i in range(25)]
+        )
+
+        assert inserted == 25
+        result = db_manager.execute_single("SELECT COUNT(*) AS total FROM test_batch")
+        assert result['total'] == 25
+
+
+class TestSchemaVersionAndMaintenance:
+    """Test suite for startup schema check and background maintenance"""
+
+    def test_schema_version_skips_ddl(self, temp_db):
+        """Test that a current schema is not recreated on startup"""
+        from database.manager import SCHEMA_VERSION
+
+        first = DatabaseManager(temp_db)
+        assert first.get_schema_version() == SCHEMA_VERSION
+        first.close_connection()
+
+        with patch.object(DatabaseManager, '_create_all_tables') as create_tables:
+            second = DatabaseManager(temp_db)
+            create_tables.assert_not_called()
+            assert second.fts_enabled
+            second.close_connection()
+
+    def test_upgrade_adds_sale_cost_column(self, temp_db):
+        """Test that upgrading a legacy sale detail table adds and fills the unit cost"""
+        DatabaseManager(temp_db).close_connection()
+
+        legacy = sqlite3.connect(temp_db)
+        legacy.executescript("""
+            DROP TABLE detalle_ventas;
+            CREATE TABLE detalle_ventas (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                venta_id INTEGER NOT NULL,
+                producto_id INTEGER NOT NULL,
+                cantidad DECIMAL(8,3) NOT NULL,
+                precio_unitario DECIMAL(10,2) NOT NULL,
+                descuento_porcentaje DECIMAL(5,2) DEFAULT 0,
+                subtotal DECIMAL(10,2) NOT NULL
+            );
+            INSERT INTO productos (id, codigo_barras, codigo_interno, nombre, precio_compra, precio_venta)
+            VALUES (1, '7790001', 'YER001', 'Yerba 1kg', 60.0, 100.0);
+            INSERT INTO detalle_ventas (venta_id, producto_id, cantidad, precio_unitario, subtotal)
+            VALUES (1, 1, 2, 100.0, 200.0);
+            PRAGMA user_version = 6;
+        """)
+        legacy.close()
+
+        from database.manager import SCHEMA_VERSION
+
+        upgraded = DatabaseManager(temp_db)
+        try:
+            assert upgraded.get_schema_version() == SCHEMA_VERSION
+            assert upgraded.execute_single("SELECT costo_unitario FROM detalle_ventas")['costo_unitario'] == 60.0
+        finally:
+            upgraded.close_connection()
+
+    def test_maintenance_thresholds(self, db_manager):
+        """Test that ANALYZE runs only after the change threshold"""
+        maintenance = db_manager.maintenance
+        maintenance.analyze_threshold = 100
+        maintenance.run(force=True)
+
+        db_manager.execute_many(
+            "INSERT INTO categorias (nombre) VALUES (?)", [(f"Cat {i}",) for i in range(50)]
+        )
+        status = maintenance.get_status()
+        assert status['pending_changes'] == 50
+        assert not status['needs_analyze']
+        assert maintenance.run() == {}
+
+        db_manager.execute_update("DELETE FROM categorias WHERE nombre LIKE 'Cat %'")
+        executed = maintenance.run()
+        assert 'analyze_ms' in executed and 'vacuum_ms' not in executed
+        assert maintenance.get_status()['pending_changes'] == 0
+
+
+class TestQueryStats:
+    """Test suite for opt-in query instrumentation"""
+
+    def test_disabled_by_default(self, db_manager):
+        """Test that nothing is recorded unless enabled"""
+        db_manager.execute_query("SELECT * FROM categorias")
+        assert db_manager.query_stats.get_report() == []
+
+    @pytest.fixture(autouse=True)
+    def slow_log(self, db_manager, tmp_path):
+        """Keep the slow-query log out of the working directory"""
+        db_manager.query_stats.slow_log_path = str(tmp_path / 'slow_queries.log')
+        yield tmp_path / 'slow_queries.log'
+        db_manager.query_stats.disable()
+
+    def test_normalized_statements(self, db_manager):
+        """Test that literals and parameter lists are grouped"""
+        from database.query_stats import normalize_statement
+
+        assert normalize_statement("SELECT *  FROM t1 WHERE id IN (?, ?, ?) AND x = 'a''b' AND y = 10") == \
+            "SELECT * FROM t1 WHERE id IN (...) AND x = ? AND y = ?"
+
+        db_manager.query_stats.enable()
+        for category_id in range(5):
+            db_manager.execute_single(f"SELECT * FROM categorias WHERE id = {category_id}")
+        db_manager.execute_many("INSERT INTO categorias (nombre) VALUES (?)", [("A",), ("B",)])
+
+        report = {item['statement']: item for item in db_manager.query_stats.get_report()}
+        select = report["SELECT * FROM categorias WHERE id = ?"]
+        assert select['calls'] == 5
+        assert select['p95_ms'] <= select['max_ms']
+        assert report["INSERT INTO categorias (nombre) VALUES (?)"]['rows'] == 2
+
+    def test_slow_query_plan(self, db_manager, tmp_path, slow_log):
+        """Test that slow statements get their query plan and can be dumped"""
+        stats = db_manager.query_stats
+        stats.enable(slow_threshold_ms=0)
+        db_manager.execute_query("SELECT * FROM productos WHERE codigo_barras = ?", ("123",))
+
+        item = stats.get_report()[0]
+        assert item['slow_calls'] == 1
+        assert 'idx_productos_codigo_barras' in item['plan'] or 'sqlite_autoindex' in item['plan']
+        assert stats.dump(tmp_path / 'stats.json')
+        assert 'productos' in stats.format_report()
+        assert 'Consulta lenta' in slow_log.read_text(encoding='utf-8')
+
+
+class TestStreamingQueries:
+    """Test suite for iter_query / iter_batches"""
+
+    @pytest.fixture
+    def categories(self, db_manager):
+        db_manager.execute_many(
+            "INSERT INTO categorias (nombre) VALUES (?)", [(f"Stream {i:03d}",) for i in range(25)]
+        )
+        return db_manager
+
+    def test_batches_and_row_types(self, categories):
+        """Test fixed-size batches and the supported row types"""
+        query = "SELECT id, nombre FROM categorias WHERE nombre LIKE 'Stream%' ORDER BY nombre"
+
+        sizes = [len(batch) for batch in categories.iter_batches(query, batch_size=10)]
+        assert sizes == [10, 10, 5]
+
+        rows = list(categories.iter_query(query, row_type='tuple'))
+        assert rows[0][1] == "Stream 000" and isinstance(rows[0], tuple)
+
+        row = next(categories.iter_query(query, row_type='row'))
+        assert row['nombre'] == "Stream 000"
+        assert list(categories.iter_query(query))[-1]['nombre'] == "Stream 024"
+
+        with pytest.raises(ValueError):
+            list(categories.iter_query(query, row_type='json'))
+
+    def test_early_close_returns_connection(self, categories):
+        """Test that abandoning the iterator releases the reader connection"""
+        iterator = categories.iter_query("SELECT * FROM categorias", batch_size=5)
+        next(iterator)
+        iterator.close()
+
+        assert categories.pool.get_stats()['readers_in_use'] == 0
+        assert categories.execute_single("SELECT COUNT(*) AS n FROM categorias")['n'] >= 25
@@ -0,0 +1,72 @@
+"""
+Unit tests for sargable date range predicates
+"""
+
+from datetime import date, datetime
+
+import pytest
+from database.date_ranges import date_range, day_bounds
+from managers.sales_manager import SalesManager
+
+
+@pytest.fixture
+def sales_db(db_manager):
+    """Database with sales around a month boundary"""
+    db_manager.execute_update("""
+        INSERT INTO usuarios (id, username, password_hash, nombre_completo)
+        VALUES (1, 'cajero', 'x', 'Cajero Prueba')
+    """)
+    db_manager.execute_many("""
+        INSERT INTO ventas (numero_factura, usuario_id, subtotal, total, estado, fecha_venta)
+        VALUES (?, 1, ?, ?, ?, ?)
+    """, [
+        ("F-1", 100.0, 100.0, 'COMPLETADA', '2024-04-30 23:59:59'),
+        ("F-2", 200.0, 200.0, 'COMPLETADA', '2024-05-01 00:00:00'),
+        ("F-3", 300.0, 300.0, 'COMPLETADA', '2024-05-31 23:59:59'),
+        ("F-4", 400.0, 400.0, 'CANCELADA', '2024-05-15 12:00:00'),
+        ("F-5", 500.0, 500.0, 'COMPLETADA', '2024-06-01 00:00:00'),
+    ])
+    return db_manager
+
+
+class TestDateRanges:
+    """Test suite for half-open date range helpers"""
+
+    def test_bounds_are_half_open(self):
+        """Test that the end day is included through the next day's bound"""
+        assert day_bounds(date(2024, 5, 1), date(2024, 5, 31)) == ('2024-05-01', '2024-06-01')
+        assert day_bounds('2024-12-31 10:00:00', datetime(2024, 12, 31, 18)) == ('2024-12-31', '2025-01-01')
+
+    def test_open_ended_ranges(self):
+        """Test predicates with a missing bound"""
+        assert date_range('v.fecha_venta', '2024-05-01') == ("v.fecha_venta >= ?", ['2024-05-01'])
+        assert date_range('fecha', end='2024-05-01') == ("fecha < ?", ['2024-05-02'])
+        assert date_range('fecha') == ("1 = 1", [])
+
+    def test_range_matches_date_function(self, sales_db):
+        """Test that results equal the DATE(...) BETWEEN version"""
+        sql, params = date_range('fecha_venta', '2024-05-01', '2024-05-31')
+        ranged = sales_db.execute_query(f"SELECT numero_factura FROM ventas WHERE {sql} ORDER BY id", params)
+        legacy = sales_db.execute_query(
+            "SELECT numero_factura FROM ventas WHERE DATE(fecha_venta) BETWEEN ? AND ? ORDER BY id",
+            ('2024-05-01', '2024-05-31'))
+
+        assert [row['numero_factura'] for row in ranged] == ['F-2', 'F-3', 'F-4']
+        assert ranged == legacy
+
+    def test_range_uses_index(self, sales_db):
+        """Test that the predicate is resolved with an index instead of a scan"""
+        sql, params = date_range('fecha_venta', '2024-05-01', '2024-05-31')
+        plan = sales_db.execute_query(
+            f"EXPLAIN QUERY PLAN SELECT SUM(total) FROM ventas WHERE estado = 'COMPLETADA' AND {sql}", params)
+        detail = ' '.join(row['detail'] for row in plan)
+
+        assert 'COVERING INDEX idx_ventas_estado_fecha' in detail
+
+    def test_sales_manager_includes_last_second(self, sales_db):
+        """Test that sales at 23:59:59 belong to their day"""
+        sales_manager = SalesManager(sales_db, None)
+        in_may = sales_manager.get_sales_by_date_range(date(2024, 5, 1), date(2024, 5, 31))
+
+        assert sorted(sale['numero_factura'] for sale in in_may) == ['F-2', 'F-3', 'F-4']
+        assert [sale['numero_factura'] for sale in sales_manager.get_sales_by_date(date(2024, 4, 30))] == ['F-1']
@@ -0,0 +1,96 @@
+"""
+Unit tests for the streaming file exporters
+"""
+
+import csv
+import threading
+
+import pytest
+from utils.exporters import CSVExporter, ExcelExporter, PDFExporter, split_rows
+
+
+def product_rows(count):
+    """Generator of product-like rows, never materialized as a list"""
+    for i in range(count):
+        yield {'id': i, 'nombre': f"Producto {i}", 'precio_venta': i * 1.5, 'stock_actual': i % 7}
+
+
+class TestStreamingExporters:
+    """Test suite for exporters fed with generators"""
+
+    def test_split_rows_keeps_first_row(self):
+        """Test that headers come from the first row without consuming it"""
+        headers, rows = split_rows(product_rows(3))
+        assert headers == ['id', 'nombre', 'precio_venta', 'stock_actual']
+        assert [row['id'] for row in rows] == [0, 1, 2]
+
+        assert split_rows(iter(()), ['a']) == (['a'], None)
+
+    def test_csv_from_generator_matches_list(self, tmp_path):
+        """Test that a streamed CSV is identical to one written from a list"""
+        streamed, listed = tmp_path / 'streamed.csv', tmp_path / 'listed.csv'
+        assert CSVExporter.export_data(product_rows(2500), str(streamed), chunk_size=100)
+        assert CSVExporter.export_data(list(product_rows(2500)), str(listed))
+
+        assert streamed.read_bytes() == listed.read_bytes()
+        with open(streamed, newline='', encoding='utf-8') as handle:
+            rows = list(csv.reader(handle))
+        assert rows[0] == ['id', 'nombre', 'precio_venta', 'stock_actual']
+        assert rows[2] == ['1.00', 'Producto 1', '$1.50', '1.00']
+        assert len(rows) == 2501
+
+    def test_excel_write_only(self, tmp_path):
+        """Test the constant-memory workbook layout"""
+        openpyxl = pytest.importorskip('openpyxl')
+        path = tmp_path / 'productos.xlsx'
+        assert ExcelExporter().export_data(product_rows(500), str(path), title="Productos")
+
+        sheet = openpyxl.load_workbook(path).active
+        assert sheet['A1'].value == "Productos"
+        assert [cell.value for cell in sheet[3]] == ['id', 'nombre', 'precio_venta', 'stock_actual']
+        assert sheet['A3'].font.b
+        assert sheet.max_row == 503
+        assert sheet.column_dimensions['B'].width > 10
+
+    def test_pdf_paginates_incrementally(self, tmp_path):
+        """Test that long exports produce one page per chunk of rows"""
+        pytest.importorskip('reportlab')
+        path = tmp_path / 'productos.pdf'
+        assert PDFExporter().export_data(product_rows(1000), str(path), title="Productos")
+        assert path.read_bytes().count(b'/Type /Page\n') > 15
+
+    def test_job_export_streams_and_cancels(self, db_manager, tmp_path, monkeypatch):
+        """Test streamed exports through the report queue, including cancellation"""
+        from managers.report_job_manager import ReportJobManager, COMPLETADO, CANCELADO
+        from managers.report_manager import ReportManager
+
+        monkeypatch.chdir(tmp_path)
+        report_jobs = ReportJobManager(ReportManager(db_manager), max_workers=1)
+        report_jobs.progress_every = 100
+        try:
+            job = report_jobs.submit('FILAS', function=lambda: product_rows(1000),
+                                     export={'path': str(tmp_path / 'ok.csv'), 'format': 'csv'})
+            job.wait(5)
+            assert job.status == COMPLETADO
+            assert job.rows_exported == 1000 and job.result is None
+            assert report_jobs.get_cached('FILAS') is None
+
+            halfway, release = threading.Event(), threading.Event()
+
+            def blocking_rows():
+                for row in product_rows(1000):
+                    if row['id'] == 150:
+                        halfway.set()
+                        release.wait(5)
+                    yield row
+
+            job = report_jobs.submit('FILAS', function=blocking_rows,
+                                     export={'path': str(tmp_path / 'cancelado.csv'), 'format': 'csv'})
+            assert halfway.wait(5)
+            report_jobs.cancel(job.id)
+            release.set()
+            job.wait(5)
+            assert job.status == CANCELADO
+            assert not (tmp_path / 'cancelado.csv').exists()
+        finally:
+            report_jobs.shutdown()
@@ -0,0 +1,104 @@
+"""
+Unit tests for InvoiceSequenceManager
+"""
+
+import threading
+import time
+
+import pytest
+from database.manager import DatabaseManager
+from managers.invoice_sequence_manager import InvoiceSequenceManager
+
+
+class TestInvoiceSequenceManager:
+    """Test suite for invoice numbering"""
+
+    def test_sequential_numbers_per_point_of_sale_and_type(self, db_manager):
+        """Test that each (punto_venta, tipo) pair has its own counter"""
+        sequences = InvoiceSequenceManager(db_manager, block_size=10)
+
+        assert sequences.next_number('TICKET', 1) == 1
+        assert sequences.next_number('TICKET', 1) == 2
+        assert sequences.next_number('TICKET', 2) == 1
+        assert sequences.next_number('FACTURA_B', 1) == 1
+        assert sequences.next_invoice_number('TICKET', 1) == 'TICKET-0001-00000003'
+
+    def test_blocks_do_not_overlap_between_terminals(self, db_manager):
+        """Test that two terminals reserve disjoint blocks"""
+        caja_1 = InvoiceSequenceManager(db_manager, block_size=5)
+        caja_2 = InvoiceSequenceManager(db_manager, block_size=5)
+
+        first = [caja_1.next_number('TICKET', 1) for _ in range(3)]
+        second = [caja_2.next_number('TICKET', 1) for _ in range(3)]
+
+        assert first == [1, 2, 3]
+        assert second == [6, 7, 8]
+        assert sequences_last(db_manager) == 10
+
+    def test_number_inside_rolled_back_transaction_is_reused(self, db_manager):
+        """Test that a number taken inside a failed unit of work is not lost"""
+        sequences = InvoiceSequenceManager(db_manager, block_size=1)
+
+        with pytest.raises(ValueError):
+            with db_manager.transaction():
+                assert sequences.next_number('TICKET', 1) == 1
+                raise ValueError("venta cancelada")
+
+        assert sequences.next_number('TICKET', 1) == 1
+
+    def test_ensure_sequence_seeds_initial_value(self, db_manager):
+        """Test seeding a counter from existing numbering"""
+        sequences = InvoiceSequenceManager(db_manager, block_size=1)
+
+        assert sequences.ensure_sequence('FE_B', 1, 120) is True
+        assert sequences.ensure_sequence('FE_B', 1, 5) is False
+        assert sequences.next_number('FE_B', 1) == 121
+
+    @pytest.mark.slow
+    def test_concurrent_terminals_generate_unique_numbers(self, db_manager, temp_db):
+        """Stress test: several terminals and processes numbering concurrently"""
+        second_process = DatabaseManager(temp_db)
+        terminals = [
+            InvoiceSequenceManager(db_manager, block_size=20),
+            InvoiceSequenceManager(db_manager, block_size=20),
+            InvoiceSequenceManager(db_manager, block_size=1),
+            InvoiceSequenceManager(second_process, block_size=20),
+            InvoiceSequenceManager(second_process, block_size=1),
+        ]
+        per_thread = 200
+        threads_per_terminal = 2
+        numbers = []
+        numbers_lock = threading.Lock()
+
+        def worker(terminal):
+            local = [terminal.next_invoice_number('TICKET', 1) for _ in range(per_thread)]
+            with numbers_lock:
+                numbers.extend(local)
+
+        threads = [
+            threading.Thread(target=worker, args=(terminal,))
+            for terminal in terminals
+            for _ in range(threads_per_terminal)
+        ]
+
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=60)
+        elapsed = time.perf_counter() - start
+
+        try:
+            expected = len(terminals) * threads_per_terminal * per_thread
+            assert len(numbers) == expected
+            assert len(set(numbers)) == expected
+            assert expected / elapsed > 200  # cientos de ventas por segundo
+        finally:
+            second_process.close_connection()
+
+
+def sequences_last(db_manager):
+    result = db_manager.execute_single(
+        "SELECT ultimo_numero FROM secuencias_comprobantes WHERE punto_venta = 1 AND tipo_comprobante = 'TICKET'"
+    )
+    return result['ultimo_numero']
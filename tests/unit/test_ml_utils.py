@@ -0,0 +1,158 @@
+"""
+Unit tests for the vectorized analytics utilities
+"""
+
+import random
+
+import pytest
+from utils import ml_utils
+from utils.ml_utils import (DataPreprocessor, FeatureEngineer, KMeans, ModelEvaluator, SimpleMLModels,
+                            calculate_confidence_interval, detect_anomalies, smooth_time_series)
+
+
+@pytest.fixture
+def values():
+    """Series long enough to take the vectorized path, with a few spikes"""
+    rng = random.Random(7)
+    series = [100 + i * 0.5 + rng.gauss(0, 10) for i in range(1000)]
+    for index in (10, 500, 900):
+        series[index] *= 6
+    return series
+
+
+def both_paths(monkeypatch, function):
+    """Run ``function`` in pure Python and, when NumPy is installed, vectorized"""
+    vectorized = function() if ml_utils.NUMPY_AVAILABLE else None
+    monkeypatch.setattr(ml_utils, 'NUMPY_AVAILABLE', False)
+    pure = function()
+    monkeypatch.undo()
+    return pure, vectorized if vectorized is not None else pure
+
+
+class TestVectorizedMlUtils:
+    """Test suite for the NumPy and pure-Python implementations"""
+
+    def test_preprocessing_matches(self, values, monkeypatch):
+        """Test normalization and outlier handling in both implementations"""
+        for method in ('min_max', 'z_score'):
+            pure, vectorized = both_paths(monkeypatch, lambda: DataPreprocessor.normalize_values(values, method))
+            assert vectorized == pytest.approx(pure)
+
+        pure, vectorized = both_paths(monkeypatch, lambda: DataPreprocessor.handle_outliers(values, 'iqr'))
+        assert vectorized == pytest.approx(pure)
+        assert max(vectorized) < max(values)
+
+        pure, vectorized = both_paths(monkeypatch, lambda: DataPreprocessor.handle_outliers(values, 'z_score', 3.0))
+        assert vectorized == pytest.approx(pure)
+        assert len(vectorized) == len(values) - 2
+
+    def test_series_functions_match(self, values, monkeypatch):
+        """Test slope, anomalies, smoothing and confidence intervals"""
+        pure, vectorized = both_paths(monkeypatch, lambda: FeatureEngineer._calculate_trend_slope(values))
+        assert vectorized == pytest.approx(pure)
+
+        pure, vectorized = both_paths(monkeypatch, lambda: detect_anomalies(values, 3.0))
+        assert vectorized == pure
+        assert [index for index, flag in enumerate(vectorized) if flag] == [500, 900]
+
+        for window in (3, 4, 7):
+            pure, vectorized = both_paths(monkeypatch, lambda: smooth_time_series(values, window))
+            assert vectorized == pytest.approx(pure)
+
+        pure, vectorized = both_paths(monkeypatch, lambda: calculate_confidence_interval(values))
+        assert vectorized == pytest.approx(pure)
+
+    def test_model_metrics_match(self, values, monkeypatch):
+        """Test regression and classification metrics"""
+        actuals = [value * 0.9 + 5 for value in values]
+        pure, vectorized = both_paths(
+            monkeypatch, lambda: ModelEvaluator.calculate_model_metrics(values, actuals, 'regression'))
+        assert vectorized == pytest.approx(pure)
+
+        probabilities = [(value % 100) / 100 for value in values]
+        labels = [float(index % 3 == 0) for index in range(len(values))]
+        pure, vectorized = both_paths(
+            monkeypatch, lambda: ModelEvaluator.calculate_model_metrics(probabilities, labels, 'classification'))
+        assert vectorized == pytest.approx(pure)
+        assert set(vectorized) == {'accuracy', 'precision', 'recall', 'f1'}
+
+    def test_small_inputs_keep_semantics(self):
+        """Test edge cases shared by both implementations"""
+        assert DataPreprocessor.normalize_values([]) == []
+        assert DataPreprocessor.normalize_values([3, 3, 3]) == [0.5, 0.5, 0.5]
+        assert FeatureEngineer._calculate_trend_slope([1, 3, 5, 7]) == 2.0
+        assert DataPreprocessor.create_lag_features([1, 2, 3], [1]) == {'lag_1': [None, 1, 2]}
+        assert smooth_time_series([1.0, 2.0], 3) == [1.0, 2.0]
+        assert calculate_confidence_interval([5.0]) == (0.0, 0.0)
+
+    def test_numpy_arrays_accepted(self):
+        """Test that arrays are taken as input and plain Python values come out"""
+        np = pytest.importorskip('numpy')
+        array = np.arange(10, dtype=float)
+
+        assert DataPreprocessor.normalize_values(array)[-1] == 1.0
+        assert FeatureEngineer._calculate_trend_slope(array) == pytest.approx(1.0)
+        assert DataPreprocessor.create_lag_features(array, [2])['lag_2'][:3] == [None, None, 0.0]
+        assert type(detect_anomalies(array)[0]) is bool
+
+
+@pytest.fixture
+def blobs():
+    """Four well separated groups on very different feature scales"""
+    rng = random.Random(3)
+    centers = [(0, 0, 0), (10, 100, 1000), (50, 5, 300), (90, 60, 20)]
+    return [[x + rng.gauss(0, 3), y + rng.gauss(0, 10), z + rng.gauss(0, 50)]
+            for x, y, z in centers for _ in range(100)]
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def implementation(request, monkeypatch):
+    """Run a test against each available implementation"""
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(ml_utils, 'NUMPY_AVAILABLE', False)
+    return request.param
+
+
+class TestKMeans:
+    """Test suite for the k-means segmentation engine"""
+
+    def test_recovers_scaled_groups(self, blobs, implementation):
+        """Test that standardized k-means++ finds groups on mixed scales"""
+        model = KMeans(k=4).fit(blobs)
+        assert model.converged
+        assert sorted(model.summary()['sizes']) == [100, 100, 100, 100]
+        # Each true group ends up in a single cluster
+        assert all(len(set(model.labels[i:i + 100])) == 1 for i in range(0, 400, 100))
+        assert model.silhouette(blobs) > 0.7
+        assert model.predict([[88, 61, 25]]) == [model.labels[300]]
+
+    def test_deterministic_seed(self, blobs, implementation):
+        """Test that the same seed gives the same segmentation"""
+        first = KMeans(k=3, seed=5).fit(blobs)
+        second = KMeans(k=3, seed=5).fit(blobs)
+        assert first.labels == second.labels
+        assert first.inertia == second.inertia
+
+    def test_mini_batch(self, blobs, implementation):
+        """Test that mini-batch mode reaches a comparable solution"""
+        full = KMeans(k=4).fit(blobs)
+        mini = KMeans(k=4, mini_batch=True, batch_size=64).fit(blobs)
+        assert mini.inertia <= full.inertia * 1.5
+        assert sorted(mini.summary()['sizes']) == [100, 100, 100, 100]
+
+    def test_elbow_suggests_k(self, blobs):
+        """Test the elbow helper on data with four groups"""
+        rows = KMeans.elbow(blobs, range(2, 8))
+        assert [row['k'] for row in rows] == list(range(2, 8))
+        assert KMeans.suggest_k(rows) == 4
+        assert max(rows, key=lambda row: row['silhouette'])['k'] == 4
+
+    def test_segmentation_wrapper(self):
+        """Test the legacy SimpleMLModels entry point"""
+        customers = [{'recency': 0.1 * (i % 2), 'frequency': i % 2, 'monetary': 0.5} for i in range(20)]
+        labels = SimpleMLModels.k_means_segmentation(customers, k=2)
+        assert len(set(labels)) == 2
+        assert labels[0::2] == [labels[0]] * 10
+        assert SimpleMLModels.k_means_segmentation(customers[:1], k=2) == [0]
@@ -0,0 +1,108 @@
+"""
+Unit tests for compiled, cached permission resolution
+"""
+
+import pytest
+
+from database.change_events import ANY_TABLE
+from managers.permission_resolver import PermissionSet, compile_permissions, user_permissions
+from managers.user_manager import UserManager
+
+
+class QueryCounter:
+    """Count the single-row queries a database manager runs"""
+
+    def __init__(self, db, monkeypatch):
+        self.count = 0
+        original = db.execute_single
+
+        def execute_single(*args, **kwargs):
+            self.count += 1
+            return original(*args, **kwargs)
+        monkeypatch.setattr(db, 'execute_single', execute_single)
+
+
+@pytest.fixture
+def users(db_manager):
+    """UserManager with a cashier on the VENDEDOR role"""
+    manager = UserManager(db_manager)
+    roles = {role['nombre']: role['id'] for role in manager.get_all_roles()}
+    success, message, user_id = manager.create_user({
+        'username': 'cajero', 'password': 'secreto1', 'nombre_completo': 'Cajero Prueba',
+        'rol_id': roles['VENDEDOR']
+    }, 1)
+    assert success, message
+    return manager, roles, user_id
+
+
+class TestPermissionResolver:
+    """Test suite for PermissionSet and PermissionResolver"""
+
+    def test_wildcard_and_hierarchy(self):
+        """Test that '*' grants everything and a parent grants its children only"""
+        permissions = compile_permissions(' ventas, productos_* ,clientes_consulta,,')
+        assert permissions.permissions == frozenset({'ventas', 'productos', 'clientes_consulta'})
+
+        assert permissions.allows('ventas') and 'ventas_anular' in permissions
+        assert permissions.allows('productos_consulta') and permissions.allows('productos.editar')
+        assert not permissions.allows('clientes')
+        assert not permissions.allows('ventasx') and not permissions.allows('compras')
+
+        assert compile_permissions(['*']).allows('usuarios_admin')
+        assert not compile_permissions('') and not compile_permissions(None).allows('ventas')
+        assert compile_permissions('ventas,compras') is compile_permissions('ventas,compras')
+        assert isinstance(compile_permissions(('ventas',)), PermissionSet)
+
+    def test_checks_are_cached_per_user(self, users, monkeypatch):
+        """Test that repeated checks do not query the database again"""
+        manager, _, user_id = users
+        queries = QueryCounter(manager.db, monkeypatch)
+
+        assert manager.user_has_permission(user_id, 'ventas')
+        assert manager.user_has_permission(user_id, 'productos_consulta')
+        for _ in range(50):
+            assert not manager.user_has_permission(user_id, 'compras')
+        assert queries.count == 1
+
+        assert not manager.user_has_permission(9999, 'ventas')
+
+    def test_update_user_and_create_role_invalidate(self, users):
+        """Test that role, status and role-definition changes take effect immediately"""
+        manager, roles, user_id = users
+        assert not manager.user_has_permission(user_id, 'stock')
+
+        success, _ = manager.update_user(user_id, {'rol_id': roles['DEPOSITO']}, 1)
+        assert success
+        assert manager.user_has_permission(user_id, 'stock')
+        assert not manager.user_has_permission(user_id, 'ventas')
+
+        success, _, role_id = manager.create_role({'nombre': 'AUDITOR', 'permisos': ['reportes_*']}, 1)
+        assert success
+        assert manager.permissions.role_permissions(role_id).allows('reportes_ventas')
+
+        success, _ = manager.deactivate_user(user_id, 1)
+        assert success
+        assert not manager.user_has_permission(user_id, 'stock')
+
+    def test_external_changes_invalidate(self, users):
+        """Test that a change from another terminal drops the cached permissions"""
+        manager, roles, user_id = users
+        assert manager.user_has_permission(user_id, 'ventas')
+
+        manager.db.execute_update("UPDATE usuarios SET rol_id = ? WHERE id = ?", (roles['DEPOSITO'], user_id))
+        assert manager.user_has_permission(user_id, 'ventas')  # todavía en caché
+
+        manager.db.changes.publish(ANY_TABLE, source='externo')
+        assert not manager.user_has_permission(user_id, 'ventas')
+
+    def test_session_permissions(self, users):
+        """Test that the UI follows the resolver and falls back to the login permissions"""
+        manager, roles, user_id = users
+        session = {'id': user_id, 'permisos': ['ventas']}
+
+        assert user_permissions(session, manager.permissions).allows('clientes_consulta')
+        manager.update_user(user_id, {'rol_id': roles['GERENTE']}, 1)
+        assert user_permissions(session, manager.permissions).allows('compras')
+
+        assert user_permissions({'permisos': 'ventas, reportes'}).allows('reportes')
+        assert not user_permissions({'id': 9999, 'permisos': ''}, manager.permissions).allows('ventas')
@@ -0,0 +1,67 @@
+"""
+Unit tests for ProductCache
+"""
+
+import pytest
+from managers.product_cache import ProductCache
+
+
+@pytest.fixture
+def catalog(db_manager):
+    """Insert a small catalog"""
+    db_manager.execute_many("""
+        INSERT INTO productos (codigo_barras, codigo_interno, nombre, precio_venta, stock_actual, activo)
+        VALUES (?, ?, ?, ?, ?, 1)
+    """, [(f"779{i:010d}", f"PRD{i:06d}", f"Producto {i}", 100.0 + i, 10) for i in range(50)])
+    return db_manager
+
+
+class TestProductCache:
+    """Test suite for the POS product cache"""
+
+    def test_lookup_by_all_keys(self, catalog):
+        """Test lookups by id, barcode and internal code"""
+        cache = ProductCache(catalog)
+        cache.warm()
+
+        by_barcode = cache.get_by_barcode("7790000000007")
+        assert by_barcode['nombre'] == "Producto 7"
+        assert cache.get_by_internal_code("PRD000007")['id'] == by_barcode['id']
+        assert cache.get_by_id(by_barcode['id'])['codigo_barras'] == "7790000000007"
+        assert cache.get_stats()['misses'] == 0
+
+    def test_returns_copies(self, catalog):
+        """Test that callers cannot mutate cached rows"""
+        cache = ProductCache(catalog)
+        cache.warm()
+
+        product = cache.get_by_barcode("7790000000001")
+        product['nombre'] = "Modificado"
+
+        assert cache.get_by_barcode("7790000000001")['nombre'] == "Producto 1"
+
+    def test_invalidate_reloads_from_database(self, catalog):
+        """Test in-process invalidation after a stock change"""
+        cache = ProductCache(catalog, refresh_interval=3600)
+        cache.warm()
+        product = cache.get_by_barcode("7790000000003")
+
+        catalog.execute_update("UPDATE productos SET stock_actual = 4 WHERE id = ?", (product['id'],))
+        cache.invalidate([product['id']])
+
+        assert cache.get_by_barcode("7790000000003")['stock_actual'] == 4
+
+    def test_refresh_picks_up_changes_from_other_connections(self, catalog):
+        """Test incremental refresh by actualizado_en"""
+        cache = ProductCache(catalog, refresh_interval=3600)
+        cache.warm()
+
+        catalog.execute_update("""
+            UPDATE productos SET codigo_barras = '9999999999999', actualizado_en = '2999-01-01 00:00:00'
+            WHERE codigo_interno = 'PRD000010'
+        """)
+        cache.refresh()
+
+        assert cache.get_by_barcode("9999999999999")['codigo_interno'] == "PRD000010"
+        assert cache.get_by_barcode("7790000000010") is None or \
+            cache.get_by_barcode("7790000000010")['codigo_interno'] != "PRD000010"
@@ -0,0 +1,72 @@
+"""
+Unit tests for full-text product search
+"""
+
+import pytest
+from managers.product_manager import ProductManager
+
+
+@pytest.fixture
+def product_manager(db_manager):
+    """ProductManager with a small catalog"""
+    db_manager.execute_many("""
+        INSERT INTO productos (codigo_barras, codigo_interno, nombre, descripcion, precio_venta, activo)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, [
+        ("7790001000011", "AZU001", "Azúcar Ledesma 1kg", "Azúcar blanca", 950.0, 1),
+        ("7790001000028", "YER001", "Yerba Mate Playadito 500g", None, 2100.0, 1),
+        ("7790001000035", "COC001", "Coca-Cola 2.25L", "Gaseosa cola", 2500.0, 1),
+        ("7790001000042", "COC002", "Coca-Cola Zero 1.5L", "Gaseosa cola sin azúcar", 1900.0, 1),
+        ("7790001000059", "ACE001", "Aceite Girasol Cocinero", None, 3100.0, 0),
+    ])
+    return ProductManager(db_manager)
+
+
+class TestProductSearch:
+    """Test suite for FTS5 product search"""
+
+    def test_index_available(self, db_manager):
+        """Test that the FTS index is created with the schema"""
+        assert db_manager.fts_enabled
+
+    def test_accent_insensitive_prefix(self, product_manager):
+        """Test prefix search without accents finds accented names"""
+        results = product_manager.search_products("azuc")
+        names = [product['nombre'] for product in results]
+
+        assert names[0] == "Azúcar Ledesma 1kg"
+        # También coincide por descripción, pero con menor peso que el nombre
+        assert "Coca-Cola Zero 1.5L" in names
+
+    def test_multiple_words_and_inactive(self, product_manager):
+        """Test that every word must match and inactive products are excluded"""
+        names = [product['nombre'] for product in product_manager.search_products("coca zer")]
+        assert names == ["Coca-Cola Zero 1.5L"]
+
+        assert product_manager.search_products("aceite") == []
+
+    def test_exact_barcode_first(self, product_manager):
+        """Test exact barcode matches are ranked first"""
+        results = product_manager.search_products("7790001000042")
+        assert results[0]['codigo_interno'] == "COC002"
+
+        assert len(product_manager.search_products("779000100")) == 4
+
+    def test_index_follows_updates(self, product_manager, db_manager):
+        """Test triggers keep the index in sync"""
+        product = product_manager.search_products("playadito")[0]
+        db_manager.execute_update("UPDATE productos SET nombre = ? WHERE id = ?",
+                                  ("Yerba Mate Taragüí 500g", product['id']))
+
+        assert product_manager.search_products("playadito") == []
+        assert product_manager.search_products("tarag")[0]['id'] == product['id']
+
+        db_manager.execute_update("DELETE FROM productos WHERE id = ?", (product['id'],))
+        assert product_manager.search_products("tarag") == []
+
+    def test_special_characters(self, product_manager):
+        """Test FTS syntax characters in user input do not raise"""
+        assert product_manager.search_products('coca "') != []
+        # Sin palabras indexables se usa LIKE
+        assert len(product_manager.search_products("-")) == 2
+        assert product_manager._build_match_expression('cola AND "x') == '"cola"* "AND"* """x"*'
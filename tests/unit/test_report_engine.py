@@ -0,0 +1,115 @@
+"""
+Unit tests for the single-pass report engine
+"""
+
+from datetime import date
+
+import pytest
+from managers.report_engine import ReportEngine
+from managers.report_manager import ReportManager
+from managers.sales_rollup_manager import SalesRollupManager
+from tests.unit.test_sales_rollups import insert_sale
+
+
+@pytest.fixture
+def report_db(db_manager):
+    """Database with sales spread over two hours of one day"""
+    db_manager.execute_update("""
+        INSERT INTO usuarios (id, username, password_hash, nombre_completo)
+        VALUES (1, 'cajero', 'x', 'Cajero Prueba')
+    """)
+    db_manager.execute_many("""
+        INSERT INTO productos (id, codigo_barras, codigo_interno, nombre, precio_compra, precio_venta,
+                               stock_actual, stock_minimo, activo)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1)
+    """, [(1, '7790001', 'YER001', 'Yerba 1kg', 60.0, 100.0, 100, 5),
+          (2, '7790002', 'AZU001', 'Azúcar 1kg', 30.0, 50.0, 2, 5),
+          (3, '7790003', 'ARR001', 'Arroz 1kg', 20.0, 40.0, 0, 0)])
+
+    insert_sale(db_manager, 'F-1', '2024-05-02', [(1, 2, 100.0)], [('EFECTIVO', 200.0)])
+    insert_sale(db_manager, 'F-2', '2024-05-02', [(2, 4, 50.0)], [('TARJETA_DEBITO', 200.0)])
+    insert_sale(db_manager, 'F-3', '2024-05-02', [(2, 1, 50.0)], [('EFECTIVO', 50.0)], estado='CANCELADA')
+    insert_sale(db_manager, 'F-4', '2024-05-03', [(1, 1, 100.0)], [('EFECTIVO', 100.0)])
+    db_manager.execute_update("UPDATE ventas SET fecha_venta = '2024-05-02 18:05:00' WHERE numero_factura = 'F-2'")
+    return db_manager
+
+
+@pytest.fixture
+def counted(report_db, tmp_path):
+    """Query statistics enabled with the slow-query log kept out of the tree"""
+    report_db.query_stats.slow_log_path = str(tmp_path / 'slow_queries.log')
+    report_db.query_stats.enable()
+    report_db.query_stats.reset()
+    yield report_db.query_stats
+    report_db.query_stats.disable()
+
+
+def statement_calls(stats):
+    """SELECT statements run, ignoring the one-off schema introspection"""
+    return sum(item['calls'] for item in stats.get_report(limit=0)
+               if not item['statement'].upper().startswith('PRAGMA'))
+
+
+class TestReportEngine:
+    """Test suite for ReportEngine"""
+
+    def test_plan_groups_metrics_by_source(self, report_db):
+        """Test that metrics over the same table share one load"""
+        engine = ReportEngine(report_db)
+        plan = engine.plan(['resumen', 'metodos_pago', 'ventas_por_hora', 'estado_stock'])
+        assert plan == {'ventas': ['resumen', 'ventas_por_hora'], 'pagos': ['metodos_pago'],
+                        'productos': ['estado_stock']}
+
+        with pytest.raises(ValueError):
+            engine.plan(['no_existe'])
+
+    def test_summary_and_hours_from_one_query(self, report_db, counted):
+        """Test the folded day summary against the expected aggregates"""
+        day = date(2024, 5, 2)
+        metrics = ReportEngine(report_db).run(['resumen', 'ventas_por_hora'], day, day)
+        assert statement_calls(counted) == 1
+
+        summary = metrics['resumen']
+        assert summary['total_ventas'] == 3
+        assert summary['ventas_completadas'] == 2
+        assert summary['ventas_canceladas'] == 1
+        assert summary['monto_total'] == 400.0
+        assert summary['ticket_promedio'] == 200.0
+        assert (summary['ticket_minimo'], summary['ticket_maximo']) == (200.0, 200.0)
+        assert summary['impuestos_total'] == 84.0
+        assert [(row['hora'], row['cantidad_ventas']) for row in metrics['ventas_por_hora']] == [('12', 1), ('18', 1)]
+
+    def test_period_summary_matches_rollups(self, report_db):
+        """Test that the raw single pass agrees with the daily rollup totals"""
+        rollups = SalesRollupManager(report_db)
+        rollups.rebuild()
+        start, end = date(2024, 5, 1), date(2024, 5, 31)
+
+        raw = ReportEngine(report_db).run(['resumen'], start, end)['resumen']
+        rolled = rollups.get_sales_totals(start, end)
+        for key in ('total_ventas', 'ventas_completadas', 'ventas_canceladas', 'monto_total', 'impuestos_total'):
+            assert rolled[key] == raw[key]
+        assert rolled['dias_con_ventas'] == 2
+        assert [(row['fecha'], row['cantidad_ventas']) for row in rollups.get_daily_totals(start, end)] == \
+            [('2024-05-02', 3), ('2024-05-03', 1)]
+
+    def test_stock_status(self, report_db, tmp_path, monkeypatch):
+        """Test stock counters against the inventory report"""
+        monkeypatch.chdir(tmp_path)
+        status = ReportEngine(report_db).run(['estado_stock'])['estado_stock']
+        inventory = ReportManager(report_db).generate_inventory_report()['resumen']
+        assert status['total_productos'] == inventory['total_productos'] == 3
+        assert status['productos_stock_bajo'] == inventory['productos_stock_bajo'] == 1
+        assert status['productos_sin_stock'] == inventory['productos_sin_stock'] == 1
+
+    def test_daily_report_shape(self, report_db, counted, tmp_path, monkeypatch):
+        """Test the daily report built by the engine with one query per table"""
+        monkeypatch.chdir(tmp_path)
+        report = ReportManager(report_db).generate_daily_sales_report(date(2024, 5, 2))
+        assert statement_calls(counted) == 3
+
+        assert report['resumen']['monto_total'] == 400.0
+        assert {row['metodo_pago']: row['monto_total'] for row in report['metodos_pago']} == \
+            {'EFECTIVO': 200.0, 'TARJETA_DEBITO': 200.0}
+        assert [(row['nombre'], row['cantidad_vendida']) for row in report['productos_top']] == \
+            [('Azúcar 1kg', 4), ('Yerba 1kg', 2)]
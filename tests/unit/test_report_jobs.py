@@ -0,0 +1,158 @@
+"""
+Unit tests for the background report job queue
+"""
+
+import sqlite3
+import threading
+import time
+from datetime import date
+
+import pytest
+from managers.report_job_manager import ReportJobManager, COMPLETADO, CANCELADO, ERROR
+from managers.report_manager import ReportManager
+
+
+@pytest.fixture
+def report_jobs(db_manager, tmp_path, monkeypatch):
+    """Job manager over a ReportManager writing into a temporary directory"""
+    monkeypatch.chdir(tmp_path)
+    manager = ReportJobManager(ReportManager(db_manager), max_workers=1)
+    yield manager
+    manager.shutdown()
+
+
+class TestReportJobManager:
+    """Test suite for ReportJobManager"""
+
+    def test_runs_report_off_thread(self, report_jobs):
+        """Test that a report runs in the pool and reports progress"""
+        updates = []
+        report_jobs.add_listener(lambda job: updates.append((threading.current_thread().name, job.progress)))
+
+        job = report_jobs.submit('INVENTORY')
+        assert job.wait(5)
+        assert job.status == COMPLETADO
+        assert job.result['tipo'] == 'INVENTORY'
+        assert updates[-1][1] == 100
+        assert any(name.startswith('reportes') for name, _ in updates)
+
+    def test_cache_reused_until_data_changes(self, report_jobs, db_manager):
+        """Test that the same report is served from cache until a write happens"""
+        first = report_jobs.submit('SALES_DAILY', {'target_date': date(2024, 5, 2)})
+        first.wait(5)
+
+        second = report_jobs.submit('SALES_DAILY', {'target_date': date(2024, 5, 2)})
+        assert second.done and second.from_cache
+        assert second.result is first.result
+
+        db_manager.execute_insert("INSERT INTO categorias (nombre) VALUES ('Nueva')")
+        third = report_jobs.submit('SALES_DAILY', {'target_date': date(2024, 5, 2)})
+        third.wait(5)
+        assert not third.from_cache
+
+    def test_cache_key_does_not_wait_for_writer(self, report_jobs, db_manager):
+        """Test that the cache key is read without the writer and sees other connections' commits"""
+        key = report_jobs.make_key('SALES_DAILY', {})
+        held, release = threading.Event(), threading.Event()
+
+        def hold_writer():
+            with db_manager.pool.writer():
+                held.set()
+                release.wait(5)
+
+        holder = threading.Thread(target=hold_writer)
+        holder.start()
+        try:
+            assert held.wait(5)
+            started = time.perf_counter()
+            assert report_jobs.make_key('SALES_DAILY', {}) == key
+            assert time.perf_counter() - started < 1
+        finally:
+            release.set()
+            holder.join()
+
+        other = sqlite3.connect(str(db_manager.db_path))
+        other.execute("INSERT INTO categorias (nombre) VALUES ('Otra terminal')")
+        other.commit()
+        other.close()
+        assert report_jobs.make_key('SALES_DAILY', {}) != key
+
+    def test_cancel_running_and_pending(self, report_jobs):
+        """Test cancelling a running job and one still waiting in the queue"""
+        started, release = threading.Event(), threading.Event()
+
+        def slow_report():
+            started.set()
+            release.wait(5)
+            return [{'id': 1}]
+
+        running = report_jobs.submit('LENTO', function=slow_report, use_cache=False)
+        pending = report_jobs.submit('LENTO', function=slow_report, use_cache=False)
+        started.wait(5)
+
+        assert report_jobs.cancel(running.id)
+        assert report_jobs.cancel(pending.id)
+        release.set()
+
+        assert running.wait(5) and pending.wait(5)
+        assert running.status == CANCELADO and running.result is None
+        assert pending.status == CANCELADO
+        assert report_jobs.get_cached('LENTO') is None
+
+    def test_errors_are_not_cached(self, report_jobs):
+        """Test that failing reports end in ERROR without a cache entry"""
+        def broken(**_):
+            raise RuntimeError("sin conexión")
+
+        job = report_jobs.submit('ROTO', function=broken)
+        job.wait(5)
+        assert job.status == ERROR
+        assert 'sin conexión' in job.error
+        assert report_jobs.get_cached('ROTO') is None
+
+        with pytest.raises(ValueError):
+            report_jobs.submit('NO_EXISTE')
+
+    def test_export_and_retention(self, report_jobs, tmp_path):
+        """Test exporting the result and evicting it with the report retention"""
+        path = tmp_path / 'productos.csv'
+        job = report_jobs.submit('FILAS', {'cantidad': 3},
+                                 function=lambda cantidad: [{'id': i, 'nombre': f"P{i}"} for i in range(cantidad)],
+                                 export={'path': str(path), 'format': 'csv', 'title': 'Productos'})
+        job.wait(5)
+        assert job.status == COMPLETADO
+        assert path.read_text(encoding='utf-8').count('P') >= 3
+        assert len(report_jobs.get_cached('FILAS', {'cantidad': 3})) == 3
+
+        assert report_jobs.cleanup_old_reports(days_to_keep=-1) == 1
+        assert report_jobs.get_cached('FILAS', {'cantidad': 3}) is None
+        assert report_jobs.get_job(job.id) is None
+
+    def test_movements_export_streams_rows(self, report_jobs, db_manager, tmp_path, monkeypatch):
+        """Test that exporting stock movements iterates the rows instead of building the report"""
+        db_manager.execute_update("""
+            INSERT INTO usuarios (id, username, password_hash, nombre_completo)
+            VALUES (1, 'cajero', 'x', 'Cajero Prueba')
+        """)
+        db_manager.execute_update("""
+            INSERT INTO productos (id, codigo_barras, codigo_interno, nombre, precio_venta, stock_actual)
+            VALUES (1, '7790001', 'YER001', 'Yerba 1kg', 100.0, 10)
+        """)
+        db_manager.execute_many("""
+            INSERT INTO movimientos_stock (producto_id, tipo_movimiento, motivo, cantidad_anterior,
+                                           cantidad_movimiento, cantidad_nueva, fecha_movimiento, usuario_id)
+            VALUES (1, 'ENTRADA', 'COMPRA', ?, 1, ?, '2024-05-02 10:00:00', 1)
+        """, [(stock, stock + 1) for stock in range(5)])
+
+        def full_report(*args, **kwargs):
+            raise AssertionError("the export must not build the full report")
+        monkeypatch.setattr(report_jobs.report_manager, 'generate_stock_movements_report', full_report)
+
+        path = tmp_path / 'movimientos.csv'
+        job = report_jobs.submit('MOVEMENTS', {'start_date': date(2024, 5, 1), 'end_date': date(2024, 5, 31)},
+                                 export={'path': str(path), 'format': 'csv', 'title': 'Movimientos',
+                                         'key': 'movimientos'})
+        assert job.wait(5)
+        assert job.status == COMPLETADO, job.error
+        assert job.rows_exported == 5 and job.result is None
+        assert path.read_text(encoding='utf-8').count('Yerba 1kg') == 5
@@ -0,0 +1,165 @@
+"""
+Unit tests for the daily sales rollup tables
+"""
+
+from datetime import date
+
+import pytest
+from managers.report_manager import ReportManager
+from managers.sales_manager import SalesManager
+from managers.sales_rollup_manager import SalesRollupManager
+
+
+def insert_sale(db, number, day, items, payments, estado='COMPLETADA', caja_id=1, costs=None):
+    """Insert a sale with its lines and payments directly (``costs`` = unit cost by product)"""
+    total = sum(quantity * price for _, quantity, price in items)
+    sale_id = db.execute_insert("""
+        INSERT INTO ventas (numero_factura, usuario_id, caja_id, subtotal, impuestos_importe, total, estado, fecha_venta)
+        VALUES (?, 1, ?, ?, ?, ?, ?, ?)
+    """, (number, caja_id, total, round(total * 0.21, 2), total, estado, f"{day} 12:30:00"))
+    db.execute_many("""
+        INSERT INTO detalle_ventas (venta_id, producto_id, cantidad, precio_unitario, costo_unitario, subtotal, total)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, [(sale_id, product_id, quantity, price, (costs or {}).get(product_id, 0), quantity * price, quantity * price)
+          for product_id, quantity, price in items])
+    db.execute_many("INSERT INTO pagos_venta (venta_id, metodo_pago, importe) VALUES (?, ?, ?)",
+                    [(sale_id, method, amount) for method, amount in payments])
+    return sale_id
+
+
+@pytest.fixture
+def sales_db(db_manager):
+    """Database with two products and sales over two months"""
+    db_manager.execute_update("""
+        INSERT INTO usuarios (id, username, password_hash, nombre_completo)
+        VALUES (1, 'cajero', 'x', 'Cajero Prueba')
+    """)
+    db_manager.execute_update("INSERT INTO cajas (id, nombre) VALUES (2, 'Caja 2')")
+    db_manager.execute_many("""
+        INSERT INTO productos (id, codigo_barras, codigo_interno, nombre, precio_compra, precio_venta, stock_actual, activo)
+        VALUES (?, ?, ?, ?, ?, ?, 100, 1)
+    """, [(1, '7790001', 'YER001', 'Yerba 1kg', 60.0, 100.0), (2, '7790002', 'AZU001', 'Azúcar 1kg', 30.0, 50.0)])
+
+    insert_sale(db_manager, 'F-1', '2024-04-30', [(1, 1, 100.0)], [('EFECTIVO', 100.0)])
+    insert_sale(db_manager, 'F-2', '2024-05-02', [(1, 2, 100.0), (2, 1, 50.0)],
+                [('EFECTIVO', 150.0), ('TARJETA_DEBITO', 100.0)])
+    insert_sale(db_manager, 'F-3', '2024-05-02', [(2, 4, 50.0)], [('TARJETA_DEBITO', 200.0)], caja_id=2)
+    insert_sale(db_manager, 'F-4', '2024-05-20', [(2, 1, 50.0)], [('EFECTIVO', 50.0)], estado='CANCELADA')
+    return db_manager
+
+
+def rollup_rows(db):
+    """Non-empty rollup rows without timestamps"""
+    sales = db.execute_query("""
+        SELECT fecha, caja_id, usuario_id, metodo_pago, cantidad_ventas, cantidad_canceladas,
+               subtotal, impuestos, total, cantidad_pagos, importe_pagos
+        FROM ventas_resumen_diario
+        WHERE cantidad_ventas != 0 OR cantidad_canceladas != 0 OR cantidad_pagos != 0
+        ORDER BY fecha, caja_id, usuario_id, metodo_pago
+    """)
+    products = db.execute_query("""
+        SELECT fecha, producto_id, cantidad, importe, costo, cantidad_ventas
+        FROM productos_resumen_diario
+        WHERE cantidad_ventas != 0
+        ORDER BY fecha, producto_id
+    """)
+    return sales, products
+
+
+class TestSalesRollups:
+    """Test suite for SalesRollupManager"""
+
+    def test_rebuild_matches_raw_tables(self, sales_db):
+        """Test that rebuilt rollups agree with aggregates over the raw rows"""
+        rollups = SalesRollupManager(sales_db)
+        success, _ = rollups.rebuild()
+        assert success
+
+        totals = rollups.get_sales_totals(date(2024, 5, 1), date(2024, 5, 31))
+        assert totals['ventas_completadas'] == 2
+        assert totals['ventas_canceladas'] == 1
+        assert totals['monto_total'] == 450.0
+        assert totals['dias_con_ventas'] == 2
+
+        payments = {row['metodo_pago']: row['monto_total']
+                    for row in rollups.get_payment_totals(date(2024, 5, 1), date(2024, 5, 31))}
+        assert payments == {'EFECTIVO': 150.0, 'TARJETA_DEBITO': 300.0}
+
+        products = rollups.get_product_totals(date(2024, 5, 1), date(2024, 5, 31))
+        assert [(p['producto_id'], p['cantidad_vendida'], p['transacciones']) for p in products] == [(2, 5, 2), (1, 2, 1)]
+        assert products[1]['ganancia_bruta'] == 200.0 - 2 * 60.0
+
+    def test_incremental_apply_matches_rebuild(self, sales_db):
+        """Test that applying sales one by one gives the same rows as a rebuild"""
+        rollups = SalesRollupManager(sales_db)
+        rollups.rebuild()
+        expected = rollup_rows(sales_db)
+
+        sales_db.execute_update("DELETE FROM ventas_resumen_diario")
+        sales_db.execute_update("DELETE FROM productos_resumen_diario")
+        for row in sales_db.execute_query("SELECT id FROM ventas ORDER BY id"):
+            rollups.apply_sale(row['id'])
+
+        assert rollup_rows(sales_db) == expected
+
+    def test_cancel_sale_updates_rollups(self, sales_db):
+        """Test that cancelling a sale moves it out of the totals and restores stock"""
+        sales_manager = SalesManager(sales_db, None)
+        sales_manager.rollups.rebuild()
+        sale_id = sales_db.execute_single("SELECT id FROM ventas WHERE numero_factura = 'F-2'")['id']
+
+        success, _ = sales_manager.cancel_sale(sale_id, 1, "Error de cobro")
+        assert success
+
+        totals = sales_manager.rollups.get_sales_totals(date(2024, 5, 2), date(2024, 5, 2))
+        assert totals['ventas_completadas'] == 1
+        assert totals['ventas_canceladas'] == 1
+        assert totals['monto_total'] == 200.0
+        assert sales_db.execute_single("SELECT stock_actual FROM productos WHERE id = 1")['stock_actual'] == 102
+
+        # Same state as recomputing from scratch
+        incremental = rollup_rows(sales_db)
+        sales_manager.rollups.rebuild()
+        assert rollup_rows(sales_db) == incremental
+
+    def test_cancel_after_cost_change(self, sales_db):
+        """Test that cancelling reverses the cost recorded at sale time, not the current one"""
+        sales_manager = SalesManager(sales_db, None)
+        sale_id = insert_sale(sales_db, 'F-5', '2024-06-03', [(1, 2, 100.0)], [('EFECTIVO', 200.0)], costs={1: 60.0})
+        sales_manager.rollups.rebuild()
+
+        sales_db.execute_update("UPDATE productos SET precio_compra = 90.0 WHERE id = 1")
+        success, _ = sales_manager.cancel_sale(sale_id, 1)
+        assert success
+
+        row = sales_db.execute_single("""
+            SELECT cantidad, importe, costo, cantidad_ventas FROM productos_resumen_diario
+            WHERE fecha = '2024-06-03' AND producto_id = 1
+        """)
+        assert (row['cantidad'], row['importe'], row['costo'], row['cantidad_ventas']) == (0, 0, 0, 0)
+
+        # A rebuild uses the same recorded cost
+        insert_sale(sales_db, 'F-6', '2024-06-04', [(1, 1, 100.0)], [('EFECTIVO', 100.0)], costs={1: 90.0})
+        sales_manager.rollups.apply_sale(sales_db.execute_single("SELECT id FROM ventas WHERE numero_factura = 'F-6'")['id'])
+        sales_db.execute_update("UPDATE productos SET precio_compra = 120.0 WHERE id = 1")
+        incremental = rollup_rows(sales_db)[1][-1]
+        sales_manager.rollups.rebuild(date(2024, 6, 1), date(2024, 6, 30))
+        assert rollup_rows(sales_db)[1][-1] == incremental
+        assert incremental['costo'] == 90.0
+
+    def test_reports_read_rollups(self, sales_db, tmp_path, monkeypatch):
+        """Test the monthly and financial reports built from the rollups"""
+        monkeypatch.chdir(tmp_path)
+        SalesRollupManager(sales_db).rebuild()
+        report_manager = ReportManager(sales_db)
+
+        monthly = report_manager.generate_monthly_sales_report(2024, 5)
+        assert monthly['resumen']['monto_total'] == 450.0
+        assert monthly['resumen']['total_ventas'] == 3
+        assert monthly['comparacion_mes_anterior'] == {'ventas_anteriores': 1, 'monto_anterior': 100.0}
+        assert [day['fecha'] for day in monthly['ventas_diarias']] == ['2024-05-02', '2024-05-20']
+
+        financial = report_manager.generate_financial_report(date(2024, 4, 1), date(2024, 5, 31))
+        assert financial['ingresos']['ingresos_brutos'] == 550.0
+        assert financial['ingresos']['cantidad_transacciones'] == 3
+        assert financial['margen']['costos_productos'] == 3 * 60.0 + 5 * 30.0
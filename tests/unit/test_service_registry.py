@@ -0,0 +1,49 @@
+"""
+Unit tests for ServiceRegistry
+"""
+
+import pytest
+from managers.service_registry import ServiceRegistry, deferred
+from utils.startup_profiler import StartupProfiler
+
+
+class TestServiceRegistry:
+    """Test suite for the lazy manager registry"""
+
+    def test_builds_on_first_access(self):
+        """Test that factories run once, on first access"""
+        calls = []
+        registry = ServiceRegistry()
+        registry.register('report', lambda: calls.append(1) or object())
+
+        assert 'report' in registry
+        assert not registry.is_loaded('report')
+        assert calls == []
+
+        first = registry['report']
+        assert registry['report'] is first
+        assert calls == [1]
+        assert registry.pending() == []
+
+    def test_failed_factory_behaves_as_missing(self):
+        """Test that an optional manager that fails to build is treated as absent"""
+        registry = ServiceRegistry()
+        registry.register('communication', deferred('module_that_does_not_exist:Manager'))
+
+        assert registry.get('communication') is None
+        assert 'communication' not in registry
+        with pytest.raises(KeyError):
+            registry['communication']
+
+    def test_eager_registration_and_profiling(self):
+        """Test eager services and profiler records"""
+        profiler = StartupProfiler()
+        registry = ServiceRegistry(profiler=profiler)
+        registry.register('decimal', deferred('decimal:Decimal', '1.5'), lazy=False)
+        registry['plain'] = 42
+
+        assert registry.loaded() == {'decimal': registry['decimal'], 'plain': 42}
+        assert str(registry['decimal']) == '1.5'
+        assert list(registry) == ['decimal', 'plain']
+        assert [record['name'] for record in profiler.get_records()] == ['decimal']
+        assert 'managers' in profiler.report()
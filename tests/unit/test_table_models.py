@@ -0,0 +1,156 @@
+"""
+Unit tests for the lazy product and customer grids
+"""
+
+import pytest
+from PyQt5.QtCore import QEvent, QPoint, Qt
+from PyQt5.QtGui import QMouseEvent
+from PyQt5.QtWidgets import QStyleOptionViewItem, QTableView
+
+from managers.customer_feature_manager import CustomerFeatureManager
+from managers.customer_manager import CustomerManager
+from managers.product_manager import ProductManager
+from tests.unit.test_sales_rollups import insert_sale
+from ui.widgets.table_models import ActionButtonsDelegate, CustomerTableModel, ProductTableModel
+
+
+@pytest.fixture
+def products_db(db_manager):
+    """250 products in two categories with varied stock levels"""
+    db_manager.execute_update("INSERT INTO categorias (id, nombre) VALUES (2, 'Limpieza')")
+    db_manager.execute_many("""
+        INSERT INTO productos (codigo_barras, codigo_interno, nombre, categoria_id, precio_compra, precio_venta,
+                               stock_actual, stock_minimo, activo)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1)
+    """, [(f'779{i:05d}', f'P{i:05d}', f"{'Detergente' if i % 5 == 0 else 'Galletitas'} {i:03d}",
+           2 if i % 5 == 0 else 1, 10.0 + i, 20.0 + i, i % 7, 3) for i in range(250)])
+    return db_manager
+
+
+def keyset_pages(manager, page_size, **options):
+    """Read every page the way the grid does and return the product ids"""
+    ids, after = [], None
+    while True:
+        page = manager.query_products(after=after, limit=page_size, **options)
+        ids.extend(row['id'] for row in page)
+        if len(page) < page_size:
+            return ids
+        after = (page[-1]['orden_valor'], page[-1]['id'])
+
+
+class TestLazyTableModels:
+    """Test suite for the paged grid models and the action delegate"""
+
+    def test_keyset_pages_match_full_order(self, products_db):
+        """Test that paging by key returns the same order as a single query"""
+        manager = ProductManager(products_db)
+        for order_by, descending in [('nombre', False), ('stock_actual', False),
+                                     ('valor_stock', True), ('categoria', True)]:
+            expected = [row['id'] for row in manager.query_products(order_by=order_by, descending=descending,
+                                                                    limit=1000)]
+            assert len(expected) == 250
+            assert keyset_pages(manager, 40, order_by=order_by, descending=descending) == expected
+
+        by_stock = manager.query_products(order_by='stock_actual', limit=1000)
+        assert [row['stock_actual'] for row in by_stock] == sorted(row['stock_actual'] for row in by_stock)
+
+    def test_filters_and_summary(self, products_db):
+        """Test that search, category and stock filters run in SQL and match the summary"""
+        manager = ProductManager(products_db)
+        options = {'search_term': 'deter', 'stock_filter': 'bajo'}
+        rows = manager.query_products(limit=1000, **options)
+        assert rows and all(row['nombre'].startswith('Detergente') and row['stock_actual'] <= 3 for row in rows)
+
+        summary = manager.get_products_summary(**options)
+        assert summary['total'] == len(rows)
+        assert summary['sin_stock'] == sum(1 for row in rows if row['stock_actual'] <= 0)
+        assert summary['valor_venta'] == pytest.approx(sum(row['stock_actual'] * row['precio_venta'] for row in rows))
+
+        assert len(manager.query_products(category_id=2, limit=1000)) == 50
+        assert all(row['stock_actual'] <= 1.5 for row in manager.query_products(stock_filter='critico', limit=1000))
+        assert manager.get_products_summary(stock_filter='sin_stock')['total'] == 36
+
+    def test_model_fetches_on_demand(self, qapp, products_db):
+        """Test that the model loads pages lazily and sorts in the database"""
+        model = ProductTableModel(ProductManager(products_db),
+                                  ['codigo', 'nombre', 'stock_actual', 'precio_venta', 'estado', 'acciones'],
+                                  page_size=100)
+        model.reload()
+        assert model.rowCount() == 100 and model.canFetchMore()
+        model.fetchMore()
+        assert model.rowCount() == 200
+        model.fetch_all()
+        assert model.rowCount() == 250 and not model.canFetchMore()
+
+        model.sort(model.column_index('precio_venta'), Qt.DescendingOrder)
+        assert model.rowCount() == 100
+        assert model.data(model.index(0, 3)) == "$269.00"
+        assert model.data(model.index(0, 3), Qt.TextAlignmentRole) == int(Qt.AlignRight | Qt.AlignVCenter)
+
+        model.set_filters(stock_filter='sin_stock')
+        assert model.rowCount() == 36 and not model.canFetchMore()
+        assert model.data(model.index(0, 4)) == "Sin Stock"
+        assert model.data(model.index(0, 0), Qt.UserRole)['stock_actual'] == 0
+        assert model.headerData(1, Qt.Horizontal) == "Producto"
+
+    def test_action_delegate_emits_row(self, qapp, products_db):
+        """Test that clicking a painted button emits the action with the row"""
+        model = ProductTableModel(ProductManager(products_db), ['nombre', 'acciones'])
+        model.reload()
+        view = QTableView()
+        view.setModel(model)
+        delegate = ActionButtonsDelegate([('edit', "✏️", "Editar"), ('stock', "📦", "Stock")], view)
+        view.setItemDelegateForColumn(1, delegate)
+        triggered = []
+        delegate.action_triggered.connect(lambda action, row: triggered.append((action, row['id'])))
+
+        index = model.index(2, 1)
+        option = QStyleOptionViewItem()
+        option.rect = view.visualRect(index)
+        second_button = delegate.button_rects(option.rect)[1]
+        event = QMouseEvent(QEvent.MouseButtonRelease, second_button.center(), Qt.LeftButton,
+                            Qt.LeftButton, Qt.NoModifier)
+        assert delegate.editorEvent(event, model, option, index)
+
+        outside = QMouseEvent(QEvent.MouseButtonRelease, QPoint(option.rect.right() + 50, second_button.center().y()),
+                              Qt.LeftButton, Qt.LeftButton, Qt.NoModifier)
+        delegate.editorEvent(outside, model, option, index)
+        assert triggered == [('stock', model.row_at(2)['id'])]
+
+    def test_customer_model(self, qapp, db_manager):
+        """Test the customer grid filters and the last purchase column"""
+        for column in ("dni_cuit TEXT", "categoria_cliente TEXT", "saldo_cuenta_corriente DECIMAL(10,2) DEFAULT 0"):
+            db_manager.execute_update(f"ALTER TABLE clientes ADD COLUMN {column}")
+        db_manager.execute_many("""
+            INSERT INTO clientes (id, nombre, apellido, categoria_cliente, saldo_cuenta_corriente, activo)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, [(1, 'Ana', 'Gómez', 'VIP', 500.0, 1), (2, 'Luis', 'Pérez', 'MINORISTA', 0.0, 1),
+              (3, 'Eva', 'Ruiz', 'VIP', 0.0, 1), (4, 'Baja', 'Antigua', 'VIP', 80.0, 0)])
+        db_manager.execute_update("""
+            INSERT INTO usuarios (id, username, password_hash, nombre_completo)
+            VALUES (1, 'cajero', 'x', 'Cajero Prueba')
+        """)
+        db_manager.execute_update("""
+            INSERT INTO productos (id, codigo_barras, codigo_interno, nombre, precio_venta, stock_actual, activo)
+            VALUES (1, '7790001', 'YER001', 'Yerba 1kg', 100.0, 100, 1)
+        """)
+        insert_sale(db_manager, 'F-1', '2026-03-05 10:00:00', [(1, 1, 100.0)], [('EFECTIVO', 100.0)])
+        db_manager.execute_update("UPDATE ventas SET cliente_id = 3 WHERE numero_factura = 'F-1'")
+        CustomerFeatureManager(db_manager).rebuild()
+
+        model = CustomerTableModel(CustomerManager(db_manager), page_size=2)
+        model.reload()
+        assert [model.data(model.index(row, 1)) for row in range(model.rowCount())] == ['Ana Gómez', 'Eva Ruiz']
+        model.fetch_all()
+        assert model.rowCount() == 3
+        assert model.data(model.index(1, 7)) == '2026-03-05'
+        assert model.data(model.index(0, 7)) == 'N/A'
+        assert model.data(model.index(0, 6), Qt.BackgroundRole) is not None
+
+        model.sort(6, Qt.DescendingOrder)
+        model.fetch_all()
+        assert model.row_at(0)['id'] == 1
+        model.set_filters(category='VIP', status='con_deuda')
+        assert [model.row_at(row)['id'] for row in range(model.rowCount())] == [1]
+        model.set_filters(status='inactivos')
+        assert [model.row_at(row)['id'] for row in range(model.rowCount())] == [4]
@@ -24,6 +24,14 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+class ReportJobSignals(QObject):
+    """Reenvía los avisos de ReportJobManager (hilos del pool) al hilo de la interfaz"""
+    
+    job_updated = pyqtSignal(object)  # ReportJob
+    
+    def forward(self, job):
+        self.job_updated.emit(job)
+
 class ReportDialog(QDialog):
     """Diálogo principal para configuración de reportes"""
     
@@ -36,6 +44,14 @@ class ReportDialog(QDialog):
         self.file_exporter = FileExporter()
         self.current_data = []
         
+        # Cola de reportes en segundo plano (si está registrada)
+        self.report_jobs = managers.get('report_jobs')
+        self.current_job = None
+        self.job_signals = ReportJobSignals(self)
+        self.job_signals.job_updated.connect(self.on_job_updated)
+        if self.report_jobs:
+            self.report_jobs.add_listener(self.job_signals.forward)
+        
         self.setWindowTitle("Generador de Reportes")
         self.setModal(True)
         self.resize(800, 600)
@@ -431,9 +447,16 @@ class ReportDialog(QDialog):
         
         layout.addStretch()
         
+        # Progreso del reporte en segundo plano
+        self.job_progress = QProgressBar()
+        self.job_progress.setRange(0, 100)
+        self.job_progress.setMaximumWidth(200)
+        self.job_progress.setVisible(False)
+        layout.addWidget(self.job_progress)
+        
         # Botones principales
         cancel_btn = QPushButton("❌ Cancelar")
-        cancel_btn.clicked.connect(self.reject)
+        cancel_btn.clicked.connect(self.cancel_or_reject)
         layout.addWidget(cancel_btn)
         
         preview_btn = QPushButton("👁️ Previsualizar")
@@ -609,9 +632,19 @@ class ReportDialog(QDialog):
     def refresh_preview(self):
         """Actualizar previsualización"""
         try:
-            # Obtener datos según configuración
-            data = self.get_report_data()
+            if self.report_jobs:
+                self.start_job()
+                return
+            
+            self.populate_preview(self.get_report_data())
             
+        except Exception as e:
+            logger.error(f"Error actualizando preview: {e}")
+            QMessageBox.warning(self, "Error", f"Error actualizando previsualización: {str(e)}")
+    
+    def populate_preview(self, data: List[Dict]):
+        """Mostrar los datos en la tabla de previsualización"""
+        try:
             if not data:
                 self.preview_table.setRowCount(0)
                 self.preview_table.setColumnCount(0)
@@ -666,10 +699,24 @@ class ReportDialog(QDialog):
         self.tab_widget.setCurrentIndex(3)  # Tab de preview
         self.refresh_preview()
     
+    def get_report_config(self) -> Dict:
+        """Leer la configuración de los controles (solo desde el hilo de la interfaz)"""
+        return {
+            'report_type': self.report_type_combo.currentData(),
+            'date_from': self.date_from.date().toPyDate(),
+            'date_to': self.date_to.date().toPyDate(),
+            'include_inactive': self.include_inactive_cb.isChecked(),
+            'debt_only': self.debt_only_cb.isChecked()
+        }
+    
     def get_report_data(self) -> List[Dict]:
         """Obtener datos del reporte según configuración"""
+        return self.fetch_report_data(**self.get_report_config())
+    
+    def fetch_report_data(self, report_type: str, date_from: date, date_to: date,
+                          include_inactive: bool = False, debt_only: bool = False) -> List[Dict]:
+        """Obtener datos del reporte sin tocar controles (se ejecuta en la cola de reportes)"""
         try:
-            report_type = self.report_type_combo.currentData()
             if not report_type:
                 return []
             
@@ -681,17 +728,13 @@ class ReportDialog(QDialog):
                 logger.warning(f"Manager no disponible: {manager_name}")
                 return []
             
-            # Obtener fechas
-            date_from = self.date_from.date().toPython()
-            date_to = self.date_to.date().toPython()
-            
             # Generar datos según tipo de reporte
             if report_type == 'ventas':
                 return self.get_sales_data(manager, date_from, date_to)
             elif report_type == 'clientes':
-                return self.get_customers_data(manager)
+                return self.get_customers_data(manager, include_inactive, debt_only)
             elif report_type == 'productos':
-                return self.get_products_data(manager)
+                return self.get_products_data(manager, include_inactive)
             elif report_type == 'top_clientes':
                 return self.get_top_customers_data(manager, date_from, date_to)
             elif report_type == 'productos_bajo_stock':
@@ -714,14 +757,14 @@ class ReportDialog(QDialog):
             logger.error(f"Error obteniendo datos de ventas: {e}")
             return []
     
-    def get_customers_data(self, manager) -> List[Dict]:
+    def get_customers_data(self, manager, include_inactive: bool = False, debt_only: bool = False) -> List[Dict]:
         """Obtener datos de clientes"""
         try:
             if hasattr(manager, 'get_all_customers'):
-                customers = manager.get_all_customers(active_only=not self.include_inactive_cb.isChecked())
+                customers = manager.get_all_customers(active_only=not include_inactive)
                 
                 # Filtrar por deuda si está activado
-                if self.debt_only_cb.isChecked():
+                if debt_only:
                     customers = [c for c in customers if float(c.get('saldo_cuenta_corriente', 0)) > 0]
                 
                 return customers
@@ -731,11 +774,11 @@ class ReportDialog(QDialog):
             logger.error(f"Error obteniendo datos de clientes: {e}")
             return []
     
-    def get_products_data(self, manager) -> List[Dict]:
+    def get_products_data(self, manager, include_inactive: bool = False) -> List[Dict]:
         """Obtener datos de productos"""
         try:
             if hasattr(manager, 'get_all_products'):
-                return manager.get_all_products(include_inactive=self.include_inactive_cb.isChecked())
+                return manager.get_all_products(include_inactive=include_inactive)
             else:
                 return []
         except Exception as e:
@@ -795,6 +838,15 @@ class ReportDialog(QDialog):
             
             full_path = os.path.join(self.directory_input.text(), filename)
             
+            # Generar título del reporte
+            report_type_info = self.report_types[self.report_type_combo.currentData()]
+            title = f"{report_type_info['name']} - {DateFormatter.format_date(datetime.now())}"
+            
+            # Consultar y exportar en segundo plano
+            if self.report_jobs:
+                self.start_job({'path': full_path, 'format': format_type, 'title': title})
+                return
+            
             # Obtener datos
             data = self.get_report_data()
             
@@ -802,36 +854,13 @@ class ReportDialog(QDialog):
                 QMessageBox.information(self, "Info", "No hay datos para exportar con los filtros seleccionados")
                 return
             
-            # Generar título del reporte
-            report_type_info = self.report_types[self.report_type_combo.currentData()]
-            title = f"{report_type_info['name']} - {DateFormatter.format_date(datetime.now())}"
-            
             # Exportar
             success = self.file_exporter.export(
                 data, full_path, format_type, title
             )
             
             if success:
-                QMessageBox.information(
-                    self, "Éxito", 
-                    f"Reporte generado exitosamente:\n{full_path}\n\nRegistros exportados: {len(data)}"
-                )
-                
-                # Abrir archivo si está configurado
-                if self.open_after_export.isChecked():
-                    try:
-                        os.startfile(full_path)  # Windows
-                    except:
-                        try:
-                            import subprocess
-                            subprocess.call(['open', full_path])  # macOS
-                        except:
-                            pass  # Linux requiere diferentes comandos según el entorno
-                
-                # Emitir señal
-                self.report_generated.emit(full_path, format_type)
-                
-                self.accept()
+                self.on_report_exported(full_path, format_type, len(data))
             else:
                 QMessageBox.critical(
                     self, "Error", 
@@ -842,6 +871,85 @@ class ReportDialog(QDialog):
             logger.error(f"Error generando reporte: {e}")
             QMessageBox.critical(self, "Error", f"Error generando reporte: {str(e)}")
     
+    def on_report_exported(self, full_path: str, format_type: str, records: int):
+        """Avisar la exportación terminada y cerrar el diálogo"""
+        QMessageBox.information(
+            self, "Éxito", 
+            f"Reporte generado exitosamente:\n{full_path}\n\nRegistros exportados: {records}"
+        )
+        
+        # Abrir archivo si está configurado
+        if self.open_after_export.isChecked():
+            try:
+                os.startfile(full_path)  # Windows
+            except:
+                try:
+                    import subprocess
+                    subprocess.call(['open', full_path])  # macOS
+                except:
+                    pass  # Linux requiere diferentes comandos según el entorno
+        
+        # Emitir señal
+        self.report_generated.emit(full_path, format_type)
+        
+        self.accept()
+    
+    # Reportes en segundo plano
+    def start_job(self, export: Dict = None):
+        """Encolar la consulta (y la exportación) del reporte configurado"""
+        if self.current_job and not self.current_job.done:
+            self.report_jobs.cancel(self.current_job.id)
+        
+        config = self.get_report_config()
+        self.current_job = self.report_jobs.submit(
+            f"DIALOG_{config['report_type']}", config,
+            function=self.fetch_report_data, export=export
+        )
+        if not self.current_job.done:
+            self.generate_btn.setEnabled(False)
+            self.job_progress.setValue(self.current_job.progress)
+            self.job_progress.setVisible(True)
+        self.on_job_updated(self.current_job)
+    
+    def on_job_updated(self, job):
+        """Progreso o fin del trabajo actual (en el hilo de la interfaz)"""
+        if job is not self.current_job:
+            return
+        
+        self.job_progress.setValue(job.progress)
+        self.job_progress.setFormat(f"{job.message} %p%")
+        if not job.done:
+            return
+        
+        self.job_progress.setVisible(False)
+        self.generate_btn.setEnabled(True)
+        
+        if job.status == 'ERROR':
+            QMessageBox.critical(self, "Error", f"Error generando reporte: {job.error}")
+        elif job.status == 'COMPLETADO':
+            if job.export:
+                if job.rows_exported:
+                    self.on_report_exported(job.export['path'], job.export['format'], job.rows_exported)
+                else:
+                    QMessageBox.information(self, "Info", "No hay datos para exportar con los filtros seleccionados")
+            else:
+                self.populate_preview(job.result)
+    
+    def cancel_or_reject(self):
+        """Cancelar el reporte en curso, o cerrar el diálogo si no hay ninguno"""
+        if self.current_job and not self.current_job.done:
+            self.report_jobs.cancel(self.current_job.id)
+            return
+        self.reject()
+    
+    def done(self, result: int):
+        """Dejar de recibir avisos de la cola al cerrar"""
+        if self.report_jobs:
+            if self.current_job and not self.current_job.done:
+                self.report_jobs.cancel(self.current_job.id)
+            self.report_jobs.remove_listener(self.job_signals.forward)
+        super().done(result)
+    
     def show_help(self):
         """Mostrar ayuda"""
         help_text = """
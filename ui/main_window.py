@@ -9,9 +9,14 @@ from PyQt5.QtWidgets import *
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 
+from managers.permission_resolver import user_permissions
+
 # Imports de widgets personalizados
 from ui.widgets.dashboard_widget import DashboardWidget
 from ui.widgets.sales_widget import SalesWidget
+from ui.widgets.async_loader import AsyncLoader, shutdown_loaders
+from ui.widgets.change_watcher import ChangeWatcher, change_bus_of
+from ui.widgets.table_models import ActionButtonsDelegate, ProductTableModel
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +34,9 @@ class MainWindow(QMainWindow):
         self.current_user = current_user
         self.widgets = {}
         
+        # Permisos compilados y guardados por usuario (se invalidan al cambiar usuario o rol)
+        self.permission_resolver = getattr(managers.get('user'), 'permissions', None)
+        
         # Configurar ventana principal
         self.init_ui()
         self.setup_menu_bar()
@@ -343,10 +351,11 @@ class MainWindow(QMainWindow):
         self.time_timer.timeout.connect(lambda: current_time.setText(datetime.now().strftime("%H:%M:%S")))
         self.time_timer.start(1000)  # Actualizar cada segundo
         
-        # Timer para actualizar datos en tiempo real
+        # Los widgets se actualizan por avisos de cambios; este timer solo detecta
+        # escrituras de otras terminales sobre la misma base (un PRAGMA por minuto)
         self.data_refresh_timer = QTimer()
-        self.data_refresh_timer.timeout.connect(self.refresh_all_data)
-        self.data_refresh_timer.start(60000)  # Actualizar cada minuto
+        self.data_refresh_timer.timeout.connect(self.check_external_changes)
+        self.data_refresh_timer.start(60000)
     
     def center_window(self):
         """Centrar ventana en la pantalla"""
@@ -395,22 +404,7 @@ class MainWindow(QMainWindow):
     def user_has_permission(self, permission: str) -> bool:
         """Verificar si el usuario actual tiene un permiso"""
         try:
-            user_permissions = self.current_user.get('permisos', [])
-            
-            # Asegurar que sea una lista
-            if isinstance(user_permissions, str):
-                user_permissions = user_permissions.split(',') if user_permissions else []
-            
-            # Limpiar espacios en blanco de permisos
-            user_permissions = [p.strip() for p in user_permissions if p.strip()]
-            
-            # Si tiene permiso de administrador completo
-            if '*' in user_permissions:
-                return True
-            
-            # Verificar permiso específico
-            return permission in user_permissions
-            
+            return user_permissions(self.current_user, self.permission_resolver).allows(permission)
         except Exception as e:
             logger.error(f"Error verificando permisos: {e}")
             return False
@@ -444,6 +438,13 @@ class MainWindow(QMainWindow):
                 self.time_timer.stop()
             if hasattr(self, 'data_refresh_timer'):
                 self.data_refresh_timer.stop()
+            # Cancelar reportes en segundo plano sin esperarlos
+            if hasattr(self.managers, 'is_loaded') and self.managers.is_loaded('report_jobs'):
+                self.managers['report_jobs'].shutdown(wait=False)
+            if hasattr(self.managers, 'is_loaded') and self.managers.is_loaded('analytics_snapshot'):
+                self.managers['analytics_snapshot'].stop()
+            # Descartar las cargas de los widgets en cola y esperar las que están en curso
+            shutdown_loaders()
             event.accept()
         else:
             event.ignore()
@@ -683,15 +684,30 @@ class MainWindow(QMainWindow):
         layout.addLayout(header_layout)
         
         # Tabla de productos
-        self.products_table = QTableWidget(0, 6)
-        self.products_table.setHorizontalHeaderLabels(["Código", "Producto", "Categoría", "Precio", "Stock", "Acciones"])
+        # Grilla con carga por páginas: orden y filtros se resuelven en la base
+        self.products_table = QTableView()
+        self.products_model = None
+        if 'product' in self.managers:
+            self.products_model = ProductTableModel(
+                self.managers['product'],
+                ['codigo', 'nombre', 'categoria', ('precio_venta', "Precio"), ('stock_actual', "Stock"), 'acciones'],
+                parent=self, loader=AsyncLoader(self.products_table))
+            self.products_table.setModel(self.products_model)
+            self.products_actions_delegate = ActionButtonsDelegate(
+                [('edit', "✏️", "Editar producto"), ('stock', "📦", "Ajustar stock")], self.products_table)
+            self.products_actions_delegate.action_triggered.connect(self.on_product_action)
+            self.products_table.setItemDelegateForColumn(5, self.products_actions_delegate)
+            # Recargar la grilla cuando cambia el stock o el catálogo (solo si está visible)
+            self.products_watcher = ChangeWatcher(change_bus_of(self.managers['product']), ('productos',),
+                                                  lambda changes: self.load_products_data(), self.products_table)
+            self.products_table.horizontalHeader().setSortIndicator(1, Qt.AscendingOrder)
+            self.products_table.setSortingEnabled(True)
         self.products_table.horizontalHeader().setStretchLastSection(True)
+        self.products_table.verticalHeader().setVisible(False)
         self.products_table.setAlternatingRowColors(True)
         self.products_table.setSelectionBehavior(QAbstractItemView.SelectRows)
         
-        # Cargar datos reales
-        self.load_products_data()
-        
+        # setSortingEnabled ordena por la columna indicada y carga la primera página
         layout.addWidget(self.products_table)
         
         # Agregar scroll area
@@ -927,89 +943,23 @@ class MainWindow(QMainWindow):
             logger.error(f"Error cargando usuarios básicos: {e}")
     
     def load_products_data(self):
-        """Cargar datos reales de productos"""
+        """Cargar datos reales de productos (primera página; el resto al desplazarse)"""
         try:
-            if 'product' not in self.managers:
+            if self.products_model is None:
                 logger.warning("Product manager no disponible")
                 return
             
-            products = self.managers['product'].get_all_products()
-            
-            if not products:
-                # Mostrar mensaje si no hay productos
-                self.products_table.setRowCount(1)
-                no_data_item = QTableWidgetItem("No hay productos registrados")
-                no_data_item.setTextAlignment(Qt.AlignCenter)
-                self.products_table.setSpan(0, 0, 1, 6)
-                self.products_table.setItem(0, 0, no_data_item)
-                return
-            
-            self.products_table.setRowCount(len(products))
-            
-            for row, product in enumerate(products):
-                # Código
-                codigo = product.get('codigo_interno') or product.get('codigo_barras', '')
-                self.products_table.setItem(row, 0, QTableWidgetItem(str(codigo)))
-                
-                # Nombre
-                self.products_table.setItem(row, 1, QTableWidgetItem(product.get('nombre', '')))
-                
-                # Categoría
-                categoria = product.get('categoria_nombre', 'Sin categoría')
-                self.products_table.setItem(row, 2, QTableWidgetItem(categoria))
-                
-                # Precio
-                precio = product.get('precio_venta', 0)
-                precio_text = f"${float(precio):,.2f}" if precio else "$0.00"
-                self.products_table.setItem(row, 3, QTableWidgetItem(precio_text))
-                
-                # Stock
-                stock = product.get('stock_actual', 0)
-                stock_text = f"{float(stock):,.2f}"
-                stock_item = QTableWidgetItem(stock_text)
-                
-                # Colorear stock bajo
-                stock_minimo = product.get('stock_minimo', 0)
-                if float(stock) <= float(stock_minimo):
-                    stock_item.setBackground(QColor(231, 76, 60, 50))  # Rojo suave
-                    stock_item.setToolTip("⚠️ Stock bajo")
-                
-                self.products_table.setItem(row, 4, stock_item)
-                
-                # Acciones
-                actions_widget = self.create_product_actions(product.get('id'))
-                self.products_table.setCellWidget(row, 5, actions_widget)
+            self.products_model.reload()
                 
         except Exception as e:
             logger.error(f"Error cargando productos: {e}")
-            # Mostrar error en la tabla
-            self.products_table.setRowCount(1)
-            error_item = QTableWidgetItem(f"Error cargando productos: {str(e)}")
-            error_item.setTextAlignment(Qt.AlignCenter)
-            self.products_table.setSpan(0, 0, 1, 6)
-            self.products_table.setItem(0, 0, error_item)
-    
-    def create_product_actions(self, product_id) -> QWidget:
-        """Crear botones de acción para producto"""
-        widget = QWidget()
-        layout = QHBoxLayout(widget)
-        layout.setContentsMargins(5, 2, 5, 2)
-        
-        edit_btn = QPushButton("✏️")
-        edit_btn.setToolTip("Editar producto")
-        edit_btn.setFixedSize(25, 25)
-        edit_btn.clicked.connect(lambda: self.edit_product(product_id))
-        
-        stock_btn = QPushButton("📦")
-        stock_btn.setToolTip("Ajustar stock")
-        stock_btn.setFixedSize(25, 25)
-        stock_btn.clicked.connect(lambda: self.adjust_stock(product_id))
-        
-        layout.addWidget(edit_btn)
-        layout.addWidget(stock_btn)
-        layout.addStretch()
-        
-        return widget
+    
+    def on_product_action(self, action: str, product: dict):
+        """Botones de acción de la grilla de productos"""
+        if action == 'edit':
+            self.edit_product(product.get('id'))
+        elif action == 'stock':
+            self.adjust_stock(product.get('id'))
     
     def load_customers_data(self):
         """Cargar datos reales de clientes"""
@@ -1145,6 +1095,12 @@ class MainWindow(QMainWindow):
     
     # NUEVOS MÉTODOS PARA FUNCIONALIDAD AVANZADA
     
+    def check_external_changes(self):
+        """Publicar un aviso genérico si otra terminal modificó la base"""
+        database = self.managers.get('database')
+        if database is not None and hasattr(database, 'check_external_changes'):
+            database.check_external_changes()
+    
     def refresh_all_data(self):
         """Actualizar todos los datos en tiempo real"""
         try:
@@ -1212,6 +1168,14 @@ class MainWindow(QMainWindow):
                 QMessageBox.warning(self, "Error", "Manager de productos no disponible")
                 return
             
+            filename = f"stock_actual_{datetime.now().strftime('%Y%m%d_%H%M')}.csv"
+            
+            # Consultar y exportar en segundo plano si la cola de reportes está disponible
+            if self.export_in_background('STOCK_CSV', self.managers['product'].iter_products,
+                                         filename, "Reporte de Stock Actual",
+                                         "Reporte de stock exportado", "No hay productos para exportar"):
+                return
+            
             # Obtener productos
             products = self.managers['product'].get_all_products()
             
@@ -1220,7 +1184,6 @@ class MainWindow(QMainWindow):
                 return
             
             # Exportar a CSV rápidamente
-            filename = f"stock_actual_{datetime.now().strftime('%Y%m%d_%H%M')}.csv"
             success = export_data(products, filename, "csv", "Reporte de Stock Actual")
             
             if success:
@@ -1241,6 +1204,14 @@ class MainWindow(QMainWindow):
                 QMessageBox.warning(self, "Error", "Manager de clientes no disponible")
                 return
             
+            filename = f"clientes_{datetime.now().strftime('%Y%m%d_%H%M')}.csv"
+            
+            # Consultar y exportar en segundo plano si la cola de reportes está disponible
+            if self.export_in_background('CUSTOMERS_CSV', self.managers['customer'].get_all_customers,
+                                         filename, "Lista de Clientes",
+                                         "Lista de clientes exportada", "No hay clientes para exportar"):
+                return
+            
             # Obtener clientes
             customers = self.managers['customer'].get_all_customers()
             
@@ -1249,7 +1220,6 @@ class MainWindow(QMainWindow):
                 return
             
             # Exportar a CSV
-            filename = f"clientes_{datetime.now().strftime('%Y%m%d_%H%M')}.csv"
             success = export_data(customers, filename, "csv", "Lista de Clientes")
             
             if success:
@@ -1261,6 +1231,49 @@ class MainWindow(QMainWindow):
             logger.error(f"Error generando reporte de clientes: {e}")
             QMessageBox.warning(self, "Error", f"Error: {str(e)}")
     
+    def export_in_background(self, report_type: str, function, filename: str, title: str,
+                             success_text: str, empty_text: str) -> bool:
+        """Encolar una exportación rápida en la cola de reportes
+        
+        Returns:
+            False si la cola no está disponible y hay que exportar en el momento
+        """
+        report_jobs = self.managers.get('report_jobs')
+        if not report_jobs:
+            return False
+        
+        if not hasattr(self, 'report_job_signals'):
+            from ui.dialogs.report_dialog import ReportJobSignals
+            self.report_job_signals = ReportJobSignals(self)
+            self.report_job_signals.job_updated.connect(self.on_background_report_updated)
+            self.background_reports = {}
+            report_jobs.add_listener(self.report_job_signals.forward)
+        
+        job = report_jobs.submit(report_type, function=function, use_cache=False,
+                                 export={'path': filename, 'format': 'csv', 'title': title})
+        self.background_reports[job.id] = (filename, success_text, empty_text)
+        self.on_background_report_updated(job)
+        return True
+    
+    def on_background_report_updated(self, job):
+        """Progreso de las exportaciones rápidas en la barra de estado"""
+        if job.id not in getattr(self, 'background_reports', {}):
+            return
+        
+        filename, success_text, empty_text = self.background_reports[job.id]
+        if not job.done:
+            self.status_message.setText(f"{job.message}: {filename} ({job.progress}%)")
+            return
+        
+        del self.background_reports[job.id]
+        self.status_message.setText("Sistema listo")
+        if job.status == 'COMPLETADO' and job.rows_exported:
+            QMessageBox.information(self, "Éxito", f"{success_text}: {filename}")
+        elif job.status == 'COMPLETADO':
+            QMessageBox.information(self, "Info", empty_text)
+        elif job.status == 'ERROR':
+            QMessageBox.warning(self, "Error", f"Error exportando {filename}: {job.error}")
+    
     def generate_low_stock_report(self):
         """Generar reporte de productos con stock bajo"""
         try:
@@ -1521,8 +1534,7 @@ class MainWindow(QMainWindow):
                 # - Imprimir ticket
                 # - Actualizar dashboard
                 
-                # Simular actualización de datos
-                QTimer.singleShot(1000, self.refresh_all_data)
+                # Los paneles se actualizan con el aviso de la venta confirmada
             else:
                 self.status_message.setText("Venta cancelada")
                 
@@ -187,6 +187,10 @@ class AdminWidget(QWidget):
         vacuum_btn.clicked.connect(self.vacuum_database)
         actions_layout.addWidget(vacuum_btn)
         
+        query_report_btn = QPushButton("📈 Consultas SQL")
+        query_report_btn.clicked.connect(self.show_query_report)
+        actions_layout.addWidget(query_report_btn)
+        
         refresh_system_btn = QPushButton("🔄 Actualizar Info")
         refresh_system_btn.clicked.connect(self.refresh_system_info)
         actions_layout.addWidget(refresh_system_btn)
@@ -627,6 +631,54 @@ Estado de la Base de Datos:
         if reply == QMessageBox.Yes:
             QMessageBox.information(self, "Limpieza", "Base de datos limpiada exitosamente")
     
+    def show_query_report(self):
+        """Mostrar estadísticas de consultas SQL por sentencia"""
+        db_manager = self.managers.get('database') or self.managers.get('db')
+        if not db_manager or not hasattr(db_manager, 'query_stats'):
+            QMessageBox.warning(self, "Consultas SQL", "Gestor de base de datos no disponible")
+            return
+        
+        stats = db_manager.query_stats
+        if not stats.enabled:
+            reply = QMessageBox.question(
+                self, "Consultas SQL",
+                "La instrumentación de consultas está desactivada.\n¿Desea activarla ahora?"
+            )
+            if reply == QMessageBox.Yes:
+                stats.enable()
+            return
+        
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Estadísticas de Consultas SQL")
+        dialog.resize(1000, 600)
+        layout = QVBoxLayout(dialog)
+        
+        report_text = QTextEdit()
+        report_text.setReadOnly(True)
+        report_text.setFont(QFont("Consolas", 9))
+        report_text.setLineWrapMode(QTextEdit.NoWrap)
+        report_text.setPlainText(stats.format_report(limit=50))
+        layout.addWidget(report_text)
+        
+        buttons_layout = QHBoxLayout()
+        reset_btn = QPushButton("Reiniciar")
+        reset_btn.clicked.connect(lambda: (stats.reset(), report_text.setPlainText(stats.format_report(limit=50))))
+        buttons_layout.addWidget(reset_btn)
+        
+        dump_btn = QPushButton("Guardar JSON")
+        dump_btn.clicked.connect(lambda: stats.dump(db_manager.query_stats_dump_path) and
+                                 QMessageBox.information(dialog, "Consultas SQL",
+                                                         f"Guardado en {db_manager.query_stats_dump_path}"))
+        buttons_layout.addWidget(dump_btn)
+        buttons_layout.addStretch()
+        
+        close_btn = QPushButton("Cerrar")
+        close_btn.clicked.connect(dialog.accept)
+        buttons_layout.addWidget(close_btn)
+        layout.addLayout(buttons_layout)
+        
+        dialog.exec_()
+    
     def load_configurations(self):
         """Cargar configuraciones actuales"""
         # TODO: Implementar carga desde base de datos
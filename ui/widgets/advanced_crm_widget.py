@@ -16,12 +16,14 @@ from PyQt5.QtWidgets import (
     QHeaderView, QMessageBox, QDialog, QDialogButtonBox,
     QScrollArea, QTreeWidget, QTreeWidgetItem, QSlider
 )
-from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QDate, QThread
+from PyQt5.QtCore import Qt, pyqtSignal, QDate, QThread
 from PyQt5.QtGui import QFont, QColor, QPalette, QIcon
 
 from ...managers.advanced_customer_manager import AdvancedCustomerManager, CustomerSegment
 from ...utils.formatters import NumberFormatter, DateFormatter, TextFormatter, StatusFormatter
 from ...utils.exporters import ExcelExporter, PDFExporter, CSVExporter
+from .async_loader import AsyncLoader
+from .change_watcher import ChangeWatcher, change_bus_of
 
 logger = logging.getLogger(__name__)
 
@@ -347,9 +349,12 @@ class AdvancedCRMWidget(QWidget):
         # Inicializar CRM manager
         self.crm_manager = AdvancedCustomerManager(database_manager)
         
+        # Las consultas corren fuera del hilo de la interfaz; en pausa mientras no se ve
+        self.loader = AsyncLoader(self)
+        
         self.setup_ui()
         self.setup_connections()
-        self.setup_timer()
+        self.setup_change_watcher()
         self.load_data()
     
     def setup_ui(self):
@@ -849,11 +854,14 @@ class AdvancedCRMWidget(QWidget):
         # Soporte
         self.new_ticket_btn.clicked.connect(self.create_support_ticket)
     
-    def setup_timer(self):
-        """Configurar timer para actualizaciones automáticas"""
-        self.update_timer = QTimer()
-        self.update_timer.timeout.connect(self.refresh_data)
-        self.update_timer.start(300000)  # Actualizar cada 5 minutos
+    def setup_change_watcher(self):
+        """Actualizar cuando cambian clientes o ventas (en lugar de cada 5 minutos)"""
+        self.change_watcher = ChangeWatcher(change_bus_of(self.db_manager), ('clientes', 'ventas'),
+                                            self.on_data_changed, self)
+    
+    def on_data_changed(self, changes: Dict):
+        """Recargar el resumen del CRM"""
+        self.load_dashboard_data()
     
     def load_data(self):
         """Cargar todos los datos"""
@@ -864,10 +872,12 @@ class AdvancedCRMWidget(QWidget):
         self.load_support_data()
     
     def load_dashboard_data(self):
-        """Cargar datos del dashboard"""
+        """Pedir datos del dashboard"""
+        self.loader.submit('dashboard', self.crm_manager.get_crm_dashboard_data, self.show_dashboard_data)
+    
+    def show_dashboard_data(self, dashboard_data: Dict):
+        """Mostrar datos del dashboard"""
         try:
-            dashboard_data = self.crm_manager.get_crm_dashboard_data()
-            
             if "error" in dashboard_data:
                 logger.error(f"Error cargando dashboard: {dashboard_data['error']}")
                 return
@@ -938,10 +948,20 @@ class AdvancedCRMWidget(QWidget):
         dialog.exec_()
     
     def analyze_churn(self):
-        """Analizar riesgo de churn"""
+        """Pedir el análisis de riesgo de churn (los resultados se muestran al terminar)"""
+        self.churn_btn.setEnabled(False)
+        self.loader.submit('churn', self.crm_manager.predict_customer_churn, self.show_churn_results,
+                           self.on_churn_failed)
+    
+    def on_churn_failed(self, error: str):
+        """Informar un error del análisis de churn"""
+        self.churn_btn.setEnabled(True)
+        QMessageBox.critical(self, "Error", f"Error analizando churn: {error}")
+    
+    def show_churn_results(self, results: Dict):
+        """Mostrar resultados del análisis de riesgo de churn"""
+        self.churn_btn.setEnabled(True)
         try:
-            results = self.crm_manager.predict_customer_churn()
-            
             if "error" in results:
                 QMessageBox.warning(self, "Error", f"Error en análisis: {results['error']}")
                 return
@@ -11,17 +11,20 @@ from enum import Enum
 
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QTabWidget,
-    QLabel, QLineEdit, QPushButton, QTableWidget, QTableWidgetItem,
+    QLabel, QLineEdit, QPushButton, QTableWidget, QTableWidgetItem, QTableView,
     QComboBox, QSpinBox, QDoubleSpinBox, QTextEdit, QDateEdit,
     QCheckBox, QGroupBox, QSplitter, QFrame, QProgressBar,
     QHeaderView, QMessageBox, QDialog, QDialogButtonBox,
     QCalendarWidget, QSlider, QScrollArea, QTreeWidget, QTreeWidgetItem
 )
-from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QDate, QThread, pyqtSignal as Signal
+from PyQt5.QtCore import Qt, pyqtSignal, QDate, QThread, pyqtSignal as Signal
 from PyQt5.QtGui import QFont, QPalette, QColor, QPixmap, QIcon
 
-from ...utils.formatters import NumberFormatter, DateFormatter, TextFormatter, StatusFormatter
+from ...utils.formatters import NumberFormatter, DateFormatter, TextFormatter
 from ...utils.exporters import ExcelExporter, PDFExporter, CSVExporter
+from .async_loader import AsyncLoader
+from .change_watcher import ChangeWatcher, change_bus_of
+from .table_models import ProductTableModel
 
 logger = logging.getLogger(__name__)
 
@@ -488,9 +491,12 @@ class AdvancedStockWidget(QWidget):
         self.product_manager = product_manager
         self.user_manager = user_manager
         
+        # Las consultas corren fuera del hilo de la interfaz; en pausa mientras no se ve
+        self.loader = AsyncLoader(self)
+        
         self.setup_ui()
         self.setup_connections()
-        self.setup_timer()
+        self.setup_change_watcher()
         self.load_data()
     
     def setup_ui(self):
@@ -664,20 +670,21 @@ class AdvancedStockWidget(QWidget):
         filters_layout.addWidget(self.category_combo)
         
         self.stock_status_combo = QComboBox()
-        self.stock_status_combo.addItems([
-            "Todos", "Con Stock", "Stock Bajo", "Sin Stock", "Stock Crítico"
-        ])
+        for text, stock_filter in [("Todos", None), ("Con Stock", 'con_stock'), ("Stock Bajo", 'bajo'),
+                                   ("Sin Stock", 'sin_stock'), ("Stock Crítico", 'critico')]:
+            self.stock_status_combo.addItem(text, stock_filter)
         filters_layout.addWidget(self.stock_status_combo)
         
         layout.addLayout(filters_layout)
         
-        # Tabla de productos con stock
-        self.products_stock_table = QTableWidget()
-        self.products_stock_table.setColumnCount(8)
-        self.products_stock_table.setHorizontalHeaderLabels([
-            "Código", "Producto", "Categoría", "Stock Actual", 
-            "Stock Mínimo", "Valor Unitario", "Valor Total", "Estado"
-        ])
+        # Tabla de productos con stock: carga por páginas, orden y filtros en la base
+        self.products_stock_model = ProductTableModel(
+            self.product_manager,
+            ['codigo', 'nombre', 'categoria', 'stock_actual', ('stock_minimo', "Stock Mínimo"),
+             ('precio_compra', "Valor Unitario"), 'valor_stock', 'estado'],
+            parent=self, loader=self.loader)
+        self.products_stock_table = QTableView()
+        self.products_stock_table.setModel(self.products_stock_model)
         
         # Configurar tabla
         header = self.products_stock_table.horizontalHeader()
@@ -691,7 +698,9 @@ class AdvancedStockWidget(QWidget):
         header.resizeSection(6, 100)  # Valor total
         
         self.products_stock_table.setAlternatingRowColors(True)
-        self.products_stock_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.products_stock_table.setSelectionBehavior(QTableView.SelectRows)
+        self.products_stock_table.verticalHeader().setVisible(False)
+        header.setSortIndicator(1, Qt.AscendingOrder)
         self.products_stock_table.setSortingEnabled(True)
         
         layout.addWidget(self.products_stock_table)
@@ -851,11 +860,18 @@ class AdvancedStockWidget(QWidget):
         # Ubicaciones
         self.locations_tree.itemSelectionChanged.connect(self.load_location_detail)
     
-    def setup_timer(self):
-        """Configurar timer para actualizaciones automáticas"""
-        self.update_timer = QTimer()
-        self.update_timer.timeout.connect(self.refresh_data)
-        self.update_timer.start(120000)  # Actualizar cada 2 minutos
+    def setup_change_watcher(self):
+        """Actualizar cuando cambian productos o stock (en lugar de consultar cada 2 minutos)"""
+        self.change_watcher = ChangeWatcher(change_bus_of(self.product_manager), ('productos',),
+                                            self.on_data_changed, self)
+    
+    def on_data_changed(self, changes: Dict):
+        """Recargar los paneles que dependen del stock"""
+        self.load_dashboard_data()
+        self.load_products_stock_data()
+        self.load_locations_data()
+        self.load_movements_data()
+        self.load_alerts_data()
     
     def load_data(self):
         """Cargar todos los datos"""
@@ -867,35 +883,43 @@ class AdvancedStockWidget(QWidget):
         self.load_categories()
     
     def load_dashboard_data(self):
-        """Cargar datos del dashboard"""
+        """Pedir datos del dashboard"""
+        self.loader.submit('dashboard', self.collect_dashboard_metrics, self.show_dashboard_metrics)
+        
+        # Stock crítico
+        self.load_critical_stock()
+        
+        # Movimientos recientes
+        self.load_recent_movements()
+    
+    def collect_dashboard_metrics(self) -> Dict:
+        """Consultar las métricas principales (se ejecuta en el pool del loader)"""
+        return {
+            'total_products': self.product_manager.get_products_count(),
+            'stock_value': self.product_manager.get_total_stock_value(),
+            'low_stock_count': self.product_manager.get_low_stock_count(),
+            'no_stock_count': self.product_manager.get_no_stock_count()
+        }
+    
+    def show_dashboard_metrics(self, metrics: Dict):
+        """Mostrar las métricas principales"""
         try:
-            # Métricas principales
-            total_products = self.product_manager.get_products_count()
-            self.total_products_label.setText(str(total_products))
-            
-            stock_value = self.product_manager.get_total_stock_value()
-            self.stock_value_label.setText(NumberFormatter.format_currency(stock_value))
-            
-            low_stock_count = self.product_manager.get_low_stock_count()
-            self.low_stock_label.setText(str(low_stock_count))
-            
-            no_stock_count = self.product_manager.get_no_stock_count()
-            self.no_stock_label.setText(str(no_stock_count))
-            
-            # Stock crítico
-            self.load_critical_stock()
-            
-            # Movimientos recientes
-            self.load_recent_movements()
+            self.total_products_label.setText(str(metrics['total_products']))
+            self.stock_value_label.setText(NumberFormatter.format_currency(metrics['stock_value']))
+            self.low_stock_label.setText(str(metrics['low_stock_count']))
+            self.no_stock_label.setText(str(metrics['no_stock_count']))
             
         except Exception as e:
             logger.error(f"Error cargando dashboard: {e}")
     
     def load_critical_stock(self):
-        """Cargar productos con stock crítico"""
+        """Pedir productos con stock crítico"""
+        self.loader.submit('critical_stock', self.product_manager.get_critical_stock_products,
+                           self.show_critical_stock)
+    
+    def show_critical_stock(self, critical_products: List[Dict]):
+        """Mostrar productos con stock crítico"""
         try:
-            critical_products = self.product_manager.get_critical_stock_products()
-            
             self.critical_stock_table.setRowCount(len(critical_products))
             
             for row, product in enumerate(critical_products):
@@ -927,10 +951,13 @@ class AdvancedStockWidget(QWidget):
             logger.error(f"Error cargando stock crítico: {e}")
     
     def load_recent_movements(self):
-        """Cargar movimientos recientes"""
+        """Pedir movimientos recientes"""
+        self.loader.submit('recent_movements', lambda: self.product_manager.get_recent_stock_movements(limit=10),
+                           self.show_recent_movements)
+    
+    def show_recent_movements(self, recent_movements: List[Dict]):
+        """Mostrar movimientos recientes"""
         try:
-            recent_movements = self.product_manager.get_recent_stock_movements(limit=10)
-            
             self.recent_movements_table.setRowCount(len(recent_movements))
             
             for row, movement in enumerate(recent_movements):
@@ -959,45 +986,23 @@ class AdvancedStockWidget(QWidget):
             logger.error(f"Error cargando movimientos recientes: {e}")
     
     def load_products_stock_data(self):
-        """Cargar datos de stock por producto"""
+        """Cargar datos de stock por producto (primera página; el resto al desplazarse)"""
         try:
-            products_stock = self.product_manager.get_all_products_with_stock()
-            
-            self.products_stock_table.setRowCount(len(products_stock))
-            
-            for row, product in enumerate(products_stock):
-                self.products_stock_table.setItem(row, 0, QTableWidgetItem(product.get('codigo', '')))
-                self.products_stock_table.setItem(row, 1, QTableWidgetItem(product.get('nombre', '')))
-                self.products_stock_table.setItem(row, 2, QTableWidgetItem(product.get('categoria', '')))
-                
-                stock_actual = float(product.get('stock_actual', 0))
-                stock_minimo = float(product.get('stock_minimo', 0))
-                precio_unitario = float(product.get('precio_unitario', 0))
-                valor_total = stock_actual * precio_unitario
-                
-                self.products_stock_table.setItem(row, 3, QTableWidgetItem(f"{stock_actual:,.2f}"))
-                self.products_stock_table.setItem(row, 4, QTableWidgetItem(f"{stock_minimo:,.2f}"))
-                self.products_stock_table.setItem(row, 5, QTableWidgetItem(
-                    NumberFormatter.format_currency(precio_unitario)
-                ))
-                self.products_stock_table.setItem(row, 6, QTableWidgetItem(
-                    NumberFormatter.format_currency(valor_total)
-                ))
-                
-                # Estado del stock
-                estado_item = StatusFormatter.format_stock_status(stock_actual, stock_minimo)
-                self.products_stock_table.setItem(row, 7, estado_item)
+            self.products_stock_model.reload()
                 
         except Exception as e:
             logger.error(f"Error cargando stock de productos: {e}")
     
     def load_locations_data(self):
-        """Cargar datos de ubicaciones"""
+        """Pedir datos de ubicaciones"""
+        self.loader.submit('locations', self.product_manager.get_stock_locations_summary,
+                           self.show_locations_data)
+    
+    def show_locations_data(self, locations: List[Dict]):
+        """Mostrar datos de ubicaciones"""
         try:
             self.locations_tree.clear()
             
-            locations = self.product_manager.get_stock_locations_summary()
-            
             for location_data in locations:
                 location_name = location_data.get('nombre', '')
                 products_count = location_data.get('productos_count', 0)
@@ -1016,19 +1021,21 @@ class AdvancedStockWidget(QWidget):
             logger.error(f"Error cargando ubicaciones: {e}")
     
     def load_location_detail(self):
-        """Cargar detalle de ubicación seleccionada"""
+        """Pedir detalle de ubicación seleccionada"""
+        selected_items = self.locations_tree.selectedItems()
+        if not selected_items:
+            return
+        
+        location_data = selected_items[0].data(0, Qt.UserRole)
+        location_name = location_data.get('nombre', '')
+        
+        # Productos en la ubicación (si se cambia de selección, gana la última)
+        self.loader.submit('location_detail', lambda: self.product_manager.get_products_in_location(location_name),
+                           self.show_location_detail)
+    
+    def show_location_detail(self, products: List[Dict]):
+        """Mostrar detalle de ubicación seleccionada"""
         try:
-            selected_items = self.locations_tree.selectedItems()
-            if not selected_items:
-                return
-            
-            item = selected_items[0]
-            location_data = item.data(0, Qt.UserRole)
-            location_name = location_data.get('nombre', '')
-            
-            # Cargar productos en la ubicación
-            products = self.product_manager.get_products_in_location(location_name)
-            
             self.location_products_table.setRowCount(len(products))
             
             for row, product in enumerate(products):
@@ -1065,13 +1072,15 @@ class AdvancedStockWidget(QWidget):
             logger.error(f"Error cargando detalle de ubicación: {e}")
     
     def load_movements_data(self):
-        """Cargar datos de movimientos"""
+        """Pedir datos de movimientos del período elegido"""
+        date_from = self.date_from.date().toPyDate()
+        date_to = self.date_to.date().toPyDate()
+        self.loader.submit('movements', lambda: self.product_manager.get_stock_movements(date_from, date_to),
+                           self.show_movements_data)
+    
+    def show_movements_data(self, movements: List[Dict]):
+        """Mostrar datos de movimientos"""
         try:
-            date_from = self.date_from.date().toPyDate()
-            date_to = self.date_to.date().toPyDate()
-            
-            movements = self.product_manager.get_stock_movements(date_from, date_to)
-            
             self.movements_table.setRowCount(len(movements))
             
             for row, movement in enumerate(movements):
@@ -1104,15 +1113,20 @@ class AdvancedStockWidget(QWidget):
                 self.movements_table.setItem(row, 7, 
                     QTableWidgetItem(movement.get('observaciones', ''))
                 )
+            
+            # Mantener los filtros de búsqueda y tipo sobre los datos nuevos
+            self.filter_movements()
                 
         except Exception as e:
             logger.error(f"Error cargando movimientos: {e}")
     
     def load_alerts_data(self):
-        """Cargar datos de alertas"""
+        """Pedir datos de alertas"""
+        self.loader.submit('alerts', self.product_manager.get_stock_alerts, self.show_alerts_data)
+    
+    def show_alerts_data(self, alerts: List[Dict]):
+        """Mostrar datos de alertas"""
         try:
-            alerts = self.product_manager.get_stock_alerts()
-            
             self.alerts_table.setRowCount(len(alerts))
             
             for row, alert in enumerate(alerts):
@@ -1152,52 +1166,34 @@ class AdvancedStockWidget(QWidget):
             logger.error(f"Error cargando alertas: {e}")
     
     def load_categories(self):
-        """Cargar categorías para filtro"""
+        """Pedir categorías para filtro"""
+        self.loader.submit('categories', lambda: self.product_manager.db.execute_query("""
+            SELECT id, nombre FROM categorias WHERE activo = 1 ORDER BY nombre
+        """), self.show_categories)
+    
+    def show_categories(self, categories: List[Dict]):
+        """Llenar el filtro de categorías conservando la elegida"""
         try:
-            categories = self.product_manager.get_product_categories()
+            selected = self.category_combo.currentData()
             
+            self.category_combo.blockSignals(True)
             self.category_combo.clear()
-            self.category_combo.addItem("Todas las Categorías")
-            self.category_combo.addItems(categories)
+            self.category_combo.addItem("Todas las Categorías", None)
+            for category in categories:
+                self.category_combo.addItem(category['nombre'], category['id'])
+            self.category_combo.setCurrentIndex(max(0, self.category_combo.findData(selected)))
+            self.category_combo.blockSignals(False)
             
         except Exception as e:
             logger.error(f"Error cargando categorías: {e}")
     
     def filter_products(self):
-        """Filtrar productos según criterios"""
-        search_text = self.search_line.text().lower()
-        category_filter = self.category_combo.currentText()
-        status_filter = self.stock_status_combo.currentText()
-        
-        for row in range(self.products_stock_table.rowCount()):
-            show_row = True
-            
-            # Filtro por búsqueda
-            if search_text:
-                nombre = self.products_stock_table.item(row, 1).text().lower()
-                codigo = self.products_stock_table.item(row, 0).text().lower()
-                if search_text not in nombre and search_text not in codigo:
-                    show_row = False
-            
-            # Filtro por categoría
-            if category_filter != "Todas las Categorías":
-                categoria = self.products_stock_table.item(row, 2).text()
-                if categoria != category_filter:
-                    show_row = False
-            
-            # Filtro por estado de stock
-            if status_filter != "Todos":
-                estado = self.products_stock_table.item(row, 7).text()
-                if status_filter == "Con Stock" and "Sin Stock" in estado:
-                    show_row = False
-                elif status_filter == "Stock Bajo" and "Stock Bajo" not in estado:
-                    show_row = False
-                elif status_filter == "Sin Stock" and "Sin Stock" not in estado:
-                    show_row = False
-                elif status_filter == "Stock Crítico" and "Crítico" not in estado:
-                    show_row = False
-            
-            self.products_stock_table.setRowHidden(row, not show_row)
+        """Filtrar productos según criterios (se resuelven en la consulta)"""
+        self.products_stock_model.set_filters(
+            search_term=self.search_line.text().strip(),
+            category_id=self.category_combo.currentData(),
+            stock_filter=self.stock_status_combo.currentData()
+        )
     
     def filter_movements(self):
         """Filtrar movimientos según criterios"""
@@ -1330,12 +1326,36 @@ class AdvancedStockWidget(QWidget):
             logger.error(f"Error exportando: {e}")
             QMessageBox.critical(self, "Error", f"Error exportando: {str(e)}")
     
+    def _export_products_stock(self):
+        """Exportar todos los productos que cumplen los filtros, no solo las filas cargadas
+
+        Las filas se consultan en el loader y el archivo se escribe al llegar.
+        """
+        self.products_stock_model.load_all(self._write_products_stock, self._products_stock_export_failed)
+    
+    def _write_products_stock(self, rows: List[Dict]):
+        """Escribir el Excel con las filas obtenidas por ``load_all``"""
+        model = self.products_stock_model
+        headers = [column.title for column in model.columns]
+        data = [model.row_text(row) for row in rows]
+        
+        filename = f"stock_products_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+        
+        exporter = ExcelExporter()
+        if exporter.export_table_data(data, headers, filename, "Stock por Producto"):
+            QMessageBox.information(self, "Éxito", f"Datos exportados a {filename}")
+        else:
+            QMessageBox.warning(self, "Advertencia", "Error exportando datos")
+    
+    def _products_stock_export_failed(self, error: str):
+        QMessageBox.critical(self, "Error", f"Error exportando stock por producto: {error}")
+    
     def _export_stock_data(self, data_type):
         """Exportar datos específicos"""
         try:
             if data_type == 'products':
-                table = self.products_stock_table
-                title = "Stock por Producto"
+                self._export_products_stock()
+                return
             elif data_type == 'movements':
                 table = self.movements_table
                 title = "Movimientos de Stock"
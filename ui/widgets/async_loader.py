@@ -0,0 +1,192 @@
+"""
+Carga de datos fuera del hilo de la interfaz
+Los widgets envían sus funciones de carga (consultas a los managers) a un pool
+de hilos compartido y reciben el resultado por señal en el hilo de la
+interfaz, así los timers de actualización no frenan al POS mientras se escanea
+"""
+
+import logging
+from typing import Any, Callable, Dict, Tuple
+
+from PyQt5.QtCore import QCoreApplication, QElapsedTimer, QEvent, QObject, QRunnable, QThreadPool, pyqtSignal
+
+logger = logging.getLogger(__name__)
+
+_shared_pool = None
+
+def shared_pool() -> QThreadPool:
+    """Pool de hilos común a todos los widgets (``ui.loader_threads`` hilos)
+
+    Con pocos hilos, los timers que vencen juntos hacen cola en lugar de
+    competir todos a la vez por las conexiones de lectura.
+    """
+    global _shared_pool
+    if _shared_pool is None:
+        # Import here to avoid circular imports
+        from config.settings import settings
+
+        _shared_pool = QThreadPool()
+        _shared_pool.setMaxThreadCount(max(1, int(settings.get('ui.loader_threads', 2))))
+    return _shared_pool
+
+def shutdown_loaders(timeout_ms: int = 3000) -> bool:
+    """Descartar las cargas en cola y esperar las que están en curso (al cerrar la aplicación)"""
+    if _shared_pool is None:
+        return True
+    _shared_pool.clear()
+    return _shared_pool.waitForDone(timeout_ms)
+
+class _LoadTask(QRunnable):
+    """Ejecuta una función de carga en el pool y avisa al loader con una señal"""
+
+    def __init__(self, loader: 'AsyncLoader', key: str, generation: int, function: Callable[[], Any]):
+        super().__init__()
+        # El loader conserva la tarea hasta recibir el aviso (necesario para tryTake)
+        self.setAutoDelete(False)
+        self.loader = loader
+        self.key = key
+        self.generation = generation
+        self.function = function
+
+    def run(self):
+        if self.loader.current_generation(self.key) != self.generation:
+            ok, payload = False, None  # cancelada antes de empezar
+        else:
+            try:
+                ok, payload = True, self.function()
+            except Exception as e:
+                ok, payload = False, str(e)
+        try:
+            self.loader._finished.emit(self.key, self.generation, ok, payload)
+        except RuntimeError:
+            pass  # el widget dueño del loader ya fue destruido
+
+class AsyncLoader(QObject):
+    """Cola de cargas de un widget sobre el pool compartido
+
+    ``submit(clave, función, callback)`` ejecuta ``función()`` en el pool y
+    llama a ``callback(resultado)`` en el hilo de la interfaz. Mientras hay
+    una carga en curso para una clave, los pedidos nuevos se combinan en uno
+    solo (gana el último) que se ejecuta al terminar la actual.
+
+    Si se pasa ``widget``, la cola se pausa cuando se oculta (por ejemplo al
+    cambiar de pestaña): los resultados en curso se descartan y lo pedido se
+    ejecuta recién cuando el widget vuelve a mostrarse.
+    """
+
+    loaded = pyqtSignal(str, object)
+    failed = pyqtSignal(str, str)
+
+    # Aviso interno desde los hilos del pool (conexión encolada al hilo de la interfaz)
+    _finished = pyqtSignal(str, int, bool, object)
+
+    def __init__(self, widget=None, pool: QThreadPool = None):
+        super().__init__(widget)
+        self.pool = pool or shared_pool()
+        self.active = True
+        self._generations: Dict[str, int] = {}
+        self._running: Dict[str, Tuple[int, _LoadTask, Tuple]] = {}
+        self._pending: Dict[str, Tuple] = {}
+        self._finished.connect(self._on_finished)
+
+        if widget is not None:
+            self.active = widget.isVisible()
+            widget.installEventFilter(self)
+
+    # API
+    def submit(self, key: str, function: Callable[[], Any], callback: Callable[[Any], None] = None,
+               error_callback: Callable[[str], None] = None) -> bool:
+        """Pedir una carga; True si empezó ahora, False si quedó combinada o en espera"""
+        request = (function, callback, error_callback)
+        if not self.active or key in self._running:
+            self._pending[key] = request
+            return False
+        self._start(key, request)
+        return True
+
+    def cancel(self, key: str = None):
+        """Descartar lo pedido para ``key`` (o todo): lo que está en cola se quita y
+        el resultado de lo que ya se está ejecutando se ignora"""
+        keys = [key] if key is not None else list(set(self._running) | set(self._pending))
+        for item in keys:
+            self._pending.pop(item, None)
+            self._discard(item)
+
+    def pause(self):
+        """Dejar de entregar resultados; lo que estaba en curso se vuelve a pedir al reanudar"""
+        self.active = False
+        for key, (_, _, request) in list(self._running.items()):
+            self._pending.setdefault(key, request)
+            self._discard(key)
+
+    def resume(self):
+        """Ejecutar lo que se pidió mientras estaba en pausa"""
+        self.active = True
+        for key in [key for key in self._pending if key not in self._running]:
+            self._start(key, self._pending.pop(key))
+
+    def is_busy(self, key: str = None) -> bool:
+        if key is not None:
+            return key in self._running
+        return bool(self._running)
+
+    def current_generation(self, key: str) -> int:
+        return self._generations.get(key, 0)
+
+    def wait_idle(self, timeout_ms: int = 5000) -> bool:
+        """Procesar eventos hasta entregar todas las cargas (scripts y pruebas; no usar en la interfaz)"""
+        timer = QElapsedTimer()
+        timer.start()
+        while self._running or (self.active and self._pending):
+            if timer.elapsed() > timeout_ms:
+                return False
+            QCoreApplication.processEvents()
+            self.pool.waitForDone(10)
+        QCoreApplication.processEvents()
+        return True
+
+    # Internos
+    def _start(self, key: str, request: Tuple):
+        generation = self.current_generation(key) + 1
+        self._generations[key] = generation
+        task = _LoadTask(self, key, generation, request[0])
+        self._running[key] = (generation, task, request)
+        self.pool.start(task)
+
+    def _discard(self, key: str):
+        self._generations[key] = self.current_generation(key) + 1
+        running = self._running.get(key)
+        if running and self.pool.tryTake(running[1]):
+            del self._running[key]
+
+    def _on_finished(self, key: str, generation: int, ok: bool, payload: Any):
+        running = self._running.get(key)
+        if running and running[0] == generation:
+            del self._running[key]
+            if self.active and generation == self.current_generation(key):
+                self._deliver(key, running[2], ok, payload)
+
+        if self.active and key in self._pending and key not in self._running:
+            self._start(key, self._pending.pop(key))
+
+    def _deliver(self, key: str, request: Tuple, ok: bool, payload: Any):
+        _, callback, error_callback = request
+        try:
+            if ok:
+                self.loaded.emit(key, payload)
+                if callback:
+                    callback(payload)
+            else:
+                logger.error(f"Error cargando '{key}': {payload}")
+                self.failed.emit(key, str(payload))
+                if error_callback:
+                    error_callback(str(payload))
+        except Exception as e:
+            logger.error(f"Error mostrando '{key}': {e}")
+
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Show:
+            self.resume()
+        elif event.type() == QEvent.Hide:
+            self.pause()
+        return False
@@ -0,0 +1,124 @@
+"""
+Actualización de widgets guiada por cambios de datos
+Reemplaza los timers de intervalo fijo: el widget se suscribe a las tablas
+que muestra y solo vuelve a consultar cuando alguna cambió, agrupando los
+cambios de una ráfaga (por ejemplo, varias ventas seguidas) y esperando a
+que el widget esté visible
+"""
+
+import logging
+from typing import Callable, Dict, Iterable
+
+from PyQt5.QtCore import QEvent, QObject, QTimer, pyqtSignal
+
+from database.change_events import ANY_TABLE, ChangeBus, ChangeEvent, merge_events
+
+logger = logging.getLogger(__name__)
+
+def change_bus_of(*sources):
+    """Bus de cambios de la primera base disponible (DatabaseManager o manager con ``db``)"""
+    for source in sources:
+        for candidate in (source, getattr(source, 'db', None)):
+            bus = getattr(candidate, 'changes', None)
+            if isinstance(bus, ChangeBus):
+                return bus
+    return None
+
+def touches(changes: Dict[str, set], *tables: str) -> bool:
+    """Indica si un lote de cambios afecta alguna de las tablas (o es de origen desconocido)"""
+    return ANY_TABLE in changes or any(table in changes for table in tables)
+
+class ChangeWatcher(QObject):
+    """Suscripción de un widget a cambios en ciertas tablas
+
+    Los eventos llegan desde el hilo que publicó y se reenvían al hilo de la
+    interfaz. El primero abre una ventana de ``debounce_ms`` (``ui.change_debounce_ms``);
+    al cerrarse se llama a ``callback({tabla: ids})`` una sola vez con todo lo
+    acumulado. Con el widget oculto los cambios se guardan y se entregan al mostrarlo.
+    """
+
+    changed = pyqtSignal(dict)
+
+    # Evento recibido desde cualquier hilo (conexión encolada al hilo de la interfaz)
+    _received = pyqtSignal(object)
+
+    def __init__(self, bus, tables: Iterable[str], callback: Callable[[Dict[str, set]], None] = None,
+                 widget=None, debounce_ms: int = None):
+        super().__init__(widget)
+        if debounce_ms is None:
+            # Import here to avoid circular imports
+            from config.settings import settings
+            debounce_ms = settings.get('ui.change_debounce_ms', 1500)
+
+        self.bus = bus
+        self.tables = tuple(tables)
+        self.callback = callback
+        self.active = widget.isVisible() if widget is not None else True
+        self._events = []
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(int(debounce_ms))
+        self._timer.timeout.connect(self.flush)
+        self._received.connect(self._queue)
+
+        self.start()
+        if bus is not None:
+            self.destroyed.connect(lambda: bus.unsubscribe(self._on_event))
+        if widget is not None:
+            widget.installEventFilter(self)
+
+    def start(self):
+        """Suscribirse (se hace al crear el watcher; después de ``stop`` la reanuda)"""
+        if self.bus is not None:
+            self.bus.subscribe(self._on_event, self.tables)
+
+    def stop(self):
+        """Cancelar la suscripción y descartar lo acumulado"""
+        if self.bus is not None:
+            self.bus.unsubscribe(self._on_event)
+        self._timer.stop()
+        self._events = []
+
+    def set_debounce(self, debounce_ms: int):
+        """Cambiar la espera para agrupar cambios"""
+        self._timer.setInterval(int(debounce_ms))
+
+    def has_pending(self) -> bool:
+        return bool(self._events)
+
+    def flush(self):
+        """Entregar ya los cambios acumulados"""
+        self._timer.stop()
+        if not self._events:
+            return
+        changes = merge_events(self._events)
+        self._events = []
+        self.changed.emit(changes)
+        if self.callback:
+            try:
+                self.callback(changes)
+            except Exception as e:
+                logger.error(f"Error actualizando por cambios en {sorted(changes)}: {e}")
+
+    # Internos
+    def _on_event(self, event: ChangeEvent):
+        try:
+            self._received.emit(event)
+        except RuntimeError:
+            self.bus.unsubscribe(self._on_event)  # el widget ya fue destruido
+
+    def _queue(self, event: ChangeEvent):
+        self._events.append(event)
+        if self.active and not self._timer.isActive():
+            self._timer.start()
+
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Show:
+            self.active = True
+            if self._events and not self._timer.isActive():
+                self._timer.start()
+        elif event.type() == QEvent.Hide:
+            self.active = False
+            self._timer.stop()
+        return False
@@ -10,6 +10,9 @@ from PyQt5.QtGui import *
 from datetime import datetime, date
 from typing import Dict, List, Optional
 
+from ui.widgets.change_watcher import ChangeWatcher, change_bus_of
+from ui.widgets.table_models import CustomerTableModel
+
 logger = logging.getLogger(__name__)
 
 class CustomersWidget(QWidget):
@@ -21,12 +24,15 @@ class CustomersWidget(QWidget):
         self.managers = managers
         self.customer_manager = managers.get('customer_manager')
         self.current_customer = None
-        self.customers_data = []
         
         self.init_ui()
         self.setup_connections()
         self.load_customers()
         self.load_dashboard()
+        
+        # Recargar cuando cambian clientes o ventas (y el widget está visible)
+        self.change_watcher = ChangeWatcher(change_bus_of(self.customer_manager), ('clientes', 'ventas'),
+                                            lambda changes: self.refresh_data(), self)
     
     def init_ui(self):
         """Inicializar interfaz de usuario"""
@@ -111,7 +117,8 @@ class CustomersWidget(QWidget):
         # Filtro por categoría
         toolbar_layout.addWidget(QLabel("Categoría:"))
         self.category_combo = QComboBox()
-        self.category_combo.addItem("Todas las categorías", "")\n        if self.customer_manager:
+        self.category_combo.addItem("Todas las categorías", "")
+        if self.customer_manager:
             for category in self.customer_manager.CUSTOMER_CATEGORIES:
                 self.category_combo.addItem(category, category)
         self.category_combo.currentTextChanged.connect(self.filter_customers)
@@ -120,7 +127,9 @@ class CustomersWidget(QWidget):
         # Filtro por actividad
         toolbar_layout.addWidget(QLabel("Estado:"))
         self.status_combo = QComboBox()
-        self.status_combo.addItems(["Todos", "Activos", "Con Deuda", "Inactivos"])
+        for text, status in [("Todos", None), ("Activos", 'activos'),
+                             ("Con Deuda", 'con_deuda'), ("Inactivos", 'inactivos')]:
+            self.status_combo.addItem(text, status)
         self.status_combo.currentTextChanged.connect(self.filter_customers)
         toolbar_layout.addWidget(self.status_combo)
         
@@ -132,13 +141,10 @@ class CustomersWidget(QWidget):
         
         layout.addLayout(toolbar_layout)
         
-        # Tabla de clientes
-        self.customers_table = QTableWidget()
-        self.customers_table.setColumnCount(8)
-        self.customers_table.setHorizontalHeaderLabels([
-            "ID", "Nombre", "Email", "Teléfono", "Categoría", 
-            "Límite Crédito", "Saldo", "Última Compra"
-        ])
+        # Tabla de clientes: carga por páginas, orden y filtros en la base
+        self.customers_model = CustomerTableModel(self.customer_manager, parent=self)
+        self.customers_table = QTableView()
+        self.customers_table.setModel(self.customers_model)
         
         # Configurar tabla
         header = self.customers_table.horizontalHeader()
@@ -148,8 +154,12 @@ class CustomersWidget(QWidget):
         
         self.customers_table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.customers_table.setAlternatingRowColors(True)
+        self.customers_table.verticalHeader().setVisible(False)
         self.customers_table.doubleClicked.connect(self.open_customer_details)
-        self.customers_table.itemSelectionChanged.connect(self.on_customer_selected)
+        self.customers_table.selectionModel().selectionChanged.connect(self.on_customer_selected)
+        if self.customer_manager:
+            header.setSortIndicator(1, Qt.AscendingOrder)
+            self.customers_table.setSortingEnabled(True)
         
         layout.addWidget(self.customers_table)
         
@@ -376,47 +386,22 @@ class CustomersWidget(QWidget):
         self.new_customer_btn.clicked.connect(self.create_new_customer)
     
     def load_customers(self):
-        """Cargar lista de clientes"""
+        """Cargar lista de clientes (primera página; el resto al desplazarse)"""
         if not self.customer_manager:
             return
         
         try:
-            self.customers_data = self.customer_manager.get_all_customers()
-            self.populate_customers_table(self.customers_data)
-            self.update_status(f"Clientes cargados: {len(self.customers_data)}")
+            self.customers_model.set_filters(
+                search_term=self.search_input.text().strip(),
+                category=self.category_combo.currentData() or None,
+                status=self.status_combo.currentData()
+            )
+            self.update_status(f"Clientes cargados: {self.customers_model.rowCount()}")
             
         except Exception as e:
             logger.error(f"Error cargando clientes: {e}")
             self.show_error("Error", f"No se pudieron cargar los clientes: {str(e)}")
     
-    def populate_customers_table(self, customers: List[Dict]):
-        """Poblar tabla de clientes"""
-        self.customers_table.setRowCount(len(customers))
-        
-        for row, customer in enumerate(customers):
-            self.customers_table.setItem(row, 0, QTableWidgetItem(str(customer.get('id', ''))))
-            self.customers_table.setItem(row, 1, QTableWidgetItem(
-                f"{customer.get('nombre', '')} {customer.get('apellido', '')}"
-            ))
-            self.customers_table.setItem(row, 2, QTableWidgetItem(customer.get('email', '')))
-            self.customers_table.setItem(row, 3, QTableWidgetItem(customer.get('telefono', '')))
-            self.customers_table.setItem(row, 4, QTableWidgetItem(customer.get('categoria_cliente', '')))
-            
-            # Formatear montos
-            limite = float(customer.get('limite_credito', 0))
-            saldo = float(customer.get('saldo_cuenta_corriente', 0))
-            
-            self.customers_table.setItem(row, 5, QTableWidgetItem(f"${limite:.2f}"))
-            
-            # Colorear saldo según deuda
-            saldo_item = QTableWidgetItem(f"${saldo:.2f}")
-            if saldo > 0:
-                saldo_item.setBackground(QColor("#ffebee"))  # Rojo claro para deuda
-            self.customers_table.setItem(row, 6, saldo_item)
-            
-            # Última compra (placeholder)
-            self.customers_table.setItem(row, 7, QTableWidgetItem("N/A"))
-    
     def load_dashboard(self):
         """Cargar datos del dashboard"""
         if not self.customer_manager:
@@ -467,25 +452,10 @@ class CustomersWidget(QWidget):
     
     def search_customers(self):
         """Buscar clientes"""
-        search_term = self.search_input.text().strip()
-        
-        if not self.customer_manager:
-            return
-        
-        try:
-            if search_term:
-                filtered_customers = self.customer_manager.search_customers(search_term)
-            else:
-                filtered_customers = self.customers_data
-                
-            self.populate_customers_table(filtered_customers)
-            
-        except Exception as e:
-            logger.error(f"Error buscando clientes: {e}")
+        self.load_customers()
     
     def filter_customers(self):
         """Filtrar clientes por categoría y estado"""
-        # Implementar filtros
         self.load_customers()
     
     def on_customer_selected(self):
@@ -498,9 +468,7 @@ class CustomersWidget(QWidget):
         self.add_note_btn.setEnabled(has_selection)
         
         if has_selection:
-            row = selected_rows[0].row()
-            customer_id = int(self.customers_table.item(row, 0).text())
-            customer = next((c for c in self.customers_data if c['id'] == customer_id), None)
+            customer = self.customers_model.row_at(selected_rows[0].row())
             
             if customer:
                 # Habilitar botón de pago solo si tiene deuda
@@ -609,7 +577,7 @@ class CustomersWidget(QWidget):
         if reply == QMessageBox.Yes:
             try:
                 updated_count = 0
-                for customer in self.customers_data:
+                for customer in self.customer_manager.get_all_customers():
                     if self.customer_manager.update_customer_category_auto(customer['id']):
                         updated_count += 1
                 
@@ -4,13 +4,28 @@ Panel ejecutivo con métricas, estadísticas y información del sistema en tiemp
 """
 
 import logging
-from datetime import datetime, date, timedelta
+from datetime import datetime
 from PyQt5.QtWidgets import *
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 
+from managers.dashboard_metrics import DashboardMetricsService
+from managers.permission_resolver import user_permissions
+from ui.widgets.async_loader import AsyncLoader
+from ui.widgets.change_watcher import ChangeWatcher, change_bus_of, touches
+
 logger = logging.getLogger(__name__)
 
+# Paneles del dashboard: tablas de las que dependen y métricas que muestran
+DASHBOARD_SECTIONS = {
+    'ventas': (('ventas',), ('ventas_hoy', 'meta_mes')),
+    'productos': (('productos',), ('total_productos', 'stock_bajo')),
+    'clientes': (('clientes', 'ventas'), ('clientes_activos', 'utilidad_mes'))
+}
+
+# Permiso necesario para ver cada panel
+SECTION_PERMISSIONS = {'ventas': 'ventas', 'productos': 'productos', 'clientes': 'reportes'}
+
 class DashboardWidget(QWidget):
     """Widget principal del dashboard ejecutivo"""
     
@@ -19,18 +34,26 @@ class DashboardWidget(QWidget):
         
         self.managers = managers
         self.current_user = current_user
+        self.permission_resolver = getattr(managers.get('user'), 'permissions', None)
         
         # Datos del dashboard
         self.dashboard_data = {}
         self.metric_widgets = {}  # Para actualizar los widgets después
         
+        # Las consultas corren fuera del hilo de la interfaz; en pausa mientras no se ve
+        self.loader = AsyncLoader(self)
+        
+        # Indicadores calculados con consultas de agregación en la base
+        self.metrics_service = self.managers.get('dashboard_metrics') or self.build_metrics_service()
+        
         self.init_ui()
         self.load_dashboard_data()
         
-        # Timer para actualización automática
-        self.refresh_timer = QTimer()
-        self.refresh_timer.timeout.connect(self.refresh_data)
-        self.refresh_timer.start(300000)  # 5 minutos
+        # Actualización por cambios de datos (solo los paneles afectados) en lugar de cada 5 minutos
+        tables = {table for section_tables, _ in DASHBOARD_SECTIONS.values() for table in section_tables}
+        self.change_watcher = ChangeWatcher(
+            change_bus_of(*(self.managers.get(name) for name in ('sales', 'product', 'customer'))),
+            tables, self.on_data_changed, self)
     
     def init_ui(self):
         """Inicializar interfaz de usuario"""
@@ -303,94 +326,53 @@ class DashboardWidget(QWidget):
     
     def user_has_permission(self, permission: str) -> bool:
         """Verificar permisos del usuario actual"""
-        user_permissions = self.current_user.get('permisos', [])
-        if isinstance(user_permissions, str):
-            user_permissions = user_permissions.split(',') if user_permissions else []
-        user_permissions = [p.strip() for p in user_permissions if p.strip()]
-        return permission in user_permissions or '*' in user_permissions
+        return user_permissions(self.current_user, self.permission_resolver).allows(permission)
+    
+    def load_dashboard_data(self, sections=None):
+        """Pedir los datos de los paneles indicados (todos por defecto); se muestran al llegar"""
+        for section in sections or DASHBOARD_SECTIONS:
+            self.loader.submit(f'dashboard:{section}', lambda section=section: self.collect_dashboard_data((section,)),
+                               self.on_dashboard_data_loaded)
     
-    def load_dashboard_data(self):
-        """Cargar datos del dashboard"""
+    def on_data_changed(self, changes: dict):
+        """Volver a consultar solo los paneles que dependen de las tablas modificadas"""
+        sections = [section for section, (tables, _) in DASHBOARD_SECTIONS.items() if touches(changes, *tables)]
+        if sections:
+            self.load_dashboard_data(sections)
+    
+    def build_metrics_service(self):
+        """Servicio de métricas sobre la base de los managers recibidos (si no se registró uno)"""
+        db = self.managers.get('database')
+        for name in ('sales', 'product', 'customer'):
+            if db is None:
+                db = getattr(self.managers.get(name), 'db', None)
+        return DashboardMetricsService(db) if db is not None else None
+    
+    def collect_dashboard_data(self, sections=tuple(DASHBOARD_SECTIONS)) -> dict:
+        """Consultar los datos de los paneles indicados (se ejecuta en el pool del loader)"""
+        dashboard_data = {}
         try:
-            self.dashboard_data = {}
-            
-            # Datos de ventas
-            if 'sales' in self.managers and self.user_has_permission('ventas'):
-                try:
-                    today_sales = self.managers['sales'].get_sales_by_date(date.today())
-                    ventas_hoy = sum(float(sale.get('total', 0)) for sale in today_sales or [])
-                    self.dashboard_data['ventas_hoy'] = ventas_hoy
-                    
-                    # Meta del mes (ejemplo: comparar con mes anterior)
-                    current_month_start = date.today().replace(day=1)
-                    monthly_sales = self.managers['sales'].get_sales_by_date_range(current_month_start, date.today())
-                    monthly_total = sum(float(sale.get('total', 0)) for sale in monthly_sales or [])
-                    # Meta arbitraria del 20% más que el mes pasado
-                    meta_mes = monthly_total * 1.2 
-                    progress = (monthly_total / meta_mes * 100) if meta_mes > 0 else 0
-                    self.dashboard_data['meta_mes'] = progress
-                except Exception as e:
-                    logger.warning(f"Error cargando datos de ventas: {e}")
-                    self.dashboard_data['ventas_hoy'] = 0
-                    self.dashboard_data['meta_mes'] = 0
-            
-            # Datos de productos
-            if 'product' in self.managers and self.user_has_permission('productos'):
-                try:
-                    all_products = self.managers['product'].search_products('') or []
-                    self.dashboard_data['total_productos'] = len(all_products)
-                    
-                    # Productos con stock bajo
-                    low_stock_products = [p for p in all_products 
-                                        if float(p.get('stock_actual', 0)) <= float(p.get('stock_minimo', 0))]
-                    self.dashboard_data['stock_bajo'] = len(low_stock_products)
-                except Exception as e:
-                    logger.warning(f"Error cargando datos de productos: {e}")
-                    self.dashboard_data['total_productos'] = 0
-                    self.dashboard_data['stock_bajo'] = 0
-            
-            # Datos de clientes
-            if 'customer' in self.managers and self.user_has_permission('reportes'):
-                try:
-                    all_customers = self.managers['customer'].get_all_customers() or []
-                    self.dashboard_data['clientes_activos'] = len(all_customers)
-                    
-                    # Utilidad del mes (diferencia entre ventas y costos)
-                    if 'sales' in self.managers:
-                        current_month_start = date.today().replace(day=1)
-                        monthly_sales = self.managers['sales'].get_sales_by_date_range(current_month_start, date.today())
-                        utilidad = sum(float(sale.get('total', 0)) * 0.3 for sale in monthly_sales or [])  # Asumiendo 30% de margen
-                        self.dashboard_data['utilidad_mes'] = utilidad
-                    else:
-                        self.dashboard_data['utilidad_mes'] = 0
-                except Exception as e:
-                    logger.warning(f"Error cargando datos de clientes: {e}")
-                    self.dashboard_data['clientes_activos'] = 0
-                    self.dashboard_data['utilidad_mes'] = 0
-            
-            # Valores por defecto para datos faltantes
-            default_values = {
-                'ventas_hoy': 0,
-                'meta_mes': 0, 
-                'total_productos': 0,
-                'stock_bajo': 0,
-                'clientes_activos': 0,
-                'utilidad_mes': 0
-            }
-            
-            for key, default_value in default_values.items():
-                if key not in self.dashboard_data:
-                    self.dashboard_data[key] = default_value
-                    
-            logger.info("Datos del dashboard cargados")
-            
+            allowed = [section for section in sections if self.user_has_permission(SECTION_PERMISSIONS[section])]
+            if allowed and self.metrics_service:
+                dashboard_data.update(self.metrics_service.get_metrics(allowed))
+            logger.debug(f"Datos del dashboard cargados: {', '.join(allowed)}")
         except Exception as e:
             logger.error(f"Error cargando datos del dashboard: {e}")
+        
+        # Valores por defecto para datos faltantes
+        for section in sections:
+            for key in DASHBOARD_SECTIONS[section][1]:
+                dashboard_data.setdefault(key, 0)
+        return dashboard_data
+    
+    def on_dashboard_data_loaded(self, dashboard_data: dict):
+        """Mostrar los datos recibidos del loader (solo cambian las métricas recibidas)"""
+        self.dashboard_data.update(dashboard_data)
+        self.update_metric_widgets()
     
     def refresh_data(self):
         """Actualizar datos del dashboard"""
         self.load_dashboard_data()
-        self.update_metric_widgets()
     
     def update_metric_widgets(self):
         """Actualizar los widgets de métricas con los datos actuales"""
@@ -17,11 +17,13 @@ from PyQt5.QtWidgets import (
     QHeaderView, QMessageBox, QDialog, QDialogButtonBox,
     QCalendarWidget, QSlider, QScrollArea
 )
-from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QDate, QThread, pyqtSignal as Signal, QRect
+from PyQt5.QtCore import Qt, pyqtSignal, QDate, QThread, pyqtSignal as Signal, QRect
 from PyQt5.QtGui import QFont, QPalette, QColor, QPixmap, QIcon, QPainter, QPen
 
 from ...utils.formatters import NumberFormatter, DateFormatter, TextFormatter, StatusFormatter
 from ...utils.exporters import ExcelExporter, PDFExporter, CSVExporter
+from .async_loader import AsyncLoader
+from .change_watcher import ChangeWatcher, change_bus_of, touches
 
 logger = logging.getLogger(__name__)
 
@@ -294,9 +296,12 @@ class ExecutiveDashboardWidget(QWidget):
         self.current_period = "month"
         self.kpi_data = {}
         
+        # Las consultas corren fuera del hilo de la interfaz; en pausa mientras no se ve
+        self.loader = AsyncLoader(self)
+        
         self.setup_ui()
         self.setup_connections()
-        self.setup_timer()
+        self.setup_change_watcher()
         self.load_data()
     
     def setup_ui(self):
@@ -699,105 +704,142 @@ class ExecutiveDashboardWidget(QWidget):
         # Proyecciones
         self.calculate_projection_btn.clicked.connect(self.calculate_projections)
     
-    def setup_timer(self):
-        """Configurar timer para actualizaciones automáticas"""
-        self.update_timer = QTimer()
-        self.update_timer.timeout.connect(self.refresh_data)
-        self.update_timer.start(300000)  # Actualizar cada 5 minutos
+    def setup_change_watcher(self):
+        """Actualizar cuando cambian ventas, productos o clientes (en lugar de cada 5 minutos)"""
+        bus = change_bus_of(self.sales_manager, self.product_manager, self.customer_manager)
+        self.change_watcher = ChangeWatcher(bus, ('ventas', 'productos', 'clientes'), self.on_data_changed, self)
+    
+    def on_data_changed(self, changes: Dict):
+        """Recargar solo las secciones afectadas por los cambios"""
+        self.load_kpis_data()
+        if touches(changes, 'ventas'):
+            self.update_sales_analysis()
+        if touches(changes, 'ventas', 'productos'):
+            self.update_products_analysis()
+        if touches(changes, 'ventas', 'clientes'):
+            self.load_customers_data()
+        self.generate_intelligent_alerts()
     
     def load_data(self):
-        """Cargar todos los datos del dashboard"""
+        """Pedir todos los datos del dashboard (cada sección se muestra al llegar)"""
         self.load_kpis_data()
         self.update_sales_analysis()
         self.update_products_analysis()
         self.load_customers_data()
         self.generate_intelligent_alerts()
-        
-        # Actualizar timestamp
-        self.last_update = datetime.now()
-        self.status_label.setText(f"Última actualización: {self.last_update.strftime('%H:%M:%S')}")
     
     def load_kpis_data(self):
-        """Cargar datos de KPIs principales"""
+        """Pedir datos de KPIs principales"""
+        period_data = self.get_period_data()
+        self.loader.submit('kpis', lambda: self.collect_kpis_data(period_data), self.show_kpis_data)
+        
+        # Cargar gráfico de ventas diarias
+        self.load_daily_sales_chart()
+    
+    def collect_kpis_data(self, period_data: Dict) -> Dict:
+        """Consultar los KPIs principales (se ejecuta en el pool del loader)"""
+        kpis = {}
+        
+        # KPIs de ventas
+        if self.sales_manager:
+            revenue = self.sales_manager.get_revenue_by_period(period_data['start'], period_data['end'])
+            sales_count = self.sales_manager.get_sales_count_by_period(period_data['start'], period_data['end'])
+            kpis['revenue'] = revenue
+            kpis['sales_count'] = sales_count
+            kpis['avg_sale'] = revenue / sales_count if sales_count > 0 else 0
+            kpis['margin'] = self.sales_manager.get_profit_margin_by_period(period_data['start'], period_data['end'])
+        
+        # KPIs de inventario
+        if self.product_manager:
+            kpis['stock_value'] = self.product_manager.get_total_stock_value()
+            kpis['products_sold'] = self.product_manager.get_products_sold_by_period(period_data['start'], period_data['end'])
+        
+        # KPIs de clientes
+        if self.customer_manager:
+            kpis['active_customers'] = self.customer_manager.get_active_customers_by_period(period_data['start'], period_data['end'])
+        
+        # Pedidos pendientes (simulado)
+        kpis['pending_orders'] = 5  # Placeholder
+        return kpis
+    
+    def show_kpis_data(self, kpis: Dict):
+        """Mostrar los KPIs principales"""
         try:
-            period_data = self.get_period_data()
+            self.kpi_data = kpis
             
-            # KPIs de ventas
-            if self.sales_manager:
-                revenue = self.sales_manager.get_revenue_by_period(period_data['start'], period_data['end'])
-                sales_count = self.sales_manager.get_sales_count_by_period(period_data['start'], period_data['end'])
-                avg_sale = revenue / sales_count if sales_count > 0 else 0
-                margin = self.sales_manager.get_profit_margin_by_period(period_data['start'], period_data['end'])
-                
-                self.revenue_kpi.update_value(NumberFormatter.format_currency(revenue))
-                self.sales_count_kpi.update_value(str(sales_count))
-                self.avg_sale_kpi.update_value(NumberFormatter.format_currency(avg_sale))
-                self.margin_kpi.update_value(f"{margin:.1f}%")
+            if 'revenue' in kpis:
+                self.revenue_kpi.update_value(NumberFormatter.format_currency(kpis['revenue']))
+                self.sales_count_kpi.update_value(str(kpis['sales_count']))
+                self.avg_sale_kpi.update_value(NumberFormatter.format_currency(kpis['avg_sale']))
+                self.margin_kpi.update_value(f"{kpis['margin']:.1f}%")
             
-            # KPIs de inventario
-            if self.product_manager:
-                stock_value = self.product_manager.get_total_stock_value()
-                products_sold = self.product_manager.get_products_sold_by_period(period_data['start'], period_data['end'])
-                
-                self.stock_value_kpi.update_value(NumberFormatter.format_currency(stock_value))
-                self.products_sold_kpi.update_value(str(products_sold))
+            if 'stock_value' in kpis:
+                self.stock_value_kpi.update_value(NumberFormatter.format_currency(kpis['stock_value']))
+                self.products_sold_kpi.update_value(str(kpis['products_sold']))
             
-            # KPIs de clientes
-            if self.customer_manager:
-                active_customers = self.customer_manager.get_active_customers_by_period(period_data['start'], period_data['end'])
-                self.customer_count_kpi.update_value(str(active_customers))
+            if 'active_customers' in kpis:
+                self.customer_count_kpi.update_value(str(kpis['active_customers']))
             
-            # Pedidos pendientes (simulado)
-            pending_orders = 5  # Placeholder
-            self.orders_pending_kpi.update_value(str(pending_orders))
+            self.orders_pending_kpi.update_value(str(kpis['pending_orders']))
             
-            # Cargar gráfico de ventas diarias
-            self.load_daily_sales_chart()
+            # Actualizar timestamp
+            self.last_update = datetime.now()
+            self.status_label.setText(f"Última actualización: {self.last_update.strftime('%H:%M:%S')}")
             
         except Exception as e:
             logger.error(f"Error cargando KPIs: {e}")
     
     def load_daily_sales_chart(self):
-        """Cargar gráfico de ventas diarias"""
-        try:
-            if not self.sales_manager:
-                return
-                
-            # Últimos 7 días
-            chart_data = []
-            for i in range(7):
-                date = datetime.now() - timedelta(days=6-i)
-                sales = self.sales_manager.get_sales_by_date(date)
-                chart_data.append({
-                    'label': date.strftime('%d/%m'),
-                    'value': int(sales)
-                })
-            
-            self.daily_sales_chart.set_data(chart_data)
-            
-        except Exception as e:
-            logger.error(f"Error cargando gráfico diario: {e}")
+        """Pedir gráfico de ventas diarias"""
+        if not self.sales_manager:
+            return
+        self.loader.submit('daily_sales_chart', self.collect_daily_sales_chart, self.daily_sales_chart.set_data)
+    
+    def collect_daily_sales_chart(self) -> List[Dict]:
+        """Ventas de los últimos 7 días (se ejecuta en el pool del loader)"""
+        chart_data = []
+        for i in range(7):
+            date = datetime.now() - timedelta(days=6-i)
+            sales = self.sales_manager.get_sales_by_date(date)
+            chart_data.append({
+                'label': date.strftime('%d/%m'),
+                'value': int(sales)
+            })
+        return chart_data
     
     def update_sales_analysis(self):
-        """Actualizar análisis de ventas"""
-        try:
-            if not self.sales_manager:
-                return
-                
-            analysis_type = self.sales_analysis_combo.currentText()
-            period_data = self.get_period_data()
+        """Pedir análisis de ventas"""
+        if not self.sales_manager:
+            return
             
-            # Obtener datos según tipo de análisis
-            if analysis_type == "Día":
-                data = self.sales_manager.get_daily_sales_analysis(period_data['start'], period_data['end'])
-            elif analysis_type == "Semana":
-                data = self.sales_manager.get_weekly_sales_analysis(period_data['start'], period_data['end'])
-            elif analysis_type == "Mes":
-                data = self.sales_manager.get_monthly_sales_analysis(period_data['start'], period_data['end'])
-            elif analysis_type == "Vendedor":
-                data = self.sales_manager.get_sales_by_seller(period_data['start'], period_data['end'])
-            else:  # Método de Pago
-                data = self.sales_manager.get_sales_by_payment_method(period_data['start'], period_data['end'])
+        analysis_type = self.sales_analysis_combo.currentText()
+        period_data = self.get_period_data()
+        self.loader.submit('sales_analysis', lambda: self.collect_sales_analysis(analysis_type, period_data),
+                           self.show_sales_analysis)
+    
+    def collect_sales_analysis(self, analysis_type: str, period_data: Dict) -> Dict:
+        """Consultar el análisis de ventas (se ejecuta en el pool del loader)"""
+        # Obtener datos según tipo de análisis
+        if analysis_type == "Día":
+            data = self.sales_manager.get_daily_sales_analysis(period_data['start'], period_data['end'])
+        elif analysis_type == "Semana":
+            data = self.sales_manager.get_weekly_sales_analysis(period_data['start'], period_data['end'])
+        elif analysis_type == "Mes":
+            data = self.sales_manager.get_monthly_sales_analysis(period_data['start'], period_data['end'])
+        elif analysis_type == "Vendedor":
+            data = self.sales_manager.get_sales_by_seller(period_data['start'], period_data['end'])
+        else:  # Método de Pago
+            data = self.sales_manager.get_sales_by_payment_method(period_data['start'], period_data['end'])
+        
+        return {
+            'data': data,
+            'prev_period_sales': self.sales_manager.get_previous_period_sales(period_data['start'], period_data['end'])
+        }
+    
+    def show_sales_analysis(self, analysis: Dict):
+        """Mostrar análisis de ventas"""
+        try:
+            data = analysis['data']
             
             # Actualizar gráfico
             chart_data = []
@@ -844,7 +886,7 @@ class ExecutiveDashboardWidget(QWidget):
             self.total_sales_label.setText(f"Total Ventas: {NumberFormatter.format_currency(total_sales)}")
             
             # Calcular crecimiento general
-            prev_period_sales = self.sales_manager.get_previous_period_sales(period_data['start'], period_data['end'])
+            prev_period_sales = analysis['prev_period_sales']
             if prev_period_sales > 0:
                 growth_rate = ((total_sales - prev_period_sales) / prev_period_sales) * 100
                 self.growth_indicator.set_value(growth_rate)
@@ -853,33 +895,39 @@ class ExecutiveDashboardWidget(QWidget):
             logger.error(f"Error actualizando análisis de ventas: {e}")
     
     def update_products_analysis(self):
-        """Actualizar análisis de productos"""
-        try:
-            if not self.product_manager:
-                return
-                
-            analysis_type = self.products_analysis_combo.currentText()
-            limit = self.products_limit_spin.value()
-            period_data = self.get_period_data()
-            
-            # Obtener datos según tipo de análisis
-            if analysis_type == "Más Vendidos":
-                data = self.product_manager.get_best_selling_products(
-                    period_data['start'], period_data['end'], limit
-                )
-            elif analysis_type == "Más Rentables":
-                data = self.product_manager.get_most_profitable_products(
-                    period_data['start'], period_data['end'], limit
-                )
-            elif analysis_type == "Stock Crítico":
-                data = self.product_manager.get_critical_stock_products(limit)
-            elif analysis_type == "Rotación Lenta":
-                data = self.product_manager.get_slow_moving_products(limit)
-            else:  # Categorías
-                data = self.product_manager.get_sales_by_category(
-                    period_data['start'], period_data['end']
-                )
+        """Pedir análisis de productos"""
+        if not self.product_manager:
+            return
             
+        analysis_type = self.products_analysis_combo.currentText()
+        limit = self.products_limit_spin.value()
+        period_data = self.get_period_data()
+        self.loader.submit('products_analysis',
+                           lambda: self.collect_products_analysis(analysis_type, limit, period_data),
+                           self.show_products_analysis)
+    
+    def collect_products_analysis(self, analysis_type: str, limit: int, period_data: Dict) -> List[Dict]:
+        """Consultar el análisis de productos (se ejecuta en el pool del loader)"""
+        if analysis_type == "Más Vendidos":
+            return self.product_manager.get_best_selling_products(
+                period_data['start'], period_data['end'], limit
+            )
+        elif analysis_type == "Más Rentables":
+            return self.product_manager.get_most_profitable_products(
+                period_data['start'], period_data['end'], limit
+            )
+        elif analysis_type == "Stock Crítico":
+            return self.product_manager.get_critical_stock_products(limit)
+        elif analysis_type == "Rotación Lenta":
+            return self.product_manager.get_slow_moving_products(limit)
+        else:  # Categorías
+            return self.product_manager.get_sales_by_category(
+                period_data['start'], period_data['end']
+            )
+    
+    def show_products_analysis(self, data: List[Dict]):
+        """Mostrar análisis de productos"""
+        try:
             # Actualizar gráfico
             chart_data = []
             for item in data:
@@ -915,34 +963,43 @@ class ExecutiveDashboardWidget(QWidget):
             logger.error(f"Error actualizando análisis de productos: {e}")
     
     def load_customers_data(self):
-        """Cargar datos de análisis de clientes"""
-        try:
-            if not self.customer_manager:
-                return
-                
-            period_data = self.get_period_data()
+        """Pedir datos de análisis de clientes"""
+        if not self.customer_manager:
+            return
             
-            # KPIs de clientes
-            total_customers = self.customer_manager.get_total_customers()
-            new_customers = self.customer_manager.get_new_customers_by_period(
+        period_data = self.get_period_data()
+        self.loader.submit('customers', lambda: self.collect_customers_data(period_data), self.show_customers_data)
+    
+    def collect_customers_data(self, period_data: Dict) -> Dict:
+        """Consultar el análisis de clientes (se ejecuta en el pool del loader)"""
+        return {
+            'total_customers': self.customer_manager.get_total_customers(),
+            'new_customers': self.customer_manager.get_new_customers_by_period(
                 period_data['start'], period_data['end']
-            )
-            avg_customer_value = self.customer_manager.get_average_customer_value(
+            ),
+            'avg_customer_value': self.customer_manager.get_average_customer_value(
                 period_data['start'], period_data['end']
-            )
-            retention_rate = self.customer_manager.get_retention_rate(
+            ),
+            'retention_rate': self.customer_manager.get_retention_rate(
                 period_data['start'], period_data['end']
-            )
-            
-            self.total_customers_kpi.update_value(str(total_customers))
-            self.new_customers_kpi.update_value(str(new_customers))
-            self.avg_customer_value_kpi.update_value(NumberFormatter.format_currency(avg_customer_value))
-            self.customer_retention_kpi.update_value(f"{retention_rate:.1f}%")
+            ),
+            'top_customers': self.customer_manager.get_top_customers_by_purchases(
+                period_data['start'], period_data['end'], 10
+            ),
+            'segments': self.customer_manager.get_customer_segmentation()
+        }
+    
+    def show_customers_data(self, customers: Dict):
+        """Mostrar datos de análisis de clientes"""
+        try:
+            # KPIs de clientes
+            self.total_customers_kpi.update_value(str(customers['total_customers']))
+            self.new_customers_kpi.update_value(str(customers['new_customers']))
+            self.avg_customer_value_kpi.update_value(NumberFormatter.format_currency(customers['avg_customer_value']))
+            self.customer_retention_kpi.update_value(f"{customers['retention_rate']:.1f}%")
             
             # Top clientes
-            top_customers = self.customer_manager.get_top_customers_by_purchases(
-                period_data['start'], period_data['end'], 10
-            )
+            top_customers = customers['top_customers']
             
             self.top_customers_table.setRowCount(len(top_customers))
             
@@ -962,10 +1019,8 @@ class ExecutiveDashboardWidget(QWidget):
                     )
             
             # Segmentación de clientes
-            segments = self.customer_manager.get_customer_segmentation()
-            
             segment_data = []
-            for segment in segments:
+            for segment in customers['segments']:
                 segment_data.append({
                     'label': segment.get('name', ''),
                     'value': segment.get('count', 0)
@@ -977,42 +1032,42 @@ class ExecutiveDashboardWidget(QWidget):
             logger.error(f"Error cargando datos de clientes: {e}")
     
     def calculate_projections(self):
-        """Calcular proyecciones basadas en datos históricos"""
+        """Pedir proyecciones basadas en datos históricos"""
+        projection_type = self.projection_type_combo.currentText()
+        projection_period = self.projection_period_combo.currentText()
+        
+        # Días a proyectar
+        days_map = {
+            "Próximos 7 días": 7,
+            "Próximo mes": 30,
+            "Próximos 3 meses": 90,
+            "Próximo año": 365
+        }
+        
+        days = days_map.get(projection_period, 30)
+        self.loader.submit('projections', lambda: self.collect_projection(projection_type, days),
+                           lambda result: self.show_projections(projection_type, days, *result))
+    
+    def collect_projection(self, projection_type: str, days: int):
+        """Valor proyectado y confianza a partir de los últimos 30 días (se ejecuta en el pool del loader)"""
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=30)
+        
+        if projection_type == "Ventas" and self.sales_manager:
+            historical_data = self.sales_manager.get_daily_sales_count(start_date, end_date)
+        elif projection_type == "Ingresos" and self.sales_manager:
+            historical_data = self.sales_manager.get_daily_revenue(start_date, end_date)
+        else:
+            # Valores simulados para otros tipos
+            return 1000 * days / 30, 75
+        
+        avg_daily = sum(historical_data) / len(historical_data) if historical_data else 0
+        confidence = min(95, len(historical_data) * 3)  # Simulado
+        return avg_daily * days, confidence
+    
+    def show_projections(self, projection_type: str, days: int, projected_value: float, confidence: float):
+        """Mostrar proyecciones"""
         try:
-            projection_type = self.projection_type_combo.currentText()
-            projection_period = self.projection_period_combo.currentText()
-            
-            # Días a proyectar
-            days_map = {
-                "Próximos 7 días": 7,
-                "Próximo mes": 30,
-                "Próximos 3 meses": 90,
-                "Próximo año": 365
-            }
-            
-            days = days_map.get(projection_period, 30)
-            
-            # Obtener datos históricos (últimos 30 días para base)
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=30)
-            
-            if projection_type == "Ventas" and self.sales_manager:
-                historical_data = self.sales_manager.get_daily_sales_count(start_date, end_date)
-                avg_daily = sum(historical_data) / len(historical_data) if historical_data else 0
-                projected_value = avg_daily * days
-                confidence = min(95, len(historical_data) * 3)  # Simulado
-                
-            elif projection_type == "Ingresos" and self.sales_manager:
-                historical_data = self.sales_manager.get_daily_revenue(start_date, end_date)
-                avg_daily = sum(historical_data) / len(historical_data) if historical_data else 0
-                projected_value = avg_daily * days
-                confidence = min(95, len(historical_data) * 3)
-                
-            else:
-                # Valores simulados para otros tipos
-                projected_value = 1000 * days / 30
-                confidence = 75
-            
             # Actualizar UI
             if projection_type in ["Ingresos"]:
                 value_text = NumberFormatter.format_currency(projected_value)
@@ -1051,24 +1106,41 @@ class ExecutiveDashboardWidget(QWidget):
             logger.error(f"Error calculando proyecciones: {e}")
     
     def generate_intelligent_alerts(self):
+        """Pedir los datos para las alertas inteligentes del negocio"""
+        self.loader.submit('alerts', self.collect_alerts_data, self.show_intelligent_alerts)
+    
+    def collect_alerts_data(self) -> Dict:
+        """Consultar los indicadores de las alertas (se ejecuta en el pool del loader)"""
+        alerts_data = {}
+        if self.product_manager:
+            alerts_data['low_stock_count'] = self.product_manager.get_low_stock_count()
+        if self.sales_manager:
+            alerts_data['today_sales'] = self.sales_manager.get_sales_by_date(datetime.now())
+            alerts_data['yesterday_sales'] = self.sales_manager.get_sales_by_date(datetime.now() - timedelta(days=1))
+        if self.customer_manager:
+            alerts_data['new_customers_today'] = self.customer_manager.get_new_customers_by_period(
+                datetime.now().date(), datetime.now().date()
+            )
+        return alerts_data
+    
+    def show_intelligent_alerts(self, alerts_data: Dict):
         """Generar alertas inteligentes del negocio"""
         try:
             self.alerts_panel.clear_alerts()
             
             # Alerta de stock bajo
-            if self.product_manager:
-                low_stock_count = self.product_manager.get_low_stock_count()
-                if low_stock_count > 0:
-                    self.alerts_panel.add_alert(
-                        "stock", 
-                        f"{low_stock_count} productos con stock bajo requieren atención",
-                        "medium"
-                    )
+            low_stock_count = alerts_data.get('low_stock_count', 0)
+            if low_stock_count > 0:
+                self.alerts_panel.add_alert(
+                    "stock", 
+                    f"{low_stock_count} productos con stock bajo requieren atención",
+                    "medium"
+                )
             
             # Alerta de ventas
-            if self.sales_manager:
-                today_sales = self.sales_manager.get_sales_by_date(datetime.now())
-                yesterday_sales = self.sales_manager.get_sales_by_date(datetime.now() - timedelta(days=1))
+            if 'today_sales' in alerts_data:
+                today_sales = alerts_data['today_sales']
+                yesterday_sales = alerts_data['yesterday_sales']
                 
                 if today_sales < yesterday_sales * 0.7:  # 30% menos que ayer
                     self.alerts_panel.add_alert(
@@ -1084,16 +1156,13 @@ class ExecutiveDashboardWidget(QWidget):
                     )
             
             # Alerta de clientes nuevos
-            if self.customer_manager:
-                new_customers_today = self.customer_manager.get_new_customers_by_period(
-                    datetime.now().date(), datetime.now().date()
+            new_customers_today = alerts_data.get('new_customers_today', 0)
+            if new_customers_today > 5:
+                self.alerts_panel.add_alert(
+                    "customers",
+                    f"{new_customers_today} nuevos clientes registrados hoy",
+                    "low"
                 )
-                if new_customers_today > 5:
-                    self.alerts_panel.add_alert(
-                        "customers",
-                        f"{new_customers_today} nuevos clientes registrados hoy",
-                        "low"
-                    )
             
             # Alerta de rendimiento del sistema
             self.alerts_panel.add_alert(
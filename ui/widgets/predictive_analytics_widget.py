@@ -8,7 +8,7 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTabWidget,
                            QLabel, QComboBox, QSpinBox, QTextEdit, QFrame,
                            QProgressBar, QGroupBox, QGridLayout, QScrollArea,
                            QSplitter, QCheckBox, QDateEdit, QLineEdit, QSlider)
-from PyQt5.QtCore import Qt, QTimer, QThread, pyqtSignal, QDate
+from PyQt5.QtCore import Qt, QDate
 from PyQt5.QtGui import QFont, QPixmap, QPainter, QColor, QPen
 from PyQt5.QtChart import QChart, QChartView, QBarSet, QBarSeries, QLineSeries, QPieSeries
 from PyQt5.QtChart import QValueAxis, QBarCategoryAxis, QDateTimeAxis
@@ -16,46 +16,10 @@ import json
 from datetime import datetime, timedelta
 import logging
 
-logger = logging.getLogger(__name__)
+from ui.widgets.async_loader import AsyncLoader
+from ui.widgets.change_watcher import ChangeWatcher, change_bus_of
 
-class PredictiveAnalyticsThread(QThread):
-    """Hilo para ejecutar análisis predictivo en background"""
-    
-    analysis_completed = pyqtSignal(dict)
-    progress_updated = pyqtSignal(int)
-    error_occurred = pyqtSignal(str)
-    
-    def __init__(self, predictive_manager, customer_id=None, analysis_type='full'):
-        super().__init__()
-        self.predictive_manager = predictive_manager
-        self.customer_id = customer_id
-        self.analysis_type = analysis_type
-        self.is_running = True
-    
-    def run(self):
-        """Ejecutar análisis predictivo"""
-        try:
-            if self.analysis_type == 'full':
-                self.progress_updated.emit(10)
-                
-                if self.customer_id:
-                    # Análisis de cliente específico
-                    result = self.predictive_manager.analyze_customer_behavior(self.customer_id)
-                    self.progress_updated.emit(100)
-                    self.analysis_completed.emit(result)
-                else:
-                    # Análisis de segmentos
-                    result = self.predictive_manager.get_segment_analysis()
-                    self.progress_updated.emit(100)
-                    self.analysis_completed.emit(result)
-            
-        except Exception as e:
-            logger.error(f"Error en análisis predictivo: {e}")
-            self.error_occurred.emit(str(e))
-    
-    def stop(self):
-        """Detener el hilo"""
-        self.is_running = False
+logger = logging.getLogger(__name__)
 
 class CustomerPredictionCard(QFrame):
     """Tarjeta para mostrar predicciones de un cliente"""
@@ -191,16 +155,18 @@ class PredictiveAnalyticsWidget(QWidget):
             logger.error(f"Error importando PredictiveAnalysisManager: {e}")
             self.predictive_manager = None
         
-        self.analysis_thread = None
+        # Análisis y consultas en el pool compartido; en pausa mientras no se ve
+        self.loader = AsyncLoader(self)
         self.current_analysis = None
         
         self.init_ui()
         self.setup_connections()
         
-        # Timer para actualizaciones automáticas
-        self.update_timer = QTimer()
-        self.update_timer.timeout.connect(self.auto_refresh)
-        self.update_timer.start(300000)  # 5 minutos
+        # Actualización automática cuando hay ventas o clientes nuevos; el intervalo
+        # configurado es la espera mínima entre dos actualizaciones
+        self.change_watcher = ChangeWatcher(change_bus_of(db_manager, customer_manager), ('ventas', 'clientes'),
+                                            self.auto_refresh, self,
+                                            debounce_ms=self.update_interval_spin.value() * 60000)
     
     def init_ui(self):
         """Inicializar interfaz de usuario"""
@@ -655,13 +621,16 @@ class PredictiveAnalyticsWidget(QWidget):
             self.load_customer_info(customer_id)
     
     def load_customer_info(self, customer_id):
-        """Cargar información básica del cliente"""
+        """Pedir información básica del cliente"""
+        if not self.predictive_manager:
+            return
+        
+        self.loader.submit('customer_info', lambda: self.predictive_manager._get_customer_data(customer_id),
+                           self.show_customer_info)
+    
+    def show_customer_info(self, customer_data):
+        """Mostrar información básica del cliente"""
         try:
-            if not self.predictive_manager:
-                return
-            
-            # Obtener datos básicos
-            customer_data = self.predictive_manager._get_customer_data(customer_id)
             if customer_data:
                 self.customer_name_label.setText(f"Cliente: {customer_data.get('nombre', 'N/A')}")
                 self.total_purchases_label.setText(f"Compras: {customer_data.get('total_purchases', 0)}")
@@ -694,24 +663,24 @@ class PredictiveAnalyticsWidget(QWidget):
         self.analyze_btn.setEnabled(False)
         self.analyze_btn.setText("Analizando...")
         
-        # Crear y ejecutar hilo de análisis
-        self.analysis_thread = PredictiveAnalyticsThread(
-            self.predictive_manager, customer_id, 'full'
-        )
-        self.analysis_thread.analysis_completed.connect(self.on_analysis_completed)
-        self.analysis_thread.progress_updated.connect(self.progress_bar.setValue)
-        self.analysis_thread.error_occurred.connect(self.on_analysis_error)
-        self.analysis_thread.start()
+        # Ejecutar en el pool del loader (cliente específico o análisis de segmentos)
+        self.progress_bar.setValue(10)
+        if customer_id:
+            analysis = lambda: self.predictive_manager.analyze_customer_behavior(customer_id)
+        else:
+            analysis = self.predictive_manager.get_segment_analysis
+        self.loader.submit('analysis', analysis,
+                           lambda result: self.on_analysis_completed(result, customer_id),
+                           self.on_analysis_error)
     
-    def on_analysis_completed(self, result):
+    def on_analysis_completed(self, result, customer_id=None):
         """Manejar finalización del análisis"""
+        self.progress_bar.setValue(100)
         self.progress_bar.setVisible(False)
         self.analyze_btn.setEnabled(True)
         self.analyze_btn.setText("🔍 Analizar")
         self.current_analysis = result
         
-        customer_id = self.customer_combo.currentData()
-        
         if customer_id:
             # Análisis individual
             self.display_individual_analysis(result)
@@ -998,34 +967,41 @@ class PredictiveAnalyticsWidget(QWidget):
             self.customer_combo.setCurrentIndex(current_index)
     
     def refresh_realtime_predictions(self):
-        """Actualizar predicciones en tiempo real"""
+        """Pedir las predicciones en tiempo real"""
+        if not self.predictive_manager:
+            return
+        
+        self.realtime_status_label.setText("Estado: Actualizando...")
+        self.realtime_status_label.setStyleSheet("color: orange; font-weight: bold;")
+        
+        # Obtener top 10 clientes para análisis rápido
+        query = """
+        SELECT c.id, c.nombre, COUNT(v.id) as purchases,
+               julianday('now') - julianday(MAX(v.fecha_venta)) as days_since_last
+        FROM clientes c
+        JOIN ventas v ON c.id = v.cliente_id
+        WHERE c.activo = 1 AND v.fecha_venta >= date('now', '-1 year')
+        GROUP BY c.id
+        ORDER BY days_since_last ASC, purchases DESC
+        LIMIT 10
+        """
+        self.loader.submit('realtime', lambda: self.db_manager.execute_query(query),
+                           self.show_realtime_predictions, self.on_realtime_error)
+    
+    def on_realtime_error(self, error_msg):
+        """Marcar error en las predicciones en tiempo real"""
+        self.realtime_status_label.setText("Estado: Error")
+        self.realtime_status_label.setStyleSheet("color: red; font-weight: bold;")
+    
+    def show_realtime_predictions(self, customers):
+        """Mostrar las predicciones en tiempo real"""
         try:
-            self.realtime_status_label.setText("Estado: Actualizando...")
-            self.realtime_status_label.setStyleSheet("color: orange; font-weight: bold;")
-            
             # Limpiar predicciones anteriores
             for i in reversed(range(self.predictions_layout.count())):
                 child = self.predictions_layout.itemAt(i).widget()
                 if child:
                     child.setParent(None)
             
-            if not self.predictive_manager:
-                return
-            
-            # Obtener top 10 clientes para análisis rápido
-            query = """
-            SELECT c.id, c.nombre, COUNT(v.id) as purchases,
-                   julianday('now') - julianday(MAX(v.fecha_venta)) as days_since_last
-            FROM clientes c
-            JOIN ventas v ON c.id = v.cliente_id
-            WHERE c.activo = 1 AND v.fecha_venta >= date('now', '-1 year')
-            GROUP BY c.id
-            ORDER BY days_since_last ASC, purchases DESC
-            LIMIT 10
-            """
-            
-            customers = self.db_manager.execute_query(query)
-            
             for customer in customers:
                 # Análisis básico rápido
                 prediction_data = {
@@ -1062,16 +1038,13 @@ class PredictiveAnalyticsWidget(QWidget):
     def toggle_auto_update(self, enabled):
         """Activar/desactivar actualización automática"""
         if enabled:
-            interval = self.update_interval_spin.value() * 60000  # a milisegundos
-            self.update_timer.start(interval)
+            self.change_watcher.start()
         else:
-            self.update_timer.stop()
+            self.change_watcher.stop()
     
     def update_refresh_interval(self):
         """Actualizar intervalo de refresco"""
-        if self.auto_update_checkbox.isChecked():
-            interval = self.update_interval_spin.value() * 60000
-            self.update_timer.start(interval)
+        self.change_watcher.set_debounce(self.update_interval_spin.value() * 60000)  # a milisegundos
     
     def update_confidence_label(self):
         """Actualizar etiqueta de confianza"""
@@ -1113,21 +1086,28 @@ class PredictiveAnalyticsWidget(QWidget):
         self.config_log.append(f"Configuración restaurada: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
     
     def test_model(self):
-        """Probar modelo predictivo"""
+        """Probar modelo predictivo con un cliente aleatorio"""
+        if not self.predictive_manager:
+            self.show_message("Sistema predictivo no disponible")
+            return
+        
+        self.loader.submit('test_model', self.collect_model_test, self.show_model_test,
+                           self.show_model_test_error)
+    
+    def collect_model_test(self):
+        """Analizar un cliente aleatorio con al menos 3 compras (se ejecuta en el pool del loader)"""
+        query = "SELECT id FROM clientes WHERE id IN (SELECT cliente_id FROM ventas GROUP BY cliente_id HAVING COUNT(*) >= 3) ORDER BY RANDOM() LIMIT 1"
+        result = self.db_manager.execute_query(query)
+        if not result:
+            return None
+        customer_id = result[0]['id']
+        return customer_id, self.predictive_manager.analyze_customer_behavior(customer_id)
+    
+    def show_model_test(self, outcome):
+        """Registrar el resultado de la prueba del modelo"""
         try:
-            if not self.predictive_manager:
-                self.show_message("Sistema predictivo no disponible")
-                return
-            
-            # Obtener cliente aleatorio para prueba
-            query = "SELECT id FROM clientes WHERE id IN (SELECT cliente_id FROM ventas GROUP BY cliente_id HAVING COUNT(*) >= 3) ORDER BY RANDOM() LIMIT 1"
-            result = self.db_manager.execute_query(query)
-            
-            if result:
-                customer_id = result[0]['id']
-                
-                # Ejecutar análisis de prueba
-                test_result = self.predictive_manager.analyze_customer_behavior(customer_id)
+            if outcome:
+                customer_id, test_result = outcome
                 
                 log_msg = f"Prueba de modelo: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
                 log_msg += f"Cliente de prueba: {customer_id}\n"
@@ -1150,9 +1130,13 @@ class PredictiveAnalyticsWidget(QWidget):
                 self.config_log.append(log_msg)
             
         except Exception as e:
-            error_msg = f"Error en prueba: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n{str(e)}\n"
-            self.config_log.append(error_msg)
-            logger.error(f"Error probando modelo: {e}")
+            self.show_model_test_error(str(e))
+    
+    def show_model_test_error(self, error):
+        """Registrar un error de la prueba del modelo"""
+        error_msg = f"Error en prueba: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n{error}\n"
+        self.config_log.append(error_msg)
+        logger.error(f"Error probando modelo: {error}")
     
     def export_analysis(self):
         """Exportar análisis actual"""
@@ -1190,8 +1174,8 @@ class PredictiveAnalyticsWidget(QWidget):
         except Exception as e:
             logger.error(f"Error exportando segmentos: {e}")
     
-    def auto_refresh(self):
-        """Auto-actualización de datos"""
+    def auto_refresh(self, changes=None):
+        """Auto-actualización de datos (al cambiar ventas o clientes)"""
         if self.tab_widget.currentIndex() == 2:  # Tab de tiempo real
             self.refresh_realtime_predictions()
     
@@ -1216,9 +1200,6 @@ class PredictiveAnalyticsWidget(QWidget):
     
     def closeEvent(self, event):
         """Limpiar recursos al cerrar"""
-        if self.analysis_thread and self.analysis_thread.isRunning():
-            self.analysis_thread.stop()
-            self.analysis_thread.wait()
-        
-        self.update_timer.stop()
+        self.loader.cancel()
+        self.change_watcher.stop()
         event.accept()
\ No newline at end of file
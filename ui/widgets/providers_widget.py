@@ -16,11 +16,13 @@ from PyQt5.QtWidgets import (
     QHeaderView, QMessageBox, QDialog, QDialogButtonBox,
     QCalendarWidget, QSlider, QScrollArea
 )
-from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QDate, QThread, pyqtSignal as Signal
+from PyQt5.QtCore import Qt, pyqtSignal, QDate, QThread, pyqtSignal as Signal
 from PyQt5.QtGui import QFont, QPalette, QColor, QPixmap, QIcon
 
 from ...utils.formatters import NumberFormatter, DateFormatter, TextFormatter, StatusFormatter
 from ...utils.exporters import ExcelExporter, PDFExporter, CSVExporter
+from .async_loader import AsyncLoader
+from .change_watcher import ChangeWatcher, change_bus_of
 
 logger = logging.getLogger(__name__)
 
@@ -227,9 +229,12 @@ class ProvidersWidget(QWidget):
         self.purchase_manager = purchase_manager
         self.current_provider_id = None
         
+        # Las consultas corren fuera del hilo de la interfaz; en pausa mientras no se ve
+        self.loader = AsyncLoader(self)
+        
         self.setup_ui()
         self.setup_connections()
-        self.setup_timer()
+        self.setup_change_watcher()
         self.load_data()
     
     def setup_ui(self):
@@ -603,11 +608,16 @@ class ProvidersWidget(QWidget):
         self.conditions_provider_combo.currentTextChanged.connect(self.load_provider_conditions)
         self.save_conditions_btn.clicked.connect(self.save_provider_conditions)
     
-    def setup_timer(self):
-        """Configurar timer para actualizaciones automáticas"""
-        self.update_timer = QTimer()
-        self.update_timer.timeout.connect(self.refresh_data)
-        self.update_timer.start(60000)  # Actualizar cada minuto
+    def setup_change_watcher(self):
+        """Actualizar cuando se reciben compras (en lugar de consultar cada minuto)"""
+        self.change_watcher = ChangeWatcher(change_bus_of(self.purchase_manager, self.provider_manager),
+                                            ('compras',), self.on_data_changed, self)
+    
+    def on_data_changed(self, changes: Dict):
+        """Recargar los paneles que dependen de las compras"""
+        self.load_dashboard_data()
+        self.load_providers_data()
+        self.load_performance_data()
     
     def load_data(self):
         """Cargar todos los datos"""
@@ -615,43 +625,54 @@ class ProvidersWidget(QWidget):
         self.load_providers_data()
         self.load_performance_data()
         self.load_categories()
-        self.load_providers_combo()
     
     def load_dashboard_data(self):
-        """Cargar datos del dashboard"""
+        """Pedir datos del dashboard"""
+        self.loader.submit('dashboard', self.collect_dashboard_metrics, self.show_dashboard_metrics)
+        
+        # Top proveedores
+        self.load_top_providers()
+        
+        # Alertas
+        self.load_alerts()
+    
+    def collect_dashboard_metrics(self) -> Dict:
+        """Consultar las métricas principales (se ejecuta en el pool del loader)"""
+        metrics = {
+            'total_providers': self.provider_manager.get_providers_count(),
+            'active_providers': self.provider_manager.get_active_providers_count(),
+            'avg_score': self.provider_manager.get_average_provider_score()
+        }
+        if self.purchase_manager:
+            metrics['monthly_amount'] = self.purchase_manager.get_monthly_purchase_amount()
+        return metrics
+    
+    def show_dashboard_metrics(self, metrics: Dict):
+        """Mostrar las métricas principales"""
         try:
-            # Métricas principales
-            total_providers = self.provider_manager.get_providers_count()
-            active_providers = self.provider_manager.get_active_providers_count()
-            
-            self.total_providers_label.setText(str(total_providers))
-            self.active_providers_label.setText(str(active_providers))
+            self.total_providers_label.setText(str(metrics['total_providers']))
+            self.active_providers_label.setText(str(metrics['active_providers']))
             
             # Compras del mes
-            if self.purchase_manager:
-                monthly_amount = self.purchase_manager.get_monthly_purchase_amount()
+            if 'monthly_amount' in metrics:
                 self.monthly_purchases_label.setText(
-                    NumberFormatter.format_currency(monthly_amount)
+                    NumberFormatter.format_currency(metrics['monthly_amount'])
                 )
             
             # Score promedio
-            avg_score = self.provider_manager.get_average_provider_score()
-            self.avg_score_label.setText(f"{avg_score:.1f}%")
-            
-            # Top proveedores
-            self.load_top_providers()
-            
-            # Alertas
-            self.load_alerts()
+            self.avg_score_label.setText(f"{metrics['avg_score']:.1f}%")
             
         except Exception as e:
             logger.error(f"Error cargando dashboard: {e}")
     
     def load_top_providers(self):
-        """Cargar top proveedores"""
+        """Pedir top proveedores"""
+        self.loader.submit('top_providers', lambda: self.provider_manager.get_top_providers_by_purchases(limit=10),
+                           self.show_top_providers)
+    
+    def show_top_providers(self, top_providers: List[Dict]):
+        """Mostrar top proveedores"""
         try:
-            top_providers = self.provider_manager.get_top_providers_by_purchases(limit=10)
-            
             self.top_providers_table.setRowCount(len(top_providers))
             
             for row, provider in enumerate(top_providers):
@@ -680,10 +701,12 @@ class ProvidersWidget(QWidget):
             logger.error(f"Error cargando top proveedores: {e}")
     
     def load_alerts(self):
-        """Cargar alertas y vencimientos"""
+        """Pedir alertas y vencimientos"""
+        self.loader.submit('alerts', self.provider_manager.get_contract_alerts, self.show_alerts)
+    
+    def show_alerts(self, alerts: List[Dict]):
+        """Mostrar alertas y vencimientos"""
         try:
-            alerts = self.provider_manager.get_contract_alerts()
-            
             self.alerts_table.setRowCount(len(alerts))
             
             for row, alert in enumerate(alerts):
@@ -699,10 +722,12 @@ class ProvidersWidget(QWidget):
             logger.error(f"Error cargando alertas: {e}")
     
     def load_providers_data(self):
-        """Cargar datos de proveedores"""
+        """Pedir proveedores (tabla y combo de condiciones usan la misma consulta)"""
+        self.loader.submit('providers', self.provider_manager.get_all_providers, self.show_providers_data)
+    
+    def show_providers_data(self, providers: List[Dict]):
+        """Mostrar proveedores en la tabla y en el combo de condiciones"""
         try:
-            providers = self.provider_manager.get_all_providers()
-            
             self.providers_table.setRowCount(len(providers))
             
             for row, provider in enumerate(providers):
@@ -737,24 +762,31 @@ class ProvidersWidget(QWidget):
                     score_item.setBackground(QColor("#F44336"))
                 
                 self.providers_table.setItem(row, 7, score_item)
+            
+            # Mantener los filtros sobre los datos nuevos
+            self.filter_providers()
                 
         except Exception as e:
             logger.error(f"Error cargando proveedores: {e}")
+        
+        self.show_providers_combo(providers)
     
     def load_performance_data(self):
-        """Cargar datos de performance"""
+        """Pedir datos de performance del período seleccionado"""
+        period_text = self.period_combo.currentText()
+        days = {
+            "Últimos 30 días": 30,
+            "Últimos 3 meses": 90,
+            "Últimos 6 meses": 180,
+            "Último año": 365
+        }.get(period_text, 30)
+        
+        self.loader.submit('performance', lambda: self.provider_manager.get_providers_performance(days),
+                           self.show_performance_data)
+    
+    def show_performance_data(self, performance_data: List[Dict]):
+        """Mostrar datos de performance"""
         try:
-            # Obtener período seleccionado
-            period_text = self.period_combo.currentText()
-            days = {
-                "Últimos 30 días": 30,
-                "Últimos 3 meses": 90,
-                "Últimos 6 meses": 180,
-                "Último año": 365
-            }.get(period_text, 30)
-            
-            performance_data = self.provider_manager.get_providers_performance(days)
-            
             self.performance_table.setRowCount(len(performance_data))
             
             for row, data in enumerate(performance_data):
@@ -787,22 +819,30 @@ class ProvidersWidget(QWidget):
             logger.error(f"Error cargando performance: {e}")
     
     def load_categories(self):
-        """Cargar categorías para filtro"""
+        """Pedir categorías para filtro"""
+        self.loader.submit('categories', self.provider_manager.get_provider_categories, self.show_categories)
+    
+    def show_categories(self, categories: List[str]):
+        """Llenar el filtro de categorías conservando la elegida"""
         try:
-            categories = self.provider_manager.get_provider_categories()
+            selected = self.category_combo.currentText()
             
+            self.category_combo.blockSignals(True)
             self.category_combo.clear()
             self.category_combo.addItem("Todas las Categorías")
             self.category_combo.addItems(categories)
+            self.category_combo.setCurrentIndex(max(0, self.category_combo.findText(selected)))
+            self.category_combo.blockSignals(False)
             
         except Exception as e:
             logger.error(f"Error cargando categorías: {e}")
     
-    def load_providers_combo(self):
-        """Cargar proveedores en combo de condiciones"""
+    def show_providers_combo(self, providers: List[Dict]):
+        """Llenar el combo de condiciones conservando el proveedor elegido"""
         try:
-            providers = self.provider_manager.get_all_providers()
+            selected = self.conditions_provider_combo.currentData()
             
+            self.conditions_provider_combo.blockSignals(True)
             self.conditions_provider_combo.clear()
             self.conditions_provider_combo.addItem("Seleccionar proveedor...")
             
@@ -811,21 +851,39 @@ class ProvidersWidget(QWidget):
                     provider.get('nombre', ''),
                     provider.get('id')
                 )
+            
+            index = self.conditions_provider_combo.findData(selected) if selected else 0
+            self.conditions_provider_combo.setCurrentIndex(max(0, index))
+            self.conditions_provider_combo.blockSignals(False)
+            if selected and index < 0:
+                self.load_provider_conditions()
                 
         except Exception as e:
             logger.error(f"Error cargando combo proveedores: {e}")
     
     def load_provider_conditions(self):
-        """Cargar condiciones del proveedor seleccionado"""
-        try:
-            provider_id = self.conditions_provider_combo.currentData()
-            if not provider_id:
-                self.save_conditions_btn.setEnabled(False)
-                return
-                
-            self.save_conditions_btn.setEnabled(True)
+        """Pedir condiciones y contratos del proveedor seleccionado"""
+        provider_id = self.conditions_provider_combo.currentData()
+        if not provider_id:
+            self.save_conditions_btn.setEnabled(False)
+            self.loader.cancel('conditions')
+            return
             
-            conditions = self.provider_manager.get_provider_conditions(provider_id)
+        self.save_conditions_btn.setEnabled(True)
+        self.loader.submit('conditions', lambda: self.collect_provider_conditions(provider_id),
+                           self.show_provider_conditions)
+    
+    def collect_provider_conditions(self, provider_id: int) -> Dict:
+        """Consultar condiciones y contratos (se ejecuta en el pool del loader)"""
+        return {
+            'conditions': self.provider_manager.get_provider_conditions(provider_id),
+            'contracts': self.provider_manager.get_provider_contracts(provider_id)
+        }
+    
+    def show_provider_conditions(self, data: Dict):
+        """Mostrar condiciones del proveedor seleccionado"""
+        try:
+            conditions = data['conditions']
             if conditions:
                 self.payment_days.setValue(conditions.get('payment_days', 30))
                 self.early_payment_discount.setValue(conditions.get('early_payment_discount', 0))
@@ -835,17 +893,15 @@ class ProvidersWidget(QWidget):
                 self.shipping_cost.setValue(conditions.get('shipping_cost', 0))
                 self.special_terms.setText(conditions.get('special_terms', ''))
             
-            # Cargar contratos
-            self.load_provider_contracts(provider_id)
+            # Contratos
+            self.show_provider_contracts(data['contracts'])
             
         except Exception as e:
             logger.error(f"Error cargando condiciones: {e}")
     
-    def load_provider_contracts(self, provider_id):
-        """Cargar contratos del proveedor"""
+    def show_provider_contracts(self, contracts: List[Dict]):
+        """Mostrar contratos del proveedor"""
         try:
-            contracts = self.provider_manager.get_provider_contracts(provider_id)
-            
             self.contracts_table.setRowCount(len(contracts))
             
             for row, contract in enumerate(contracts):
@@ -9,6 +9,10 @@ from PyQt5.QtWidgets import *
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 
+from ui.widgets.async_loader import AsyncLoader
+from ui.widgets.change_watcher import ChangeWatcher, change_bus_of
+from ui.widgets.table_models import ActionButtonsDelegate, ProductTableModel
+
 logger = logging.getLogger(__name__)
 
 class StockWidget(QWidget):
@@ -25,13 +29,15 @@ class StockWidget(QWidget):
         self.user_manager = user_manager
         
         # Estado actual
-        self.current_products = []
         self.selected_product = None
         
+        # Las consultas corren fuera del hilo de la interfaz; en pausa mientras no se ve
+        self.loader = AsyncLoader(self)
+        
         self.init_ui()
         self.setup_filters()
         self.load_products()
-        self.setup_refresh_timer()
+        self.setup_change_watcher()
     
     def init_ui(self):
         """Inicializar interfaz de usuario"""
@@ -155,9 +161,9 @@ class StockWidget(QWidget):
         stock_filter_layout.addWidget(QLabel("Stock:"))
         
         self.stock_filter_combo = QComboBox()
-        self.stock_filter_combo.addItems([
-            "Todos", "Stock Normal", "Stock Bajo", "Sin Stock"
-        ])
+        for text, stock_filter in [("Todos", None), ("Stock Normal", 'normal'),
+                                   ("Stock Bajo", 'bajo'), ("Sin Stock", 'sin_stock')]:
+            self.stock_filter_combo.addItem(text, stock_filter)
         self.stock_filter_combo.currentIndexChanged.connect(self.filter_products)
         stock_filter_layout.addWidget(self.stock_filter_combo)
         
@@ -205,18 +211,28 @@ class StockWidget(QWidget):
         left_panel = QWidget()
         left_layout = QVBoxLayout(left_panel)
         
-        # Tabla de productos
-        self.products_table = QTableWidget()
-        self.products_table.setColumnCount(8)
-        self.products_table.setHorizontalHeaderLabels([
-            "Código", "Nombre", "Categoría", "Stock Actual", 
-            "Stock Mín.", "Precio Venta", "Estado", "Acciones"
-        ])
+        # Tabla de productos: carga por páginas, orden y filtros en la base
+        self.products_model = ProductTableModel(
+            self.product_manager,
+            ['codigo', ('nombre', "Nombre"), 'categoria', 'stock_actual',
+             'stock_minimo', 'precio_venta', 'estado', 'acciones'],
+            parent=self, loader=self.loader)
+        self.products_table = QTableView()
+        self.products_table.setModel(self.products_model)
+        
+        # Botones de acción dibujados por el delegate (sin un widget por fila)
+        self.actions_delegate = ActionButtonsDelegate(
+            [('edit', "✏️", "Editar producto"), ('stock', "📊", "Ajustar stock")], self.products_table)
+        self.actions_delegate.action_triggered.connect(self.on_product_action)
+        self.products_table.setItemDelegateForColumn(7, self.actions_delegate)
         
         # Configurar tabla
         self.products_table.setAlternatingRowColors(True)
         self.products_table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.products_table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.products_table.verticalHeader().setVisible(False)
+        self.products_table.horizontalHeader().setSortIndicator(1, Qt.AscendingOrder)
+        self.products_table.setSortingEnabled(True)
         self.products_table.selectionModel().selectionChanged.connect(self.on_product_selected)
         
         # Ajustar columnas
@@ -400,19 +416,25 @@ class StockWidget(QWidget):
         self.search_timer.setSingleShot(True)
         self.search_timer.timeout.connect(self.search_products)
     
-    def setup_refresh_timer(self):
-        """Configurar timer de actualización automática"""
-        self.refresh_timer = QTimer()
-        self.refresh_timer.timeout.connect(self.refresh_stats)
-        self.refresh_timer.start(300000)  # 5 minutos
+    def setup_change_watcher(self):
+        """Actualizar productos y movimientos cuando cambia el stock (en lugar de cada 5 minutos)"""
+        self.change_watcher = ChangeWatcher(change_bus_of(self.product_manager), ('productos',),
+                                            self.on_data_changed, self)
+    
+    def on_data_changed(self, changes: dict):
+        """Recargar la grilla, las estadísticas y los movimientos"""
+        self.load_products()
+        self.load_movements()
     
     def load_categories(self):
-        """Cargar categorías en el combo"""
+        """Pedir categorías para el combo"""
+        self.loader.submit('categories', lambda: self.product_manager.db.execute_query("""
+            SELECT id, nombre FROM categorias WHERE activo = 1 ORDER BY nombre
+        """), self.show_categories)
+    
+    def show_categories(self, categories: list):
+        """Agregar las categorías al combo"""
         try:
-            categories = self.product_manager.db.execute_query("""
-                SELECT id, nombre FROM categorias WHERE activo = 1 ORDER BY nombre
-            """)
-            
             for category in categories:
                 self.category_combo.addItem(category['nombre'], category['id'])
                 
@@ -420,146 +442,39 @@ class StockWidget(QWidget):
             logger.error(f"Error cargando categorías: {e}")
     
     def load_products(self):
-        """Cargar productos en la tabla"""
+        """Cargar productos en la tabla (filtros resueltos en la consulta)"""
         try:
-            # Obtener filtros actuales
-            search_term = self.search_input.text().strip()
-            category_id = self.category_combo.currentData()
-            
-            if search_term:
-                products = self.product_manager.search_products(search_term, limit=200)
-            else:
-                products = self.product_manager.get_all_products(page_size=200)
-            
-            # Aplicar filtros adicionales
-            if category_id:
-                products = [p for p in products if p.get('categoria_id') == category_id]
-            
-            # Filtro por stock
-            stock_filter = self.stock_filter_combo.currentText()
-            if stock_filter == "Stock Bajo":
-                products = [p for p in products if p.get('stock_actual', 0) <= p.get('stock_minimo', 0)]
-            elif stock_filter == "Sin Stock":
-                products = [p for p in products if p.get('stock_actual', 0) == 0]
-            elif stock_filter == "Stock Normal":
-                products = [p for p in products if p.get('stock_actual', 0) > p.get('stock_minimo', 0)]
-            
-            self.current_products = products
-            self.populate_products_table(products)
+            self.products_model.set_filters(
+                search_term=self.search_input.text().strip(),
+                category_id=self.category_combo.currentData(),
+                stock_filter=self.stock_filter_combo.currentData()
+            )
             self.update_stats()
             
         except Exception as e:
             logger.error(f"Error cargando productos: {e}")
             QMessageBox.warning(self, "Error", f"Error cargando productos: {e}")
     
-    def populate_products_table(self, products: list):
-        """Poblar tabla de productos"""
-        self.products_table.setRowCount(len(products))
-        
-        for row, product in enumerate(products):
-            # Código
-            code_item = QTableWidgetItem(product.get('codigo_barras', ''))
-            self.products_table.setItem(row, 0, code_item)
-            
-            # Nombre
-            name_item = QTableWidgetItem(product.get('nombre', ''))
-            self.products_table.setItem(row, 1, name_item)
-            
-            # Categoría
-            category_item = QTableWidgetItem(product.get('categoria_nombre', 'Sin categoría'))
-            self.products_table.setItem(row, 2, category_item)
-            
-            # Stock actual
-            stock_actual = float(product.get('stock_actual', 0))
-            stock_item = QTableWidgetItem(f"{stock_actual:.2f}")
-            stock_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-            
-            # Colorear según stock
-            stock_min = float(product.get('stock_minimo', 0))
-            if stock_actual == 0:
-                stock_item.setBackground(QColor("#fadbd8"))  # Rojo claro
-            elif stock_actual <= stock_min and stock_min > 0:
-                stock_item.setBackground(QColor("#fef9e7"))  # Amarillo claro
-            
-            self.products_table.setItem(row, 3, stock_item)
-            
-            # Stock mínimo
-            stock_min_item = QTableWidgetItem(f"{stock_min:.2f}")
-            stock_min_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-            self.products_table.setItem(row, 4, stock_min_item)
-            
-            # Precio venta
-            price = float(product.get('precio_venta', 0))
-            price_item = QTableWidgetItem(f"${price:.2f}")
-            price_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-            self.products_table.setItem(row, 5, price_item)
-            
-            # Estado
-            if stock_actual == 0:
-                status = "Sin Stock"
-                status_color = QColor("#e74c3c")
-            elif stock_actual <= stock_min and stock_min > 0:
-                status = "Stock Bajo"
-                status_color = QColor("#f39c12")
-            else:
-                status = "Normal"
-                status_color = QColor("#27ae60")
-            
-            status_item = QTableWidgetItem(status)
-            status_item.setForeground(QBrush(status_color))
-            self.products_table.setItem(row, 6, status_item)
-            
-            # Botones de acción
-            actions_widget = self.create_product_actions(product)
-            self.products_table.setCellWidget(row, 7, actions_widget)
-        
-        # Ajustar altura de filas
-        self.products_table.resizeRowsToContents()
-    
-    def create_product_actions(self, product: dict) -> QWidget:
-        """Crear botones de acción para producto"""
-        widget = QWidget()
-        layout = QHBoxLayout(widget)
-        layout.setContentsMargins(2, 2, 2, 2)
-        layout.setSpacing(2)
-        
-        # Botón editar
-        edit_btn = QPushButton("✏️")
-        edit_btn.setMaximumWidth(25)
-        edit_btn.setToolTip("Editar producto")
-        edit_btn.clicked.connect(lambda: self.edit_product(product))
-        layout.addWidget(edit_btn)
-        
-        # Botón ajustar stock
-        stock_btn = QPushButton("📊")
-        stock_btn.setMaximumWidth(25)
-        stock_btn.setToolTip("Ajustar stock")
-        stock_btn.clicked.connect(lambda: self.adjust_product_stock(product))
-        layout.addWidget(stock_btn)
-        
-        return widget
+    def on_product_action(self, action: str, product: dict):
+        """Botones de acción de la tabla de productos"""
+        if action == 'edit':
+            self.edit_product(product)
+        elif action == 'stock':
+            self.adjust_product_stock(product)
     
     def update_stats(self):
-        """Actualizar estadísticas del header"""
+        """Pedir estadísticas del header"""
+        # Totales de todos los productos filtrados, no solo de las filas cargadas
+        filters = dict(self.products_model.filters)
+        self.loader.submit('stats', lambda: self.product_manager.get_products_summary(**filters),
+                           self.show_stats)
+    
+    def show_stats(self, summary: dict):
+        """Mostrar estadísticas del header"""
         try:
-            # Total productos
-            total_products = len(self.current_products)
-            self.total_products_card.value_label.setText(str(total_products))
-            
-            # Productos con stock bajo
-            low_stock_count = len([
-                p for p in self.current_products 
-                if float(p.get('stock_actual', 0)) <= float(p.get('stock_minimo', 0))
-                and float(p.get('stock_minimo', 0)) > 0
-            ])
-            self.low_stock_card.value_label.setText(str(low_stock_count))
-            
-            # Valor total del stock
-            total_value = sum(
-                float(p.get('stock_actual', 0)) * float(p.get('precio_venta', 0))
-                for p in self.current_products
-            )
-            self.stock_value_card.value_label.setText(f"${total_value:,.2f}")
+            self.total_products_card.value_label.setText(str(summary.get('total', 0)))
+            self.low_stock_card.value_label.setText(str(summary.get('stock_bajo', 0)))
+            self.stock_value_card.value_label.setText(f"${float(summary.get('valor_venta', 0)):,.2f}")
             
         except Exception as e:
             logger.error(f"Error actualizando estadísticas: {e}")
@@ -579,9 +494,9 @@ class StockWidget(QWidget):
     
     def on_product_selected(self):
         """Manejar selección de producto"""
-        current_row = self.products_table.currentRow()
-        if current_row >= 0 and current_row < len(self.current_products):
-            self.selected_product = self.current_products[current_row]
+        product = self.products_model.row_at(self.products_table.currentIndex().row())
+        if product:
+            self.selected_product = product
             self.update_product_details()
             self.edit_product_btn.setEnabled(True)
             self.adjust_stock_btn.setEnabled(True)
@@ -597,13 +512,15 @@ class StockWidget(QWidget):
             return
         
         for field, label in self.detail_labels.items():
-            value = self.selected_product.get(field, '-')
-            if field in ['precio_compra', 'precio_venta', 'precio_mayorista'] and value != '-':
+            value = self.selected_product.get(field)
+            if value is None:
+                label.setText('-')
+            elif field in ['precio_compra', 'precio_venta', 'precio_mayorista']:
                 label.setText(f"${float(value):.2f}")
-            elif field in ['stock_actual', 'stock_minimo', 'stock_maximo'] and value != '-':
+            elif field in ['stock_actual', 'stock_minimo', 'stock_maximo']:
                 label.setText(f"{float(value):.2f}")
             else:
-                label.setText(str(value) if value is not None else '-')
+                label.setText(str(value))
     
     def clear_product_details(self):
         """Limpiar panel de detalles"""
@@ -671,19 +588,20 @@ class StockWidget(QWidget):
             QMessageBox.warning(self, "Error", f"Error ajustando stock: {e}")
     
     def load_movements(self):
-        """Cargar movimientos de stock"""
+        """Pedir movimientos de stock del período"""
+        date_from = self.date_from.date().toPyDate()
+        date_to = self.date_to.date().toPyDate()
+        movement_type = self.movement_type_combo.currentText()
+        
+        self.loader.submit('movements', lambda: self.product_manager.get_stock_movements(
+            date_from=date_from,
+            date_to=date_to,
+            limit=500
+        ), lambda movements: self.show_movements(movements, movement_type), self.on_movements_error)
+    
+    def show_movements(self, movements: list, movement_type: str):
+        """Mostrar movimientos filtrados por tipo"""
         try:
-            date_from = self.date_from.date().toPython()
-            date_to = self.date_to.date().toPython()
-            
-            movements = self.product_manager.get_stock_movements(
-                date_from=date_from,
-                date_to=date_to,
-                limit=500
-            )
-            
-            # Filtrar por tipo si es necesario
-            movement_type = self.movement_type_combo.currentText()
             if movement_type != "Todos":
                 movements = [m for m in movements if m['tipo_movimiento'] == movement_type]
             
@@ -693,6 +611,10 @@ class StockWidget(QWidget):
             logger.error(f"Error cargando movimientos: {e}")
             QMessageBox.warning(self, "Error", f"Error cargando movimientos: {e}")
     
+    def on_movements_error(self, error: str):
+        """Informar un error al consultar movimientos"""
+        QMessageBox.warning(self, "Error", f"Error cargando movimientos: {error}")
+    
     def populate_movements_table(self, movements: list):
         """Poblar tabla de movimientos"""
         self.movements_table.setRowCount(len(movements))
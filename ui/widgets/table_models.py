@@ -0,0 +1,345 @@
+"""
+Modelos de tabla con carga diferida para las grillas de productos y clientes
+Las filas se piden a los managers por páginas a medida que la vista se
+desplaza (canFetchMore/fetchMore), el orden y los filtros se resuelven en SQL
+y los botones de acción los dibuja un delegate en lugar de un widget por fila
+"""
+
+import logging
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from PyQt5.QtCore import QAbstractTableModel, QEvent, QModelIndex, QRect, QSize, Qt, pyqtSignal
+from PyQt5.QtGui import QBrush, QColor
+from PyQt5.QtWidgets import QApplication, QStyle, QStyledItemDelegate, QStyleOptionButton, QToolTip
+
+logger = logging.getLogger(__name__)
+
+class TableColumn(NamedTuple):
+    """Columna de una grilla: clave del dato, título y clave de orden (None = no ordenable)"""
+    key: str
+    title: str
+    sort_key: Optional[str] = None
+
+class LazyTableModel(QAbstractTableModel):
+    """Modelo base que carga sus filas por páginas
+
+    Las subclases implementan ``fetch_page`` (consulta al manager) y el formato
+    de las celdas. Cada fila debe traer ``id`` y ``orden_valor`` para pedir la
+    página siguiente por clave. Con ``loader`` (AsyncLoader) las páginas se
+    consultan fuera del hilo de la interfaz y se agregan al llegar.
+    """
+
+    PAGE_SIZE = 200
+
+    def __init__(self, columns: Iterable[TableColumn], order_by: str, page_size: int = None, parent=None,
+                 loader=None):
+        super().__init__(parent)
+        self.columns = list(columns)
+        self.page_size = page_size or self.PAGE_SIZE
+        self.order_by = order_by
+        self.descending = False
+        self.filters: Dict[str, Any] = {}
+        self.loader = loader
+        self.loader_key = f"{type(self).__name__}:{id(self)}"
+        self._rows: List[Dict] = []
+        self._exhausted = False
+        self._loading = False
+
+    # Para las subclases
+    def fetch_page(self, after: Optional[Tuple], limit: int) -> List[Dict]:
+        """Obtener hasta ``limit`` filas posteriores a ``after`` (orden_valor, id)"""
+        raise NotImplementedError
+
+    def display_value(self, row: Dict, key: str) -> str:
+        value = row.get(key)
+        return '' if value is None else str(value)
+
+    def cell_data(self, row: Dict, key: str, role: int) -> Any:
+        """Datos de roles distintos al texto (alineación, colores, tooltips)"""
+        return None
+
+    # Interfaz de QAbstractTableModel
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal and 0 <= section < len(self.columns):
+            return self.columns[section].title
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+        row = self._rows[index.row()]
+        key = self.columns[index.column()].key
+        if role == Qt.UserRole:
+            return row
+        if role == Qt.DisplayRole:
+            return self.display_value(row, key)
+        return self.cell_data(row, key, role)
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and not self._exhausted and not self._loading
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted or self._loading:
+            return
+        after = (self._rows[-1]['orden_valor'], self._rows[-1]['id']) if self._rows else None
+        if self.loader is None:
+            self._append_page(self.fetch_page(after, self.page_size))
+            return
+        self._loading = True
+        self.loader.submit(self.loader_key, lambda: self.fetch_page(after, self.page_size),
+                           self._append_page, self._page_failed)
+
+    def _append_page(self, page: List[Dict]):
+        self._loading = False
+        if len(page) < self.page_size:
+            self._exhausted = True
+        if page:
+            self.beginInsertRows(QModelIndex(), len(self._rows), len(self._rows) + len(page) - 1)
+            self._rows.extend(page)
+            self.endInsertRows()
+
+    def _page_failed(self, error: str):
+        # Sin marcar el fin: el próximo fetchMore vuelve a pedir la página (p. ej. base bloqueada)
+        self._loading = False
+
+    def sort(self, column: int, order=Qt.AscendingOrder):
+        """Ordenar en la base: se descartan las filas cargadas y se pide la primera página"""
+        sort_key = self.columns[column].sort_key if 0 <= column < len(self.columns) else None
+        if not sort_key:
+            return
+        self.order_by = sort_key
+        self.descending = order == Qt.DescendingOrder
+        self.reload()
+
+    # API para los widgets
+    def set_filters(self, **filters):
+        """Reemplazar los filtros (se resuelven en la consulta) y recargar"""
+        self.filters = filters
+        self.reload()
+
+    def reload(self):
+        if self.loader is not None:
+            self.loader.cancel(self.loader_key)
+            self.loader.cancel(f"{self.loader_key}:all")
+        self.beginResetModel()
+        self._rows = []
+        self._exhausted = False
+        self._loading = False
+        self.endResetModel()
+        self.fetchMore()
+
+    def fetch_all(self):
+        """Cargar en el modelo todas las páginas restantes (sin loader; con loader usar ``load_all``)"""
+        while self.canFetchMore():
+            self.fetchMore()
+
+    def load_all(self, callback, error_callback=None):
+        """Obtener todas las filas que cumplen los filtros (exportaciones)
+
+        Completa las filas ya cargadas con las páginas restantes y entrega la
+        lista a ``callback``; con loader las consultas corren en el pool y el
+        callback llega en el hilo de la interfaz, sin agregar filas a la grilla.
+        """
+        rows = list(self._rows)
+        exhausted = self._exhausted
+
+        def collect():
+            while not exhausted:
+                after = (rows[-1]['orden_valor'], rows[-1]['id']) if rows else None
+                page = self.fetch_page(after, self.page_size)
+                rows.extend(page)
+                if len(page) < self.page_size:
+                    break
+            return rows
+
+        if self.loader is None:
+            callback(collect())
+            return
+        self.loader.submit(f"{self.loader_key}:all", collect, callback, error_callback)
+
+    def row_text(self, row: Dict) -> List[str]:
+        """Textos de una fila en el orden de las columnas (exportaciones)"""
+        return [self.display_value(row, column.key) or '' for column in self.columns]
+
+    def row_at(self, row: int) -> Optional[Dict]:
+        return self._rows[row] if 0 <= row < len(self._rows) else None
+
+    def column_index(self, key: str) -> int:
+        return next((i for i, column in enumerate(self.columns) if column.key == key), -1)
+
+# Columnas disponibles en las grillas de productos
+PRODUCT_COLUMNS = {
+    'codigo': TableColumn('codigo', "Código", 'codigo'),
+    'nombre': TableColumn('nombre', "Producto", 'nombre'),
+    'categoria': TableColumn('categoria', "Categoría", 'categoria'),
+    'stock_actual': TableColumn('stock_actual', "Stock Actual", 'stock_actual'),
+    'stock_minimo': TableColumn('stock_minimo', "Stock Mín.", 'stock_minimo'),
+    'precio_compra': TableColumn('precio_compra', "Precio Compra", 'precio_compra'),
+    'precio_venta': TableColumn('precio_venta', "Precio Venta", 'precio_venta'),
+    'valor_stock': TableColumn('valor_stock', "Valor Total", 'valor_stock'),
+    'estado': TableColumn('estado', "Estado"),
+    'acciones': TableColumn('acciones', "Acciones")
+}
+
+def stock_status(product: Dict) -> Tuple[str, str]:
+    """Estado de stock de un producto y su color"""
+    stock_actual = float(product.get('stock_actual') or 0)
+    stock_min = float(product.get('stock_minimo') or 0)
+    if stock_actual <= 0:
+        return "Sin Stock", "#e74c3c"
+    if stock_actual <= stock_min and stock_min > 0:
+        return "Stock Bajo", "#f39c12"
+    return "Normal", "#27ae60"
+
+class ProductTableModel(LazyTableModel):
+    """Grilla de productos sobre ProductManager.query_products
+
+    ``columns`` es una lista de claves de PRODUCT_COLUMNS o pares (clave, título)
+    para cambiar el título de una columna. Filtros: search_term, category_id,
+    stock_filter e include_inactive.
+    """
+
+    _NUMERIC = ('stock_actual', 'stock_minimo', 'precio_compra', 'precio_venta', 'valor_stock')
+
+    def __init__(self, product_manager, columns: Iterable, page_size: int = None, parent=None, loader=None):
+        resolved = []
+        for column in columns:
+            key, title = column if isinstance(column, tuple) else (column, None)
+            resolved.append(PRODUCT_COLUMNS[key]._replace(title=title) if title else PRODUCT_COLUMNS[key])
+        super().__init__(resolved, 'nombre', page_size, parent, loader)
+        self.product_manager = product_manager
+
+    def fetch_page(self, after, limit):
+        return self.product_manager.query_products(order_by=self.order_by, descending=self.descending,
+                                                   after=after, limit=limit, **self.filters)
+
+    def display_value(self, product, key):
+        if key == 'codigo':
+            return str(product.get('codigo_barras') or product.get('codigo_interno') or '')
+        if key == 'categoria':
+            return product.get('categoria_nombre') or "Sin categoría"
+        if key in ('stock_actual', 'stock_minimo'):
+            return f"{float(product.get(key) or 0):,.2f}"
+        if key in ('precio_compra', 'precio_venta'):
+            return f"${float(product.get(key) or 0):,.2f}"
+        if key == 'valor_stock':
+            return f"${float(product.get('stock_actual') or 0) * float(product.get('precio_compra') or 0):,.2f}"
+        if key == 'estado':
+            return stock_status(product)[0]
+        if key == 'acciones':
+            return None
+        return super().display_value(product, key)
+
+    def cell_data(self, product, key, role):
+        if role == Qt.TextAlignmentRole and key in self._NUMERIC:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        if key == 'estado' and role == Qt.ForegroundRole:
+            return QBrush(QColor(stock_status(product)[1]))
+        if key == 'stock_actual' and role in (Qt.BackgroundRole, Qt.ToolTipRole):
+            status = stock_status(product)[0]
+            if role == Qt.ToolTipRole:
+                return "⚠️ Stock bajo" if status == "Stock Bajo" else None
+            if status == "Sin Stock":
+                return QBrush(QColor("#fadbd8"))  # Rojo claro
+            if status == "Stock Bajo":
+                return QBrush(QColor("#fef9e7"))  # Amarillo claro
+        return None
+
+class CustomerTableModel(LazyTableModel):
+    """Grilla de clientes sobre CustomerManager.query_customers
+
+    Filtros: search_term, category y status.
+    """
+
+    COLUMNS = [
+        TableColumn('id', "ID", 'id'),
+        TableColumn('nombre', "Nombre", 'nombre'),
+        TableColumn('email', "Email", 'email'),
+        TableColumn('telefono', "Teléfono", 'telefono'),
+        TableColumn('categoria_cliente', "Categoría", 'categoria'),
+        TableColumn('limite_credito', "Límite Crédito", 'limite_credito'),
+        TableColumn('saldo_cuenta_corriente', "Saldo", 'saldo'),
+        TableColumn('ultima_compra', "Última Compra", 'ultima_compra')
+    ]
+
+    def __init__(self, customer_manager, page_size: int = None, parent=None, loader=None):
+        super().__init__(self.COLUMNS, 'nombre', page_size, parent, loader)
+        self.customer_manager = customer_manager
+
+    def fetch_page(self, after, limit):
+        return self.customer_manager.query_customers(order_by=self.order_by, descending=self.descending,
+                                                     after=after, limit=limit, **self.filters)
+
+    def display_value(self, customer, key):
+        if key == 'nombre':
+            return f"{customer.get('nombre') or ''} {customer.get('apellido') or ''}".strip()
+        if key in ('limite_credito', 'saldo_cuenta_corriente'):
+            return f"${float(customer.get(key) or 0):.2f}"
+        if key == 'ultima_compra':
+            return (customer.get('ultima_compra') or "N/A")[:10]
+        return super().display_value(customer, key)
+
+    def cell_data(self, customer, key, role):
+        if role == Qt.TextAlignmentRole and key in ('limite_credito', 'saldo_cuenta_corriente'):
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        if (role == Qt.BackgroundRole and key == 'saldo_cuenta_corriente'
+                and float(customer.get(key) or 0) > 0):
+            return QBrush(QColor("#ffebee"))  # Rojo claro para deuda
+        return None
+
+class ActionButtonsDelegate(QStyledItemDelegate):
+    """Botones de acción dibujados en la celda, sin crear un QWidget por fila
+
+    ``actions`` es una lista de (nombre, texto, tooltip). Al hacer clic en un
+    botón se emite ``action_triggered(nombre, fila)`` con el dict de la fila.
+    """
+
+    action_triggered = pyqtSignal(str, dict)
+
+    BUTTON_SIZE = 25
+    SPACING = 2
+
+    def __init__(self, actions: List[Tuple[str, str, str]], parent=None):
+        super().__init__(parent)
+        self.actions = actions
+
+    def button_rects(self, cell: QRect) -> List[QRect]:
+        top = cell.top() + max(0, (cell.height() - self.BUTTON_SIZE) // 2)
+        size = min(self.BUTTON_SIZE, cell.height())
+        return [QRect(cell.left() + self.SPACING + i * (self.BUTTON_SIZE + self.SPACING), top, self.BUTTON_SIZE, size)
+                for i in range(len(self.actions))]
+
+    def paint(self, painter, option, index):
+        super().paint(painter, option, index)
+        style = option.widget.style() if option.widget else QApplication.style()
+        for (_, text, _), rect in zip(self.actions, self.button_rects(option.rect)):
+            button = QStyleOptionButton()
+            button.rect = rect
+            button.text = text
+            button.state = QStyle.State_Enabled | QStyle.State_Raised
+            style.drawControl(QStyle.CE_PushButton, button, painter, option.widget)
+
+    def sizeHint(self, option, index):
+        return QSize(self.SPACING + len(self.actions) * (self.BUTTON_SIZE + self.SPACING), self.BUTTON_SIZE + 4)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            for (name, _, _), rect in zip(self.actions, self.button_rects(option.rect)):
+                if rect.contains(event.pos()):
+                    self.action_triggered.emit(name, index.data(Qt.UserRole) or {})
+                    return True
+        return super().editorEvent(event, model, option, index)
+
+    def helpEvent(self, event, view, option, index):
+        if event.type() == QEvent.ToolTip:
+            for (_, _, tooltip), rect in zip(self.actions, self.button_rects(option.rect)):
+                if rect.contains(event.pos()):
+                    QToolTip.showText(event.globalPos(), tooltip, view)
+                    return True
+        return super().helpEvent(event, view, option, index)
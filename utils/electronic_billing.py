@@ -168,25 +168,30 @@ class InvoiceNumberGenerator:
     """Generador de numeración de comprobantes"""
     
     def __init__(self, database_manager):
+        # Import here to avoid circular imports
+        from managers.invoice_sequence_manager import InvoiceSequenceManager
+        
         self.db = database_manager
+        # Los comprobantes fiscales deben ser correlativos: sin bloques en memoria
+        self.sequences = InvoiceSequenceManager(database_manager, block_size=1)
     
     def get_next_invoice_number(self, invoice_type: str, point_of_sale: str = "0001") -> str:
         """Obtener siguiente número de comprobante"""
         try:
-            # Buscar último número para el tipo y punto de venta
-            query = """
-                SELECT MAX(CAST(numero_comprobante AS INTEGER)) as max_num
-                FROM facturas_electronicas
-                WHERE tipo_comprobante = ? AND punto_venta = ?
-            """
-            
-            result = self.db.execute_query(query, (invoice_type, point_of_sale))
-            
-            if result and result[0][0]:
-                next_number = int(result[0][0]) + 1
-            else:
-                next_number = 1
+            sequence_type = f"FE_{invoice_type}"
+            
+            # Inicializar el contador una sola vez a partir de los comprobantes existentes
+            if not self.sequences.has_sequence(sequence_type, int(point_of_sale)):
+                result = self.db.execute_single("""
+                    SELECT MAX(CAST(numero_comprobante AS INTEGER)) as max_num
+                    FROM facturas_electronicas
+                    WHERE tipo_comprobante = ? AND punto_venta = ?
+                """, (invoice_type, point_of_sale))
                 
+                last_number = int(result['max_num']) if result and result['max_num'] else 0
+                self.sequences.ensure_sequence(sequence_type, int(point_of_sale), last_number)
+            
+            next_number = self.sequences.next_number(sequence_type, int(point_of_sale))
             return f"{next_number:08d}"  # 8 dígitos con ceros a la izquierda
             
         except Exception as e:
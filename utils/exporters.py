@@ -6,7 +6,8 @@ Utilidades para exportar datos a diferentes formatos
 import os
 import logging
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from itertools import chain, islice
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Tuple
 from io import BytesIO
 
 # Formatters internos
@@ -14,6 +15,61 @@ from .formatters import NumberFormatter, DateFormatter, TextFormatter
 
 logger = logging.getLogger(__name__)
 
+# Columnas que se exportan con formato de moneda
+CURRENCY_KEYWORDS = ('precio', 'monto', 'total', 'importe')
+
+# Filas que se escriben por lote y filas de muestra para calcular anchos de columna
+EXPORT_CHUNK_SIZE = 1000
+WIDTH_SAMPLE_ROWS = 200
+
+def split_rows(data: Iterable[Dict], headers: Optional[List[str]] = None) -> Tuple[List[str], Optional[Iterator[Dict]]]:
+    """Determinar los encabezados mirando solo la primera fila
+    
+    Acepta listas o generadores (por ejemplo ``db.iter_query``) sin materializarlos.
+    
+    Returns:
+        Tupla (encabezados, iterador de filas), con None como iterador si no hay datos
+    """
+    rows = iter(data or ())
+    first = next(rows, None)
+    if first is None:
+        return headers or [], None
+    if headers is None:
+        headers = list(first.keys())
+    return headers, chain([first], rows)
+
+def iter_chunks(rows: Iterable, size: int = EXPORT_CHUNK_SIZE) -> Iterator[List]:
+    """Agrupar un iterador en listas de ``size`` elementos"""
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+class RowFormatter:
+    """Convierte filas a listas de textos con el formato de exportación"""
+    
+    def __init__(self, headers: List[str], max_length: int = None):
+        self.headers = headers
+        self.max_length = max_length
+        self.currency = [any(keyword in str(header).lower() for keyword in CURRENCY_KEYWORDS)
+                         for header in headers]
+    
+    def format_value(self, value: Any, currency: bool) -> str:
+        if isinstance(value, (int, float)):
+            return NumberFormatter.format_currency(value) if currency else NumberFormatter.format_number(value)
+        if isinstance(value, datetime):
+            return DateFormatter.format_datetime(value)
+        return str(value) if value is not None else ""
+    
+    def format(self, row: Dict) -> List[str]:
+        values = [self.format_value(row.get(header, ""), currency)
+                  for header, currency in zip(self.headers, self.currency)]
+        if self.max_length:
+            values = [TextFormatter.truncate(value, self.max_length) for value in values]
+        return values
+
 class ExcelExporter:
     """Exportador a archivos Excel"""
     
@@ -22,7 +78,6 @@ class ExcelExporter:
         try:
             import openpyxl
             from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-            from openpyxl.utils.dataframe import dataframe_to_rows
             self.openpyxl = openpyxl
             self.Font = Font
             self.Alignment = Alignment
@@ -33,82 +88,64 @@ class ExcelExporter:
         except ImportError:
             logger.warning("openpyxl no disponible. Exportación a Excel deshabilitada.")
     
-    def export_data(self, data: List[Dict], filename: str, 
+    def export_data(self, data: Iterable[Dict], filename: str, 
                    sheet_name: str = "Datos", 
                    headers: Optional[List[str]] = None,
                    title: Optional[str] = None) -> bool:
-        """Exportar datos a Excel"""
+        """Exportar datos a Excel
+        
+        Usa un workbook de solo escritura: las filas se vuelcan al archivo a medida
+        que llegan, así ``data`` puede ser un generador de cualquier tamaño. Los
+        anchos de columna se calculan con las primeras filas.
+        """
         if not self.openpyxl_available:
             logger.error("openpyxl no disponible")
             return False
         
         try:
+            from openpyxl.cell import WriteOnlyCell
+            from openpyxl.utils import get_column_letter
+            
             # Crear workbook y hoja
-            wb = self.openpyxl.Workbook()
-            ws = wb.active
-            ws.title = sheet_name
+            wb = self.openpyxl.Workbook(write_only=True)
+            ws = wb.create_sheet(sheet_name)
+            
+            headers, rows = split_rows(data, headers)
+            formatter = RowFormatter(headers)
             
-            current_row = 1
+            # Muestra para los anchos (deben definirse antes de escribir filas)
+            sample = [formatter.format(row) for row in islice(rows, WIDTH_SAMPLE_ROWS)] if rows else []
+            for col, header in enumerate(headers, 1):
+                max_length = max([len(str(header))] + [len(values[col - 1]) for values in sample])
+                ws.column_dimensions[get_column_letter(col)].width = min(max_length + 2, 50)
             
             # Añadir título si se proporciona
             if title:
-                ws.merge_cells(f'A1:Z1')
-                title_cell = ws['A1']
-                title_cell.value = title
+                title_cell = WriteOnlyCell(ws, value=title)
                 title_cell.font = self.Font(size=16, bold=True)
-                title_cell.alignment = self.Alignment(horizontal='center')
-                current_row = 3
+                ws.append([title_cell])
+                ws.append([])
             
-            if not data:
-                ws.cell(row=current_row, column=1, value="No hay datos para exportar")
+            if rows is None:
+                ws.append(["No hay datos para exportar"])
                 wb.save(filename)
                 return True
             
-            # Determinar headers
-            if headers is None:
-                headers = list(data[0].keys()) if data else []
-            
             # Escribir headers
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=current_row, column=col, value=header)
+            header_cells = []
+            for header in headers:
+                cell = WriteOnlyCell(ws, value=header)
                 cell.font = self.Font(bold=True)
                 cell.fill = self.PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
                 cell.alignment = self.Alignment(horizontal='center')
-            
-            current_row += 1
+                header_cells.append(cell)
+            ws.append(header_cells)
             
             # Escribir datos
-            for row_data in data:
-                for col, header in enumerate(headers, 1):
-                    value = row_data.get(header, "")
-                    
-                    # Formatear valor según tipo
-                    if isinstance(value, (int, float)):
-                        if any(keyword in str(header).lower() for keyword in ['precio', 'monto', 'total', 'importe']):
-                            formatted_value = NumberFormatter.format_currency(value)
-                        else:
-                            formatted_value = NumberFormatter.format_number(value)
-                    elif isinstance(value, datetime):
-                        formatted_value = DateFormatter.format_datetime(value)
-                    else:
-                        formatted_value = str(value) if value is not None else ""
-                    
-                    ws.cell(row=current_row, column=col, value=formatted_value)
-                
-                current_row += 1
-            
-            # Autoajustar columnas
-            for column in ws.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                ws.column_dimensions[column_letter].width = adjusted_width
+            for values in sample:
+                ws.append(values)
+            for row_data in rows:
+                ws.append(formatter.format(row_data))
             
             # Guardar archivo
             wb.save(filename)
@@ -206,94 +243,91 @@ class PDFExporter:
         except ImportError:
             logger.warning("reportlab no disponible. Exportación a PDF deshabilitada.")
     
-    def export_data(self, data: List[Dict], filename: str,
+    def export_data(self, data: Iterable[Dict], filename: str,
                    title: str = "Reporte", 
                    headers: Optional[List[str]] = None,
-                   company_name: str = "AlmacénPro") -> bool:
-        """Exportar datos a PDF"""
+                   company_name: str = "AlmacénPro",
+                   row_height: float = 14) -> bool:
+        """Exportar datos a PDF
+        
+        Las páginas se dibujan de a una sobre el canvas, con una tabla por página,
+        así solo se mantienen en memoria las filas de la página actual.
+        """
         if not self.reportlab_available:
             logger.error("reportlab no disponible")
             return False
         
         try:
-            # Crear documento
-            doc = self.SimpleDocTemplate(filename, pagesize=self.A4)
-            story = []
+            from reportlab.pdfgen import canvas
             
-            # Estilos
-            styles = self.getSampleStyleSheet()
-            title_style = self.ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=18,
-                spaceAfter=30,
-                alignment=1  # Centrado
-            )
-            
-            # Título del documento
-            story.append(self.Paragraph(company_name, title_style))
-            story.append(self.Paragraph(title, styles['Heading2']))
-            story.append(self.Paragraph(f"Generado: {DateFormatter.format_datetime(datetime.now())}", styles['Normal']))
-            story.append(self.Spacer(1, 20))
+            page_width, page_height = self.A4
+            margin = self.inch
+            available_width = page_width - 2 * margin
             
-            if not data:
-                story.append(self.Paragraph("No hay datos para mostrar", styles['Normal']))
-                doc.build(story)
+            # Crear documento
+            pdf = canvas.Canvas(filename, pagesize=self.A4)
+            pdf.setTitle(title)
+            
+            # Título del documento (primera página)
+            top = page_height - margin
+            pdf.setFont('Helvetica-Bold', 18)
+            pdf.drawCentredString(page_width / 2, top - 18, company_name)
+            pdf.setFont('Helvetica-Bold', 14)
+            pdf.drawString(margin, top - 54, title)
+            pdf.setFont('Helvetica', 10)
+            pdf.drawString(margin, top - 72, f"Generado: {DateFormatter.format_datetime(datetime.now())}")
+            first_page_top = top - 92
+            
+            headers, rows = split_rows(data, headers)
+            if rows is None:
+                pdf.drawString(margin, first_page_top - 12, "No hay datos para mostrar")
+                pdf.save()
                 return True
             
-            # Determinar headers
-            if headers is None:
-                headers = list(data[0].keys()) if data else []
-            
-            # Preparar datos para tabla
-            table_data = [headers]  # Primera fila con headers
-            
-            for row_data in data:
-                formatted_row = []
-                for header in headers:
-                    value = row_data.get(header, "")
-                    
-                    # Formatear valor
-                    if isinstance(value, (int, float)):
-                        if any(keyword in str(header).lower() for keyword in ['precio', 'monto', 'total', 'importe']):
-                            formatted_value = NumberFormatter.format_currency(value)
-                        else:
-                            formatted_value = NumberFormatter.format_number(value)
-                    elif isinstance(value, datetime):
-                        formatted_value = DateFormatter.format_datetime(value)
-                    else:
-                        formatted_value = str(value) if value is not None else ""
-                    
-                    # Truncar si es muy largo
-                    formatted_value = TextFormatter.truncate(formatted_value, 25)
-                    formatted_row.append(formatted_value)
-                
-                table_data.append(formatted_row)
-            
-            # Crear tabla
-            table = self.Table(table_data)
-            
-            # Estilo de tabla
-            table.setStyle(self.TableStyle([
+            formatter = RowFormatter(headers, max_length=25)
+            style = self.TableStyle([
                 # Header
                 ('BACKGROUND', (0, 0), (-1, 0), self.colors.grey),
                 ('TEXTCOLOR', (0, 0), (-1, 0), self.colors.whitesmoke),
                 ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
                 ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
                 ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
                 
                 # Datos
                 ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
                 ('FONTSIZE', (0, 1), (-1, -1), 8),
                 ('ROWBACKGROUNDS', (0, 1), (-1, -1), [self.colors.beige, self.colors.white]),
                 ('GRID', (0, 0), (-1, -1), 1, self.colors.black)
-            ]))
-            
-            story.append(table)
+            ])
+            
+            # Filas por página descontando el encabezado de la tabla
+            first_page_rows = max(1, int((first_page_top - margin) // row_height) - 1)
+            page_rows = max(1, int((page_height - 2 * margin) // row_height) - 1)
+            
+            page = [formatter.format(row) for row in islice(rows, first_page_rows)]
+            
+            # Anchos proporcionales al contenido de la primera página
+            lengths = [max([len(str(header))] + [len(values[col]) for values in page])
+                       for col, header in enumerate(headers)]
+            col_widths = [available_width * length / sum(lengths) for length in lengths]
+            
+            page_top, page_number = first_page_top, 1
+            while page:
+                table = self.Table([headers] + page, colWidths=col_widths,
+                                   rowHeights=row_height, repeatRows=1)
+                table.setStyle(style)
+                table.wrapOn(pdf, available_width, page_top - margin)
+                table.drawOn(pdf, margin, page_top - row_height * (len(page) + 1))
+                
+                pdf.setFont('Helvetica', 8)
+                pdf.drawRightString(page_width - margin, margin / 2, f"Página {page_number}")
+                pdf.showPage()
+                
+                page = [formatter.format(row) for row in islice(rows, page_rows)]
+                page_top, page_number = page_height - margin, page_number + 1
             
             # Construir documento
-            doc.build(story)
+            pdf.save()
             logger.info(f"Datos exportados a PDF: {filename}")
             return True
             
@@ -373,48 +407,30 @@ class CSVExporter:
     """Exportador a archivos CSV"""
     
     @staticmethod
-    def export_data(data: List[Dict], filename: str, 
+    def export_data(data: Iterable[Dict], filename: str, 
                    headers: Optional[List[str]] = None,
-                   delimiter: str = ',') -> bool:
-        """Exportar datos a CSV"""
+                   delimiter: str = ',',
+                   chunk_size: int = EXPORT_CHUNK_SIZE) -> bool:
+        """Exportar datos a CSV escribiendo por lotes (``data`` puede ser un generador)"""
         try:
             import csv
             
-            if not data:
-                with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-                    csvfile.write("No hay datos para exportar")
-                return True
-            
-            # Determinar headers
-            if headers is None:
-                headers = list(data[0].keys())
+            headers, rows = split_rows(data, headers)
             
             with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.DictWriter(csvfile, fieldnames=headers, delimiter=delimiter)
+                if rows is None:
+                    csvfile.write("No hay datos para exportar")
+                    return True
+                
+                writer = csv.writer(csvfile, delimiter=delimiter)
                 
                 # Escribir headers
-                writer.writeheader()
+                writer.writerow(headers)
                 
                 # Escribir datos
-                for row in data:
-                    formatted_row = {}
-                    for header in headers:
-                        value = row.get(header, "")
-                        
-                        # Formatear valor
-                        if isinstance(value, (int, float)):
-                            if any(keyword in str(header).lower() for keyword in ['precio', 'monto', 'total', 'importe']):
-                                formatted_value = NumberFormatter.format_currency(value)
-                            else:
-                                formatted_value = NumberFormatter.format_number(value)
-                        elif isinstance(value, datetime):
-                            formatted_value = DateFormatter.format_datetime(value)
-                        else:
-                            formatted_value = str(value) if value is not None else ""
-                        
-                        formatted_row[header] = formatted_value
-                    
-                    writer.writerow(formatted_row)
+                formatter = RowFormatter(headers)
+                for chunk in iter_chunks(rows, chunk_size):
+                    writer.writerows([formatter.format(row) for row in chunk])
             
             logger.info(f"Datos exportados a CSV: {filename}")
             return True
@@ -432,9 +448,9 @@ class FileExporter:
         self.pdf_exporter = PDFExporter()
         self.csv_exporter = CSVExporter()
     
-    def export(self, data: List[Dict], filename: str, format_type: str = "excel",
+    def export(self, data: Iterable[Dict], filename: str, format_type: str = "excel",
                title: str = "Reporte", headers: Optional[List[str]] = None, **kwargs) -> bool:
-        """Exportar datos al formato especificado"""
+        """Exportar datos al formato especificado (lista o generador de filas)"""
         try:
             # Determinar formato por extensión si no se especifica
             if format_type == "auto":
@@ -450,7 +466,7 @@ class FileExporter:
             
             # Exportar según formato
             if format_type.lower() == "excel":
-                return self.excel_exporter.export_data(data, filename, title, headers)
+                return self.excel_exporter.export_data(data, filename, headers=headers, title=title)
             elif format_type.lower() == "pdf":
                 return self.pdf_exporter.export_data(data, filename, title, headers, **kwargs)
             elif format_type.lower() == "csv":
@@ -509,7 +525,7 @@ class FileExporter:
 
 
 # Función de conveniencia
-def export_data(data: List[Dict], filename: str, format_type: str = "excel", 
+def export_data(data: Iterable[Dict], filename: str, format_type: str = "excel", 
                title: str = "Reporte", headers: Optional[List[str]] = None) -> bool:
     """Función de conveniencia para exportar datos"""
     exporter = FileExporter()
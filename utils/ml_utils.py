@@ -4,22 +4,42 @@ Funciones auxiliares para análisis predictivo y procesamiento de datos
 """
 
 import math
-from typing import List, Dict, Tuple, Optional, Any
+import random
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from datetime import datetime, timedelta
 from collections import defaultdict, Counter
 import logging
 
 logger = logging.getLogger(__name__)
 
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# Debajo de este tamaño convertir a array cuesta más que el bucle en Python
+VECTOR_MIN_SIZE = 256
+
+def use_numpy(*series) -> bool:
+    """Usar la versión vectorizada para estas series"""
+    if not NUMPY_AVAILABLE:
+        return False
+    return any(isinstance(values, np.ndarray) or len(values) >= VECTOR_MIN_SIZE for values in series)
+
 class DataPreprocessor:
     """Preprocesador de datos para análisis predictivo"""
     
     @staticmethod
     def normalize_values(values: List[float], method: str = 'min_max') -> List[float]:
         """Normalizar lista de valores"""
-        if not values or len(values) == 0:
+        if values is None or len(values) == 0:
             return values
         
+        if method in ('min_max', 'z_score') and use_numpy(values):
+            return DataPreprocessor._normalize_values_numpy(values, method)
+        
         if method == 'min_max':
             min_val = min(values)
             max_val = max(values)
@@ -40,12 +60,29 @@ class DataPreprocessor:
         
         return values
     
+    @staticmethod
+    def _normalize_values_numpy(values, method: str) -> List[float]:
+        array = np.asarray(values, dtype=float)
+        if method == 'min_max':
+            min_val, max_val = array.min(), array.max()
+            if max_val == min_val:
+                return [0.5] * len(array)
+            return ((array - min_val) / (max_val - min_val)).tolist()
+        
+        std_dev = array.std()
+        if std_dev == 0:
+            return [0.0] * len(array)
+        return ((array - array.mean()) / std_dev).tolist()
+    
     @staticmethod
     def handle_outliers(values: List[float], method: str = 'iqr', factor: float = 1.5) -> List[float]:
         """Manejar valores atípicos"""
-        if not values or len(values) < 4:
+        if values is None or len(values) < 4:
             return values
         
+        if method in ('iqr', 'z_score') and use_numpy(values):
+            return DataPreprocessor._handle_outliers_numpy(values, method, factor)
+        
         sorted_values = sorted(values)
         n = len(sorted_values)
         
@@ -75,6 +112,24 @@ class DataPreprocessor:
         
         return values
     
+    @staticmethod
+    def _handle_outliers_numpy(values, method: str, factor: float) -> List[float]:
+        array = np.asarray(values, dtype=float)
+        n = len(array)
+        
+        if method == 'iqr':
+            # Mismos índices que la versión ordenada, sin ordenar todo el array
+            q1_idx, q3_idx = n // 4, 3 * n // 4
+            partitioned = np.partition(array, (q1_idx, q3_idx))
+            q1, q3 = partitioned[q1_idx], partitioned[q3_idx]
+            iqr = q3 - q1
+            return np.clip(array, q1 - factor * iqr, q3 + factor * iqr).tolist()
+        
+        std_dev = array.std()
+        if std_dev == 0:
+            return values
+        return array[np.abs(array - array.mean()) <= factor * std_dev].tolist()
+    
     @staticmethod
     def create_time_features(dates: List[datetime]) -> Dict[str, List[int]]:
         """Crear características temporales a partir de fechas"""
@@ -105,6 +160,7 @@ class DataPreprocessor:
     def create_lag_features(values: List[float], lags: List[int]) -> Dict[str, List[Optional[float]]]:
         """Crear características con rezago temporal"""
         lag_features = {}
+        values = values.tolist() if NUMPY_AVAILABLE and isinstance(values, np.ndarray) else values
         
         for lag in lags:
             lag_name = f'lag_{lag}'
@@ -237,12 +293,17 @@ class FeatureEngineer:
             return 0.0
         
         n = len(values)
-        x = list(range(n))
+        if use_numpy(values):
+            # Forma centrada: equivalente y sin cancelación con series largas
+            y = np.asarray(values, dtype=float)
+            x = np.arange(n, dtype=float) - (n - 1) / 2
+            return float(np.dot(x, y - y.mean()) / np.dot(x, x))
         
-        sum_x = sum(x)
+        # x = 0..n-1: sus sumas tienen forma cerrada
+        sum_x = n * (n - 1) // 2
         sum_y = sum(values)
-        sum_xy = sum(xi * yi for xi, yi in zip(x, values))
-        sum_x2 = sum(xi * xi for xi in x)
+        sum_xy = sum(xi * yi for xi, yi in enumerate(values))
+        sum_x2 = (n - 1) * n * (2 * n - 1) // 6
         
         denominator = n * sum_x2 - sum_x * sum_x
         if denominator == 0:
@@ -346,59 +407,17 @@ class SimpleMLModels:
             return historical_clv or 1000
     
     @staticmethod
-    def k_means_segmentation(customers_features: List[Dict[str, float]], k: int = 5) -> List[int]:
-        """Segmentación K-means simplificada"""
+    def k_means_segmentation(customers_features: List[Dict[str, float]], k: int = 5,
+                             seed: int = 42) -> List[int]:
+        """Segmentación K-means sobre recency, frequency y monetary (ver ``KMeans``)"""
         try:
             if len(customers_features) < k:
                 return list(range(len(customers_features)))
             
             # Características principales para clustering
             main_features = ['recency', 'frequency', 'monetary']
-            
-            # Extraer vectores de características
-            vectors = []
-            for customer in customers_features:
-                vector = [customer.get(feat, 0) for feat in main_features]
-                vectors.append(vector)
-            
-            # Inicializar centroides aleatoriamente
-            import random
-            centroids = []
-            for _ in range(k):
-                centroid = [random.uniform(0, 1) for _ in main_features]
-                centroids.append(centroid)
-            
-            # Algoritmo K-means (versión simplificada)
-            assignments = [0] * len(vectors)
-            
-            for iteration in range(10):  # Máximo 10 iteraciones
-                # Asignar puntos a centroides más cercanos
-                new_assignments = []
-                for vector in vectors:
-                    distances = [SimpleMLModels._euclidean_distance(vector, centroid) 
-                               for centroid in centroids]
-                    closest = distances.index(min(distances))
-                    new_assignments.append(closest)
-                
-                # Verificar convergencia
-                if new_assignments == assignments:
-                    break
-                
-                assignments = new_assignments
-                
-                # Actualizar centroides
-                for cluster_id in range(k):
-                    cluster_points = [vectors[i] for i, assignment in enumerate(assignments) 
-                                    if assignment == cluster_id]
-                    
-                    if cluster_points:
-                        new_centroid = []
-                        for feat_idx in range(len(main_features)):
-                            avg_value = sum(point[feat_idx] for point in cluster_points) / len(cluster_points)
-                            new_centroid.append(avg_value)
-                        centroids[cluster_id] = new_centroid
-            
-            return assignments
+            vectors = [[customer.get(feat, 0) for feat in main_features] for customer in customers_features]
+            return KMeans(k=k, seed=seed).fit_predict(vectors)
             
         except Exception as e:
             logger.error(f"Error en K-means: {e}")
@@ -410,6 +429,380 @@ class SimpleMLModels:
         """Calcular distancia euclidiana entre dos puntos"""
         return sum((a - b) ** 2 for a, b in zip(point1, point2)) ** 0.5
 
+class KMeans:
+    """Segmentación K-means con inicialización k-means++
+    
+    Las características se estandarizan (media 0, desvío 1) antes de agrupar,
+    así ninguna domina por su escala. Itera hasta que los centroides se mueven
+    menos que ``tol`` (relativo a la varianza de los datos) o hasta ``max_iter``.
+    Con muchos puntos usa mini-lotes (Sculley, 2010) y asigna todos al final.
+    La misma semilla da el mismo resultado; la versión en NumPy y la de Python
+    puro usan generadores distintos y pueden diferir entre sí.
+    
+    Uso:
+        model = KMeans(k=4).fit(vectores)
+        model.labels, model.inertia, model.silhouette(vectores)
+    """
+    
+    # Desde esta cantidad de puntos se usan mini-lotes si no se indica
+    MINI_BATCH_THRESHOLD = 100000
+    # Lotes seguidos con movimiento bajo la tolerancia para dar por convergido un mini-lote
+    MINI_BATCH_PATIENCE = 10
+    
+    def __init__(self, k: int = 5, max_iter: int = 100, tol: float = 1e-4, seed: int = 42,
+                 n_init: int = 1, mini_batch: Optional[bool] = None, batch_size: int = 1024,
+                 standardize: bool = True):
+        if k < 1:
+            raise ValueError("k debe ser al menos 1")
+        self.k = k
+        self.max_iter = max_iter
+        self.tol = tol
+        self.seed = seed
+        self.n_init = max(1, n_init)
+        self.mini_batch = mini_batch
+        self.batch_size = batch_size
+        self.standardize = standardize
+        
+        self.mean: List[float] = []
+        self.scale: List[float] = []
+        self.centroids: List[List[float]] = []
+        self.labels: List[int] = []
+        self.inertia = 0.0
+        self.iterations = 0
+        self.converged = False
+    
+    # Estandarización
+    def _fit_scaler(self, data):
+        if NUMPY_AVAILABLE:
+            array = np.asarray(data, dtype=float)
+            mean, scale = array.mean(axis=0), array.std(axis=0)
+            self.mean, self.scale = mean.tolist(), np.where(scale > 0, scale, 1.0).tolist()
+            if not self.standardize:
+                self.mean, self.scale = [0.0] * array.shape[1], [1.0] * array.shape[1]
+            return
+        
+        columns = list(zip(*data))
+        self.mean, self.scale = [], []
+        for column in columns:
+            mean = sum(column) / len(column)
+            std = (sum((value - mean) ** 2 for value in column) / len(column)) ** 0.5
+            self.mean.append(mean if self.standardize else 0.0)
+            self.scale.append(std if self.standardize and std > 0 else 1.0)
+    
+    def _transform(self, data):
+        if NUMPY_AVAILABLE:
+            return (np.asarray(data, dtype=float) - np.asarray(self.mean)) / np.asarray(self.scale)
+        return [[(value - mean) / scale for value, mean, scale in zip(row, self.mean, self.scale)]
+                for row in data]
+    
+    # Ajuste
+    def fit(self, data) -> 'KMeans':
+        """Agrupar los vectores (lista de listas o array de n x d)"""
+        if len(data) < self.k:
+            raise ValueError(f"Se necesitan al menos {self.k} puntos para {self.k} grupos")
+        
+        self._fit_scaler(data)
+        points = self._transform(data)
+        mini_batch = self.mini_batch if self.mini_batch is not None else len(points) >= self.MINI_BATCH_THRESHOLD
+        fit_once = self._fit_numpy if NUMPY_AVAILABLE else self._fit_python
+        
+        best = None
+        for attempt in range(self.n_init):
+            result = fit_once(points, self.seed + attempt, mini_batch)
+            if best is None or result[2] < best[2]:
+                best = result
+        
+        centroids, labels, self.inertia, self.iterations, self.converged = best
+        self.centroids = centroids.tolist() if NUMPY_AVAILABLE else centroids
+        self.labels = labels.tolist() if NUMPY_AVAILABLE else labels
+        return self
+    
+    def fit_predict(self, data) -> List[int]:
+        return self.fit(data).labels
+    
+    def predict(self, data) -> List[int]:
+        """Grupo más cercano de cada vector nuevo"""
+        points = self._transform(data)
+        if NUMPY_AVAILABLE:
+            return self._assign_numpy(points, np.asarray(self.centroids))[0].tolist()
+        return self._assign_python(points, self.centroids)[0]
+    
+    def _tolerance(self, points) -> float:
+        """Tolerancia absoluta: ``tol`` por la varianza media de las columnas"""
+        if NUMPY_AVAILABLE:
+            return self.tol * float(np.mean(np.var(points, axis=0)))
+        columns = list(zip(*points))
+        variances = []
+        for column in columns:
+            mean = sum(column) / len(column)
+            variances.append(sum((value - mean) ** 2 for value in column) / len(column))
+        return self.tol * sum(variances) / len(variances)
+    
+    # Versión NumPy
+    @staticmethod
+    def _assign_numpy(points, centroids, chunk: int = 65536):
+        """Etiqueta y distancia al cuadrado al centroide más cercano"""
+        labels = np.empty(len(points), dtype=np.intp)
+        distances = np.empty(len(points))
+        centroid_norms = np.einsum('ij,ij->i', centroids, centroids)
+        for start in range(0, len(points), chunk):
+            block = points[start:start + chunk]
+            # |x - c|² = |x|² - 2 x·c + |c|², por bloques para acotar la memoria
+            squared = (np.einsum('ij,ij->i', block, block)[:, None]
+                       - 2 * block @ centroids.T + centroid_norms[None, :])
+            nearest = squared.argmin(axis=1)
+            labels[start:start + chunk] = nearest
+            distances[start:start + chunk] = np.maximum(squared[np.arange(len(block)), nearest], 0)
+        return labels, distances
+    
+    def _init_numpy(self, points, rng):
+        """Semillas k-means++: cada centro nuevo con probabilidad proporcional a D²"""
+        n = len(points)
+        centroids = np.empty((self.k, points.shape[1]))
+        centroids[0] = points[rng.integers(n)]
+        closest = ((points - centroids[0]) ** 2).sum(axis=1)
+        for index in range(1, self.k):
+            total = closest.sum()
+            chosen = rng.choice(n, p=closest / total) if total > 0 else rng.integers(n)
+            centroids[index] = points[chosen]
+            closest = np.minimum(closest, ((points - centroids[index]) ** 2).sum(axis=1))
+        return centroids
+    
+    def _fit_numpy(self, points, seed: int, mini_batch: bool):
+        rng = np.random.default_rng(seed)
+        tolerance = self._tolerance(points)
+        n = len(points)
+        
+        if mini_batch:
+            sample = points[rng.choice(n, size=min(n, max(10 * self.k, 3 * self.batch_size)), replace=False)]
+            centroids = self._init_numpy(sample, rng)
+        else:
+            centroids = self._init_numpy(points, rng)
+        counts = np.zeros(self.k)
+        converged, calm = False, 0
+        
+        for iteration in range(1, self.max_iter + 1):
+            if mini_batch:
+                batch = points[rng.integers(n, size=min(self.batch_size, n))]
+                labels, _ = self._assign_numpy(batch, centroids)
+                batch_counts = np.bincount(labels, minlength=self.k)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, labels, batch)
+                counts += batch_counts
+                updated = batch_counts > 0
+                # Paso 1/n por centro: promedio móvil de todos los puntos que recibió
+                new_centroids = centroids.copy()
+                new_centroids[updated] += (sums[updated] - batch_counts[updated, None] * centroids[updated]) \
+                    / counts[updated, None]
+            else:
+                labels, distances = self._assign_numpy(points, centroids)
+                batch_counts = np.bincount(labels, minlength=self.k)
+                new_centroids = np.zeros_like(centroids)
+                np.add.at(new_centroids, labels, points)
+                filled = batch_counts > 0
+                new_centroids[filled] /= batch_counts[filled, None]
+                # Grupos vacíos: moverlos a los puntos más lejanos de su centro
+                empty = np.flatnonzero(~filled)
+                if len(empty):
+                    farthest = np.argsort(distances)[::-1][:len(empty)]
+                    new_centroids[empty] = points[farthest]
+            
+            shift = float(((new_centroids - centroids) ** 2).sum())
+            centroids = new_centroids
+            calm = calm + 1 if shift <= tolerance else 0
+            if calm >= (self.MINI_BATCH_PATIENCE if mini_batch else 1):
+                converged = True
+                break
+        
+        labels, distances = self._assign_numpy(points, centroids)
+        return centroids, labels, float(distances.sum()), iteration, converged
+    
+    # Versión Python puro
+    @staticmethod
+    def _assign_python(points, centroids):
+        labels, distances = [], []
+        for point in points:
+            best_index, best_distance = 0, float('inf')
+            for index, centroid in enumerate(centroids):
+                distance = sum((a - b) ** 2 for a, b in zip(point, centroid))
+                if distance < best_distance:
+                    best_index, best_distance = index, distance
+            labels.append(best_index)
+            distances.append(best_distance)
+        return labels, distances
+    
+    def _init_python(self, points, rng):
+        centroids = [list(points[rng.randrange(len(points))])]
+        closest = [sum((a - b) ** 2 for a, b in zip(point, centroids[0])) for point in points]
+        for _ in range(1, self.k):
+            total = sum(closest)
+            if total > 0:
+                chosen = rng.choices(range(len(points)), weights=closest)[0]
+            else:
+                chosen = rng.randrange(len(points))
+            centroids.append(list(points[chosen]))
+            closest = [min(current, sum((a - b) ** 2 for a, b in zip(point, centroids[-1])))
+                       for current, point in zip(closest, points)]
+        return centroids
+    
+    def _fit_python(self, points, seed: int, mini_batch: bool):
+        rng = random.Random(seed)
+        tolerance = self._tolerance(points)
+        dimensions = len(points[0])
+        
+        if mini_batch:
+            sample = rng.sample(points, min(len(points), max(10 * self.k, 3 * self.batch_size)))
+            centroids = self._init_python(sample, rng)
+        else:
+            centroids = self._init_python(points, rng)
+        counts = [0] * self.k
+        converged, calm = False, 0
+        
+        for iteration in range(1, self.max_iter + 1):
+            previous = [list(centroid) for centroid in centroids]
+            if mini_batch:
+                batch = [points[rng.randrange(len(points))] for _ in range(min(self.batch_size, len(points)))]
+                labels, _ = self._assign_python(batch, centroids)
+                for point, label in zip(batch, labels):
+                    counts[label] += 1
+                    rate = 1.0 / counts[label]
+                    centroid = centroids[label]
+                    for dim in range(dimensions):
+                        centroid[dim] += rate * (point[dim] - centroid[dim])
+            else:
+                labels, distances = self._assign_python(points, centroids)
+                sums = [[0.0] * dimensions for _ in range(self.k)]
+                sizes = [0] * self.k
+                for point, label in zip(points, labels):
+                    sizes[label] += 1
+                    total = sums[label]
+                    for dim in range(dimensions):
+                        total[dim] += point[dim]
+                farthest = None
+                for index in range(self.k):
+                    if sizes[index]:
+                        centroids[index] = [value / sizes[index] for value in sums[index]]
+                        continue
+                    # Grupos vacíos: moverlos a los puntos más lejanos de su centro
+                    if farthest is None:
+                        farthest = sorted(range(len(points)), key=distances.__getitem__, reverse=True)
+                    centroids[index] = list(points[farthest.pop(0)])
+            
+            shift = sum((a - b) ** 2 for old, new in zip(previous, centroids) for a, b in zip(old, new))
+            calm = calm + 1 if shift <= tolerance else 0
+            if calm >= (self.MINI_BATCH_PATIENCE if mini_batch else 1):
+                converged = True
+                break
+        
+        labels, distances = self._assign_python(points, centroids)
+        return centroids, labels, sum(distances), iteration, converged
+    
+    # Evaluación
+    def silhouette(self, data, labels: List[int] = None, sample_size: int = 1000) -> float:
+        """Coeficiente de silueta medio (-1 a 1) sobre una muestra de hasta ``sample_size`` puntos"""
+        return silhouette_score(self._transform(data), self.labels if labels is None else labels,
+                                sample_size, self.seed)
+    
+    def cluster_centers(self) -> List[List[float]]:
+        """Centroides en la escala original de las características"""
+        return [[value * scale + mean for value, mean, scale in zip(centroid, self.mean, self.scale)]
+                for centroid in self.centroids]
+    
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'k': self.k,
+            'inertia': self.inertia,
+            'iterations': self.iterations,
+            'converged': self.converged,
+            'sizes': [self.labels.count(index) for index in range(self.k)],
+            'centers': self.cluster_centers()
+        }
+    
+    @classmethod
+    def elbow(cls, data, k_values: Iterable[int] = range(2, 9), sample_size: int = 1000,
+              **options) -> List[Dict[str, float]]:
+        """Inercia y silueta para cada k (para elegir la cantidad de grupos)"""
+        rows = []
+        for k in k_values:
+            if k > len(data):
+                break
+            model = cls(k=k, **options).fit(data)
+            rows.append({
+                'k': k,
+                'inertia': model.inertia,
+                'silhouette': model.silhouette(data, sample_size=sample_size) if k > 1 else 0.0
+            })
+        return rows
+    
+    @staticmethod
+    def suggest_k(elbow_rows: List[Dict[str, float]]) -> Optional[int]:
+        """k del codo: el punto más alejado de la recta entre la primera y la última inercia"""
+        if not elbow_rows:
+            return None
+        if len(elbow_rows) < 3:
+            return elbow_rows[0]['k']
+        
+        first, last = elbow_rows[0], elbow_rows[-1]
+        span_k = last['k'] - first['k']
+        span_inertia = (first['inertia'] - last['inertia']) or 1.0
+        
+        def gap(row):
+            # Ambos ejes normalizados a 0..1; la recta va de (0, 1) a (1, 0)
+            x = (row['k'] - first['k']) / span_k
+            y = (row['inertia'] - last['inertia']) / span_inertia
+            return 1 - x - y
+        
+        return max(elbow_rows, key=gap)['k']
+
+def silhouette_score(points, labels: List[int], sample_size: int = 1000, seed: int = 42) -> float:
+    """Coeficiente de silueta medio sobre una muestra de puntos
+    
+    Para cada punto: (b - a) / max(a, b), con ``a`` la distancia media a su
+    grupo y ``b`` la menor distancia media a otro grupo. Puntos solos en su
+    grupo valen 0.
+    """
+    n = len(points)
+    if n < 2 or len(set(labels)) < 2:
+        return 0.0
+    
+    indexes = list(range(n))
+    if n > sample_size:
+        indexes = sorted(random.Random(seed).sample(indexes, sample_size))
+    
+    if NUMPY_AVAILABLE:
+        sample = np.asarray(points, dtype=float)[indexes]
+        groups = np.asarray(labels)[indexes]
+        squared = (sample ** 2).sum(axis=1)
+        distances = np.sqrt(np.maximum(squared[:, None] - 2 * sample @ sample.T + squared[None, :], 0))
+        unique = np.unique(groups)
+        members = groups[None, :] == unique[:, None]
+        sizes = members.sum(axis=1)
+        means = distances @ members.T.astype(float)
+        own = np.searchsorted(unique, groups)
+        own_size = sizes[own]
+        a = np.where(own_size > 1, means[np.arange(len(groups)), own] / np.maximum(own_size - 1, 1), 0.0)
+        others = np.where(members.T, np.inf, means / sizes[None, :])
+        b = others.min(axis=1)
+        scores = np.where((own_size > 1) & (np.maximum(a, b) > 0), (b - a) / np.maximum(np.maximum(a, b), 1e-12), 0.0)
+        return float(scores.mean())
+    
+    sample = [points[index] for index in indexes]
+    groups = [labels[index] for index in indexes]
+    sizes = Counter(groups)
+    total = 0.0
+    for i, point in enumerate(sample):
+        if sizes[groups[i]] < 2:
+            continue
+        sums = defaultdict(float)
+        for j, other in enumerate(sample):
+            if i != j:
+                sums[groups[j]] += sum((a - b) ** 2 for a, b in zip(point, other)) ** 0.5
+        a = sums[groups[i]] / (sizes[groups[i]] - 1)
+        b = min(sums[group] / size for group, size in sizes.items() if group != groups[i])
+        if max(a, b) > 0:
+            total += (b - a) / max(a, b)
+    return total / len(sample)
+
 class PredictionValidator:
     """Validador de predicciones y modelos"""
     
@@ -539,6 +932,9 @@ class ModelEvaluator:
                 return {'error': 'Datos de predicción y reales no coinciden'}
             
             metrics = {}
+            if use_numpy(predictions, actuals):
+                predictions = np.asarray(predictions, dtype=float)
+                actuals = np.asarray(actuals, dtype=float)
             
             if model_type == 'regression':
                 # Métricas para regresión (CLV)
@@ -550,8 +946,12 @@ class ModelEvaluator:
             elif model_type == 'classification':
                 # Métricas para clasificación (Churn)
                 # Convertir probabilidades a predicciones binarias
-                binary_predictions = [1 if p >= 0.5 else 0 for p in predictions]
-                binary_actuals = [1 if a >= 0.5 else 0 for a in actuals]
+                if isinstance(predictions, list):
+                    binary_predictions = [1 if p >= 0.5 else 0 for p in predictions]
+                    binary_actuals = [1 if a >= 0.5 else 0 for a in actuals]
+                else:
+                    binary_predictions = (predictions >= 0.5).astype(int)
+                    binary_actuals = (actuals >= 0.5).astype(int)
                 
                 metrics['accuracy'] = ModelEvaluator._accuracy(binary_predictions, binary_actuals)
                 metrics['precision'] = ModelEvaluator._precision(binary_predictions, binary_actuals)
@@ -567,20 +967,30 @@ class ModelEvaluator:
     @staticmethod
     def _mean_absolute_error(predictions: List[float], actuals: List[float]) -> float:
         """Mean Absolute Error"""
+        if use_numpy(predictions, actuals):
+            return float(np.mean(np.abs(np.asarray(predictions, dtype=float) - np.asarray(actuals, dtype=float))))
         return sum(abs(p - a) for p, a in zip(predictions, actuals)) / len(predictions)
     
     @staticmethod
     def _mean_squared_error(predictions: List[float], actuals: List[float]) -> float:
         """Mean Squared Error"""
+        if use_numpy(predictions, actuals):
+            errors = np.asarray(predictions, dtype=float) - np.asarray(actuals, dtype=float)
+            return float(np.dot(errors, errors) / len(errors))
         return sum((p - a) ** 2 for p, a in zip(predictions, actuals)) / len(predictions)
     
     @staticmethod
     def _r_squared(predictions: List[float], actuals: List[float]) -> float:
         """R-squared (coeficiente de determinación)"""
-        mean_actual = sum(actuals) / len(actuals)
-        
-        ss_res = sum((a - p) ** 2 for a, p in zip(actuals, predictions))
-        ss_tot = sum((a - mean_actual) ** 2 for a in actuals)
+        if use_numpy(predictions, actuals):
+            actual = np.asarray(actuals, dtype=float)
+            residuals = actual - np.asarray(predictions, dtype=float)
+            deviations = actual - actual.mean()
+            ss_res, ss_tot = float(np.dot(residuals, residuals)), float(np.dot(deviations, deviations))
+        else:
+            mean_actual = sum(actuals) / len(actuals)
+            ss_res = sum((a - p) ** 2 for a, p in zip(actuals, predictions))
+            ss_tot = sum((a - mean_actual) ** 2 for a in actuals)
         
         if ss_tot == 0:
             return 1.0 if ss_res == 0 else 0.0
@@ -592,13 +1002,14 @@ class ModelEvaluator:
         """Accuracy para clasificación"""
         if len(predictions) == 0:
             return 0.0
+        if use_numpy(predictions, actuals):
+            return float(np.mean(np.asarray(predictions) == np.asarray(actuals)))
         return sum(p == a for p, a in zip(predictions, actuals)) / len(predictions)
     
     @staticmethod
     def _precision(predictions: List[int], actuals: List[int]) -> float:
         """Precision para clasificación"""
-        tp = sum(p == 1 and a == 1 for p, a in zip(predictions, actuals))
-        fp = sum(p == 1 and a == 0 for p, a in zip(predictions, actuals))
+        tp, fp, _ = ModelEvaluator._confusion_counts(predictions, actuals)
         
         if tp + fp == 0:
             return 0.0
@@ -607,13 +1018,26 @@ class ModelEvaluator:
     @staticmethod
     def _recall(predictions: List[int], actuals: List[int]) -> float:
         """Recall para clasificación"""
-        tp = sum(p == 1 and a == 1 for p, a in zip(predictions, actuals))
-        fn = sum(p == 0 and a == 1 for p, a in zip(predictions, actuals))
+        tp, _, fn = ModelEvaluator._confusion_counts(predictions, actuals)
         
         if tp + fn == 0:
             return 0.0
         return tp / (tp + fn)
     
+    @staticmethod
+    def _confusion_counts(predictions: List[int], actuals: List[int]) -> Tuple[int, int, int]:
+        """Verdaderos positivos, falsos positivos y falsos negativos"""
+        if use_numpy(predictions, actuals):
+            predicted, actual = np.asarray(predictions), np.asarray(actuals)
+            return (int(np.count_nonzero((predicted == 1) & (actual == 1))),
+                    int(np.count_nonzero((predicted == 1) & (actual == 0))),
+                    int(np.count_nonzero((predicted == 0) & (actual == 1))))
+        
+        tp = sum(p == 1 and a == 1 for p, a in zip(predictions, actuals))
+        fp = sum(p == 1 and a == 0 for p, a in zip(predictions, actuals))
+        fn = sum(p == 0 and a == 1 for p, a in zip(predictions, actuals))
+        return tp, fp, fn
+    
     @staticmethod
     def _f1_score(precision: float, recall: float) -> float:
         """F1-score"""
@@ -625,11 +1049,15 @@ class ModelEvaluator:
 def calculate_confidence_interval(values: List[float], confidence_level: float = 0.95) -> Tuple[float, float]:
     """Calcular intervalo de confianza"""
     try:
-        if not values or len(values) < 2:
+        if values is None or len(values) < 2:
             return 0.0, 0.0
         
-        mean_val = sum(values) / len(values)
-        std_err = (sum((x - mean_val) ** 2 for x in values) / (len(values) - 1)) ** 0.5
+        if use_numpy(values):
+            array = np.asarray(values, dtype=float)
+            mean_val, std_err = float(array.mean()), float(array.std(ddof=1))
+        else:
+            mean_val = sum(values) / len(values)
+            std_err = (sum((x - mean_val) ** 2 for x in values) / (len(values) - 1)) ** 0.5
         
         # Usar distribución t simplificada (aproximación)
         t_value = 2.0 if confidence_level >= 0.95 else 1.65
@@ -647,6 +1075,13 @@ def detect_anomalies(values: List[float], threshold: float = 2.0) -> List[bool]:
         if len(values) < 3:
             return [False] * len(values)
         
+        if use_numpy(values):
+            array = np.asarray(values, dtype=float)
+            std_dev = array.std()
+            if std_dev == 0:
+                return [False] * len(array)
+            return (np.abs(array - array.mean()) / std_dev > threshold).tolist()
+        
         mean_val = sum(values) / len(values)
         std_dev = (sum((x - mean_val) ** 2 for x in values) / len(values)) ** 0.5
         
@@ -665,6 +1100,16 @@ def smooth_time_series(values: List[float], window_size: int = 3) -> List[float]
         if len(values) < window_size:
             return values
         
+        if use_numpy(values):
+            # Media de la ventana centrada (recortada en los bordes) con sumas acumuladas
+            array = np.asarray(values, dtype=float)
+            n, half_window = len(array), window_size // 2
+            cumulative = np.concatenate(([0.0], np.cumsum(array)))
+            index = np.arange(n)
+            start_idx = np.maximum(index - half_window, 0)
+            end_idx = np.minimum(index + half_window + 1, n)
+            return ((cumulative[end_idx] - cumulative[start_idx]) / (end_idx - start_idx)).tolist()
+        
         smoothed = []
         half_window = window_size // 2
         
@@ -0,0 +1,78 @@
+"""
+Perfilador de Inicio para AlmacénPro
+Registra cuánto tarda cada fase del arranque (imports, base de datos,
+managers y widgets) para el reporte de ``--profile-startup``
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class StartupProfiler:
+    """Acumulador de tiempos de arranque agrupados por categoría"""
+
+    def __init__(self):
+        self.enabled = False
+        self.origin = time.perf_counter()
+        self._records: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def enable(self, origin: Optional[float] = None):
+        """Activar el reporte detallado (``origin`` = instante de inicio del proceso)"""
+        self.enabled = True
+        if origin is not None:
+            self.origin = origin
+
+    def record(self, name: str, seconds: float, category: str = 'general'):
+        """Registrar la duración de una fase"""
+        with self._lock:
+            self._records.append({
+                'name': name,
+                'category': category,
+                'ms': round(seconds * 1000, 1),
+                'end': time.perf_counter(),
+                'thread': threading.current_thread().name
+            })
+
+    @contextmanager
+    def measure(self, name: str, category: str = 'general'):
+        """Context manager para medir un bloque"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start, category)
+
+    def get_records(self) -> List[Dict]:
+        with self._lock:
+            return list(self._records)
+
+    def get_totals(self) -> Dict[str, float]:
+        """Total de milisegundos por categoría"""
+        totals: Dict[str, float] = {}
+        for record in self.get_records():
+            totals[record['category']] = round(totals.get(record['category'], 0.0) + record['ms'], 1)
+        return totals
+
+    def report(self) -> str:
+        """Reporte de texto con totales por categoría y detalle por fase"""
+        records = self.get_records()
+        elapsed = (time.perf_counter() - self.origin) * 1000
+
+        lines = [f"=== Perfil de inicio ({elapsed:.0f} ms desde el arranque) ==="]
+        for category, total in self.get_totals().items():
+            lines.append(f"{category:<24}{total:>10.1f} ms")
+
+        lines.append("")
+        lines.append(f"{'fase':<40}{'categoría':<24}{'ms':>10}{'en ms':>10}  hilo")
+        for record in records:
+            at_ms = (record['end'] - self.origin) * 1000
+            lines.append(f"{record['name']:<40}{record['category']:<24}{record['ms']:>10.1f}"
+                         f"{at_ms:>10.1f}  {record['thread']}")
+        return "\n".join(lines)
+
+startup_profiler = StartupProfiler()